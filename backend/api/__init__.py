@@ -2,7 +2,19 @@
 Camada de API - Contém as rotas da API e a configuração do servidor FastAPI.
 """
 
-from api.server import app, create_app, run
-from api.dependencies import Dependencies
+import importlib
 
-__all__ = ['app', 'create_app', 'run', 'Dependencies'] 
\ No newline at end of file
+# O servidor é importado sob demanda: importar api.launcher não deve criar a aplicação
+_LAZY_IMPORTS = {
+    'app': 'api.server',
+    'create_app': 'api.server',
+    'run': 'api.server',
+    'Dependencies': 'api.dependencies'
+}
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        return getattr(importlib.import_module(_LAZY_IMPORTS[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+__all__ = list(_LAZY_IMPORTS)
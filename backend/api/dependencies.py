@@ -3,21 +3,26 @@ Gerenciamento de dependências para injeção na API FastAPI.
 """
 
 import logging
+import secrets
+from functools import cached_property
 from typing import Optional
 
+from fastapi import Header, HTTPException, status
+
 # Importações absolutas em vez de relativas
 from domain.services import ProductService, TerritoryService, PriceService
 from application.controllers import ProductController, TerritoryController, PriceController, ExportController
 from infrastructure.config import Config
-from infrastructure.external import TCEMGApiClient
-from infrastructure.cache import CacheService
-from infrastructure.export import ExcelExportService
-from infrastructure.repositories import TCEMGProductRepository, TCEMGTerritoryRepository, TCEMGPriceRepository
 
 class Dependencies:
     """
     Gerencia as dependências da aplicação usando o padrão Singleton.
     Facilita o uso com o sistema de injeção de dependências do FastAPI.
+    
+    Cada dependência é construída no primeiro acesso, e os módulos de
+    infraestrutura (aiohttp, SQLite, pandas) só são importados nesse momento.
+    Assim, criar a aplicação é barato; o custo fica com o pré-carregamento
+    (ver api.launcher) ou com a primeira requisição que usar a dependência.
     """
     
     _instance = None
@@ -30,38 +35,198 @@ class Dependencies:
     
     def __init__(self):
         if not hasattr(self, '_initialized') or not self._initialized:
-            # Inicializa os serviços e repositórios
+            # Inicializa a configuração; os serviços são criados sob demanda
             self.initialize()
             self._initialized = True
     
     def initialize(self):
-        """Inicializa todas as dependências da aplicação."""
-        # Configura a aplicação
+        """Inicializa a configuração da aplicação."""
         Config.setup()
         
-        # Cria os serviços de infraestrutura
-        self.cache_service = CacheService()
-        self.api_client = TCEMGApiClient()
-        self.export_service = ExcelExportService()
+        # Logger
+        self.logger = logging.getLogger(__name__)
+    
+    # Serviços de infraestrutura
+    
+    @cached_property
+    def cache_service(self):
+        from infrastructure.cache import CacheService
+        return CacheService()
+    
+    @cached_property
+    def api_client(self):
+        from infrastructure.external import TCEMGApiClient
+        return TCEMGApiClient()
+    
+    @cached_property
+    def export_service(self):
+        from infrastructure.export import ExcelExportService
+        return ExcelExportService()
+    
+    @cached_property
+    def popularity_log(self):
+        from infrastructure.cache import PopularityLog
+        return PopularityLog(Config.POPULARITY_LOG_CAPACITY, Config.POPULARITY_HALF_LIFE)
+    
+    @cached_property
+    def cache_warmer(self):
+        if Config.CACHE_WARM_TOP_K <= 0:
+            return None
         
-        # Cria os repositórios
-        self.product_repository = TCEMGProductRepository(self.api_client, self.cache_service)
-        self.territory_repository = TCEMGTerritoryRepository(self.api_client, self.cache_service)
-        self.price_repository = TCEMGPriceRepository(self.api_client, self.cache_service)
+        from infrastructure.cache import CacheWarmer
+        return CacheWarmer(
+            self.cache_service,
+            self.popularity_log,
+            self.api_client.rate_limiter,
+            {
+                "prices:history": self.upstream_price_repository.refresh_history,
+                "products:search": self.product_repository.refresh_search
+            },
+            top_k=Config.CACHE_WARM_TOP_K,
+            budget=Config.CACHE_WARM_BUDGET,
+            interval=Config.CACHE_WARM_INTERVAL,
+            refresh_ahead=Config.CACHE_WARM_REFRESH_AHEAD,
+            log_path=Config.POPULARITY_LOG_PATH or None
+        )
+    
+    @cached_property
+    def cache_reaper(self):
+        from infrastructure.cache import CacheReaper
+        return CacheReaper(self.cache_service, Config.CACHE_REAP_INTERVAL, Config.CACHE_REAP_BATCH_SIZE)
+    
+    @cached_property
+    def cache_admin(self):
+        from infrastructure.cache import CacheAdmin
+        return CacheAdmin(
+            self.cache_service,
+            self.cache_warmer,
+            self.price_store,
+            Config.METRICS_DIR or None,
+            Config.CACHE_BROADCAST_INTERVAL
+        )
+    
+    @cached_property
+    def metrics_flusher(self):
+        if not Config.METRICS_DIR:
+            return None
         
-        # Cria os serviços de domínio
-        self.product_service = ProductService(self.product_repository)
-        self.territory_service = TerritoryService(self.territory_repository)
-        self.price_service = PriceService(self.price_repository)
+        from infrastructure.telemetry import MetricsFlusher
+        return MetricsFlusher(Config.METRICS_DIR, Config.METRICS_FLUSH_INTERVAL)
+    
+    @cached_property
+    def profile_store(self):
+        from infrastructure.telemetry import ProfileStore
+        return ProfileStore(Config.PROFILING_MAX_STORED, Config.PROFILING_DIR or None)
+    
+    # Repositórios
+    
+    @cached_property
+    def product_repository(self):
+        from infrastructure.repositories import TCEMGProductRepository
+        return TCEMGProductRepository(self.api_client, self.cache_service, self.popularity_log)
+    
+    @cached_property
+    def territory_repository(self):
+        from infrastructure.repositories import TCEMGTerritoryRepository
+        return TCEMGTerritoryRepository(
+            self.api_client,
+            self.cache_service,
+            Config.TERRITORY_SNAPSHOT_PATH or None,
+            Config.TERRITORY_REFRESH_INTERVAL
+        )
+    
+    @cached_property
+    def upstream_price_repository(self):
+        from infrastructure.repositories import TCEMGPriceRepository
+        return TCEMGPriceRepository(self.api_client, self.cache_service, self.popularity_log)
+    
+    @cached_property
+    def price_repository(self):
+        price_repository = self.upstream_price_repository
         
-        # Cria os controladores
-        self.product_controller = ProductController(self.product_service)
-        self.territory_controller = TerritoryController(self.territory_service)
-        self.price_controller = PriceController(self.price_service, self.product_service)
-        self.export_controller = ExportController(self.export_service)
+        # Armazém local de preços (opcional)
+        if self.price_store is not None:
+            from infrastructure.repositories import SQLitePriceRepository
+            price_repository = SQLitePriceRepository(
+                self.price_store,
+                price_repository,
+                self.territory_repository
+            )
         
-        # Logger
-        self.logger = logging.getLogger(__name__)
+        return price_repository
+    
+    @cached_property
+    def price_store(self):
+        if not Config.WAREHOUSE_ENABLED:
+            return None
+        
+        from infrastructure.warehouse import PriceStore
+        return PriceStore(Config.WAREHOUSE_PATH, sketch_k=Config.QUANTILE_SKETCH_K)
+    
+    @cached_property
+    def ingestion_service(self):
+        if self.price_store is None:
+            return None
+        
+        from infrastructure.warehouse import PriceIngestionService
+        return PriceIngestionService(
+            self.api_client,
+            self.price_store,
+            Config.INGESTION_WATCHLIST,
+            Config.INGESTION_INTERVAL
+        )
+    
+    # Serviços de domínio
+    
+    @cached_property
+    def product_service(self) -> ProductService:
+        return ProductService(self.product_repository)
+    
+    @cached_property
+    def territory_service(self) -> TerritoryService:
+        return TerritoryService(self.territory_repository)
+    
+    @cached_property
+    def price_service(self) -> PriceService:
+        return PriceService(self.price_repository, self.territory_repository)
+    
+    # Controladores
+    
+    @cached_property
+    def product_controller(self) -> ProductController:
+        return ProductController(self.product_service)
+    
+    @cached_property
+    def territory_controller(self) -> TerritoryController:
+        return TerritoryController(self.territory_service)
+    
+    @cached_property
+    def price_controller(self) -> PriceController:
+        return PriceController(self.price_service, self.product_service)
+    
+    @cached_property
+    def export_controller(self) -> ExportController:
+        return ExportController(self.export_service)
+    
+    async def preload(self):
+        """
+        Pré-carrega os índices compartilhados (territórios) antes do fork dos workers.
+        
+        Os objetos criados aqui ficam no cache em memória do processo principal
+        e são herdados pelos workers por cópia sob escrita. A sessão HTTP é
+        fechada ao final, pois está presa ao laço de eventos do pré-carregamento.
+        """
+        # Constrói os controladores (e importa a infraestrutura) antes do fork
+        self.product_controller
+        self.territory_controller
+        self.price_controller
+        self.ingestion_service
+        
+        try:
+            index = await self.territory_repository.get_index()
+            self.logger.info(f"Índice territorial pré-carregado com {len(index.municipalities)} municípios")
+        finally:
+            await self.api_client.close()
     
     async def get_api_client(self):
         """
@@ -107,4 +272,22 @@ class Dependencies:
         Returns:
             Controlador de exportação
         """
-        return self.export_controller 
\ No newline at end of file
+        return self.export_controller
+
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None)) -> None:
+    """
+    Protege as rotas administrativas com o token configurado em ADMIN_TOKEN.
+    
+    Args:
+        x_admin_token: Valor do cabeçalho X-Admin-Token
+        
+    Raises:
+        HTTPException: 404 se as rotas administrativas estiverem desativadas,
+            401 se o token estiver ausente ou incorreto
+    """
+    if not Config.ADMIN_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    
+    if not x_admin_token or not secrets.compare_digest(x_admin_token.encode(), Config.ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token administrativo inválido")
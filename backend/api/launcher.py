@@ -0,0 +1,396 @@
+"""
+Servidor de produção com múltiplos workers para a API do Banco de Preços do TCE-MG.
+
+O processo principal importa a aplicação e pré-carrega os índices compartilhados
+(territórios) antes de criar os workers por fork; assim os workers herdam esses
+objetos por cópia sob escrita em vez de reconstruí-los. O processo principal:
+
+- mantém o socket de escuta e recria workers que terminam;
+- recicla cada worker após N requisições (com variação aleatória, para que
+  os workers não reiniciem todos ao mesmo tempo);
+- ao receber SIGTERM/SIGINT, repassa o sinal aos workers, que param de aceitar
+  conexões e drenam as requisições em andamento, e encerra à força os que
+  excederem o tempo de drenagem;
+- mantém o diretório em que os workers gravam as métricas, consolidando as
+  dos workers encerrados, para que o /metrics some todos os workers.
+
+Uso:
+    python -m api.launcher --workers 4 --max-requests 10000
+
+Para testes, ``serve_in_thread`` executa a aplicação no próprio processo.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import gc
+import importlib
+import logging
+import os
+import random
+import shutil
+import signal
+import socket
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import uvicorn
+
+from infrastructure.config import Config
+from infrastructure.telemetry import archive_snapshot, clear_snapshots
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_APP = "api.server:app"
+
+
+def load_app(app_path: str) -> Tuple[Any, Optional[Any]]:
+    """
+    Importa a aplicação e o seu gancho de pré-carregamento.
+
+    Args:
+        app_path: Caminho no formato "modulo:atributo"
+
+    Returns:
+        Tupla com a aplicação e a função assíncrona ``preload`` do módulo (ou None)
+    """
+    module_name, _, attribute = app_path.partition(":")
+    module = importlib.import_module(module_name)
+    return getattr(module, attribute or "app"), getattr(module, "preload", None)
+
+
+def create_socket(host: str, port: int) -> socket.socket:
+    """
+    Cria o socket de escuta compartilhado pelos workers.
+
+    Args:
+        host: Endereço de escuta
+        port: Porta de escuta (0 escolhe uma porta livre)
+
+    Returns:
+        Socket já associado ao endereço
+    """
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.set_inheritable(True)
+    return sock
+
+
+def _server_config(app: Any, max_requests: int, **kwargs) -> uvicorn.Config:
+    """Cria a configuração do uvicorn de um worker."""
+    return uvicorn.Config(
+        app,
+        limit_max_requests=max_requests or None,
+        log_config=None,
+        **kwargs
+    )
+
+
+class Launcher:
+    """
+    Processo principal que cria, monitora e recicla os workers.
+    """
+
+    def __init__(
+        self,
+        app_path: str = DEFAULT_APP,
+        host: str = None,
+        port: int = None,
+        workers: int = None,
+        max_requests: int = None,
+        max_requests_jitter: int = None,
+        graceful_timeout: int = None,
+        preload: bool = None
+    ):
+        self.app_path = app_path
+        self.host = host if host is not None else Config.SERVER_HOST
+        self.port = port if port is not None else Config.SERVER_PORT
+        self.workers = max(1, workers if workers is not None else Config.SERVER_WORKERS)
+        self.max_requests = max_requests if max_requests is not None else Config.SERVER_MAX_REQUESTS
+        self.max_requests_jitter = (
+            max_requests_jitter if max_requests_jitter is not None else Config.SERVER_MAX_REQUESTS_JITTER
+        )
+        self.graceful_timeout = graceful_timeout if graceful_timeout is not None else Config.SERVER_GRACEFUL_TIMEOUT
+        self.preload = preload if preload is not None else Config.SERVER_PRELOAD
+        self.logger = logging.getLogger(__name__)
+
+        self._app = None
+        self._socket: Optional[socket.socket] = None
+        self._children: Dict[int, int] = {}  # pid -> slot do worker
+        self._stopping = False
+        self._metrics_tempdir: Optional[str] = None
+
+    def _preload(self) -> None:
+        """Importa a aplicação e pré-carrega os índices no processo principal."""
+        started = time.perf_counter()
+        self._app, preload_hook = load_app(self.app_path)
+
+        if preload_hook is not None:
+            try:
+                asyncio.run(preload_hook())
+            except Exception as e:
+                # Os workers constroem os índices sob demanda se o pré-carregamento falhar
+                self.logger.warning(f"Falha no pré-carregamento: {e}")
+
+        # Move os objetos já criados para a geração permanente, evitando que a
+        # coleta de lixo dos workers toque nas páginas compartilhadas
+        gc.collect()
+        gc.freeze()
+        self.logger.info(f"Aplicação pré-carregada em {time.perf_counter() - started:.2f}s")
+
+    def _worker_max_requests(self) -> int:
+        """Calcula o limite de requisições de um worker, com variação aleatória."""
+        if not self.max_requests:
+            return 0
+        return self.max_requests + random.randint(0, max(0, self.max_requests_jitter))
+
+    def _spawn(self, slot: int) -> None:
+        """
+        Cria um worker por fork.
+
+        Args:
+            slot: Posição do worker (o worker 0 executa as tarefas em segundo plano)
+        """
+        pid = os.fork()
+        if pid:
+            self._children[pid] = slot
+            return
+
+        # Processo filho
+        exit_code = 0
+        try:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            random.seed()
+            Config.BACKGROUND_TASKS_ENABLED = slot == 0
+
+            app = self._app
+            if app is None:
+                app, _ = load_app(self.app_path)
+
+            server = uvicorn.Server(_server_config(app, self._worker_max_requests(), lifespan="on"))
+            server.run(sockets=[self._socket])
+        except BaseException as e:
+            self.logger.error(f"Worker {os.getpid()} encerrado com erro: {e}")
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def _handle_stop(self, signum, frame) -> None:
+        """Inicia o encerramento gracioso ao receber SIGTERM ou SIGINT."""
+        if self._stopping:
+            return
+        self._stopping = True
+        self.logger.info(f"Sinal {signal.Signals(signum).name} recebido, drenando workers")
+        for pid in list(self._children):
+            with contextlib.suppress(ProcessLookupError):
+                os.kill(pid, signal.SIGTERM)
+
+    def _reap(self) -> None:
+        """Coleta workers encerrados e recria os que terminaram fora do encerramento."""
+        while self._children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self._children.clear()
+                return
+
+            if pid == 0:
+                return
+
+            slot = self._children.pop(pid, None)
+            self._archive_metrics(pid)
+            if slot is None or self._stopping:
+                continue
+
+            code = os.waitstatus_to_exitcode(status)
+            reason = "reciclado" if code == 0 else f"encerrado com código {code}"
+            self.logger.info(f"Worker {pid} {reason}; criando substituto")
+            if code != 0:
+                # Evita um laço de recriação rápido quando o worker falha na inicialização
+                time.sleep(1)
+            self._spawn(slot)
+
+    def _prepare_metrics(self) -> None:
+        """
+        Prepara o diretório em que os workers gravam as métricas (ver /metrics).
+
+        Sem METRICS_DIR configurado, usa um diretório temporário removido no
+        encerramento; os snapshots de uma execução anterior são descartados.
+        """
+        if not Config.METRICS_DIR:
+            self._metrics_tempdir = tempfile.mkdtemp(prefix="tce-metrics-")
+            Config.METRICS_DIR = self._metrics_tempdir
+            os.environ["METRICS_DIR"] = self._metrics_tempdir
+        else:
+            os.makedirs(Config.METRICS_DIR, exist_ok=True)
+            clear_snapshots(Config.METRICS_DIR)
+
+    def _archive_metrics(self, pid: int) -> None:
+        """Incorpora as métricas de um worker encerrado ao arquivo consolidado."""
+        try:
+            archive_snapshot(Config.METRICS_DIR, pid)
+        except OSError as e:
+            self.logger.warning(f"Falha ao consolidar as métricas do worker {pid}: {e}")
+
+    def _drain(self) -> None:
+        """Aguarda o término dos workers e encerra à força os que excederem o tempo de drenagem."""
+        deadline = time.monotonic() + self.graceful_timeout
+        while self._children and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+
+        for pid in list(self._children):
+            self.logger.warning(f"Worker {pid} excedeu o tempo de drenagem, encerrando à força")
+            with contextlib.suppress(ProcessLookupError):
+                os.kill(pid, signal.SIGKILL)
+            with contextlib.suppress(ChildProcessError):
+                os.waitpid(pid, 0)
+            self._children.pop(pid, None)
+
+    def run(self) -> None:
+        """Inicia o processo principal e bloqueia até o encerramento."""
+        if self.preload:
+            self._preload()
+
+        self._prepare_metrics()
+        self._socket = create_socket(self.host, self.port)
+        self.logger.info(
+            f"Servindo {self.app_path} em {self.host}:{self.port} com {self.workers} workers "
+            f"(reciclagem: {self.max_requests or 'desativada'})"
+        )
+
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+
+        for slot in range(self.workers):
+            self._spawn(slot)
+
+        try:
+            while not self._stopping:
+                self._reap()
+                time.sleep(0.2)
+            self._drain()
+        finally:
+            self._socket.close()
+            if self._metrics_tempdir:
+                shutil.rmtree(self._metrics_tempdir, ignore_errors=True)
+            self.logger.info("Servidor encerrado")
+
+
+@contextlib.contextmanager
+def serve_in_thread(app: Any, host: str = "127.0.0.1", port: int = 0) -> Iterator[str]:
+    """
+    Executa a aplicação no próprio processo, em uma thread, para testes e benchmarks.
+
+    Args:
+        app: Aplicação ASGI
+        host: Endereço de escuta
+        port: Porta de escuta (0 escolhe uma porta livre)
+
+    Yields:
+        URL base do servidor em execução
+    """
+    sock = create_socket(host, port)
+    server = uvicorn.Server(_server_config(app, 0, lifespan="on", log_level="warning"))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+
+    try:
+        while not server.started:
+            if not thread.is_alive():
+                raise RuntimeError("Falha ao iniciar o servidor em processo")
+            time.sleep(0.01)
+        bound_host, bound_port = sock.getsockname()[:2]
+        yield f"http://{bound_host}:{bound_port}"
+    finally:
+        server.should_exit = True
+        thread.join()
+        sock.close()
+
+
+def run(app_path: str = DEFAULT_APP, in_process: bool = False, reload: bool = False, **options) -> None:
+    """
+    Executa a aplicação.
+
+    Args:
+        app_path: Caminho da aplicação no formato "modulo:atributo"
+        in_process: Executa em um único processo, sem fork (testes e depuração)
+        reload: Servidor de desenvolvimento com recarga automática
+        **options: Opções do ``Launcher`` (host, port, workers, max_requests...)
+    """
+    host = options.get("host") or Config.SERVER_HOST
+    port = options.get("port") or Config.SERVER_PORT
+
+    if reload:
+        uvicorn.run(app_path, host=host, port=port, reload=True)
+        return
+
+    if in_process:
+        app, _ = load_app(app_path)
+        uvicorn.run(app, host=host, port=port)
+        return
+
+    if not hasattr(os, "fork"):
+        # Windows: sem fork não há pré-carregamento compartilhado
+        logger.warning("Fork indisponível nesta plataforma; usando os workers do uvicorn")
+        uvicorn.run(
+            app_path,
+            host=host,
+            port=port,
+            workers=options.get("workers") or Config.SERVER_WORKERS,
+            limit_max_requests=(options.get("max_requests") or Config.SERVER_MAX_REQUESTS) or None
+        )
+        return
+
+    Launcher(app_path, **options).run()
+
+
+def main(argv=None) -> None:
+    """Ponto de entrada de linha de comando."""
+    Config.setup()
+
+    parser = argparse.ArgumentParser(description="Servidor de produção da API do Banco de Preços do TCE-MG")
+    parser.add_argument("app", nargs="?", default=DEFAULT_APP, help="Aplicação no formato modulo:atributo")
+    parser.add_argument("--host", default=Config.SERVER_HOST, help="Endereço de escuta")
+    parser.add_argument("--port", type=int, default=Config.SERVER_PORT, help="Porta de escuta")
+    parser.add_argument("--workers", type=int, default=Config.SERVER_WORKERS, help="Quantidade de workers")
+    parser.add_argument(
+        "--max-requests", type=int, default=Config.SERVER_MAX_REQUESTS,
+        help="Recicla o worker após N requisições (0 desativa)"
+    )
+    parser.add_argument(
+        "--max-requests-jitter", type=int, default=Config.SERVER_MAX_REQUESTS_JITTER,
+        help="Variação aleatória máxima somada ao limite de requisições"
+    )
+    parser.add_argument(
+        "--graceful-timeout", type=int, default=Config.SERVER_GRACEFUL_TIMEOUT,
+        help="Segundos para drenar as requisições no encerramento"
+    )
+    parser.add_argument("--no-preload", action="store_true", help="Importa a aplicação em cada worker (sem a opção, vale SERVER_PRELOAD)")
+    parser.add_argument("--in-process", action="store_true", help="Executa em um único processo, sem fork")
+    parser.add_argument("--reload", action="store_true", help="Servidor de desenvolvimento com recarga automática")
+    args = parser.parse_args(argv)
+
+    if args.in_process or args.reload:
+        run(args.app, in_process=args.in_process, reload=args.reload, host=args.host, port=args.port)
+        return
+
+    run(
+        args.app,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        max_requests=args.max_requests,
+        max_requests_jitter=args.max_requests_jitter,
+        graceful_timeout=args.graceful_timeout,
+        preload=False if args.no_preload else None
+    )
+
+
+if __name__ == "__main__":
+    main()
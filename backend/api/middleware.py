@@ -0,0 +1,591 @@
+"""
+Middlewares HTTP da API: cache condicional (ETag/304, Cache-Control, Vary),
+compressão negociada (zstd, brotli, gzip), medição de latência (Server-Timing),
+métricas de requisições e perfis estatísticos sob demanda.
+
+Todos são middlewares ASGI puros, para não materializar respostas em fluxo
+(streaming) nem adicionar uma tarefa por requisição.
+"""
+
+import hashlib
+import logging
+import random
+import re
+import secrets
+import time
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from domain.value_objects import QueryKey
+from infrastructure.cache import track_cache_versions
+from infrastructure.telemetry import ProfileStore, finish_profile, finish_request_timing, start_profile, start_request_timing
+from infrastructure.telemetry.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS, HTTP_REQUESTS_IN_FLIGHT
+
+try:
+    import brotli
+except ImportError:  # Dependência opcional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # Dependência opcional
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Tipos de conteúdo que valem a pena comprimir (planilhas .xlsx já são compactadas)
+_COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+def _header(headers: Sequence[Tuple[bytes, bytes]], name: bytes) -> Optional[str]:
+    """Obtém o valor de um cabeçalho (nome em minúsculas) de uma lista ASGI."""
+    for key, value in headers:
+        if key.lower() == name:
+            return value.decode("latin-1")
+    return None
+
+
+def _without(headers: Sequence[Tuple[bytes, bytes]], *names: bytes) -> List[Tuple[bytes, bytes]]:
+    """Remove cabeçalhos de uma lista ASGI."""
+    return [(key, value) for key, value in headers if key.lower() not in names]
+
+
+def _add_vary(headers: List[Tuple[bytes, bytes]], *fields: str) -> List[Tuple[bytes, bytes]]:
+    """Acrescenta campos ao cabeçalho Vary, sem duplicá-los."""
+    current = _header(headers, b"vary")
+    values = [value.strip() for value in current.split(",")] if current else []
+    for field in fields:
+        if field.lower() not in (value.lower() for value in values):
+            values.append(field)
+    return [*_without(headers, b"vary"), (b"vary", ", ".join(values).encode("latin-1"))]
+
+
+def _matching_etag(if_none_match: str, etag: str) -> Optional[str]:
+    """
+    Procura um ETag em um cabeçalho If-None-Match.
+
+    O sufixo de codificação (ex.: "-br") é ignorado na comparação: ele apenas
+    distingue as representações comprimidas da mesma versão do conteúdo.
+
+    Returns:
+        O ETag informado pelo cliente que corresponde à versão atual, ou None
+    """
+    base = etag.strip('"')
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return etag
+        tag = candidate[2:] if candidate.startswith("W/") else candidate
+        tag = tag.strip('"')
+        if tag == base or tag.rsplit("-", 1)[0] == base:
+            return candidate
+    return None
+
+
+class ConditionalCacheMiddleware:
+    """
+    Adiciona ETag, Cache-Control e Vary às respostas GET e responde 304 quando
+    o cliente já possui a versão atual (If-None-Match).
+
+    O ETag é derivado das versões de conteúdo das entradas de cache usadas
+    para montar a resposta (ver ``track_cache_versions``), junto com o caminho,
+    os parâmetros em forma canônica (``QueryKey``: a ordem dos parâmetros e os
+    parâmetros vazios não mudam o ETag) e o tipo de conteúdo; sem entradas de
+    cache, usa o resumo do corpo.
+    """
+
+    def __init__(self, app, cache_control: Dict[str, str], default_cache_control: str = "no-cache"):
+        """
+        Args:
+            app: Aplicação ASGI
+            cache_control: Política de Cache-Control por prefixo de rota (o prefixo mais longo vence)
+            default_cache_control: Política das rotas sem regra específica
+        """
+        self.app = app
+        self.cache_control = sorted(cache_control.items(), key=lambda item: len(item[0]), reverse=True)
+        self.default_cache_control = default_cache_control
+
+    def _policy(self, path: str) -> str:
+        """Obtém a política de Cache-Control de uma rota."""
+        for prefix, policy in self.cache_control:
+            if path.startswith(prefix):
+                return policy
+        return self.default_cache_control
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = _header(scope["headers"], b"if-none-match")
+        policy = self._policy(scope["path"])
+        start_message = None
+        streaming = False
+        body_parts: List[bytes] = []
+
+        with track_cache_versions() as versions:
+
+            async def send_wrapper(message):
+                nonlocal start_message, streaming
+
+                if message["type"] == "http.response.start":
+                    start_message = message
+                    return
+
+                if message["type"] != "http.response.body" or streaming:
+                    await send(message)
+                    return
+
+                more_body = message.get("more_body", False)
+                if more_body and not body_parts:
+                    # Resposta em fluxo: sem ETag, pois o corpo não é conhecido de antemão
+                    streaming = True
+                    await send({**start_message, "headers": self._headers(start_message, policy)})
+                    await send(message)
+                    return
+
+                body_parts.append(message.get("body", b""))
+                if not more_body:
+                    await self._send_buffered(
+                        send, start_message, policy, b"".join(body_parts), versions, if_none_match, scope
+                    )
+
+            await self.app(scope, receive, send_wrapper)
+
+    def _headers(self, start_message, policy: str) -> List[Tuple[bytes, bytes]]:
+        """Adiciona o Cache-Control da rota às respostas bem-sucedidas."""
+        headers = list(start_message["headers"])
+        if start_message["status"] == 200 and not _header(headers, b"cache-control"):
+            headers.append((b"cache-control", policy.encode("latin-1")))
+        return headers
+
+    async def _send_buffered(self, send, start_message, policy, body, versions, if_none_match, scope):
+        """Envia uma resposta completa com ETag, ou 304 se o cliente já tem a versão atual."""
+        headers = self._headers(start_message, policy)
+
+        if start_message["status"] != 200 or _header(headers, b"etag") or "no-store" in policy:
+            await send({**start_message, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(scope["path"].encode())
+        digest.update(b"?" + QueryKey.from_params(scope["path"], scope.get("query_string", b"")).digest.encode())
+        digest.update(b"|" + (_header(headers, b"content-type") or "").encode("latin-1"))
+        if versions:
+            for version in sorted(set(versions)):
+                digest.update(b"|" + version.encode())
+        else:
+            digest.update(b"|" + body)
+        etag = f'"{digest.hexdigest()}"'
+        headers.append((b"etag", etag.encode("latin-1")))
+
+        matched = _matching_etag(if_none_match, etag) if if_none_match else None
+        if matched:
+            # Devolve o ETag da representação que o cliente já possui (com o sufixo da codificação)
+            not_modified = [
+                (key, value) for key, value in headers
+                if key.lower() in (b"cache-control", b"vary", b"date", b"expires")
+            ]
+            not_modified.append((b"etag", matched.encode("latin-1")))
+            await send({"type": "http.response.start", "status": 304, "headers": not_modified})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        await send({**start_message, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+class _Encoder:
+    """Compressor incremental de uma codificação de conteúdo."""
+
+    def __init__(self, encoding: str, level: Optional[int] = None):
+        self.encoding = encoding
+        if encoding == "zstd":
+            self._compressor = zstandard.ZstdCompressor(level=level or 3).compressobj()
+            self._flush_mode = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        elif encoding == "br":
+            self._compressor = brotli.Compressor(quality=level or 4)
+        else:
+            self._compressor = zlib.compressobj(level or 6, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        """
+        Comprime um bloco de dados.
+
+        Args:
+            data: Dados a comprimir
+            final: Indica o último bloco da resposta
+
+        Returns:
+            Dados comprimidos disponíveis até o momento (o bloco é sempre
+            descarregado, para não atrasar respostas em fluxo)
+        """
+        if self.encoding == "zstd":
+            output = self._compressor.compress(data)
+            if final:
+                return output + self._compressor.flush()
+            return output + self._compressor.flush(self._flush_mode)
+
+        if self.encoding == "br":
+            output = self._compressor.process(data)
+            return output + (self._compressor.finish() if final else self._compressor.flush())
+
+        output = self._compressor.compress(data)
+        return output + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+def available_encodings() -> List[str]:
+    """
+    Lista as codificações suportadas, em ordem de preferência do servidor.
+
+    Returns:
+        Codificações disponíveis (gzip sempre; zstd e br se instalados)
+    """
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.append("gzip")
+    return encodings
+
+
+def negotiate_encoding(accept_encoding: Optional[str], encodings: Sequence[str]) -> Optional[str]:
+    """
+    Escolhe a codificação de conteúdo a partir do cabeçalho Accept-Encoding.
+
+    Args:
+        accept_encoding: Valor do cabeçalho Accept-Encoding
+        encodings: Codificações suportadas, em ordem de preferência do servidor
+
+    Returns:
+        Codificação escolhida ou None para enviar sem compressão
+    """
+    if not accept_encoding:
+        return None
+
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+
+    wildcard = weights.get("*", 0.0)
+    best, best_weight = None, 0.0
+    for encoding in encodings:
+        weight = weights.get(encoding, wildcard)
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+class CompressionMiddleware:
+    """
+    Comprime respostas textuais grandes com a melhor codificação aceita pelo
+    cliente (zstd, brotli ou gzip). Respostas em fluxo são comprimidas bloco a
+    bloco; o ETag de uma representação comprimida recebe o sufixo da codificação.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, encodings: Sequence[str] = None):
+        """
+        Args:
+            app: Aplicação ASGI
+            minimum_size: Tamanho mínimo, em bytes, para comprimir uma resposta completa
+            encodings: Codificações permitidas, em ordem de preferência (padrão: todas as disponíveis)
+        """
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = [encoding for encoding in (encodings or available_encodings()) if encoding in available_encodings()]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(_header(scope["headers"], b"accept-encoding"), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, self._vary_only(send))
+            return
+
+        start_message = None
+        encoder: Optional[_Encoder] = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, encoder, passthrough
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if encoder is None:
+                headers = list(start_message["headers"])
+                content_type = _header(headers, b"content-type") or ""
+                compressible = (
+                    start_message["status"] not in (204, 304)
+                    and not _header(headers, b"content-encoding")
+                    and content_type.startswith(_COMPRESSIBLE_TYPES)
+                    and (more_body or len(body) >= self.minimum_size)
+                )
+
+                if not compressible:
+                    passthrough = True
+                    if content_type.startswith(_COMPRESSIBLE_TYPES) or start_message["status"] == 304:
+                        headers = _add_vary(headers, "Accept-Encoding")
+                    await send({**start_message, "headers": headers})
+                    await send(message)
+                    return
+
+                encoder = _Encoder(encoding)
+                headers = _add_vary(_without(headers, b"content-length"), "Accept-Encoding")
+                headers.append((b"content-encoding", encoding.encode("latin-1")))
+
+                etag = _header(headers, b"etag")
+                if etag and etag.endswith('"'):
+                    headers = _without(headers, b"etag")
+                    headers.append((b"etag", f'{etag[:-1]}-{encoding}"'.encode("latin-1")))
+
+                if not more_body:
+                    compressed = encoder.compress(body, final=True)
+                    headers.append((b"content-length", str(len(compressed)).encode("latin-1")))
+                    await send({**start_message, "headers": headers})
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+
+                await send({**start_message, "headers": headers})
+
+            await send({
+                "type": "http.response.body",
+                "body": encoder.compress(body, final=not more_body),
+                "more_body": more_body
+            })
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _vary_only(self, send):
+        """Envolve o envio de uma resposta não comprimida para declarar Vary: Accept-Encoding."""
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = message["headers"]
+                content_type = _header(headers, b"content-type") or ""
+                if content_type.startswith(_COMPRESSIBLE_TYPES) or message["status"] == 304:
+                    message = {**message, "headers": _add_vary(list(headers), "Accept-Encoding")}
+            await send(message)
+
+        return send_wrapper
+
+
+class TimingMiddleware:
+    """
+    Mede a latência por etapa de uma amostra das requisições.
+
+    Nas requisições amostradas, as etapas registradas com
+    ``infrastructure.telemetry.span`` (API do TCE-MG, decodificação,
+    mapeamento, DTOs, rota) são enviadas no cabeçalho Server-Timing,
+    alimentam os histogramas por etapa e geram um log estruturado. As demais
+    requisições passam direto, sem custo além do sorteio.
+    """
+
+    def __init__(self, app, sample_rate: float = 1.0, log_threshold_ms: float = 0):
+        """
+        Args:
+            app: Aplicação ASGI
+            sample_rate: Fração das requisições medidas (0 desativa, 1 mede todas)
+            log_threshold_ms: Registra o log apenas para requisições a partir desta duração
+        """
+        self.app = app
+        self.sample_rate = sample_rate
+        self.log_threshold_ms = log_threshold_ms
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.sample_rate or random.random() >= self.sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        timing, token = start_request_timing()
+        status = None
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                header = timing.server_timing(timing.elapsed()).encode("latin-1")
+                message = {**message, "headers": [*message.get("headers", []), (b"server-timing", header)]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            finish_request_timing(timing, token, scope["method"], scope["path"], status, self.log_threshold_ms)
+
+
+class MetricsMiddleware:
+    """
+    Contabiliza as requisições HTTP: total por rota e status, duração por rota
+    e requisições em andamento.
+
+    A rota é o modelo registrado pelo ``api.routing.TimedRoute`` (ex.:
+    "/api/products/{product_id}"), não o caminho concreto, para que a
+    quantidade de séries não cresça com os parâmetros; caminhos sem rota
+    são contabilizados como "unmatched".
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+        started = time.perf_counter()
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            route = scope.get("route_path", "unmatched")
+            HTTP_REQUESTS.labels(scope["method"], route, status).inc()
+            HTTP_REQUEST_DURATION.labels(scope["method"], route).observe(time.perf_counter() - started)
+
+
+class ProfilingMiddleware:
+    """
+    Gera o perfil estatístico (pilhas das tarefas assíncronas, do controlador
+    ao cliente da API do TCE-MG) de requisições específicas, sem custo para as
+    demais.
+
+    O perfil é iniciado:
+
+    - pelo cabeçalho ``X-Profile: 1`` acompanhado de ``X-Admin-Token`` válido;
+      a resposta informa o identificador do perfil em ``X-Profile-Id``;
+    - pela regra de amostragem: uma fração das requisições cujo caminho
+      corresponde à expressão configurada, guardando apenas as que durarem
+      ao menos a duração mínima.
+
+    Os perfis guardados são consultados em /api/admin/profiles.
+    """
+
+    def __init__(
+        self,
+        app,
+        store: ProfileStore,
+        admin_token: str = "",
+        sample_rate: float = 0.0,
+        path_pattern: str = "",
+        min_duration_ms: float = 0,
+        interval_ms: float = 2
+    ):
+        """
+        Args:
+            app: Aplicação ASGI
+            store: Onde guardar os perfis
+            admin_token: Token exigido pelo cabeçalho X-Profile (vazio desativa o cabeçalho)
+            sample_rate: Fração das requisições elegíveis perfiladas pela regra de amostragem
+            path_pattern: Expressão regular dos caminhos elegíveis (vazio: todos)
+            min_duration_ms: Duração mínima para guardar um perfil da amostragem
+            interval_ms: Intervalo entre amostras das pilhas
+        """
+        self.app = app
+        self.store = store
+        self.admin_token = admin_token
+        self.sample_rate = sample_rate
+        self.path_pattern = re.compile(path_pattern) if path_pattern else None
+        self.min_duration_ms = min_duration_ms
+        self.interval = interval_ms / 1000
+
+    def _trigger(self, scope) -> Optional[str]:
+        """Decide se a requisição será perfilada e por qual regra ("header", "sample" ou None)."""
+        if self.admin_token and _header(scope["headers"], b"x-profile") in ("1", "true"):
+            token = _header(scope["headers"], b"x-admin-token") or ""
+            if secrets.compare_digest(token.encode("latin-1"), self.admin_token.encode("latin-1")):
+                return "header"
+
+        if (
+            self.sample_rate
+            and (self.path_pattern is None or self.path_pattern.search(scope["path"]))
+            and random.random() < self.sample_rate
+        ):
+            return "sample"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        trigger = self._trigger(scope) if scope["type"] == "http" else None
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile, token = start_profile(
+            scope["method"],
+            scope["path"],
+            scope.get("query_string", b"").decode("latin-1"),
+            trigger,
+            self.interval
+        )
+        status = None
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if trigger == "header":
+                    headers = [*message.get("headers", []), (b"x-profile-id", profile.id.encode("latin-1"))]
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            finish_profile(profile, token, status)
+            if trigger == "header" or profile.duration * 1000 >= self.min_duration_ms:
+                self.store.save(profile)
+                logger.info(
+                    f"Perfil {profile.id} gerado para {scope['method']} {scope['path']} "
+                    f"({profile.duration * 1000:.0f} ms, {profile.samples} amostras)"
+                )
+
+
+def route_cache_control(territory_max_age: int, product_max_age: int, price_max_age: int) -> Dict[str, str]:
+    """
+    Monta as políticas de Cache-Control por rota.
+
+    Args:
+        territory_max_age: Validade das listas de regiões e municípios (segundos)
+        product_max_age: Validade das consultas de produtos (segundos)
+        price_max_age: Validade dos históricos e agregados de preço (segundos)
+
+    Returns:
+        Mapa de prefixo de rota para política de Cache-Control
+    """
+    return {
+        "/api/regions": f"public, max-age={territory_max_age}",
+        "/api/municipalities": f"public, max-age={territory_max_age}",
+        "/api/products": f"public, max-age={product_max_age}",
+        "/api/prices": f"public, max-age={price_max_age}, must-revalidate",
+        "/api/prices/export": "no-store",
+        "/metrics": "no-store",
+        "/api/admin": "no-store",
+    }
@@ -0,0 +1,62 @@
+"""
+Classe de rota da API com medição das etapas da própria rota.
+"""
+
+import asyncio
+import functools
+from time import perf_counter
+from typing import Any, Callable
+
+from fastapi.routing import APIRoute
+
+from infrastructure.telemetry import current_timing, span
+
+
+def _timed_endpoint(endpoint: Callable) -> Callable:
+    """Envolve a função da rota em uma etapa "endpoint", preservando a assinatura."""
+    if not asyncio.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        def sync_wrapper(*args, **kwargs):
+            with span("endpoint"):
+                return endpoint(*args, **kwargs)
+
+        return sync_wrapper
+
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        with span("endpoint"):
+            return await endpoint(*args, **kwargs)
+
+    return wrapper
+
+
+class TimedRoute(APIRoute):
+    """
+    Rota que separa o tempo da função da rota ("endpoint") do tempo do
+    FastAPI ("framework": leitura e validação dos parâmetros, resolução das
+    dependências, validação do modelo de resposta e serialização).
+
+    Também registra o modelo da rota (ex.: "/api/products/{product_id}") em
+    ``scope["route_path"]``, usado como rótulo nas métricas.
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs: Any):
+        super().__init__(path, _timed_endpoint(endpoint), **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            request.scope["route_path"] = self.path
+            timing = current_timing()
+            if timing is None:
+                return await handler(request)
+
+            endpoint_before = timing.total("endpoint")
+            started = perf_counter()
+            response = await handler(request)
+            elapsed = perf_counter() - started
+            timing.add("framework", elapsed - (timing.total("endpoint") - endpoint_before))
+            return response
+
+        return timed_handler
@@ -2,7 +2,7 @@
 Servidor FastAPI para a API do sistema de consulta ao Banco de Preços do TCE-MG.
 """
 
-from fastapi import FastAPI, Query, Path, Depends, HTTPException, status, Response
+from fastapi import FastAPI, Query, Path, Depends, Header, HTTPException, status, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from typing import List, Optional
@@ -13,14 +13,39 @@ import re
 from datetime import datetime
 
 # Importações absolutas em vez de relativas
-from api.dependencies import Dependencies
+from api.dependencies import Dependencies, require_admin_token
+from api.middleware import (
+    CompressionMiddleware,
+    ConditionalCacheMiddleware,
+    MetricsMiddleware,
+    ProfilingMiddleware,
+    TimingMiddleware,
+    route_cache_control
+)
+from api.routing import TimedRoute
+from infrastructure.config import Config
+from infrastructure.telemetry import generate_latest, render_collapsed, top_functions
 from application.controllers import ProductController, TerritoryController, PriceController, ExportController
-from application.dtos import ProductDTO, TerritoryDTO, PriceRecordDTO
+from application.dtos import (
+    ProductDTO,
+    TerritoryDTO,
+    PriceRecordDTO,
+    PriceAggregateDTO,
+    PriceSummaryDTO,
+    PriceBatchRequestDTO,
+    PriceBatchResponseDTO
+)
 
-def create_app() -> FastAPI:
+def create_app(dependencies: Dependencies = None) -> FastAPI:
     """
     Cria e configura a aplicação FastAPI.
     
+    A criação é barata: as dependências são construídas no primeiro uso
+    (ou no pré-carregamento do api.launcher), não aqui.
+    
+    Args:
+        dependencies: Dependências da aplicação (opcional, usa o singleton)
+        
     Returns:
         Aplicação FastAPI configurada
     """
@@ -31,6 +56,9 @@ def create_app() -> FastAPI:
         version="1.0.0"
     )
     
+    # Rotas medidas por etapa (ver api.routing.TimedRoute)
+    app.router.route_class = TimedRoute
+    
     # Configura CORS
     app.add_middleware(
         CORSMiddleware,
@@ -40,11 +68,91 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
     
-    # Inicializa as dependências
-    dependencies = Dependencies()
+    # Inicializa as dependências (construídas sob demanda)
+    dependencies = dependencies or Dependencies()
+    
+    # ETag/304 e Cache-Control por rota; a compressão fica por fora para
+    # que o ETag seja calculado sobre a representação não comprimida
+    app.add_middleware(
+        ConditionalCacheMiddleware,
+        cache_control=route_cache_control(
+            Config.HTTP_CACHE_TERRITORY_MAX_AGE,
+            Config.HTTP_CACHE_PRODUCT_MAX_AGE,
+            Config.HTTP_CACHE_PRICE_MAX_AGE
+        )
+    )
+    app.add_middleware(CompressionMiddleware, minimum_size=Config.HTTP_COMPRESSION_MIN_SIZE)
+    
+    # Latência por etapa (Server-Timing) de uma amostra das requisições;
+    # fica por fora de todos para incluir a compressão no total
+    app.add_middleware(
+        TimingMiddleware,
+        sample_rate=Config.TIMING_SAMPLE_RATE,
+        log_threshold_ms=Config.TIMING_LOG_THRESHOLD_MS
+    )
+    app.add_middleware(MetricsMiddleware)
+    
+    # Perfis estatísticos sob demanda (cabeçalho X-Profile ou amostragem)
+    app.add_middleware(
+        ProfilingMiddleware,
+        store=dependencies.profile_store,
+        admin_token=Config.ADMIN_TOKEN,
+        sample_rate=Config.PROFILING_SAMPLE_RATE,
+        path_pattern=Config.PROFILING_PATH_PATTERN,
+        min_duration_ms=Config.PROFILING_MIN_DURATION_MS,
+        interval_ms=Config.PROFILING_INTERVAL_MS
+    )
+    
+    # Inicia e encerra as tarefas em segundo plano
+    @app.on_event("startup")
+    async def start_background_tasks():
+        if Config.WAREHOUSE_ENABLED and Config.BACKGROUND_TASKS_ENABLED and dependencies.ingestion_service:
+            dependencies.ingestion_service.start()
+        
+        # Todos os workers gravam as suas métricas, para a agregação no /metrics
+        if dependencies.metrics_flusher:
+            dependencies.metrics_flusher.start()
+        
+        # Os territórios e o cache são de cada worker; por isso todos atualizam os seus
+        dependencies.territory_repository.start()
+        
+        if dependencies.cache_warmer:
+            dependencies.cache_warmer.start()
+        
+        dependencies.cache_admin.start()
+        dependencies.cache_reaper.start()
+    
+    @app.on_event("shutdown")
+    async def stop_background_tasks():
+        if Config.WAREHOUSE_ENABLED and dependencies.ingestion_service:
+            await dependencies.ingestion_service.stop()
+        
+        if dependencies.metrics_flusher:
+            await dependencies.metrics_flusher.stop()
+        
+        if "territory_repository" in vars(dependencies):
+            await dependencies.territory_repository.stop()
+        
+        if "cache_admin" in vars(dependencies):
+            await dependencies.cache_admin.stop()
+        
+        if "cache_reaper" in vars(dependencies):
+            await dependencies.cache_reaper.stop()
+        
+        if "cache_warmer" in vars(dependencies) and dependencies.cache_warmer:
+            await dependencies.cache_warmer.stop()
+        
+        # Fecha a sessão HTTP com a API do TCE-MG, se chegou a ser criada
+        if "api_client" in vars(dependencies):
+            await dependencies.api_client.close()
     
     # Define as rotas
     
+    # Rota raiz para verificar se a API está funcionando
+    @app.get("/")
+    def root():
+        return {"message": "API de Consulta ao Banco de Preços do TCE-MG está funcionando!"}
+    
     # Rotas de produtos
     @app.get("/api/products/search", response_model=List[ProductDTO])
     async def search_products(
@@ -116,38 +224,206 @@ def create_app() -> FastAPI:
     # Rotas de preços
     @app.get("/api/prices/history", response_model=List[PriceRecordDTO])
     async def get_price_history(
+        response: Response,
         product_id: str = Query(..., description="ID do produto"),
         unit: str = Query(..., description="Unidade do produto"),
         territory_type: str = Query(..., description="Tipo de território (ESTADO, REGIAO, MUNICIPIO)"),
         region_codes: Optional[List[str]] = Query(None, description="Lista de códigos de região"),
         municipality_codes: Optional[List[str]] = Query(None, description="Lista de códigos de município"),
         year: Optional[int] = Query(None, description="Ano de referência"),
+        units: Optional[List[str]] = Query(None, description="Outras unidades (embalagens) do produto a mesclar, com preços por unidade base"),
+        normalize: bool = Query(False, description="Converte os preços para a unidade base (ex.: CAIXA 100,00 UN -> UN)"),
+        accept: Optional[str] = Header(None),
         price_controller: PriceController = Depends(dependencies.get_price_controller)
     ):
         """
         Obtém o histórico de preços de acordo com os parâmetros.
         
+        Com ``Accept: application/x-ndjson`` a resposta é transmitida em fluxo,
+        um registro por linha, sem montar o histórico inteiro em memória.
+        
         Args:
+            response: Resposta HTTP (para o cabeçalho Vary)
             product_id: ID do produto
             unit: Unidade do produto
             territory_type: Tipo de território
             region_codes: Lista de códigos de região (opcional)
             municipality_codes: Lista de códigos de município (opcional)
             year: Ano de referência (opcional)
+            units: Outras unidades do produto a mesclar (opcional; implica ``normalize``)
+            normalize: Converte os preços para a unidade base
+            accept: Cabeçalho Accept da requisição
             price_controller: Controlador de preços
             
         Returns:
-            Lista de registros de preço
+            Lista de registros de preço, ou fluxo NDJSON
         """
+        if accept and "application/x-ndjson" in accept:
+            lines = await price_controller.stream_price_history(
+                product_id=product_id,
+                unit=unit,
+                territory_type=territory_type,
+                region_codes=region_codes,
+                municipality_codes=municipality_codes,
+                year=year,
+                batch_size=Config.STREAM_BATCH_SIZE,
+                units=units,
+                normalize=normalize
+            )
+            return StreamingResponse(lines, media_type="application/x-ndjson", headers={"Vary": "Accept"})
+        
+        response.headers["Vary"] = "Accept"
         return await price_controller.get_price_history(
             product_id=product_id,
             unit=unit,
             territory_type=territory_type,
             region_codes=region_codes,
             municipality_codes=municipality_codes,
-            year=year
+            year=year,
+            units=units,
+            normalize=normalize
+        )
+    
+    @app.get("/api/prices/timeseries", response_model=List[PriceAggregateDTO])
+    async def get_price_timeseries(
+        product_id: str = Query(..., description="ID do produto"),
+        unit: str = Query(..., description="Unidade do produto"),
+        territory_type: str = Query(..., description="Tipo de território (ESTADO, REGIAO, MUNICIPIO)"),
+        region_codes: Optional[List[str]] = Query(None, description="Lista de códigos de região"),
+        municipality_codes: Optional[List[str]] = Query(None, description="Lista de códigos de município"),
+        year: Optional[int] = Query(None, description="Ano de referência"),
+        units: Optional[List[str]] = Query(None, description="Outras unidades (embalagens) do produto a mesclar, com preços por unidade base"),
+        normalize: bool = Query(False, description="Converte os preços para a unidade base (ex.: CAIXA 100,00 UN -> UN)"),
+        granularity: str = Query("MES", description="Granularidade temporal (DIA, SEMANA, MES, TRIMESTRE)"),
+        group_by: Optional[str] = Query(None, description="Quebra territorial (MUNICIPIO, REGIAO)"),
+        max_points: int = Query(120, ge=1, le=1000, description="Número máximo de pontos por série"),
+        price_controller: PriceController = Depends(dependencies.get_price_controller)
+    ):
+        """
+        Obtém a série temporal agregada de preços para gráficos de tendência.
+        
+        Args:
+            product_id: ID do produto
+            unit: Unidade do produto
+            territory_type: Tipo de território
+            region_codes: Lista de códigos de região (opcional)
+            municipality_codes: Lista de códigos de município (opcional)
+            year: Ano de referência (opcional)
+            units: Outras unidades do produto a mesclar (opcional; implica ``normalize``)
+            normalize: Converte os preços para a unidade base
+            granularity: Granularidade temporal
+            group_by: Quebra territorial (opcional)
+            max_points: Número máximo de pontos por série
+            price_controller: Controlador de preços
+            
+        Returns:
+            Lista de agregados de preço por período
+        """
+        return await price_controller.get_price_timeseries(
+            product_id=product_id,
+            unit=unit,
+            territory_type=territory_type,
+            region_codes=region_codes,
+            municipality_codes=municipality_codes,
+            year=year,
+            granularity=granularity,
+            group_by=group_by,
+            max_points=max_points,
+            units=units,
+            normalize=normalize
         )
     
+    @app.get("/api/prices/regions", response_model=List[PriceSummaryDTO])
+    async def get_region_rollup(
+        product_id: str = Query(..., description="ID do produto"),
+        unit: str = Query(..., description="Unidade do produto"),
+        year: Optional[int] = Query(None, description="Ano de referência"),
+        units: Optional[List[str]] = Query(None, description="Outras unidades (embalagens) do produto a mesclar, com preços por unidade base"),
+        normalize: bool = Query(False, description="Converte os preços para a unidade base (ex.: CAIXA 100,00 UN -> UN)"),
+        price_controller: PriceController = Depends(dependencies.get_price_controller)
+    ):
+        """
+        Obtém o resumo de preços de todo o estado agrupado por região.
+        
+        Args:
+            product_id: ID do produto
+            unit: Unidade do produto
+            year: Ano de referência (opcional)
+            units: Outras unidades do produto a mesclar (opcional; implica ``normalize``)
+            normalize: Converte os preços para a unidade base
+            price_controller: Controlador de preços
+            
+        Returns:
+            Lista de resumos de preço por região
+        """
+        return await price_controller.get_region_rollup(
+            product_id=product_id,
+            unit=unit,
+            year=year,
+            units=units,
+            normalize=normalize
+        )
+    
+    @app.get("/api/prices/summary", response_model=List[PriceSummaryDTO])
+    async def get_price_summary(
+        product_id: str = Query(..., description="ID do produto"),
+        unit: str = Query(..., description="Unidade do produto"),
+        territory_type: str = Query(..., description="Tipo de território (ESTADO, REGIAO, MUNICIPIO)"),
+        region_codes: Optional[List[str]] = Query(None, description="Lista de códigos de região"),
+        municipality_codes: Optional[List[str]] = Query(None, description="Lista de códigos de município"),
+        year: Optional[int] = Query(None, description="Ano de referência"),
+        units: Optional[List[str]] = Query(None, description="Outras unidades (embalagens) do produto a mesclar, com preços por unidade base"),
+        normalize: bool = Query(False, description="Converte os preços para a unidade base (ex.: CAIXA 100,00 UN -> UN)"),
+        group_by: Optional[str] = Query(None, description="Quebra territorial (MUNICIPIO, REGIAO)"),
+        price_controller: PriceController = Depends(dependencies.get_price_controller)
+    ):
+        """
+        Obtém o resumo de preços (mediana, percentis, média e extremos) de um escopo territorial.
+        
+        Args:
+            product_id: ID do produto
+            unit: Unidade do produto
+            territory_type: Tipo de território
+            region_codes: Lista de códigos de região (opcional)
+            municipality_codes: Lista de códigos de município (opcional)
+            year: Ano de referência (opcional)
+            units: Outras unidades do produto a mesclar (opcional; implica ``normalize``)
+            normalize: Converte os preços para a unidade base
+            group_by: Quebra territorial (opcional)
+            price_controller: Controlador de preços
+            
+        Returns:
+            Lista de resumos de preço
+        """
+        return await price_controller.get_price_summary(
+            product_id=product_id,
+            unit=unit,
+            territory_type=territory_type,
+            region_codes=region_codes,
+            municipality_codes=municipality_codes,
+            year=year,
+            group_by=group_by,
+            units=units,
+            normalize=normalize
+        )
+    
+    @app.post("/api/prices/batch", response_model=PriceBatchResponseDTO, response_model_exclude_none=True)
+    async def get_price_batch(
+        request: PriceBatchRequestDTO,
+        price_controller: PriceController = Depends(dependencies.get_price_controller)
+    ):
+        """
+        Executa várias consultas de histórico de preços em uma única requisição.
+        
+        Args:
+            request: Consultas (produto, unidade, território, ano) e opção de retornar apenas resumos
+            price_controller: Controlador de preços
+            
+        Returns:
+            Resultado de cada consulta (registros ou resumo, ou o erro), na ordem recebida
+        """
+        return await price_controller.get_price_batch(request.queries, request.summary_only)
+    
     @app.get("/api/prices/export")
     async def export_price_history(
         product_id: str = Query(..., description="ID do produto"),
@@ -209,6 +485,181 @@ def create_app() -> FastAPI:
             headers={"Content-Disposition": f"attachment; filename={filename}"}
         )
     
+    # Métricas no formato do Prometheus
+    @app.get("/metrics", include_in_schema=False)
+    async def get_metrics():
+        """
+        Exporta as métricas de requisições, da API do TCE-MG, do cache e das
+        exportações, somadas entre todos os workers.
+        
+        Returns:
+            Métricas no formato de texto do Prometheus
+        """
+        return Response(
+            content=generate_latest(Config.METRICS_DIR or None),
+            media_type="text/plain; version=0.0.4; charset=utf-8"
+        )
+    
+    # Perfis estatísticos das requisições (rotas administrativas)
+    @app.get("/api/admin/profiles", include_in_schema=False, dependencies=[Depends(require_admin_token)])
+    async def list_profiles():
+        """
+        Lista os perfis guardados, do mais recente para o mais antigo.
+        
+        Returns:
+            Resumos dos perfis (requisição, duração, quantidade de amostras)
+        """
+        return dependencies.profile_store.list()
+    
+    @app.get("/api/admin/profiles/{profile_id}", include_in_schema=False, dependencies=[Depends(require_admin_token)])
+    async def get_profile(
+        profile_id: str = Path(..., description="Identificador do perfil (cabeçalho X-Profile-Id)"),
+        format: str = Query("json", description="Formato: json, collapsed (flame graph) ou top"),
+        limit: int = Query(30, ge=1, le=500, description="Quantidade de funções no formato top")
+    ):
+        """
+        Obtém um perfil guardado.
+        
+        Args:
+            profile_id: Identificador do perfil
+            format: json (pilhas completas), collapsed (pilhas colapsadas para
+                ferramentas de flame graph) ou top (funções com mais amostras)
+            limit: Quantidade de funções no formato top
+            
+        Returns:
+            Perfil no formato solicitado
+        """
+        profile = dependencies.profile_store.get(profile_id)
+        if profile is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Perfil com ID {profile_id} não encontrado"
+            )
+        
+        if format == "collapsed":
+            return Response(content=render_collapsed(profile), media_type="text/plain; charset=utf-8")
+        if format == "top":
+            summary = {key: value for key, value in profile.items() if key != "stacks"}
+            return {**summary, "functions": top_functions(profile, limit)}
+        if format != "json":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Formato inválido. Use json, collapsed ou top."
+            )
+        return profile
+    
+    # Controle do cache (rotas administrativas)
+    @app.get("/api/admin/cache", include_in_schema=False, dependencies=[Depends(require_admin_token)])
+    async def get_cache_stats():
+        """
+        Lista os namespaces do cache com entradas, tamanho e taxa de acertos,
+        somados entre todos os workers.
+        
+        Returns:
+            Estatísticas por namespace
+        """
+        return {"namespaces": dependencies.cache_admin.namespaces()}
+    
+    @app.get("/api/admin/cache/key", include_in_schema=False, dependencies=[Depends(require_admin_token)])
+    async def inspect_cache_key(
+        key: str = Query(..., description="Chave do cache (ex.: prices:history:1001:...)")
+    ):
+        """
+        Descreve uma entrada do cache do worker que atendeu a requisição.
+        
+        Args:
+            key: Chave do cache
+            
+        Returns:
+            Idade, tempo restante, tamanho, versão e falha memorizada da entrada
+        """
+        entry = dependencies.cache_admin.inspect(key)
+        if entry is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Chave {key} não encontrada no cache deste worker"
+            )
+        return entry
+    
+    @app.post("/api/admin/cache/invalidate", include_in_schema=False, dependencies=[Depends(require_admin_token)])
+    async def invalidate_cache(
+        product_id: Optional[str] = Query(None, description="Invalida as entradas e o armazém local de um produto"),
+        namespace: Optional[str] = Query(None, description="Invalida um namespace (ex.: prices:history)"),
+        pattern: Optional[str] = Query(None, description="Invalida as chaves com curingas de shell (ex.: products:search:*)")
+    ):
+        """
+        Invalida entradas do cache em todos os workers.
+        
+        Exatamente um dos filtros deve ser informado.
+        
+        Args:
+            product_id: ID do produto
+            namespace: Namespace das chaves
+            pattern: Padrão das chaves
+            
+        Returns:
+            Quantidade de entradas removidas neste worker (e de partições do
+            armazém local, na invalidação por produto)
+        """
+        if sum(value is not None for value in (product_id, namespace, pattern)) != 1:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Informe exatamente um dos parâmetros product_id, namespace ou pattern."
+            )
+        
+        cache_admin = dependencies.cache_admin
+        try:
+            if product_id is not None:
+                return await cache_admin.invalidate_product(product_id)
+            if namespace is not None:
+                return cache_admin.invalidate_namespace(namespace)
+            return cache_admin.invalidate_pattern(pattern)
+        except OSError as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Invalidação aplicada apenas neste worker: {e}"
+            )
+    
+    @app.post("/api/admin/cache/warm", include_in_schema=False, dependencies=[Depends(require_admin_token)])
+    async def warm_cache():
+        """
+        Aquece o cache com as consultas mais populares em todos os workers.
+        
+        Returns:
+            Quantidade de consultas recarregadas neste worker
+        """
+        try:
+            return await dependencies.cache_admin.warm()
+        except RuntimeError as e:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    
+    # Rota de informações do servidor
+    @app.get("/api/info")
+    def get_info():
+        """
+        Obtém informações sobre o servidor e a API.
+        
+        Returns:
+            Informações do servidor
+        """
+        return {
+            "api_version": "1.0.0",
+            "description": "API para consulta de preços de produtos em compras públicas do estado de Minas Gerais",
+            "endpoints": [
+                {"path": "/api/products/search", "method": "GET", "description": "Busca produtos pelo termo de pesquisa"},
+                {"path": "/api/products/{product_id}", "method": "GET", "description": "Obtém um produto pelo ID"},
+                {"path": "/api/regions", "method": "GET", "description": "Obtém todas as regiões disponíveis"},
+                {"path": "/api/municipalities", "method": "GET", "description": "Obtém todos os municípios, opcionalmente filtrados por região"},
+                {"path": "/api/prices/history", "method": "GET", "description": "Obtém o histórico de preços de acordo com os parâmetros (NDJSON em fluxo com Accept: application/x-ndjson)"},
+                {"path": "/api/prices/timeseries", "method": "GET", "description": "Obtém a série temporal agregada de preços por período"},
+                {"path": "/api/prices/regions", "method": "GET", "description": "Obtém o resumo de preços do estado agrupado por região"},
+                {"path": "/api/prices/summary", "method": "GET", "description": "Obtém o resumo de preços (mediana e percentis) de um escopo territorial"},
+                {"path": "/api/prices/batch", "method": "POST", "description": "Executa várias consultas de histórico de preços (ou apenas resumos) em uma única requisição"},
+                {"path": "/api/prices/export", "method": "GET", "description": "Exporta o histórico de preços para um arquivo Excel"},
+                {"path": "/metrics", "method": "GET", "description": "Métricas de requisições, API do TCE-MG, cache e exportações (formato Prometheus)"}
+            ]
+        }
+    
     return app
 
 
@@ -216,14 +667,14 @@ def create_app() -> FastAPI:
 app = create_app()
 
 
+async def preload():
+    """Pré-carrega os índices compartilhados antes do fork dos workers (ver api.launcher)."""
+    await Dependencies().preload()
+
+
 # Função para executar a aplicação
 def run():
-    """Executa a aplicação com uvicorn."""
-    import uvicorn
-    
-    uvicorn.run(
-        "api.server:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True
-    ) 
\ No newline at end of file
+    """Executa a aplicação com o servidor de produção (múltiplos workers)."""
+    from api.launcher import run as run_server
+    
+    run_server("api.server:app")
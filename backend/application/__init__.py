@@ -3,13 +3,15 @@ Camada de Aplicação - Orquestra os fluxos de uso do sistema,
 coordenando as interações entre a interface do usuário e o domínio.
 """
 
-from application.dtos import ProductDTO, TerritoryDTO, PriceRecordDTO
+from application.dtos import ProductDTO, TerritoryDTO, PriceRecordDTO, PriceAggregateDTO, PriceSummaryDTO
 from application.controllers import ProductController, TerritoryController, PriceController, ExportController
 
 __all__ = [
     'ProductDTO',
     'TerritoryDTO', 
     'PriceRecordDTO',
+    'PriceAggregateDTO',
+    'PriceSummaryDTO',
     'ProductController',
     'TerritoryController',
     'PriceController',
@@ -1,14 +1,111 @@
-from typing import List, Optional
+from typing import AsyncIterator, List, Optional
 from fastapi import HTTPException, status
+import asyncio
+import json
 import logging
 from datetime import datetime
 import re
+import time
 from io import BytesIO
 
-from domain.entities import TerritoryType
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # Dependência opcional
+    orjson = None
+
+from domain.entities import Product, TerritoryType
+from domain.price_series import PriceColumns, TimeGranularity
 from domain.services import ProductService, TerritoryService, PriceService
-from application.dtos import ProductDTO, TerritoryDTO, PriceRecordDTO
+from domain.units import common_base_unit
+from application.dtos import (
+    ProductDTO,
+    TerritoryDTO,
+    PriceRecordDTO,
+    PriceAggregateDTO,
+    PriceSummaryDTO,
+    PriceQueryDTO,
+    PriceBatchResultDTO,
+    PriceBatchResponseDTO
+)
+from infrastructure.config import Config
 from infrastructure.export import ExcelExportService
+from infrastructure.telemetry import span
+from infrastructure.telemetry.metrics import EXPORT_DURATION, EXPORTS
+
+def ensure_region_mapping(unmapped_municipalities: int) -> None:
+    """
+    Recusa os recursos que usam o mapeamento local de municípios por região
+    (agrupamentos por região e municípios de uma região) enquanto houver
+    municípios sem região conhecida.
+    
+    Sem o mapeamento completo, esses recursos omitiriam os municípios sem
+    região sem aviso; o mapeamento é completado pela atualização dos
+    territórios a partir da API do TCE-MG. Consultas com escopo de região
+    não passam por aqui: a API do TCE-MG filtra as regiões (``codRegioes``).
+    
+    Args:
+        unmapped_municipalities: Quantidade de municípios sem região
+        
+    Raises:
+        HTTPException: 503, se o mapeamento estiver incompleto
+    """
+    if unmapped_municipalities:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=(
+                f"Agrupamentos por região indisponíveis: {unmapped_municipalities} municípios ainda sem "
+                "região conhecida. Tente novamente após a atualização dos territórios."
+            )
+        )
+
+
+def encode_ndjson(columns: PriceColumns, product_name: str) -> bytes:
+    """
+    Codifica um lote de registros de preço em NDJSON (um objeto JSON por linha).
+    
+    Os campos são os mesmos de PriceRecordDTO. As colunas são convertidas de
+    uma vez (datas em ISO, preços em float) em vez de registro a registro.
+    
+    Args:
+        columns: Lote de registros em formato colunar
+        product_name: Nome do produto
+        
+    Returns:
+        Linhas codificadas em UTF-8, cada uma terminada por quebra de linha
+    """
+    dates = np.datetime_as_string(columns.dates, unit="D").tolist()
+    rows = zip(columns.ids.tolist(), dates, columns.municipalities.tolist(), columns.prices.tolist())
+    
+    if orjson is not None:
+        dumps = orjson.dumps
+        return b"".join(
+            dumps({
+                "id": record_id,
+                "product_id": columns.product_id,
+                "product_name": product_name,
+                "unit": columns.unit,
+                "date": record_date,
+                "municipality": municipality,
+                "unit_price": unit_price
+            }) + b"\n"
+            for record_id, record_date, municipality, unit_price in rows
+        )
+    
+    return "".join(
+        json.dumps({
+            "id": record_id,
+            "product_id": columns.product_id,
+            "product_name": product_name,
+            "unit": columns.unit,
+            "date": record_date,
+            "municipality": municipality,
+            "unit_price": unit_price
+        }, ensure_ascii=False) + "\n"
+        for record_id, record_date, municipality, unit_price in rows
+    ).encode("utf-8")
+
 
 class ProductController:
     """Controlador para operações relacionadas a produtos."""
@@ -37,7 +134,8 @@ class ProductController:
         
         products = await self.product_service.search_products(search_term)
         
-        return [ProductDTO.from_entity(product) for product in products]
+        with span("dto"):
+            return [ProductDTO.from_entity(product) for product in products]
     
     async def get_product(self, product_id: str) -> ProductDTO:
         """
@@ -80,7 +178,8 @@ class TerritoryController:
         
         regions = await self.territory_service.get_regions()
         
-        return [TerritoryDTO.from_entity(region) for region in regions]
+        with span("dto"):
+            return [TerritoryDTO.from_entity(region) for region in regions]
     
     async def get_municipalities(self, region_code: str = None) -> List[TerritoryDTO]:
         """
@@ -94,9 +193,13 @@ class TerritoryController:
         """
         self.logger.info(f"Buscando municípios{' da região ' + region_code if region_code else ''}")
         
+        if region_code:
+            ensure_region_mapping(await self.territory_service.get_unmapped_municipalities())
+        
         municipalities = await self.territory_service.get_municipalities(region_code)
         
-        return [TerritoryDTO.from_entity(municipality) for municipality in municipalities]
+        with span("dto"):
+            return [TerritoryDTO.from_entity(municipality) for municipality in municipalities]
 
 
 class PriceController:
@@ -107,49 +210,81 @@ class PriceController:
         self.product_service = product_service
         self.logger = logging.getLogger(__name__)
     
-    async def get_price_history(
+    async def _validate_price_query(
         self,
         product_id: str,
-        unit: str,
         territory_type: str,
         region_codes: List[str] = None,
         municipality_codes: List[str] = None,
-        year: int = None
-    ) -> List[PriceRecordDTO]:
+        group_by: str = None
+    ) -> Product:
         """
-        Obtém o histórico de preços de acordo com os parâmetros.
+        Valida os parâmetros comuns às consultas de preço.
         
         Args:
             product_id: ID do produto
-            unit: Unidade do produto
             territory_type: Tipo de território (ESTADO, REGIAO, MUNICIPIO)
             region_codes: Lista de códigos de região (opcional)
             municipality_codes: Lista de códigos de município (opcional)
-            year: Ano de referência (opcional)
+            group_by: Quebra territorial (opcional)
             
         Returns:
-            Lista de DTOs de registros de preço
+            Produto consultado
         """
-        self.logger.info(f"Buscando histórico de preços para produto {product_id}, unidade {unit}")
+        territory_enum = self._validate_territory_type(territory_type)
+        
+        # Valida a existência do produto
+        product = await self.product_service.get_product(product_id)
+        self._validate_product(product_id, product)
         
-        # Valida o tipo de território
+        self._validate_territory_codes(territory_enum, region_codes, municipality_codes)
+        await self._validate_region_mapping(group_by)
+        
+        return product
+    
+    async def _validate_region_mapping(self, group_by: str = None) -> None:
+        """Recusa agrupamentos por região enquanto o mapeamento de municípios estiver incompleto."""
+        if group_by == TerritoryType.REGION.value:
+            ensure_region_mapping(await self.price_service.get_unmapped_municipalities())
+    
+    @staticmethod
+    def _validate_territory_type(territory_type: str) -> TerritoryType:
+        """Valida o tipo de território (ESTADO, REGIAO, MUNICIPIO)."""
         try:
-            territory_enum = TerritoryType(territory_type)
+            return TerritoryType(territory_type)
         except ValueError:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Tipo de território inválido: {territory_type}. Deve ser ESTADO, REGIAO ou MUNICIPIO."
             )
-        
-        # Valida a existência do produto
-        product = await self.product_service.get_product(product_id)
+    
+    @staticmethod
+    def _validate_product(product_id: str, product: Optional[Product]) -> None:
+        """Valida a existência do produto consultado."""
         if not product:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Produto com ID {product_id} não encontrado."
             )
-        
-        # Valida códigos de região/município de acordo com o tipo de território
+    
+    @staticmethod
+    def _validate_units(unit: str, units: List[str] = None) -> None:
+        """Valida se as unidades a mesclar têm a mesma unidade base da unidade consultada."""
+        try:
+            common_base_unit([unit, *(units or [])])
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+    
+    @staticmethod
+    def _validate_territory_codes(
+        territory_enum: TerritoryType,
+        region_codes: List[str] = None,
+        municipality_codes: List[str] = None
+    ) -> None:
+        """Valida os códigos de região/município de acordo com o tipo de território."""
         if territory_enum == TerritoryType.REGION and not region_codes:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -161,6 +296,38 @@ class PriceController:
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Códigos de município são obrigatórios quando o tipo de território é MUNICIPIO."
             )
+    
+    async def get_price_history(
+        self,
+        product_id: str,
+        unit: str,
+        territory_type: str,
+        region_codes: List[str] = None,
+        municipality_codes: List[str] = None,
+        year: int = None,
+        units: List[str] = None,
+        normalize: bool = False
+    ) -> List[PriceRecordDTO]:
+        """
+        Obtém o histórico de preços de acordo com os parâmetros.
+        
+        Args:
+            product_id: ID do produto
+            unit: Unidade do produto
+            territory_type: Tipo de território (ESTADO, REGIAO, MUNICIPIO)
+            region_codes: Lista de códigos de região (opcional)
+            municipality_codes: Lista de códigos de município (opcional)
+            year: Ano de referência (opcional)
+            units: Outras unidades do produto a mesclar (opcional; implica ``normalize``)
+            normalize: Converte os preços para a unidade base (ex.: CAIXA 100,00 UN -> UN)
+            
+        Returns:
+            Lista de DTOs de registros de preço
+        """
+        self.logger.info(f"Buscando histórico de preços para produto {product_id}, unidade {unit}")
+        
+        product = await self._validate_price_query(product_id, territory_type, region_codes, municipality_codes)
+        self._validate_units(unit, units)
         
         # Busca o histórico de preços
         price_records = await self.price_service.get_price_history(
@@ -169,15 +336,363 @@ class PriceController:
             territory_type=territory_type,
             region_codes=region_codes,
             municipality_codes=municipality_codes,
-            year=year
+            year=year,
+            units=units,
+            normalize=normalize
         )
         
         # Adiciona o nome do produto aos registros
         for record in price_records:
             record.product_name = product.name
         
-        return [PriceRecordDTO.from_entity(record) for record in price_records]
+        with span("dto"):
+            return [PriceRecordDTO.from_entity(record) for record in price_records]
+    
+    async def stream_price_history(
+        self,
+        product_id: str,
+        unit: str,
+        territory_type: str,
+        region_codes: List[str] = None,
+        municipality_codes: List[str] = None,
+        year: int = None,
+        batch_size: int = 1000,
+        units: List[str] = None,
+        normalize: bool = False
+    ) -> AsyncIterator[bytes]:
+        """
+        Obtém o histórico de preços como um fluxo NDJSON.
+        
+        A validação acontece antes de devolver o fluxo, para que erros de
+        parâmetro ainda possam ser respondidos com o código HTTP adequado.
+        
+        Args:
+            product_id: ID do produto
+            unit: Unidade do produto
+            territory_type: Tipo de território (ESTADO, REGIAO, MUNICIPIO)
+            region_codes: Lista de códigos de região (opcional)
+            municipality_codes: Lista de códigos de município (opcional)
+            year: Ano de referência (opcional)
+            batch_size: Quantidade de registros por pedaço da resposta
+            units: Outras unidades do produto a mesclar (opcional; implica ``normalize``)
+            normalize: Converte os preços para a unidade base (ex.: CAIXA 100,00 UN -> UN)
+            
+        Returns:
+            Iterador assíncrono de pedaços NDJSON
+        """
+        self.logger.info(f"Transmitindo histórico de preços para produto {product_id}, unidade {unit}")
+        
+        product = await self._validate_price_query(product_id, territory_type, region_codes, municipality_codes)
+        self._validate_units(unit, units)
+        
+        batches = self.price_service.iter_price_history(
+            product_id=product_id,
+            unit=unit,
+            territory_type=territory_type,
+            region_codes=region_codes,
+            municipality_codes=municipality_codes,
+            year=year,
+            batch_size=batch_size,
+            units=units,
+            normalize=normalize
+        )
+        
+        async def lines():
+            async for batch in batches:
+                yield encode_ndjson(batch, product.name)
+        
+        return lines()
 
+    
+    async def get_price_timeseries(
+        self,
+        product_id: str,
+        unit: str,
+        territory_type: str,
+        region_codes: List[str] = None,
+        municipality_codes: List[str] = None,
+        year: int = None,
+        granularity: str = TimeGranularity.MONTH.value,
+        group_by: str = None,
+        max_points: int = 120,
+        units: List[str] = None,
+        normalize: bool = False
+    ) -> List[PriceAggregateDTO]:
+        """
+        Obtém a série temporal agregada de preços.
+        
+        Args:
+            product_id: ID do produto
+            unit: Unidade do produto
+            territory_type: Tipo de território (ESTADO, REGIAO, MUNICIPIO)
+            region_codes: Lista de códigos de região (opcional)
+            municipality_codes: Lista de códigos de município (opcional)
+            year: Ano de referência (opcional)
+            granularity: Granularidade temporal (DIA, SEMANA, MES, TRIMESTRE)
+            group_by: Quebra territorial (MUNICIPIO ou REGIAO, opcional)
+            max_points: Número máximo de pontos por série
+            units: Outras unidades do produto a mesclar (opcional; implica ``normalize``)
+            normalize: Converte os preços para a unidade base (ex.: CAIXA 100,00 UN -> UN)
+            
+        Returns:
+            Lista de DTOs de agregados de preço
+        """
+        self.logger.info(f"Buscando série temporal de preços para produto {product_id}, unidade {unit}, granularidade {granularity}")
+        
+        try:
+            TimeGranularity(granularity)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Granularidade inválida: {granularity}. Deve ser DIA, SEMANA, MES ou TRIMESTRE."
+            )
+        
+        if group_by and group_by not in (TerritoryType.MUNICIPALITY.value, TerritoryType.REGION.value):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Agrupamento inválido: {group_by}. Deve ser MUNICIPIO ou REGIAO."
+            )
+        
+        await self._validate_price_query(product_id, territory_type, region_codes, municipality_codes, group_by)
+        self._validate_units(unit, units)
+        
+        aggregates = await self.price_service.get_price_timeseries(
+            product_id=product_id,
+            unit=unit,
+            territory_type=territory_type,
+            region_codes=region_codes,
+            municipality_codes=municipality_codes,
+            year=year,
+            granularity=granularity,
+            group_by=group_by,
+            max_points=max_points,
+            units=units,
+            normalize=normalize
+        )
+        
+        with span("dto"):
+            return [PriceAggregateDTO.from_entity(aggregate) for aggregate in aggregates]
+    
+    async def get_region_rollup(
+        self,
+        product_id: str,
+        unit: str,
+        year: int = None,
+        units: List[str] = None,
+        normalize: bool = False
+    ) -> List[PriceSummaryDTO]:
+        """
+        Obtém o resumo de preços de todo o estado agrupado por região.
+        
+        Args:
+            product_id: ID do produto
+            unit: Unidade do produto
+            year: Ano de referência (opcional)
+            units: Outras unidades do produto a mesclar (opcional; implica ``normalize``)
+            normalize: Converte os preços para a unidade base (ex.: CAIXA 100,00 UN -> UN)
+            
+        Returns:
+            Lista de DTOs de resumo de preço por região
+        """
+        self.logger.info(f"Buscando resumo regional de preços para produto {product_id}, unidade {unit}")
+        
+        await self._validate_price_query(product_id, TerritoryType.STATE.value, group_by=TerritoryType.REGION.value)
+        self._validate_units(unit, units)
+        
+        summaries = await self.price_service.get_region_rollup(
+            product_id=product_id,
+            unit=unit,
+            year=year,
+            units=units,
+            normalize=normalize
+        )
+        
+        with span("dto"):
+            return [PriceSummaryDTO.from_entity(summary) for summary in summaries]
+    
+    async def get_price_summary(
+        self,
+        product_id: str,
+        unit: str,
+        territory_type: str,
+        region_codes: List[str] = None,
+        municipality_codes: List[str] = None,
+        year: int = None,
+        group_by: str = None,
+        units: List[str] = None,
+        normalize: bool = False
+    ) -> List[PriceSummaryDTO]:
+        """
+        Obtém o resumo de preços (mediana, percentis, média e extremos) de um escopo territorial.
+        
+        Args:
+            product_id: ID do produto
+            unit: Unidade do produto
+            territory_type: Tipo de território (ESTADO, REGIAO, MUNICIPIO)
+            region_codes: Lista de códigos de região (opcional)
+            municipality_codes: Lista de códigos de município (opcional)
+            year: Ano de referência (opcional)
+            group_by: Quebra territorial (MUNICIPIO ou REGIAO, opcional)
+            units: Outras unidades do produto a mesclar (opcional; implica ``normalize``)
+            normalize: Converte os preços para a unidade base (ex.: CAIXA 100,00 UN -> UN)
+            
+        Returns:
+            Lista de DTOs de resumo de preço
+        """
+        self.logger.info(f"Buscando resumo de preços para produto {product_id}, unidade {unit}, território {territory_type}")
+        
+        if group_by and group_by not in (TerritoryType.MUNICIPALITY.value, TerritoryType.REGION.value):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Agrupamento inválido: {group_by}. Deve ser MUNICIPIO ou REGIAO."
+            )
+        
+        await self._validate_price_query(product_id, territory_type, region_codes, municipality_codes, group_by)
+        self._validate_units(unit, units)
+        
+        summaries = await self.price_service.get_price_summary(
+            product_id=product_id,
+            unit=unit,
+            territory_type=territory_type,
+            region_codes=region_codes,
+            municipality_codes=municipality_codes,
+            year=year,
+            group_by=group_by,
+            units=units,
+            normalize=normalize
+        )
+        
+        with span("dto"):
+            return [PriceSummaryDTO.from_entity(summary) for summary in summaries]
+
+    async def get_price_batch(
+        self,
+        queries: List[PriceQueryDTO],
+        summary_only: bool = False
+    ) -> PriceBatchResponseDTO:
+        """
+        Executa várias consultas de histórico de preços em uma única requisição.
+        
+        Consultas repetidas (mesmo produto, unidade, território e ano) são
+        executadas uma única vez. Os produtos são resolvidos juntos antes das
+        consultas, e as consultas rodam concorrentemente; o limitador do
+        cliente da API mantém as requisições ao TCE-MG dentro dos limites.
+        Um erro em uma consulta não interrompe as demais: cada resultado traz
+        o seu próprio status HTTP.
+        
+        Args:
+            queries: Consultas de preço
+            summary_only: Retorna apenas o resumo (mediana, percentis) de cada consulta
+            
+        Returns:
+            DTO com os resultados, na mesma ordem das consultas
+        """
+        if not queries:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Informe ao menos uma consulta."
+            )
+        
+        if len(queries) > Config.BATCH_MAX_QUERIES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Máximo de {Config.BATCH_MAX_QUERIES} consultas por requisição."
+            )
+        
+        unique_queries = {}
+        for query in queries:
+            unique_queries.setdefault(self._batch_query_key(query), query)
+        
+        self.logger.info(f"Executando {len(unique_queries)} consultas de preço em lote ({len(queries)} recebidas)")
+        
+        products = await self.product_service.get_products(query.product_id for query in unique_queries.values())
+        
+        outcomes = await asyncio.gather(*(
+            self._run_batch_query(query, products.get(query.product_id), summary_only)
+            for query in unique_queries.values()
+        ))
+        outcomes = dict(zip(unique_queries.keys(), outcomes))
+        
+        results = [
+            PriceBatchResultDTO(query=query, **outcomes[self._batch_query_key(query)])
+            for query in queries
+        ]
+        return PriceBatchResponseDTO(results=results, unique_queries=len(unique_queries))
+    
+    @staticmethod
+    def _batch_query_key(query: PriceQueryDTO) -> tuple:
+        """Chave que identifica consultas equivalentes (a ordem dos códigos não importa)."""
+        return (
+            query.product_id,
+            query.unit,
+            query.territory_type,
+            tuple(sorted(set(query.region_codes or []))),
+            tuple(sorted(set(query.municipality_codes or []))),
+            query.year
+        )
+    
+    async def _run_batch_query(
+        self,
+        query: PriceQueryDTO,
+        product: Optional[Product],
+        summary_only: bool
+    ) -> dict:
+        """
+        Executa uma consulta do lote, convertendo erros em um resultado.
+        
+        Args:
+            query: Consulta de preço
+            product: Produto já resolvido (None se não encontrado)
+            summary_only: Retorna apenas o resumo
+            
+        Returns:
+            Campos do resultado (status e registros, resumo ou erro)
+        """
+        try:
+            territory_enum = self._validate_territory_type(query.territory_type)
+            self._validate_product(query.product_id, product)
+            self._validate_territory_codes(territory_enum, query.region_codes, query.municipality_codes)
+            
+            if summary_only:
+                summaries = await self.price_service.get_price_summary(
+                    product_id=query.product_id,
+                    unit=query.unit,
+                    territory_type=query.territory_type,
+                    region_codes=query.region_codes,
+                    municipality_codes=query.municipality_codes,
+                    year=query.year
+                )
+                with span("dto"):
+                    return {
+                        "status": status.HTTP_200_OK,
+                        "summary": [PriceSummaryDTO.from_entity(summary) for summary in summaries]
+                    }
+            
+            price_records = await self.price_service.get_price_history(
+                product_id=query.product_id,
+                unit=query.unit,
+                territory_type=query.territory_type,
+                region_codes=query.region_codes,
+                municipality_codes=query.municipality_codes,
+                year=query.year
+            )
+            for record in price_records:
+                record.product_name = product.name
+            
+            with span("dto"):
+                return {
+                    "status": status.HTTP_200_OK,
+                    "records": [PriceRecordDTO.from_entity(record) for record in price_records]
+                }
+            
+        except HTTPException as e:
+            return {"status": e.status_code, "error": e.detail}
+        except Exception as e:
+            self.logger.error(f"Erro na consulta em lote do produto {query.product_id}: {e}")
+            return {
+                "status": status.HTTP_500_INTERNAL_SERVER_ERROR,
+                "error": "Erro ao consultar o histórico de preços."
+            }
 
 class ExportController:
     """Controlador para operações de exportação de dados."""
@@ -221,10 +736,19 @@ class ExportController:
             filename = f"historico_precos_{product_slug}_{timestamp}.xlsx"
         
         # Exporta para Excel
-        excel_buffer = self.export_service.export_to_excel(
-            data=data,
-            filename=filename,
-            sheet_name=f"{product_name} ({unit})"
-        )
+        started = time.perf_counter()
+        try:
+            with span("export"):
+                excel_buffer = self.export_service.export_to_excel(
+                    data=data,
+                    filename=filename,
+                    sheet_name=f"{product_name} ({unit})"
+                )
+        except Exception:
+            EXPORTS.labels("xlsx", "error").inc()
+            raise
+        finally:
+            EXPORT_DURATION.labels("xlsx").observe(time.perf_counter() - started)
         
+        EXPORTS.labels("xlsx", "success").inc()
         return excel_buffer.getvalue() 
\ No newline at end of file
@@ -1,8 +1,9 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import date
 
 from domain.entities import Product, Territory, PriceRecord
+from domain.price_series import PriceAggregate, PriceSummary
 
 class ProductDTO(BaseModel):
     """DTO para representação de produtos na API."""
@@ -83,4 +84,110 @@ class PriceRecordDTO(BaseModel):
             date=entity.date if isinstance(entity.date, date) else date.fromisoformat(entity.date),
             municipality=entity.municipality,
             unit_price=entity.unit_price
-        ) 
\ No newline at end of file
+        ) 
+
+
+class PriceAggregateDTO(BaseModel):
+    """DTO para representação de agregados de preço por período na API."""
+    period_start: date
+    period_end: date
+    count: int
+    median: float
+    p10: float
+    p90: float
+    min: float
+    max: float
+    group_id: Optional[str] = None
+    group_name: Optional[str] = None
+    
+    @classmethod
+    def from_entity(cls, entity: PriceAggregate) -> 'PriceAggregateDTO':
+        """
+        Converte um agregado de domínio para DTO.
+        
+        Args:
+            entity: Agregado de preços
+            
+        Returns:
+            DTO de agregado de preços
+        """
+        return cls(
+            period_start=entity.period_start,
+            period_end=entity.period_end,
+            count=entity.count,
+            median=entity.median,
+            p10=entity.p10,
+            p90=entity.p90,
+            min=entity.min,
+            max=entity.max,
+            group_id=entity.group_id,
+            group_name=entity.group_name
+        )
+
+
+class PriceSummaryDTO(BaseModel):
+    """DTO para representação de resumos de preço por grupo territorial na API."""
+    group_id: Optional[str] = None
+    group_name: Optional[str] = None
+    count: int
+    mean: float
+    median: float
+    p10: float
+    p90: float
+    min: float
+    max: float
+    
+    @classmethod
+    def from_entity(cls, entity: PriceSummary) -> 'PriceSummaryDTO':
+        """
+        Converte um resumo de domínio para DTO.
+        
+        Args:
+            entity: Resumo de preços
+            
+        Returns:
+            DTO de resumo de preços
+        """
+        return cls(
+            group_id=entity.group_id,
+            group_name=entity.group_name,
+            count=entity.count,
+            mean=entity.mean,
+            median=entity.median,
+            p10=entity.p10,
+            p90=entity.p90,
+            min=entity.min,
+            max=entity.max
+        )
+
+
+
+class PriceQueryDTO(BaseModel):
+    """DTO de uma consulta de preços dentro de uma requisição em lote."""
+    product_id: str
+    unit: str
+    territory_type: str
+    region_codes: Optional[List[str]] = None
+    municipality_codes: Optional[List[str]] = None
+    year: Optional[int] = None
+
+
+class PriceBatchRequestDTO(BaseModel):
+    """DTO da requisição de consultas de preço em lote."""
+    queries: List[PriceQueryDTO]
+    summary_only: bool = False
+
+
+class PriceBatchResultDTO(BaseModel):
+    """DTO do resultado de uma consulta de preços em lote."""
+    query: PriceQueryDTO
+    status: int
+    records: Optional[List[PriceRecordDTO]] = None
+    summary: Optional[List[PriceSummaryDTO]] = None
+    error: Optional[str] = None
+
+
+class PriceBatchResponseDTO(BaseModel):
+    """DTO da resposta de consultas de preço em lote, na ordem das consultas."""
+    results: List[PriceBatchResultDTO]
+    unique_queries: int
@@ -0,0 +1,14 @@
+"""
+Scripts de benchmark e de validação de desempenho do sistema.
+
+Execute a partir do diretório ``backend``, por exemplo:
+    python -m benchmarks.quantile_sketch_accuracy
+
+A suíte completa (teste de carga contra a API do TCE-MG simulada e
+microbenchmarks, com linha de base e comparação) é executada com:
+    python -m benchmarks.suite --output benchmarks/baseline.json
+    python -m benchmarks.suite --compare benchmarks/baseline.json
+
+Conjuntos de dados sintéticos com milhões de registros (Parquet ou .npz):
+    python -m benchmarks.synthetic_data --rows 5000000 --output precos.parquet
+"""
@@ -0,0 +1,133 @@
+"""
+Mede o efeito do aquecimento do cache em uma carga com popularidade
+concentrada (distribuição de Zipf), contra a API do TCE-MG simulada.
+
+Uma primeira carga preenche o registro de popularidade; o cache é então
+esvaziado (como depois da expiração ou de uma reinicialização) e uma
+segunda carga, com a mesma distribuição e outra semente, é executada sem e
+com aquecimento prévio. São comparados a taxa de acertos, as requisições à
+API e a latência média das consultas da segunda carga.
+
+Uso:
+    python -m benchmarks.cache_warming [--queries 2000] [--products 200]
+        [--skew 1.1] [--top-k 100] [--budget 100] [--latency fixed:30]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+from benchmarks.fake_tce_server import FakeTCEMGServer, LatencyModel, SyntheticCatalog, serve_in_background
+from domain.entities import TerritoryType
+from domain.value_objects import PricePeriod, ProductFilter, TerritoryScope
+from infrastructure.config import Config
+
+# Escopos consultados: o estado inteiro e algumas regiões
+_SCOPES = [TerritoryScope(TerritoryType.STATE)] + [
+    TerritoryScope(TerritoryType.REGION, region_codes=[str(code)]) for code in range(1, 6)
+]
+
+
+def zipf_queries(count: int, products: int, skew: float, seed: int) -> List[Tuple[str, int, int]]:
+    """
+    Sorteia consultas (produto, escopo, ano) com popularidade de Zipf.
+
+    Returns:
+        Lista de tuplas (ID do produto, índice do escopo, ano)
+    """
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, products + 1) ** skew
+    chosen = rng.choice(products, size=count, p=weights / weights.sum())
+    scopes = rng.choice(len(_SCOPES), size=count, p=[0.6] + [0.08] * (len(_SCOPES) - 1))
+    years = rng.choice([2024, 2023], size=count, p=[0.8, 0.2])
+    return [(str(1001 + int(product)), int(scope), int(year)) for product, scope, year in zip(chosen, scopes, years)]
+
+
+async def run_queries(repository, queries: List[Tuple[str, int, int]]) -> float:
+    """Executa as consultas em sequência e devolve a latência média, em milissegundos."""
+    started = time.perf_counter()
+    for product_id, scope, year in queries:
+        await repository.get_price_columns(
+            ProductFilter(product_id=product_id, unit="UNIDADE"),
+            _SCOPES[scope],
+            PricePeriod(year=year)
+        )
+    return (time.perf_counter() - started) * 1000 / len(queries)
+
+
+async def scenario(args, server: FakeTCEMGServer, warm: bool) -> dict:
+    """Executa as duas cargas, com ou sem aquecimento entre elas."""
+    from infrastructure.cache import CacheService, CacheWarmer, PopularityLog
+    from infrastructure.external import TCEMGApiClient
+    from infrastructure.repositories import TCEMGPriceRepository
+
+    cache = CacheService()
+    log = PopularityLog()
+    client = TCEMGApiClient()
+    repository = TCEMGPriceRepository(client, cache, log)
+    warmer = CacheWarmer(
+        cache, log, client.rate_limiter, {"prices:history": repository.refresh_history},
+        top_k=args.top_k, budget=args.budget, interval=0, refresh_ahead=0
+    )
+
+    try:
+        await run_queries(repository, zipf_queries(args.queries, args.products, args.skew, args.seed))
+        cache.clear()
+
+        warm_ms = 0.0
+        if warm:
+            started = time.perf_counter()
+            await warmer.warm()
+            warm_ms = (time.perf_counter() - started) * 1000
+
+        before = sum(server.requests.values())
+        queries = zipf_queries(args.queries, args.products, args.skew, args.seed + 1)
+        latency = await run_queries(repository, queries)
+        upstream = sum(server.requests.values()) - before
+    finally:
+        await client.close()
+
+    return {
+        "hit_ratio": 1 - upstream / len(queries),
+        "upstream": upstream,
+        "latency_ms": latency,
+        "warm_ms": warm_ms
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Efeito do aquecimento do cache")
+    parser.add_argument("--queries", type=int, default=2000, help="Consultas em cada carga")
+    parser.add_argument("--products", type=int, default=200, help="Produtos consultados")
+    parser.add_argument("--skew", type=float, default=1.1, help="Expoente da distribuição de Zipf")
+    parser.add_argument("--top-k", type=int, default=100, help="Consultas populares aquecidas")
+    parser.add_argument("--budget", type=int, default=100, help="Requisições do aquecimento")
+    parser.add_argument("--latency", default="fixed:30", help="Latência simulada da API")
+    parser.add_argument("--seed", type=int, default=0, help="Semente das cargas")
+    args = parser.parse_args()
+
+    server = FakeTCEMGServer(
+        SyntheticCatalog(products=args.products, history_rows=200),
+        LatencyModel.parse(args.latency, args.seed)
+    )
+    with serve_in_background(server) as url:
+        os.environ["TCE_API_BASE_URL"] = url
+        Config.setup()
+        Config.TCE_MAX_REQUESTS_PER_SECOND = 0
+
+        for warm in (False, True):
+            result = asyncio.run(scenario(args, server, warm))
+            name = "com aquecimento" if warm else "sem aquecimento"
+            print(
+                f"{name:<16} acertos {result['hit_ratio']:>6.1%}  requisições à API {result['upstream']:>5}  "
+                f"latência média {result['latency_ms']:>6.2f} ms  aquecimento {result['warm_ms']:>7.0f} ms"
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
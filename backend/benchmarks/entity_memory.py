@@ -0,0 +1,119 @@
+"""
+Mede a memória e o tempo de construção e conversão das entidades de preço
+com um histórico sintético de 1 milhão de registros.
+
+Compara o ``PriceRecord`` atual (``__slots__`` e textos internados) com uma
+classe equivalente com ``__dict__`` por instância e textos não compartilhados,
+como eram as entidades antes, e mede os caminhos de conversão em lote:
+construtor com verificações, ``PriceRecord.from_records``,
+``PriceRecord.to_records``, ``to_dict`` e ``PriceColumns.to_records``.
+
+A memória é a retida pelos registros criados; nas duas primeiras medidas o
+tempo inclui a criação das tuplas de entrada, com textos não compartilhados.
+
+Uso:
+    python -m benchmarks.entity_memory [--rows 1000000] [--seed 0]
+"""
+
+import argparse
+import gc
+import time
+import tracemalloc
+from typing import Callable, Optional, Tuple
+
+from domain.entities import PriceRecord
+from infrastructure.synthetic import SyntheticPriceGenerator
+
+
+class LegacyPriceRecord:
+    """Registro de preço com ``__dict__`` por instância, para comparação."""
+
+    def __init__(self, id, product_id, product_name, unit, date, municipality, unit_price):
+        self.id = id
+        self.product_id = product_id
+        self.product_name = product_name
+        self.unit = unit
+        self.date = date
+        self.municipality = municipality
+        self.unit_price = unit_price
+
+
+def _copy(text: str) -> str:
+    """Cópia de um texto em um novo objeto (sem compartilhar a string original)."""
+    return text.encode("utf-8").decode("utf-8")
+
+
+def timed(function: Callable[[], object]) -> Tuple[object, float]:
+    """Executa a função e devolve o resultado e a duração, em segundos."""
+    gc.collect()
+    started = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - started
+
+
+def traced_memory(function: Callable[[], object]) -> Tuple[object, int]:
+    """Executa a função e devolve o resultado e a memória alocada que ele retém, em bytes."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = function()
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, retained
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Memória e construção das entidades de preço")
+    parser.add_argument("--rows", type=int, default=1000000, help="Quantidade de registros")
+    parser.add_argument("--seed", type=int, default=0, help="Semente dos dados sintéticos")
+    args = parser.parse_args()
+
+    columns = SyntheticPriceGenerator(seed=args.seed).price_columns("1001", "CAIXA 100,00 UN", args.rows)
+
+    ids = columns.ids.tolist()
+    days = columns.dates.tolist()
+    municipalities = columns.municipalities.tolist()
+    prices = columns.prices.tolist()
+
+    def raw():
+        # Tuplas com textos não compartilhados (cópias), como chegam de uma fonte externa
+        for record_id, day, municipality, price in zip(ids, days, municipalities, prices):
+            yield (
+                record_id, _copy("1001"), _copy("AGULHA DESCARTÁVEL 13X4,5"), _copy("CAIXA 100,00 UN"),
+                day, _copy(municipality), price
+            )
+
+    def report(name: str, seconds: float, retained: Optional[int] = None) -> None:
+        memory = f"{retained / args.rows:>8.0f} B/registro" if retained is not None else ""
+        print(f"{name:<34} {seconds:>7.2f} s {args.rows / seconds:>12,.0f} registros/s {memory}")
+
+    _, legacy_memory = traced_memory(lambda: [LegacyPriceRecord(*row) for row in raw()])
+    _, legacy_time = timed(lambda: [LegacyPriceRecord(*row) for row in raw()])
+    report("legado (__dict__)", legacy_time, legacy_memory)
+
+    _, checked_memory = traced_memory(lambda: [PriceRecord(*row) for row in raw()])
+    records, checked_time = timed(lambda: [PriceRecord(*row) for row in raw()])
+    report("PriceRecord(...)", checked_time, checked_memory)
+
+    tuples = PriceRecord.to_records(records)
+    _, trusted_memory = traced_memory(lambda: PriceRecord.from_records(tuples))
+    _, trusted_time = timed(lambda: PriceRecord.from_records(tuples))
+    report("PriceRecord.from_records", trusted_time, trusted_memory)
+
+    _, to_records_time = timed(lambda: PriceRecord.to_records(records))
+    report("PriceRecord.to_records", to_records_time)
+
+    _, to_dict_time = timed(lambda: [record.to_dict() for record in records])
+    report("to_dict", to_dict_time)
+
+    _, columns_memory = traced_memory(lambda: columns.to_records("AGULHA DESCARTÁVEL 13X4,5"))
+    _, columns_time = timed(lambda: columns.to_records("AGULHA DESCARTÁVEL 13X4,5"))
+    report("PriceColumns.to_records", columns_time, columns_memory)
+
+    print(f"\nMemória por registro: {checked_memory / legacy_memory:.0%} da classe com __dict__")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
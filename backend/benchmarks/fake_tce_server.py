@@ -0,0 +1,395 @@
+"""
+Servidor local que substitui a API do TCE-MG em benchmarks e testes, sem rede.
+
+Atende /produtos, /regioes, /municipios e /precos/historico de dois modos:
+
+- synthetic: respostas sintéticas determinísticas (a mesma consulta sempre
+  devolve os mesmos dados), com tamanho configurável;
+- replay: respostas gravadas pelo cliente com TCE_RECORD_DIR (ver
+  ``infrastructure.external.ResponseRecorder``); com ``--fallback`` as
+  consultas não gravadas recebem respostas sintéticas, sem ele recebem 404.
+
+Em ambos os modos é possível simular a latência (fixa, uniforme ou
+log-normal) e uma taxa de erros da API.
+
+Uso:
+    python -m benchmarks.fake_tce_server [--port 8099] [--history-rows 5000]
+        [--latency lognormal:80:0.5] [--error-rate 0.02] [--error-statuses 503,429]
+        [--mode replay --fixtures fixtures/tce --fallback]
+
+    TCE_API_BASE_URL=http://127.0.0.1:8099 python -m api.launcher
+
+Para gravar respostas reais, execute a aplicação com TCE_RECORD_DIR=fixtures/tce
+apontando para a API do TCE-MG e faça as consultas desejadas.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import random
+import threading
+import unicodedata
+from collections import Counter
+from datetime import date
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+from aiohttp import web
+
+from infrastructure.external import ResponseRecorder
+from infrastructure.synthetic import SyntheticPriceGenerator, synthetic_municipalities, synthetic_regions
+
+try:
+    import orjson
+except ImportError:  # Dependência opcional
+    orjson = None
+    import json
+
+# Registros do histórico de preços por pedaço da resposta
+_CHUNK_ROWS = 5000
+
+_PRODUCT_NOUNS = [
+    "AGULHA DESCARTÁVEL", "SERINGA DESCARTÁVEL", "LUVA DE PROCEDIMENTO", "GAZE HIDRÓFILA",
+    "ALGODÃO HIDRÓFILO", "ESPARADRAPO", "CATETER INTRAVENOSO", "EQUIPO MACROGOTAS",
+    "PAPEL A4", "CANETA ESFEROGRÁFICA", "DETERGENTE NEUTRO", "ÁLCOOL ETÍLICO 70%",
+    "ARROZ TIPO 1", "FEIJÃO CARIOCA", "ÓLEO DE SOJA", "LEITE UHT INTEGRAL",
+    "GASOLINA COMUM", "ÓLEO DIESEL S10", "PNEU 275/80 R22,5", "CIMENTO CP II"
+]
+_PRODUCT_VARIANTS = ["13X4,5", "25X7", "25X8", "40X12", "PEQUENO", "MÉDIO", "GRANDE", "500 ML", "1 L", "5 KG"]
+_PRODUCT_UNITS = ["UNIDADE", "CAIXA 100,00 UN", "PACOTE 500,00 FL", "LITRO", "QUILOGRAMA", "FRASCO 1,00 L"]
+
+
+def _encode(value: Any) -> bytes:
+    """Serializa um valor em JSON (orjson, se instalado)."""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _normalize(text: str) -> str:
+    """Texto em maiúsculas e sem acentos, para a busca de produtos."""
+    return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii").upper()
+
+
+class LatencyModel:
+    """
+    Distribuição da latência simulada das respostas, em milissegundos.
+
+    Formatos aceitos por ``parse``:
+
+    - "0": sem latência;
+    - "fixed:50": sempre 50 ms;
+    - "uniform:20:120": uniforme entre 20 e 120 ms;
+    - "lognormal:80:0.5": log-normal com mediana de 80 ms e desvio (sigma) 0,5,
+      com cauda longa como a de um serviço real.
+    """
+
+    def __init__(self, kind: str = "fixed", params: Sequence[float] = (0,), seed: Optional[int] = None):
+        """
+        Args:
+            kind: Distribuição ("fixed", "uniform" ou "lognormal")
+            params: Parâmetros da distribuição, em milissegundos (sigma adimensional)
+            seed: Semente do sorteio
+        """
+        if kind not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Distribuição de latência desconhecida: {kind}")
+        self.kind = kind
+        self.params = tuple(params)
+        self._random = random.Random(seed)
+
+    @classmethod
+    def parse(cls, spec: str, seed: Optional[int] = None) -> 'LatencyModel':
+        """
+        Cria o modelo a partir da descrição textual.
+
+        Args:
+            spec: Descrição (ex.: "lognormal:80:0.5")
+            seed: Semente do sorteio
+
+        Returns:
+            Modelo de latência
+        """
+        kind, *values = spec.split(":")
+        if not values:
+            return cls("fixed", (float(kind),), seed)
+        return cls(kind, tuple(float(value) for value in values), seed)
+
+    def sample(self) -> float:
+        """Sorteia uma latência, em milissegundos."""
+        if self.kind == "fixed":
+            return self.params[0]
+        if self.kind == "uniform":
+            return self._random.uniform(self.params[0], self.params[1])
+        median, sigma = self.params
+        return self._random.lognormvariate(np.log(median), sigma) if median > 0 else 0.0
+
+
+class SyntheticCatalog:
+    """
+    Dados sintéticos determinísticos: produtos, regiões, municípios e
+    históricos de preço.
+
+    O histórico de uma consulta é gerado por ``SyntheticPriceGenerator`` a
+    partir de uma semente derivada dos parâmetros, portanto a mesma consulta
+    devolve sempre os mesmos registros.
+    """
+
+    def __init__(self, seed: int = 0, products: int = 200, municipalities: int = 853, history_rows: int = 1000):
+        """
+        Args:
+            seed: Semente dos dados
+            products: Quantidade de produtos do catálogo
+            municipalities: Quantidade de municípios
+            history_rows: Registros do histórico de uma consulta de todo o estado
+        """
+        self.seed = seed
+        self.history_rows = history_rows
+
+        self.regions = synthetic_regions()
+        self.generator = SyntheticPriceGenerator(
+            seed=seed,
+            municipalities=synthetic_municipalities(municipalities, seed),
+            products={str(1001 + i): None for i in range(products)}
+        )
+        self.municipalities = [
+            {"codigo": municipality.code, "nome": municipality.name, "codRegiao": municipality.region_code}
+            for municipality in self.generator.municipalities
+        ]
+
+        self.products = []
+        for i in range(products):
+            noun = _PRODUCT_NOUNS[i % len(_PRODUCT_NOUNS)]
+            variant = _PRODUCT_VARIANTS[(i // len(_PRODUCT_NOUNS)) % len(_PRODUCT_VARIANTS)]
+            self.products.append({
+                "id": str(1001 + i),
+                "nome": f"{noun} {variant}",
+                "unidade": _PRODUCT_UNITS[i % len(_PRODUCT_UNITS)]
+            })
+        self._search_names = [_normalize(product["nome"]) for product in self.products]
+
+    def search_products(self, term: str) -> List[Dict[str, str]]:
+        """Produtos cujo nome contém o termo (sem diferenciar maiúsculas e acentos)."""
+        term = _normalize(term or "")
+        return [product for product, name in zip(self.products, self._search_names) if term in name]
+
+    def municipalities_of(self, region_code: Optional[str]) -> List[Dict[str, str]]:
+        """Municípios de uma região (todos, se a região não for informada)."""
+        if not region_code:
+            return self.municipalities
+        return [municipality for municipality in self.municipalities if municipality["codRegiao"] == region_code]
+
+    def _scope(self, params: Dict[str, str]) -> np.ndarray:
+        """Índices dos municípios do escopo territorial da consulta."""
+        scope = params.get("limiteTerritorial", "ESTADO")
+        if scope == "REGIAO" and params.get("codRegioes"):
+            codes = set(params["codRegioes"].split(","))
+            field = "codRegiao"
+        elif scope == "MUNICIPIO" and params.get("codMunicipios"):
+            codes = set(params["codMunicipios"].split(","))
+            field = "codigo"
+        else:
+            return np.arange(len(self.municipalities))
+        return np.array([i for i, municipality in enumerate(self.municipalities) if municipality[field] in codes], dtype=np.int64)
+
+    @staticmethod
+    def _period(params: Dict[str, str]) -> tuple:
+        """Intervalo de datas da consulta (padrão: 2021 a 2024)."""
+        if params.get("exercicio"):
+            year = int(params["exercicio"])
+            start, end = date(year, 1, 1), date(year, 12, 31)
+        else:
+            start, end = date(2021, 1, 1), date(2024, 12, 31)
+        if params.get("dataInicial"):
+            start = max(start, date.fromisoformat(params["dataInicial"]))
+        if params.get("dataFinal"):
+            end = min(end, date.fromisoformat(params["dataFinal"]))
+        return start, end
+
+    def price_history(self, params: Dict[str, str]) -> Iterator[bytes]:
+        """
+        Gera o histórico de preços de uma consulta como um array JSON, em pedaços.
+
+        Args:
+            params: Parâmetros da requisição (idProduto, unidade, limiteTerritorial, ...)
+
+        Returns:
+            Iterador dos pedaços do corpo da resposta
+        """
+        scope = self._scope(params)
+        start, end = self._period(params)
+        share = len(scope) / len(self.municipalities) if self.municipalities else 0
+        days = (end - start).days + 1
+        rows = round(self.history_rows * share * min(1.0, days / 1461)) if len(scope) and days > 0 else 0
+
+        key = "&".join(f"{name}={params[name]}" for name in sorted(params))
+        batch = self.generator.sample(params.get("idProduto", ""), rows, scope, start, end, key)
+        days = batch["date"].astype(str).tolist()
+        where = batch["municipality"].tolist()
+        prices = batch["unit_price"].tolist()
+        quantities = batch["quantity"].tolist()
+
+        yield b"["
+        for offset in range(0, rows, _CHUNK_ROWS):
+            chunk = slice(offset, offset + _CHUNK_ROWS)
+            records = [
+                {
+                    "dataNotaFiscal": day,
+                    "municipio": self.municipalities[position]["nome"],
+                    "codigoMunicipio": self.municipalities[position]["codigo"],
+                    "valorUnitario": price,
+                    "quantidade": quantity
+                }
+                for day, position, price, quantity in zip(days[chunk], where[chunk], prices[chunk], quantities[chunk])
+            ]
+            yield (b"," if offset else b"") + _encode(records)[1:-1]
+        yield b"]"
+
+
+class FakeTCEMGServer:
+    """Aplicação aiohttp que simula a API do TCE-MG."""
+
+    def __init__(
+        self,
+        catalog: Optional[SyntheticCatalog] = None,
+        latency: Optional[LatencyModel] = None,
+        error_rate: float = 0.0,
+        error_statuses: Sequence[int] = (503,),
+        fixtures: Optional[str] = None,
+        fallback: bool = True,
+        seed: Optional[int] = None
+    ):
+        """
+        Args:
+            catalog: Dados sintéticos (padrão: catálogo com a configuração padrão)
+            latency: Latência simulada (padrão: nenhuma)
+            error_rate: Fração das requisições respondidas com erro
+            error_statuses: Status HTTP sorteados para as respostas com erro
+            fixtures: Diretório das respostas gravadas (ativa o modo replay)
+            fallback: No modo replay, responde consultas não gravadas com dados sintéticos
+            seed: Semente do sorteio dos erros
+        """
+        self.catalog = catalog or SyntheticCatalog()
+        self.latency = latency or LatencyModel()
+        self.error_rate = error_rate
+        self.error_statuses = list(error_statuses)
+        self.recorder = ResponseRecorder(fixtures) if fixtures else None
+        self.fallback = fallback
+        self.requests: Counter = Counter()
+        self._random = random.Random(seed)
+
+    def create_app(self) -> web.Application:
+        """Cria a aplicação aiohttp com as rotas da API simulada."""
+        app = web.Application()
+        app.router.add_get("/produtos", self._handle)
+        app.router.add_get("/regioes", self._handle)
+        app.router.add_get("/municipios", self._handle)
+        app.router.add_get("/precos/historico", self._handle)
+        return app
+
+    def _synthetic(self, endpoint: str, params: Dict[str, str]) -> Iterator[bytes]:
+        """Resposta sintética de um endpoint."""
+        if endpoint == "/produtos":
+            return iter([_encode(self.catalog.search_products(params.get("descricao", "")))])
+        if endpoint == "/regioes":
+            return iter([_encode(self.catalog.regions)])
+        if endpoint == "/municipios":
+            return iter([_encode(self.catalog.municipalities_of(params.get("codRegiao")))])
+        return self.catalog.price_history(params)
+
+    async def _handle(self, request: web.Request) -> web.StreamResponse:
+        endpoint = request.path
+        params = dict(request.query)
+
+        delay = self.latency.sample()
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+
+        if self.error_rate and self._random.random() < self.error_rate:
+            status = self._random.choice(self.error_statuses)
+            self.requests[(endpoint, status)] += 1
+            return web.json_response({"erro": "Erro simulado"}, status=status)
+
+        body = self.recorder.load(endpoint, params) if self.recorder else None
+        if body is None and self.recorder and not self.fallback:
+            self.requests[(endpoint, 404)] += 1
+            return web.json_response({"erro": "Consulta não gravada"}, status=404)
+
+        self.requests[(endpoint, 200)] += 1
+        if body is not None:
+            return web.Response(body=body, content_type="application/json")
+
+        response = web.StreamResponse(headers={"Content-Type": "application/json"})
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+        for chunk in self._synthetic(endpoint, params):
+            await response.write(chunk)
+        await response.write_eof()
+        return response
+
+
+@contextlib.contextmanager
+def serve_in_background(server: FakeTCEMGServer, host: str = "127.0.0.1", port: int = 0) -> Iterator[str]:
+    """
+    Executa o servidor simulado em uma thread, com laço de eventos próprio.
+
+    Args:
+        server: Servidor simulado
+        host: Endereço de escuta
+        port: Porta de escuta (0 escolhe uma porta livre)
+
+    Yields:
+        URL base do servidor, para usar em TCE_API_BASE_URL
+    """
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(server.create_app(), access_log=None)
+    loop.run_until_complete(runner.setup())
+    site = web.TCPSite(runner, host, port)
+    loop.run_until_complete(site.start())
+    bound_port = site._server.sockets[0].getsockname()[1]
+
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://{host}:{bound_port}"
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.run_until_complete(runner.cleanup())
+        loop.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Servidor local que simula a API do TCE-MG")
+    parser.add_argument("--host", default="127.0.0.1", help="Endereço de escuta")
+    parser.add_argument("--port", type=int, default=8099, help="Porta de escuta")
+    parser.add_argument("--seed", type=int, default=0, help="Semente dos dados sintéticos e dos sorteios")
+    parser.add_argument("--products", type=int, default=200, help="Produtos do catálogo sintético")
+    parser.add_argument("--municipalities", type=int, default=853, help="Municípios sintéticos")
+    parser.add_argument("--history-rows", type=int, default=1000, help="Registros do histórico de uma consulta do estado")
+    parser.add_argument("--latency", default="0", help='Latência simulada (ex.: "fixed:50", "uniform:20:120", "lognormal:80:0.5")')
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fração das requisições respondidas com erro")
+    parser.add_argument("--error-statuses", default="503", help="Status HTTP dos erros simulados, separados por vírgula")
+    parser.add_argument("--mode", choices=("synthetic", "replay"), default="synthetic", help="Origem das respostas")
+    parser.add_argument("--fixtures", help="Diretório das respostas gravadas (modo replay)")
+    parser.add_argument("--fallback", action="store_true", help="No modo replay, gera respostas sintéticas para consultas não gravadas")
+    args = parser.parse_args()
+
+    if args.mode == "replay" and not args.fixtures:
+        parser.error("--fixtures é obrigatório no modo replay")
+
+    server = FakeTCEMGServer(
+        SyntheticCatalog(args.seed, args.products, args.municipalities, args.history_rows),
+        LatencyModel.parse(args.latency, args.seed),
+        args.error_rate,
+        [int(status) for status in args.error_statuses.split(",")],
+        args.fixtures if args.mode == "replay" else None,
+        args.fallback,
+        args.seed
+    )
+    print(f"API do TCE-MG simulada em http://{args.host}:{args.port} (TCE_API_BASE_URL=http://{args.host}:{args.port})")
+    web.run_app(server.create_app(), host=args.host, port=args.port, print=None, access_log=None)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
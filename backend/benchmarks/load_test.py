@@ -0,0 +1,379 @@
+"""
+Teste de carga de ponta a ponta da API contra a API do TCE-MG simulada
+(ver ``benchmarks.fake_tce_server``), sem rede.
+
+Dois modos de execução:
+
+- inprocess: as requisições são entregues diretamente à aplicação ASGI,
+  sem socket, medindo apenas o custo da aplicação;
+- http: a aplicação roda em um servidor uvicorn na mesma máquina (ou no
+  endereço de ``--url``) e as requisições passam pelo HTTP real.
+
+Cenários:
+
+- search: busca de produtos;
+- history_cold: histórico de preços sempre com parâmetros inéditos (falha
+  no cache, passa pela API simulada);
+- history_warm: o mesmo histórico repetido (acerto no cache);
+- export: exportação do histórico para Excel;
+- batch: consultas em lote (POST /api/prices/batch).
+
+Para cada cenário são medidos a vazão, as latências p50/p95/p99, a taxa de
+erros e a memória residente máxima do processo.
+
+Uso:
+    python -m benchmarks.load_test [--mode inprocess|http] [--scenarios search,history_warm]
+        [--requests 200] [--concurrency 16] [--history-rows 2000]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import tempfile
+import time
+import warnings
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import urlencode
+
+import numpy as np
+
+from benchmarks.fake_tce_server import FakeTCEMGServer, LatencyModel, SyntheticCatalog, serve_in_background
+from infrastructure.config import Config
+
+# Termos de busca e produtos simulados usados nos cenários
+_SEARCH_TERMS = ["agulha", "seringa", "luva", "papel", "caneta", "gasolina", "arroz", "cimento"]
+_PRODUCT_IDS = [str(product_id) for product_id in range(1001, 1011)]
+
+
+class BenchmarkRequest(NamedTuple):
+    """Requisição de um cenário."""
+    method: str
+    path: str
+    params: Sequence[Tuple[str, str]] = ()
+    body: Optional[Any] = None
+
+
+def _history_params(product_id: str, municipality_code: Optional[str] = None, year: Optional[int] = None) -> List[Tuple[str, str]]:
+    """Parâmetros de uma consulta de histórico de preços."""
+    params = [("product_id", product_id), ("unit", "UNIDADE")]
+    if municipality_code:
+        params += [("territory_type", "MUNICIPIO"), ("municipality_codes", municipality_code)]
+    else:
+        params.append(("territory_type", "ESTADO"))
+    if year:
+        params.append(("year", str(year)))
+    return params
+
+
+def _search(i: int, catalog: SyntheticCatalog) -> BenchmarkRequest:
+    return BenchmarkRequest("GET", "/api/products/search", [("q", _SEARCH_TERMS[i % len(_SEARCH_TERMS)])])
+
+
+def _history_cold(i: int, catalog: SyntheticCatalog) -> BenchmarkRequest:
+    # Combinação inédita de produto, município e ano a cada requisição
+    municipality = catalog.municipalities[(i // len(_PRODUCT_IDS)) % len(catalog.municipalities)]["codigo"]
+    year = 2021 + (i // (len(_PRODUCT_IDS) * len(catalog.municipalities))) % 4
+    return BenchmarkRequest("GET", "/api/prices/history", _history_params(_PRODUCT_IDS[i % len(_PRODUCT_IDS)], municipality, year))
+
+
+def _history_warm(i: int, catalog: SyntheticCatalog) -> BenchmarkRequest:
+    return BenchmarkRequest("GET", "/api/prices/history", _history_params("1001"))
+
+
+def _export(i: int, catalog: SyntheticCatalog) -> BenchmarkRequest:
+    params = _history_params("1002", year=2023) + [("product_name", "AGULHA DESCARTAVEL 25X7")]
+    return BenchmarkRequest("GET", "/api/prices/export", params)
+
+
+def _batch(i: int, catalog: SyntheticCatalog) -> BenchmarkRequest:
+    queries = [
+        {
+            "product_id": _PRODUCT_IDS[(i + j) % len(_PRODUCT_IDS)],
+            "unit": "UNIDADE",
+            "territory_type": "MUNICIPIO",
+            "municipality_codes": [catalog.municipalities[j]["codigo"]]
+        }
+        for j in range(20)
+    ]
+    return BenchmarkRequest("POST", "/api/prices/batch", body={"queries": queries, "summary_only": True})
+
+
+# Cenário: (gerador da i-ésima requisição, aquece o cache antes da medição)
+SCENARIOS: Dict[str, Tuple[Callable[[int, SyntheticCatalog], BenchmarkRequest], bool]] = {
+    "search": (_search, True),
+    "history_cold": (_history_cold, False),
+    "history_warm": (_history_warm, True),
+    "export": (_export, True),
+    "batch": (_batch, True)
+}
+
+
+class InProcessDriver:
+    """Entrega as requisições diretamente à aplicação ASGI."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def send(self, request: BenchmarkRequest) -> int:
+        body = json.dumps(request.body).encode("utf-8") if request.body is not None else b""
+        headers = [(b"host", b"benchmark"), (b"accept-encoding", b"identity")]
+        if request.body is not None:
+            headers.append((b"content-type", b"application/json"))
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": request.method,
+            "scheme": "http", "path": request.path, "raw_path": request.path.encode(), "root_path": "",
+            "query_string": urlencode(list(request.params)).encode(), "headers": headers,
+            "client": ("127.0.0.1", 0), "server": ("benchmark", 80),
+        }
+        status = 500
+        sent = False
+
+        async def receive():
+            nonlocal sent
+            if sent:
+                await asyncio.Event().wait()  # Nenhuma mensagem nova até o fim da requisição
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        await self.app(scope, receive, send)
+        return status
+
+    async def close(self) -> None:
+        return None
+
+
+class HTTPDriver:
+    """Envia as requisições por HTTP."""
+
+    def __init__(self, base_url: str, concurrency: int):
+        self.base_url = base_url
+        self.concurrency = concurrency
+        self.session = None
+
+    async def send(self, request: BenchmarkRequest) -> int:
+        if self.session is None:
+            # A sessão precisa ser criada no laço de eventos que a usará
+            import aiohttp
+            self.session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=self.concurrency))
+
+        async with self.session.request(
+            request.method,
+            self.base_url + request.path,
+            params=list(request.params),
+            json=request.body
+        ) as response:
+            await response.read()
+            return response.status
+
+    async def close(self) -> None:
+        if self.session is not None:
+            await self.session.close()
+
+
+def max_rss_mb() -> float:
+    """Memória residente máxima do processo até o momento, em MB."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def run_scenario(
+    driver,
+    name: str,
+    catalog: SyntheticCatalog,
+    requests: int,
+    concurrency: int,
+    offset: int = 0
+) -> Dict[str, Any]:
+    """
+    Executa um cenário em laço fechado: ``concurrency`` clientes enviam a
+    próxima requisição assim que recebem a resposta da anterior.
+
+    Args:
+        driver: Driver das requisições (em processo ou HTTP)
+        name: Nome do cenário
+        catalog: Catálogo da API simulada (códigos de municípios)
+        requests: Quantidade de requisições medidas
+        concurrency: Quantidade de clientes simultâneos
+        offset: Deslocamento do índice das requisições (cenários frios usam parâmetros inéditos)
+
+    Returns:
+        Vazão, latências, taxa de erros e memória máxima do cenário
+    """
+    factory, warm_up = SCENARIOS[name]
+    if warm_up:
+        await driver.send(factory(offset, catalog))
+
+    latencies = np.zeros(requests)
+    statuses: Dict[int, int] = {}
+    next_index = 0
+
+    async def client() -> None:
+        nonlocal next_index
+        while next_index < requests:
+            index = next_index
+            next_index += 1
+            request = factory(offset + index, catalog)
+            started = time.perf_counter()
+            try:
+                status = await driver.send(request)
+            except Exception:
+                status = 0
+            latencies[index] = time.perf_counter() - started
+            statuses[status] = statuses.get(status, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    errors = sum(count for status, count in statuses.items() if not 200 <= status < 400)
+    p50, p95, p99 = np.percentile(latencies * 1000, [50, 95, 99])
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "throughput_rps": round(requests / elapsed, 1),
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "error_rate": round(errors / requests, 4),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "max_rss_mb": round(max_rss_mb(), 1)
+    }
+
+
+def _configure_environment(base_url: str) -> None:
+    """
+    Aponta a aplicação para a API simulada, antes de importá-la.
+
+    Os limites de requisições à API do TCE-MG e a amostragem de latência
+    ficam desativados, salvo configuração explícita, para que o teste meça a
+    aplicação e não os limites. As planilhas do cenário de exportação vão
+    para um diretório temporário, fora do diretório de exportação da
+    aplicação, mesmo que a configuração já tenha sido carregada por outro
+    benchmark no mesmo processo (ex.: benchmarks.suite).
+    """
+    os.environ["TCE_API_BASE_URL"] = base_url
+    os.environ["EXPORT_DIR"] = Config.EXPORT_DIR = tempfile.mkdtemp(prefix="load-test-exports-")
+    os.environ.setdefault("TCE_MAX_REQUESTS_PER_SECOND", "0")
+    os.environ.setdefault("TCE_MAX_CONCURRENT_REQUESTS", "0")
+    os.environ.setdefault("TIMING_SAMPLE_RATE", "0")
+
+
+async def _run_all(
+    driver,
+    catalog: SyntheticCatalog,
+    scenarios: Sequence[str],
+    requests: int,
+    concurrency: int,
+    in_process_app: bool = False
+) -> Dict[str, Any]:
+    results = {}
+    try:
+        for name in scenarios:
+            results[name] = await run_scenario(driver, name, catalog, requests, concurrency)
+    finally:
+        await driver.close()
+        if in_process_app:
+            # A sessão HTTP da aplicação está presa ao laço de eventos desta execução
+            from api.dependencies import Dependencies
+            await Dependencies().api_client.close()
+    return results
+
+
+def run_load_test(
+    mode: str = "inprocess",
+    scenarios: Sequence[str] = tuple(SCENARIOS),
+    requests: int = 200,
+    concurrency: int = 16,
+    history_rows: int = 2000,
+    upstream_latency: str = "fixed:20",
+    url: Optional[str] = None,
+    app_path: str = "api.server:app"
+) -> Dict[str, Any]:
+    """
+    Executa os cenários contra a API do TCE-MG simulada.
+
+    Args:
+        mode: "inprocess" (ASGI direto) ou "http"
+        scenarios: Cenários executados, em ordem
+        requests: Requisições medidas por cenário
+        concurrency: Clientes simultâneos
+        history_rows: Registros do histórico de uma consulta do estado na API simulada
+        upstream_latency: Latência da API simulada (ver ``LatencyModel.parse``)
+        url: No modo http, endereço de um servidor já em execução, configurado
+            com a mesma API simulada (a memória não é medida); sem ele, a
+            aplicação roda neste processo
+        app_path: Aplicação no formato "modulo:atributo"
+
+    Returns:
+        Configuração da execução e resultados por cenário
+    """
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        raise ValueError(f"Cenários desconhecidos: {', '.join(sorted(unknown))}")
+
+    catalog = SyntheticCatalog(history_rows=history_rows)
+    server = FakeTCEMGServer(catalog, LatencyModel.parse(upstream_latency, seed=0))
+    config = {
+        "mode": mode,
+        "requests": requests,
+        "concurrency": concurrency,
+        "history_rows": history_rows,
+        "upstream_latency": upstream_latency
+    }
+
+    # O nome da planilha exportada pode exceder o limite do Excel; o aviso não interessa aqui
+    warnings.filterwarnings("ignore", message="Title is more than 31 characters")
+
+    with serve_in_background(server) as upstream_url:
+        _configure_environment(upstream_url)
+
+        if mode == "http" and url:
+            results = asyncio.run(_run_all(HTTPDriver(url, concurrency), catalog, scenarios, requests, concurrency))
+            for result in results.values():
+                result["max_rss_mb"] = None  # Servidor em outro processo
+            return {"config": config, "scenarios": results}
+
+        from api.launcher import load_app, serve_in_thread
+
+        app, _ = load_app(app_path)
+        if mode == "http":
+            with serve_in_thread(app) as base_url:
+                results = asyncio.run(_run_all(HTTPDriver(base_url, concurrency), catalog, scenarios, requests, concurrency))
+        else:
+            results = asyncio.run(_run_all(InProcessDriver(app), catalog, scenarios, requests, concurrency, True))
+
+    return {"config": config, "scenarios": results}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Teste de carga da API contra a API do TCE-MG simulada")
+    parser.add_argument("--mode", choices=("inprocess", "http"), default="inprocess", help="Modo de execução")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Cenários, separados por vírgula")
+    parser.add_argument("--requests", type=int, default=200, help="Requisições por cenário")
+    parser.add_argument("--concurrency", type=int, default=16, help="Clientes simultâneos")
+    parser.add_argument("--history-rows", type=int, default=2000, help="Registros do histórico do estado na API simulada")
+    parser.add_argument("--upstream-latency", default="fixed:20", help="Latência da API simulada (ex.: lognormal:80:0.5)")
+    parser.add_argument("--url", help="Modo http: endereço de um servidor já em execução")
+    args = parser.parse_args()
+
+    result = run_load_test(
+        args.mode,
+        [name.strip() for name in args.scenarios.split(",") if name.strip()],
+        args.requests,
+        args.concurrency,
+        args.history_rows,
+        args.upstream_latency,
+        args.url
+    )
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,162 @@
+"""
+Microbenchmarks dos trechos quentes do processamento de uma requisição:
+cache em memória, mapeamento dos registros da API do TCE-MG e serialização
+das respostas, além da geração dos dados sintéticos.
+
+Cada medida é a melhor de algumas repetições, em operações (ou registros)
+por segundo; quanto maior, melhor.
+
+Uso:
+    python -m benchmarks.microbenchmarks [--rows 10000] [--min-time 0.2]
+"""
+
+import argparse
+import json
+import time
+from typing import Callable, Dict
+
+from application.controllers import encode_ndjson
+from application.dtos import PriceRecordDTO
+from benchmarks.fake_tce_server import SyntheticCatalog
+from domain.entities import PriceRecord
+from domain.price_series import PriceColumns
+from domain.units import merge_unit_columns, parse_unit
+from domain.value_objects import QueryKey
+from infrastructure.cache import CacheService, PopularityLog
+from infrastructure.repositories.price_history_decoder import PriceHistoryDecoder, decode_price_history
+from infrastructure.repositories.tce_mg_price_repository import map_price_results
+from infrastructure.synthetic import SyntheticPriceGenerator
+
+
+def measure(function: Callable[[], object], items: int = 1, min_time: float = 0.2, repeats: int = 3) -> float:
+    """
+    Mede a vazão de uma função.
+
+    A função é executada em laço até somar ``min_time`` segundos; a medida é
+    a melhor de ``repeats`` repetições, para reduzir o ruído da máquina.
+
+    Args:
+        function: Função medida (sem argumentos)
+        items: Itens processados por chamada (ex.: registros)
+        min_time: Duração mínima de cada repetição, em segundos
+        repeats: Quantidade de repetições
+
+    Returns:
+        Itens por segundo
+    """
+    best = 0.0
+    for _ in range(repeats):
+        calls = 0
+        started = time.perf_counter()
+        elapsed = 0.0
+        while elapsed < min_time:
+            function()
+            calls += 1
+            elapsed = time.perf_counter() - started
+        best = max(best, items * calls / elapsed)
+    return best
+
+
+def _raw_body(rows: int) -> bytes:
+    """Corpo de uma resposta de histórico da API do TCE-MG, gerado pelo catálogo sintético."""
+    catalog = SyntheticCatalog(history_rows=rows)
+    return b"".join(catalog.price_history({"idProduto": "1001", "unidade": "UN", "limiteTerritorial": "ESTADO"}))
+
+
+def run_microbenchmarks(rows: int = 10000, min_time: float = 0.2) -> Dict[str, Dict[str, float]]:
+    """
+    Executa todos os microbenchmarks.
+
+    Args:
+        rows: Registros usados nas medidas de mapeamento e serialização
+        min_time: Duração mínima de cada repetição, em segundos
+
+    Returns:
+        Dicionário do nome da medida para a vazão ("ops_per_s") e a unidade
+    """
+    results: Dict[str, Dict[str, float]] = {}
+
+    def record(name: str, unit: str, function: Callable[[], object], items: int = 1) -> None:
+        results[name] = {"ops_per_s": round(measure(function, items, min_time), 1), "unit": unit}
+
+    # Cache em memória
+    cache = CacheService()
+    small_value = [{"id": str(i), "name": f"PRODUTO {i}", "unit": "UNIDADE"} for i in range(10)]
+    keys = [f"products:search:termo {i}" for i in range(1000)]
+    for key in keys:
+        cache.set(key, small_value)
+    counter = iter(range(10 ** 12))
+
+    record("cache.set", "ops", lambda: cache.set(keys[next(counter) % 1000], small_value))
+    record("cache.get_hit", "ops", lambda: cache.get(keys[next(counter) % 1000]))
+    record("cache.get_miss", "ops", lambda: cache.get("products:search:ausente"))
+
+    # Chave canônica de uma consulta com 100 municípios
+    codes = [str(3100005 + i * 10) for i in range(100)]
+    record("cache.query_key", "ops", lambda: QueryKey(
+        "prices:history", "1001", unit="UN", territory="MUNICIPIO", municipalities=codes
+    ).key)
+
+    # Registro de popularidade (a cada consulta) e seleção das mais populares
+    popularity = PopularityLog()
+    for key in keys:
+        popularity.record(key, "products:search", {"term": key})
+    record("cache.popularity_touch", "ops", lambda: popularity.touch(keys[next(counter) % 1000]))
+    record("cache.popularity_top", "ops", lambda: popularity.top(100))
+
+    # Mapeamento dos registros da API
+    body = _raw_body(rows)
+    raw = json.loads(body)
+    records = map_price_results("1001", "UN", raw)
+    columns = PriceColumns.from_records("1001", "UN", records)
+    cache.set("prices:history:benchmark", columns)
+
+    record("cache.set_columns", "ops", lambda: cache.set("prices:history:benchmark", columns))
+    record("mapping.map_price_results", "rows", lambda: map_price_results("1001", "UN", raw), len(raw))
+    record("mapping.decode_price_history", "rows", lambda: decode_price_history("1001", "UN", body), len(raw))
+    record("mapping.decoder_columns", "rows", lambda: PriceHistoryDecoder("1001", "UN").columns(raw), len(raw))
+    record("mapping.columns_from_records", "rows", lambda: PriceColumns.from_records("1001", "UN", records), len(records))
+    record("mapping.columns_to_records", "rows", lambda: columns.to_records(), len(columns))
+    tuples = PriceRecord.to_records(records)
+    record("entities.from_records", "rows", lambda: PriceRecord.from_records(tuples), len(tuples))
+    record("entities.to_records", "rows", lambda: PriceRecord.to_records(records), len(records))
+
+    # Normalização de unidades: interpretação memorizada e mescla de duas embalagens
+    boxes = PriceColumns(
+        product_id="1001",
+        unit="CAIXA 100,00 UN",
+        ids=columns.ids,
+        dates=columns.dates,
+        municipalities=columns.municipalities,
+        prices=columns.prices * 100
+    )
+    record("units.parse_unit", "ops", lambda: parse_unit("CAIXA 100,00 UN"))
+    record("units.merge_columns", "rows", lambda: merge_unit_columns([columns, boxes]), len(columns) * 2)
+
+    # Serialização das respostas
+    dtos = [PriceRecordDTO.from_entity(record) for record in records]
+    record("serialization.dto_from_entity", "rows", lambda: [PriceRecordDTO.from_entity(record) for record in records], len(records))
+    record("serialization.dto_json", "rows", lambda: json.dumps([dto.dict() for dto in dtos], default=str), len(dtos))
+    record("serialization.ndjson", "rows", lambda: encode_ndjson(columns, "AGULHA"), len(columns))
+
+    # Geração dos dados sintéticos
+    generator = SyntheticPriceGenerator()
+    record("synthetic.sample", "rows", lambda: generator.sample("1001", rows), rows)
+    record("synthetic.price_columns", "rows", lambda: generator.price_columns("1001", "UN", rows), rows)
+
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Microbenchmarks de cache, mapeamento, serialização e dados sintéticos")
+    parser.add_argument("--rows", type=int, default=10000, help="Registros das medidas de mapeamento e serialização")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Duração mínima de cada repetição (segundos)")
+    args = parser.parse_args()
+
+    for name, result in run_microbenchmarks(args.rows, args.min_time).items():
+        print(f"{name:<36} {result['ops_per_s']:>14,.0f} {result['unit']}/s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,133 @@
+"""
+Valida a precisão dos sketches de quantis mesclados contra os quantis exatos do NumPy.
+
+Simula partições (município, ano) de preços com distribuições assimétricas,
+constrói um sketch por partição, mescla-os como faz o serviço de preços para
+regiões, estado e múltiplos anos, e compara o posto de cada quantil estimado
+com o limite de erro de ``KLLSketch.normalized_rank_error``.
+
+Uso:
+    python -m benchmarks.quantile_sketch_accuracy [--k 200] [--partitions 300] [--seed 42]
+
+Retorna código de saída 1 se algum quantil violar o limite de erro.
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from domain.quantile_sketch import KLLSketch
+
+QUANTILES = [0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99]
+
+
+def rank_error(sorted_values: np.ndarray, estimate: float, q: float) -> float:
+    """
+    Calcula o erro de posto normalizado de uma estimativa de quantil.
+
+    Args:
+        sorted_values: Valores exatos ordenados
+        estimate: Quantil estimado
+        q: Quantil desejado
+
+    Returns:
+        Distância entre o posto da estimativa e o posto desejado, como fração de 1
+    """
+    n = len(sorted_values)
+    low = np.searchsorted(sorted_values, estimate, side="left") / n
+    high = np.searchsorted(sorted_values, estimate, side="right") / n
+    if low <= q <= high:
+        return 0.0
+    return min(abs(low - q), abs(high - q))
+
+
+def generate_partitions(rng: np.random.Generator, count: int):
+    """
+    Gera partições de preços com tamanhos e escalas variados.
+
+    Args:
+        rng: Gerador de números aleatórios
+        count: Quantidade de partições
+
+    Returns:
+        Lista de arrays de preços
+    """
+    sizes = rng.zipf(1.6, size=count).clip(1, 20000) * 20
+    scales = rng.lognormal(mean=3.0, sigma=0.8, size=count)
+    return [rng.lognormal(mean=0.0, sigma=0.6, size=size) * scale for size, scale in zip(sizes, scales)]
+
+
+def check(label: str, values: np.ndarray, sketch: KLLSketch, bound: float) -> bool:
+    """
+    Compara os quantis de um sketch com os quantis exatos e imprime o resultado.
+
+    Args:
+        label: Descrição do conjunto validado
+        values: Valores exatos
+        sketch: Sketch correspondente
+        bound: Limite de erro de posto
+
+    Returns:
+        True se todos os quantis respeitam o limite
+    """
+    sorted_values = np.sort(values)
+    estimates = sketch.quantiles(QUANTILES)
+    errors = [rank_error(sorted_values, estimate, q) for estimate, q in zip(estimates, QUANTILES)]
+    worst = max(errors)
+    ok = worst <= bound
+    status = "OK" if ok else "FALHOU"
+    print(f"{label:<28} n={len(values):>9}  erro máximo={worst:.4%}  limite={bound:.4%}  {status}")
+    return ok
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--k", type=int, default=200, help="Parâmetro de precisão dos sketches")
+    parser.add_argument("--partitions", type=int, default=300, help="Quantidade de partições (município, ano)")
+    parser.add_argument("--seed", type=int, default=42, help="Semente dos dados sintéticos")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    bound = KLLSketch.normalized_rank_error(args.k)
+    partitions = generate_partitions(rng, args.partitions)
+
+    started = time.perf_counter()
+    sketches = [KLLSketch.from_values(values, args.k) for values in partitions]
+    build_time = time.perf_counter() - started
+
+    ok = True
+    largest = int(np.argmax([len(values) for values in partitions]))
+    ok &= check("maior partição", partitions[largest], sketches[largest], bound)
+
+    # Uma "região" com um décimo das partições e o "estado" com todas
+    region_size = max(1, args.partitions // 10)
+    groups = [("região (mescla)", slice(0, region_size)), ("estado (mescla)", slice(0, args.partitions))]
+    for label, selection in groups:
+        merged = KLLSketch(args.k)
+        for sketch in sketches[selection]:
+            merged.merge(KLLSketch.from_bytes(sketch.to_bytes()))
+        ok &= check(label, np.concatenate(partitions[selection]), merged, bound)
+
+    started = time.perf_counter()
+    merged = KLLSketch(args.k)
+    for sketch in sketches:
+        merged.merge(sketch)
+    merge_time = time.perf_counter() - started
+
+    all_values = np.concatenate(partitions)
+    started = time.perf_counter()
+    np.quantile(all_values, QUANTILES)
+    exact_time = time.perf_counter() - started
+
+    print(
+        f"\nconstrução: {build_time * 1000:.1f} ms  mescla: {merge_time * 1000:.1f} ms  "
+        f"quantis exatos: {exact_time * 1000:.1f} ms"
+    )
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
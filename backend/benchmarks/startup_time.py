@@ -0,0 +1,109 @@
+"""
+Mede o tempo de inicialização da aplicação (partida a frio e criação de workers).
+
+Cada execução roda em um interpretador novo e mede:
+
+- o tempo de importação do módulo da aplicação e de criação do app;
+- o tempo até a primeira resposta de uma rota que não acessa a API do TCE-MG;
+- a memória residente máxima do processo;
+- quais módulos pesados (pandas, openpyxl) foram carregados.
+
+Uso:
+    python -m benchmarks.startup_time [--runs 5] [--app api.server:app]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+_PROBE = r"""
+import asyncio, json, resource, sys, time
+started = time.perf_counter()
+import importlib
+module_name, _, attribute = sys.argv[1].partition(":")
+app = getattr(importlib.import_module(module_name), attribute or "app")
+imported = time.perf_counter()
+
+async def first_request():
+    messages = []
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": sys.argv[2], "raw_path": sys.argv[2].encode(), "root_path": "",
+        "query_string": b"", "headers": [], "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 80),
+    }
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+    async def send(message):
+        messages.append(message)
+    await app(scope, receive, send)
+    return messages[0]["status"]
+
+status = asyncio.run(first_request())
+answered = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "first_request_ms": (answered - imported) * 1000,
+    "status": status,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "heavy_modules": sorted(name for name in ("pandas", "openpyxl") if name in sys.modules),
+}))
+"""
+
+
+def measure(app_path: str, path: str) -> dict:
+    """
+    Executa uma medição em um interpretador novo.
+
+    Args:
+        app_path: Aplicação no formato "modulo:atributo"
+        path: Rota usada na primeira requisição
+
+    Returns:
+        Medições da execução, incluindo o tempo total do processo
+    """
+    started = time.perf_counter()
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE, app_path, path],
+        check=True,
+        capture_output=True,
+        text=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result["process_ms"] = (time.perf_counter() - started) * 1000
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Mede o tempo de inicialização da aplicação")
+    parser.add_argument("--runs", type=int, default=5, help="Quantidade de execuções")
+    parser.add_argument("--app", default="api.server:app", help="Aplicação no formato modulo:atributo")
+    parser.add_argument("--path", default="/api/info", help="Rota da primeira requisição")
+    parser.add_argument("--json", action="store_true", help="Imprime o resultado em JSON")
+    args = parser.parse_args()
+
+    runs = [measure(args.app, args.path) for _ in range(args.runs)]
+    summary = {
+        key: round(statistics.median(run[key] for run in runs), 1)
+        for key in ("import_ms", "first_request_ms", "process_ms", "max_rss_mb")
+    }
+    summary["status"] = runs[-1]["status"]
+    summary["heavy_modules"] = runs[-1]["heavy_modules"]
+
+    if args.json:
+        print(json.dumps(summary))
+        return 0
+
+    print(f"Aplicação: {args.app} ({args.runs} execuções, mediana)")
+    print(f"  importação e criação do app: {summary['import_ms']:>8.1f} ms")
+    print(f"  primeira resposta ({args.path}): {summary['first_request_ms']:>8.1f} ms (HTTP {summary['status']})")
+    print(f"  processo completo:           {summary['process_ms']:>8.1f} ms")
+    print(f"  memória residente máxima:    {summary['max_rss_mb']:>8.1f} MB")
+    print(f"  módulos pesados carregados:  {', '.join(summary['heavy_modules']) or 'nenhum'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
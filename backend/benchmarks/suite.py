@@ -0,0 +1,193 @@
+"""
+Suíte de benchmarks: teste de carga de ponta a ponta (``benchmarks.load_test``)
+e microbenchmarks (``benchmarks.microbenchmarks``), com gravação da linha de
+base em JSON e comparação para detectar regressões.
+
+Uso:
+    # Grava a linha de base
+    python -m benchmarks.suite --output benchmarks/baseline.json
+
+    # Executa de novo e compara com a linha de base (código de saída 1 se houver regressão)
+    python -m benchmarks.suite --compare benchmarks/baseline.json [--threshold 0.15]
+
+    # Compara dois resultados já gravados
+    python -m benchmarks.suite --compare benchmarks/baseline.json --current resultado.json
+
+As medidas dependem da máquina: compare apenas resultados obtidos no mesmo
+ambiente e com os mesmos parâmetros.
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmarks.load_test import SCENARIOS, run_load_test
+from benchmarks.microbenchmarks import run_microbenchmarks
+
+# Medidas comparadas nos cenários: (nome, maior é melhor)
+_SCENARIO_METRICS = [
+    ("throughput_rps", True),
+    ("p50_ms", False),
+    ("p95_ms", False),
+    ("p99_ms", False),
+    ("max_rss_mb", False)
+]
+
+# Latências abaixo deste valor (ms) não são comparadas em termos relativos, pelo ruído
+_MIN_LATENCY_MS = 1.0
+
+
+def _git_revision() -> Optional[str]:
+    """Revisão atual do repositório, se disponível."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            check=True,
+            capture_output=True,
+            text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(args) -> Dict[str, Any]:
+    """Executa o teste de carga e os microbenchmarks e monta o resultado."""
+    result: Dict[str, Any] = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine()
+        }
+    }
+
+    if not args.skip_load:
+        load = run_load_test(
+            args.mode,
+            [name.strip() for name in args.scenarios.split(",") if name.strip()],
+            args.requests,
+            args.concurrency,
+            args.history_rows,
+            args.upstream_latency
+        )
+        result["load"] = load
+
+    if not args.skip_micro:
+        result["micro"] = run_microbenchmarks(args.rows, args.min_time)
+
+    return result
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[Tuple[str, float, float, float, bool]]:
+    """
+    Compara um resultado com a linha de base.
+
+    Args:
+        baseline: Resultado da linha de base
+        current: Resultado atual
+        threshold: Piora relativa tolerada (ex.: 0.15 para 15%)
+
+    Returns:
+        Lista de (medida, valor da linha de base, valor atual, variação
+        relativa, regressão), apenas para as medidas presentes em ambos
+    """
+    rows = []
+
+    def check(name: str, before: Optional[float], after: Optional[float], higher_is_better: bool) -> None:
+        if before is None or after is None or before == 0:
+            return
+        change = (after - before) / before
+        worse = -change if higher_is_better else change
+        noisy = not higher_is_better and name.endswith("_ms") and max(before, after) < _MIN_LATENCY_MS
+        rows.append((name, before, after, change, worse > threshold and not noisy))
+
+    base_scenarios = baseline.get("load", {}).get("scenarios", {})
+    for scenario, values in current.get("load", {}).get("scenarios", {}).items():
+        if scenario not in base_scenarios:
+            continue
+        for metric, higher_is_better in _SCENARIO_METRICS:
+            check(f"{scenario}.{metric}", base_scenarios[scenario].get(metric), values.get(metric), higher_is_better)
+
+        # Erros novos são regressão independentemente da tolerância
+        before_errors = base_scenarios[scenario].get("error_rate", 0)
+        after_errors = values.get("error_rate", 0)
+        if after_errors > before_errors:
+            rows.append((f"{scenario}.error_rate", before_errors, after_errors, after_errors - before_errors, True))
+
+    base_micro = baseline.get("micro", {})
+    for name, values in current.get("micro", {}).items():
+        if name in base_micro:
+            check(f"micro.{name}", base_micro[name].get("ops_per_s"), values.get("ops_per_s"), True)
+
+    return rows
+
+
+def print_comparison(rows: List[Tuple[str, float, float, float, bool]], threshold: float) -> int:
+    """
+    Exibe a comparação e devolve a quantidade de regressões.
+
+    Args:
+        rows: Resultado de ``compare``
+        threshold: Piora relativa tolerada
+
+    Returns:
+        Quantidade de regressões
+    """
+    print(f"{'medida':<44} {'base':>12} {'atual':>12} {'variação':>9}")
+    for name, before, after, change, regression in rows:
+        flag = "  REGRESSÃO" if regression else ""
+        print(f"{name:<44} {before:>12,.2f} {after:>12,.2f} {change:>+8.1%}{flag}")
+
+    regressions = sum(1 for row in rows if row[4])
+    print(f"\n{regressions} regressão(ões) acima de {threshold:.0%}" if regressions else f"\nSem regressões acima de {threshold:.0%}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Suíte de benchmarks com linha de base e detecção de regressões")
+    parser.add_argument("--output", help="Grava o resultado neste arquivo JSON (ex.: benchmarks/baseline.json)")
+    parser.add_argument("--compare", help="Linha de base para comparar")
+    parser.add_argument("--current", help="Resultado já gravado para comparar (não executa a suíte)")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Piora relativa tolerada na comparação")
+    parser.add_argument("--mode", choices=("inprocess", "http"), default="inprocess", help="Modo do teste de carga")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Cenários do teste de carga, separados por vírgula")
+    parser.add_argument("--requests", type=int, default=200, help="Requisições por cenário")
+    parser.add_argument("--concurrency", type=int, default=16, help="Clientes simultâneos")
+    parser.add_argument("--history-rows", type=int, default=2000, help="Registros do histórico do estado na API simulada")
+    parser.add_argument("--upstream-latency", default="fixed:20", help="Latência da API simulada")
+    parser.add_argument("--rows", type=int, default=10000, help="Registros dos microbenchmarks")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Duração mínima de cada repetição dos microbenchmarks")
+    parser.add_argument("--skip-load", action="store_true", help="Não executa o teste de carga")
+    parser.add_argument("--skip-micro", action="store_true", help="Não executa os microbenchmarks")
+    args = parser.parse_args()
+
+    if args.current:
+        with open(args.current, encoding="utf-8") as file:
+            result = json.load(file)
+    else:
+        result = run_suite(args)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(result, file, indent=2, ensure_ascii=False)
+            file.write("\n")
+        print(f"Resultado gravado em {args.output}", file=sys.stderr)
+    elif not args.compare:
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+        regressions = print_comparison(compare(baseline, result, args.threshold), args.threshold)
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
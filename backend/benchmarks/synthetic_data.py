@@ -0,0 +1,58 @@
+"""
+Gera conjuntos de dados sintéticos de preços (milhões de registros) em
+Parquet ou NumPy (.npz), para benchmarks do armazém e das agregações, e
+mede a vazão da geração.
+
+O formato é escolhido pela extensão do arquivo; Parquet requer o pyarrow.
+Sem ``--output``, apenas mede a geração em memória.
+
+Uso:
+    python -m benchmarks.synthetic_data [--rows 5000000] [--batch-size 1000000]
+        [--seed 0] [--start 2019-01-01] [--end 2024-12-31] [--output precos.parquet]
+"""
+
+import argparse
+import time
+from datetime import date
+
+from infrastructure.synthetic import SyntheticPriceGenerator
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Geração de dados sintéticos de preços")
+    parser.add_argument("--rows", type=int, default=5000000, help="Quantidade de registros")
+    parser.add_argument("--batch-size", type=int, default=1000000, help="Registros por lote da geração")
+    parser.add_argument("--seed", type=int, default=0, help="Semente dos dados")
+    parser.add_argument("--products", type=int, default=200, help="Quantidade de produtos do catálogo")
+    parser.add_argument("--start", type=date.fromisoformat, default=date(2019, 1, 1), help="Data inicial")
+    parser.add_argument("--end", type=date.fromisoformat, default=date(2024, 12, 31), help="Data final")
+    parser.add_argument("--output", help="Arquivo de destino (.parquet ou .npz)")
+    args = parser.parse_args()
+
+    generator = SyntheticPriceGenerator(
+        seed=args.seed,
+        products={str(1001 + i): None for i in range(args.products)},
+        start=args.start,
+        end=args.end
+    )
+
+    started = time.perf_counter()
+    if not args.output:
+        rows = sum(len(batch["date"]) for batch in generator.iter_batches(args.rows, args.batch_size))
+    elif args.output.endswith(".parquet"):
+        try:
+            rows = generator.write_parquet(args.output, args.rows, args.batch_size)
+        except ImportError as e:
+            parser.error(str(e))
+    elif args.output.endswith(".npz"):
+        rows = generator.write_npz(args.output, args.rows, args.batch_size)
+    else:
+        parser.error("O arquivo de destino deve terminar em .parquet ou .npz")
+    elapsed = time.perf_counter() - started
+
+    print(f"{rows:,} registros em {elapsed:.2f} s ({rows / elapsed:,.0f} registros/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,7 +4,11 @@ do sistema de consulta de preços do TCE-MG.
 """
 
 from domain.entities import Product, Territory, TerritoryType, PriceRecord
-from domain.value_objects import ProductFilter, TerritoryScope, PricePeriod
+from domain.value_objects import ProductFilter, TerritoryScope, PricePeriod, QueryKey
+from domain.price_series import PriceColumns, MonthlyPriceSummaries, PriceAggregate, PriceSummary, TimeGranularity
+from domain.quantile_sketch import KLLSketch
+from domain.territory_index import TerritoryIndex
+from domain.units import UnitOfMeasure, parse_unit, common_base_unit, merge_unit_columns
 from domain.repositories import ProductRepository, TerritoryRepository, PriceRepository
 from domain.services import ProductService, TerritoryService, PriceService
 
@@ -16,6 +20,18 @@ __all__ = [
     'ProductFilter',
     'TerritoryScope',
     'PricePeriod',
+    'QueryKey',
+    'PriceColumns',
+    'MonthlyPriceSummaries',
+    'KLLSketch',
+    'PriceAggregate',
+    'PriceSummary',
+    'TerritoryIndex',
+    'TimeGranularity',
+    'UnitOfMeasure',
+    'parse_unit',
+    'common_base_unit',
+    'merge_unit_columns',
     'ProductRepository',
     'TerritoryRepository',
     'PriceRepository',
@@ -1,6 +1,8 @@
+import sys
 from datetime import date
 from enum import Enum
-from typing import Optional
+from operator import attrgetter
+from typing import Iterable, List, Optional, Tuple
 
 class TerritoryType(Enum):
     """Enum que define os tipos de território disponíveis."""
@@ -8,13 +10,42 @@ class TerritoryType(Enum):
     REGION = "REGIAO"
     MUNICIPALITY = "MUNICIPIO"
 
+
+def _intern(value):
+    """Interna textos repetidos (unidades, nomes), para que ocorrências iguais compartilhem a mesma string."""
+    return sys.intern(value) if type(value) is str else value
+
+
+def _from_records(cls, rows: Iterable[tuple]) -> list:
+    """
+    Cria entidades em lote a partir de tuplas na ordem de ``cls.__slots__``,
+    sem passar pelo construtor.
+    """
+    new = object.__new__
+    setters = [getattr(cls, name).__set__ for name in cls.__slots__]
+    entities = []
+    append = entities.append
+    for row in rows:
+        entity = new(cls)
+        for setter, value in zip(setters, row):
+            setter(entity, value)
+        append(entity)
+    return entities
+
+
 class Product:
-    """Entidade que representa um produto no sistema."""
+    """
+    Entidade que representa um produto no sistema.
+    
+    Usa ``__slots__`` (sem ``__dict__`` por instância) e interna nome e unidade.
+    """
+    
+    __slots__ = ("id", "name", "unit")
     
     def __init__(self, id: str, name: str, unit: str):
         self.id = id
-        self.name = name
-        self.unit = unit
+        self.name = _intern(name)
+        self.unit = _intern(unit)
     
     def __str__(self) -> str:
         return f"{self.name} ({self.unit})"
@@ -25,16 +56,49 @@ class Product:
             "name": self.name,
             "unit": self.unit
         }
+    
+    @classmethod
+    def from_records(cls, rows: Iterable[Tuple[str, str, str]]) -> List['Product']:
+        """
+        Cria produtos em lote a partir de dados confiáveis, sem as verificações do construtor.
+        
+        Args:
+            rows: Tuplas (id, name, unit)
+        
+        Returns:
+            Lista de produtos
+        """
+        return _from_records(cls, rows)
+    
+    @staticmethod
+    def to_records(products: Iterable['Product']) -> List[Tuple[str, str, str]]:
+        """
+        Converte produtos em tuplas (id, name, unit).
+        
+        Args:
+            products: Produtos
+        
+        Returns:
+            Lista de tuplas, aceita por ``from_records``
+        """
+        return list(map(_PRODUCT_FIELDS, products))
 
 
 class Territory:
-    """Entidade que representa um território geográfico."""
+    """
+    Entidade que representa um território geográfico.
+    
+    Usa ``__slots__`` (sem ``__dict__`` por instância) e interna o nome.
+    """
+    
+    __slots__ = ("id", "name", "type", "region_id")
     
     def __init__(self, id: str, name: str, type: TerritoryType, region_id: Optional[str] = None):
         self.id = id
-        self.name = name
-        self.type = type
-        self.region_id = region_id
+        self.name = _intern(name)
+        # Aceita também o valor textual do tipo (ex.: dicionários gerados por to_dict)
+        self.type = type if isinstance(type, TerritoryType) else TerritoryType(type)
+        self.region_id = _intern(region_id)
     
     def __str__(self) -> str:
         return f"{self.name} ({self.type.value})"
@@ -48,15 +112,50 @@ class Territory:
         
         if self.region_id:
             result["region_id"] = self.region_id
-            
+        
         return result
+    
+    @classmethod
+    def from_records(cls, rows: Iterable[Tuple[str, str, TerritoryType, Optional[str]]]) -> List['Territory']:
+        """
+        Cria territórios em lote a partir de dados confiáveis, sem as verificações do construtor.
+        
+        Args:
+            rows: Tuplas (id, name, type, region_id), com type já como TerritoryType
+        
+        Returns:
+            Lista de territórios
+        """
+        return _from_records(cls, rows)
+    
+    @staticmethod
+    def to_records(territories: Iterable['Territory']) -> List[Tuple[str, str, TerritoryType, Optional[str]]]:
+        """
+        Converte territórios em tuplas (id, name, type, region_id).
+        
+        Args:
+            territories: Territórios
+        
+        Returns:
+            Lista de tuplas, aceita por ``from_records``
+        """
+        return list(map(_TERRITORY_FIELDS, territories))
 
 
 class PriceRecord:
-    """Entidade que representa um registro de preço."""
+    """
+    Entidade que representa um registro de preço.
+    
+    Usa ``__slots__`` (sem ``__dict__`` por instância), o que reduz a memória
+    de históricos grandes, e interna os textos que se repetem entre registros
+    (produto, unidade e município). Para construir muitos registros a partir
+    de dados já validados, use ``from_records``.
+    """
+    
+    __slots__ = ("id", "product_id", "product_name", "unit", "date", "municipality", "unit_price")
     
     def __init__(
-        self, 
+        self,
         id: str,
         product_id: str,
         product_name: str,
@@ -66,12 +165,12 @@ class PriceRecord:
         unit_price: float
     ):
         self.id = id
-        self.product_id = product_id
-        self.product_name = product_name
-        self.unit = unit
+        self.product_id = _intern(product_id)
+        self.product_name = _intern(product_name)
+        self.unit = _intern(unit)
         self.date = date
-        self.municipality = municipality
-        self.unit_price = unit_price
+        self.municipality = _intern(municipality)
+        self.unit_price = float(unit_price)
     
     def __str__(self) -> str:
         return f"{self.product_name} - {self.municipality} - {self.date} - R$ {self.unit_price:.2f}"
@@ -85,4 +184,57 @@ class PriceRecord:
             "date": self.date.isoformat() if isinstance(self.date, date) else self.date,
             "municipality": self.municipality,
             "unit_price": self.unit_price
-        } 
\ No newline at end of file
+        }
+    
+    @classmethod
+    def from_records(cls, rows: Iterable[tuple]) -> List['PriceRecord']:
+        """
+        Cria registros em lote a partir de dados confiáveis, sem as verificações do construtor.
+        
+        Os valores são usados como estão: o preço deve ser float e os textos
+        repetidos já devem ser compartilhados (como nas colunas de PriceColumns
+        ou nas tuplas de ``to_records``).
+        
+        Args:
+            rows: Tuplas (id, product_id, product_name, unit, date, municipality, unit_price)
+        
+        Returns:
+            Lista de registros de preço
+        """
+        # Laço explícito: atribuir os campos por desempacotamento é mais
+        # rápido que chamar o construtor ou atribuir campo a campo
+        new = object.__new__
+        records = []
+        append = records.append
+        for row in rows:
+            record = new(cls)
+            (
+                record.id,
+                record.product_id,
+                record.product_name,
+                record.unit,
+                record.date,
+                record.municipality,
+                record.unit_price
+            ) = row
+            append(record)
+        return records
+    
+    @staticmethod
+    def to_records(records: Iterable['PriceRecord']) -> List[tuple]:
+        """
+        Converte registros de preço em tuplas
+        (id, product_id, product_name, unit, date, municipality, unit_price).
+        
+        Args:
+            records: Registros de preço
+        
+        Returns:
+            Lista de tuplas, aceita por ``from_records``
+        """
+        return list(map(_PRICE_RECORD_FIELDS, records))
+
+
+_PRODUCT_FIELDS = attrgetter(*Product.__slots__)
+_TERRITORY_FIELDS = attrgetter(*Territory.__slots__)
+_PRICE_RECORD_FIELDS = attrgetter(*PriceRecord.__slots__)
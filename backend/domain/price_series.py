@@ -0,0 +1,780 @@
+"""
+Representação colunar de históricos de preço e agregações vetorizadas
+por período de tempo, usadas pelos gráficos de tendência.
+"""
+
+import hashlib
+import sys
+from datetime import date
+from enum import Enum
+from itertools import repeat
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from domain.entities import PriceRecord
+from domain.quantile_sketch import KLLSketch
+
+
+class TimeGranularity(Enum):
+    """Enum que define a granularidade temporal das agregações."""
+    DAY = "DIA"
+    WEEK = "SEMANA"
+    MONTH = "MES"
+    QUARTER = "TRIMESTRE"
+
+
+class PriceColumns:
+    """
+    Histórico de preços em formato colunar.
+
+    Cada campo variável dos registros é mantido em um array NumPy, o que
+    permite agrupar e agregar milhares de registros sem laços em Python.
+    """
+
+    __slots__ = ("product_id", "unit", "ids", "dates", "municipalities", "prices")
+
+    def __init__(
+        self,
+        product_id: str,
+        unit: str,
+        ids: np.ndarray,
+        dates: np.ndarray,
+        municipalities: np.ndarray,
+        prices: np.ndarray
+    ):
+        self.product_id = product_id
+        self.unit = unit
+        self.ids = ids
+        self.dates = dates
+        self.municipalities = municipalities
+        self.prices = prices
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Tamanho aproximado em memória, em bytes.
+
+        Para as colunas de texto, soma os ponteiros e estima o tamanho das
+        strings a partir de uma amostra.
+        """
+        total = 0
+        for column in (self.ids, self.dates, self.municipalities, self.prices):
+            total += column.nbytes
+            if column.dtype == object and len(column):
+                sample = column[:100].tolist()
+                total += len(column) * sum(sys.getsizeof(value) for value in sample) // len(sample)
+        return total
+
+    def content_digest(self) -> str:
+        """
+        Calcula um resumo (hash) do conteúdo, estável entre processos.
+
+        Returns:
+            Resumo hexadecimal do conteúdo
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{self.product_id}\x1f{self.unit}\x1f".encode())
+        digest.update("\x1f".join(map(str, self.ids.tolist())).encode())
+        digest.update(self.dates.astype("datetime64[D]").astype(np.int64).tobytes())
+        digest.update("\x1f".join(map(str, self.municipalities.tolist())).encode())
+        digest.update(self.prices.astype(np.float64).tobytes())
+        return digest.hexdigest()
+
+    @classmethod
+    def empty(cls, product_id: str, unit: str) -> 'PriceColumns':
+        """Cria um histórico colunar vazio."""
+        return cls(
+            product_id=product_id,
+            unit=unit,
+            ids=np.empty(0, dtype=object),
+            dates=np.empty(0, dtype="datetime64[D]"),
+            municipalities=np.empty(0, dtype=object),
+            prices=np.empty(0, dtype=np.float64)
+        )
+
+    @classmethod
+    def from_records(cls, product_id: str, unit: str, records: Iterable[PriceRecord]) -> 'PriceColumns':
+        """
+        Converte registros de preço para o formato colunar.
+
+        Registros cuja data não pode ser interpretada são descartados.
+
+        Args:
+            product_id: ID do produto
+            unit: Unidade do produto
+            records: Registros de preço
+
+        Returns:
+            Histórico colunar
+        """
+        records = list(records)
+        if not records:
+            return cls.empty(product_id, unit)
+
+        dates = np.array(
+            [record.date.isoformat() if isinstance(record.date, date) else (record.date or "NaT") for record in records]
+        )
+        try:
+            parsed_dates = dates.astype("datetime64[D]")
+        except ValueError:
+            parsed_dates = np.array([_parse_date(value) for value in dates], dtype="datetime64[D]")
+
+        columns = cls(
+            product_id=product_id,
+            unit=unit,
+            ids=np.array([record.id for record in records], dtype=object),
+            dates=parsed_dates,
+            municipalities=np.array([record.municipality for record in records], dtype=object),
+            prices=np.array([record.unit_price for record in records], dtype=np.float64)
+        )
+        return columns.take(~np.isnat(parsed_dates))
+
+    @classmethod
+    def concat(cls, product_id: str, unit: str, parts: Iterable['PriceColumns']) -> 'PriceColumns':
+        """
+        Concatena vários históricos colunares do mesmo produto.
+
+        Args:
+            product_id: ID do produto
+            unit: Unidade do produto
+            parts: Partes a concatenar, na ordem
+
+        Returns:
+            Histórico colunar com todas as linhas
+        """
+        parts = [part for part in parts if len(part)]
+        if not parts:
+            return cls.empty(product_id, unit)
+        if len(parts) == 1:
+            return parts[0]
+
+        return cls(
+            product_id=product_id,
+            unit=unit,
+            ids=np.concatenate([part.ids for part in parts]),
+            dates=np.concatenate([part.dates for part in parts]),
+            municipalities=np.concatenate([part.municipalities for part in parts]),
+            prices=np.concatenate([part.prices for part in parts])
+        )
+
+    def batches(self, batch_size: int) -> Iterator['PriceColumns']:
+        """
+        Divide o histórico em lotes consecutivos.
+
+        Args:
+            batch_size: Quantidade máxima de linhas por lote
+
+        Returns:
+            Iterador de lotes (vistas sobre os arrays, sem cópia)
+        """
+        for start in range(0, len(self), batch_size):
+            yield self.take(slice(start, start + batch_size))
+
+    def take(self, mask: np.ndarray) -> 'PriceColumns':
+        """
+        Seleciona um subconjunto das linhas.
+
+        Args:
+            mask: Máscara booleana, array de índices ou fatia (``slice``)
+
+        Returns:
+            Novo histórico colunar com as linhas selecionadas
+        """
+        return PriceColumns(
+            product_id=self.product_id,
+            unit=self.unit,
+            ids=self.ids[mask],
+            dates=self.dates[mask],
+            municipalities=self.municipalities[mask],
+            prices=self.prices[mask]
+        )
+
+    def to_records(self, product_name: str = "") -> List[PriceRecord]:
+        """
+        Converte o histórico colunar de volta para entidades.
+
+        Os registros são criados em lote (``PriceRecord.from_records``) e
+        compartilham os objetos de data e os textos repetidos.
+
+        Args:
+            product_name: Nome do produto a ser atribuído aos registros
+
+        Returns:
+            Lista de registros de preço
+        """
+        if not len(self):
+            return []
+
+        # Um objeto date por dia distinto, em vez de um por registro
+        days, positions = np.unique(self.dates, return_inverse=True)
+        day_values = days.tolist()
+        dates = [day_values[position] for position in positions.tolist()]
+
+        return PriceRecord.from_records(zip(
+            self.ids.tolist(),
+            repeat(sys.intern(self.product_id)),
+            repeat(sys.intern(product_name)),
+            repeat(sys.intern(self.unit)),
+            dates,
+            self.municipalities.tolist(),
+            self.prices.tolist()
+        ))
+
+
+class MonthlyPriceSummaries:
+    """
+    Resumos materializados de preço por (município, mês) em formato colunar.
+
+    Cada linha guarda contagem, soma, mínimo, máximo e um sketch de quantis,
+    o que permite compor períodos e territórios maiores sem reler os registros.
+    """
+
+    __slots__ = ("product_id", "unit", "municipalities", "months", "counts", "sums", "mins", "maxs", "sketches")
+
+    def __init__(
+        self,
+        product_id: str,
+        unit: str,
+        municipalities: np.ndarray,
+        months: np.ndarray,
+        counts: np.ndarray,
+        sums: np.ndarray,
+        mins: np.ndarray,
+        maxs: np.ndarray,
+        sketches: np.ndarray
+    ):
+        self.product_id = product_id
+        self.unit = unit
+        self.municipalities = municipalities
+        self.months = months
+        self.counts = counts
+        self.sums = sums
+        self.mins = mins
+        self.maxs = maxs
+        self.sketches = sketches
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    @classmethod
+    def empty(cls, product_id: str, unit: str) -> 'MonthlyPriceSummaries':
+        """Cria um conjunto de resumos vazio."""
+        return cls(
+            product_id=product_id,
+            unit=unit,
+            municipalities=np.empty(0, dtype=object),
+            months=np.empty(0, dtype="datetime64[M]"),
+            counts=np.empty(0, dtype=np.int64),
+            sums=np.empty(0, dtype=np.float64),
+            mins=np.empty(0, dtype=np.float64),
+            maxs=np.empty(0, dtype=np.float64),
+            sketches=np.empty(0, dtype=object)
+        )
+
+    def take(self, mask: np.ndarray) -> 'MonthlyPriceSummaries':
+        """
+        Seleciona um subconjunto das linhas de resumo.
+
+        Args:
+            mask: Máscara booleana ou array de índices
+
+        Returns:
+            Novos resumos com as linhas selecionadas
+        """
+        return MonthlyPriceSummaries(
+            product_id=self.product_id,
+            unit=self.unit,
+            municipalities=self.municipalities[mask],
+            months=self.months[mask],
+            counts=self.counts[mask],
+            sums=self.sums[mask],
+            mins=self.mins[mask],
+            maxs=self.maxs[mask],
+            sketches=self.sketches[mask]
+        )
+
+
+class PriceAggregate:
+    """Agregado estatístico dos preços de um período (e, opcionalmente, de um grupo territorial)."""
+
+    def __init__(
+        self,
+        period_start: date,
+        period_end: date,
+        count: int,
+        median: float,
+        p10: float,
+        p90: float,
+        min: float,
+        max: float,
+        group_id: Optional[str] = None,
+        group_name: Optional[str] = None
+    ):
+        self.period_start = period_start
+        self.period_end = period_end
+        self.count = count
+        self.median = median
+        self.p10 = p10
+        self.p90 = p90
+        self.min = min
+        self.max = max
+        self.group_id = group_id
+        self.group_name = group_name
+
+    def to_dict(self) -> dict:
+        result = {
+            "period_start": self.period_start.isoformat(),
+            "period_end": self.period_end.isoformat(),
+            "count": self.count,
+            "median": self.median,
+            "p10": self.p10,
+            "p90": self.p90,
+            "min": self.min,
+            "max": self.max
+        }
+
+        if self.group_id is not None:
+            result["group_id"] = self.group_id
+            result["group_name"] = self.group_name
+
+        return result
+
+
+class PriceSummary:
+    """Resumo estatístico dos preços de um grupo territorial."""
+
+    def __init__(
+        self,
+        count: int,
+        mean: float,
+        median: float,
+        p10: float,
+        p90: float,
+        min: float,
+        max: float,
+        group_id: Optional[str] = None,
+        group_name: Optional[str] = None
+    ):
+        self.count = count
+        self.mean = mean
+        self.median = median
+        self.p10 = p10
+        self.p90 = p90
+        self.min = min
+        self.max = max
+        self.group_id = group_id
+        self.group_name = group_name
+
+    def to_dict(self) -> dict:
+        result = {
+            "count": self.count,
+            "mean": self.mean,
+            "median": self.median,
+            "p10": self.p10,
+            "p90": self.p90,
+            "min": self.min,
+            "max": self.max
+        }
+
+        if self.group_id is not None:
+            result["group_id"] = self.group_id
+            result["group_name"] = self.group_name
+
+        return result
+
+
+def _parse_date(value: str) -> np.datetime64:
+    """Converte uma data ISO para datetime64, retornando NaT se inválida."""
+    try:
+        return np.datetime64(value, "D")
+    except ValueError:
+        return np.datetime64("NaT")
+
+
+def _bucket_ordinals(dates: np.ndarray, granularity: TimeGranularity) -> np.ndarray:
+    """Calcula o ordinal do período de cada data (dias, semanas, meses ou trimestres desde 1970)."""
+    if granularity == TimeGranularity.DAY:
+        return dates.astype("datetime64[D]").astype(np.int64)
+
+    if granularity == TimeGranularity.WEEK:
+        # 1970-01-01 foi uma quinta-feira; o deslocamento faz as semanas começarem na segunda
+        return (dates.astype("datetime64[D]").astype(np.int64) + 3) // 7
+
+    months = dates.astype("datetime64[M]").astype(np.int64)
+    if granularity == TimeGranularity.MONTH:
+        return months
+
+    return months // 3
+
+
+def _bucket_starts(ordinals: np.ndarray, granularity: TimeGranularity) -> np.ndarray:
+    """Converte ordinais de período para a data inicial de cada período."""
+    if granularity == TimeGranularity.DAY:
+        return ordinals.astype("datetime64[D]")
+
+    if granularity == TimeGranularity.WEEK:
+        return (ordinals * 7 - 3).astype("datetime64[D]")
+
+    if granularity == TimeGranularity.MONTH:
+        return ordinals.astype("datetime64[M]").astype("datetime64[D]")
+
+    return (ordinals * 3).astype("datetime64[M]").astype("datetime64[D]")
+
+
+def grouped_quantiles(sorted_values: np.ndarray, starts: np.ndarray, counts: np.ndarray, q: float) -> np.ndarray:
+    """
+    Calcula um quantil para cada grupo de um array ordenado por (grupo, valor).
+
+    Usa interpolação linear, como o padrão de ``numpy.quantile``.
+
+    Args:
+        sorted_values: Valores ordenados dentro de cada grupo
+        starts: Índice inicial de cada grupo
+        counts: Quantidade de valores de cada grupo
+        q: Quantil desejado, entre 0 e 1
+
+    Returns:
+        Array com o quantil de cada grupo
+    """
+    position = q * (counts - 1)
+    lower = np.floor(position).astype(np.int64)
+    upper = np.minimum(lower + 1, counts - 1)
+    fraction = position - lower
+
+    lower_values = sorted_values[starts + lower]
+    upper_values = sorted_values[starts + upper]
+
+    return lower_values + (upper_values - lower_values) * fraction
+
+
+def _grouped_stats(keys: np.ndarray, prices: np.ndarray):
+    """
+    Calcula as estatísticas de preço de cada chave em uma única ordenação.
+
+    Args:
+        keys: Chave inteira de grupo de cada linha
+        prices: Preço de cada linha
+
+    Returns:
+        Tupla com as chaves distintas (ordenadas) e um dicionário de arrays
+        com count, mean, median, p10, p90, min e max de cada chave
+    """
+    order = np.lexsort((prices, keys))
+    sorted_keys = keys[order]
+    sorted_prices = prices[order]
+
+    unique_keys, starts, counts = np.unique(sorted_keys, return_index=True, return_counts=True)
+
+    stats = {
+        "count": counts,
+        "mean": np.add.reduceat(sorted_prices, starts) / counts,
+        "median": grouped_quantiles(sorted_prices, starts, counts, 0.5),
+        "p10": grouped_quantiles(sorted_prices, starts, counts, 0.1),
+        "p90": grouped_quantiles(sorted_prices, starts, counts, 0.9),
+        "min": sorted_prices[starts],
+        "max": sorted_prices[starts + counts - 1]
+    }
+
+    return unique_keys, stats
+
+
+def summarize_by_group(
+    prices: np.ndarray,
+    group_keys: np.ndarray,
+    group_names: Optional[Dict[str, str]] = None
+) -> List[PriceSummary]:
+    """
+    Resume os preços por grupo em uma única passagem vetorizada.
+
+    Args:
+        prices: Preço de cada linha
+        group_keys: Chave de grupo de cada linha; linhas com chave None são descartadas
+        group_names: Nomes de exibição de cada chave de grupo (opcional)
+
+    Returns:
+        Lista de resumos ordenada pela chave de grupo
+    """
+    valid = np.array([key is not None for key in group_keys.tolist()], dtype=bool)
+    if not valid.any():
+        return []
+
+    labels, group_index = np.unique(group_keys[valid].astype(str), return_inverse=True)
+    unique_keys, stats = _grouped_stats(group_index.astype(np.int64), prices[valid])
+
+    group_names = group_names or {}
+    summaries = []
+    for i, key in enumerate(unique_keys.tolist()):
+        group_id = labels[key]
+        summaries.append(PriceSummary(
+            count=int(stats["count"][i]),
+            mean=round(float(stats["mean"][i]), 2),
+            median=round(float(stats["median"][i]), 2),
+            p10=round(float(stats["p10"][i]), 2),
+            p90=round(float(stats["p90"][i]), 2),
+            min=float(stats["min"][i]),
+            max=float(stats["max"][i]),
+            group_id=group_id,
+            group_name=group_names.get(group_id, group_id)
+        ))
+
+    return summaries
+
+
+def aggregate_price_series(
+    columns: PriceColumns,
+    granularity: TimeGranularity,
+    max_points: int,
+    group_keys: Optional[np.ndarray] = None,
+    group_names: Optional[Dict[str, str]] = None
+) -> List[PriceAggregate]:
+    """
+    Agrega um histórico colunar por período, opcionalmente por grupo territorial.
+
+    Quando o número de períodos excede ``max_points``, períodos consecutivos
+    são fundidos (recalculando as estatísticas a partir das linhas originais)
+    para que a série nunca tenha mais do que ``max_points`` pontos por grupo.
+
+    Args:
+        columns: Histórico de preços em formato colunar
+        granularity: Granularidade temporal
+        max_points: Número máximo de pontos por grupo
+        group_keys: Chave de grupo de cada linha (opcional); linhas com chave None são descartadas
+        group_names: Nomes de exibição de cada chave de grupo (opcional)
+
+    Returns:
+        Lista de agregados ordenada por grupo e período
+    """
+    if len(columns) == 0:
+        return []
+
+    ordinals = _bucket_ordinals(columns.dates, granularity)
+    first_ordinal = ordinals.min()
+    span = int(ordinals.max() - first_ordinal) + 1
+
+    # Funde períodos consecutivos para respeitar o orçamento de pontos
+    factor = max(1, -(-span // max(1, max_points)))
+    buckets = (ordinals - first_ordinal) // factor
+    bucket_count = int(buckets.max()) + 1
+
+    prices = columns.prices
+    group_labels: List[Optional[str]] = [None]
+    group_index = np.zeros(len(prices), dtype=np.int64)
+
+    if group_keys is not None:
+        valid = np.array([key is not None for key in group_keys.tolist()], dtype=bool)
+        if not valid.all():
+            buckets = buckets[valid]
+            prices = prices[valid]
+            group_keys = group_keys[valid]
+        if len(prices) == 0:
+            return []
+        labels, group_index = np.unique(group_keys.astype(str), return_inverse=True)
+        group_labels = labels.tolist()
+
+    keys = group_index * bucket_count + buckets
+    unique_keys, stats = _grouped_stats(keys, prices)
+
+    bucket_of_key = unique_keys % bucket_count
+    group_of_key = unique_keys // bucket_count
+    period_starts = _bucket_starts(first_ordinal + bucket_of_key * factor, granularity)
+    period_ends = _bucket_starts(first_ordinal + (bucket_of_key + 1) * factor, granularity) - np.timedelta64(1, "D")
+
+    group_names = group_names or {}
+    aggregates = []
+    for i in range(len(unique_keys)):
+        group_id = group_labels[group_of_key[i]]
+        aggregates.append(PriceAggregate(
+            period_start=period_starts[i].item(),
+            period_end=period_ends[i].item(),
+            count=int(stats["count"][i]),
+            median=round(float(stats["median"][i]), 2),
+            p10=round(float(stats["p10"][i]), 2),
+            p90=round(float(stats["p90"][i]), 2),
+            min=float(stats["min"][i]),
+            max=float(stats["max"][i]),
+            group_id=group_id,
+            group_name=group_names.get(group_id, group_id) if group_id is not None else None
+        ))
+
+    return aggregates
+
+
+def _merge_sketches(sketches: Iterable[KLLSketch]) -> KLLSketch:
+    """Mescla uma sequência de sketches sem alterar os originais."""
+    sketches = iter(sketches)
+    merged = next(sketches).copy()
+    for sketch in sketches:
+        merged.merge(sketch)
+    return merged
+
+
+def _summary_groups(summaries: MonthlyPriceSummaries, keys: np.ndarray):
+    """
+    Agrupa as linhas de resumo por chave inteira e compõe as estatísticas de cada grupo.
+
+    Args:
+        summaries: Resumos mensais
+        keys: Chave inteira de cada linha de resumo
+
+    Returns:
+        Tupla com as chaves distintas e um dicionário de arrays com as estatísticas
+    """
+    order = np.argsort(keys, kind="mergesort")
+    sorted_keys = keys[order]
+    unique_keys, starts = np.unique(sorted_keys, return_index=True)
+
+    counts = np.add.reduceat(summaries.counts[order], starts)
+    sums = np.add.reduceat(summaries.sums[order], starts)
+    mins = np.minimum.reduceat(summaries.mins[order], starts)
+    maxs = np.maximum.reduceat(summaries.maxs[order], starts)
+
+    sorted_sketches = summaries.sketches[order]
+    ends = np.append(starts[1:], len(order))
+    quantiles = np.array([
+        _merge_sketches(sorted_sketches[start:end]).quantiles([0.5, 0.1, 0.9])
+        for start, end in zip(starts.tolist(), ends.tolist())
+    ]).reshape(-1, 3)
+
+    stats = {
+        "count": counts,
+        "mean": sums / counts,
+        "median": quantiles[:, 0],
+        "p10": quantiles[:, 1],
+        "p90": quantiles[:, 2],
+        "min": mins,
+        "max": maxs
+    }
+
+    return unique_keys, stats
+
+
+def _group_index(group_keys: Optional[np.ndarray], size: int):
+    """
+    Converte chaves de grupo em índices inteiros.
+
+    Returns:
+        Tupla com máscara de linhas válidas, índice do grupo de cada linha válida e rótulos
+    """
+    if group_keys is None:
+        return np.ones(size, dtype=bool), np.zeros(size, dtype=np.int64), [None]
+
+    valid = np.array([key is not None for key in group_keys.tolist()], dtype=bool)
+    if not valid.any():
+        return valid, np.empty(0, dtype=np.int64), []
+
+    labels, group_index = np.unique(group_keys[valid].astype(str), return_inverse=True)
+    return valid, group_index.astype(np.int64), labels.tolist()
+
+
+def aggregate_monthly_summaries(
+    summaries: MonthlyPriceSummaries,
+    granularity: TimeGranularity,
+    max_points: int,
+    group_keys: Optional[np.ndarray] = None,
+    group_names: Optional[Dict[str, str]] = None
+) -> List[PriceAggregate]:
+    """
+    Agrega resumos mensais materializados por período, opcionalmente por grupo territorial.
+
+    Equivalente a ``aggregate_price_series`` para granularidades mensal e
+    trimestral, mas com custo proporcional ao número de resumos, não de registros.
+
+    Args:
+        summaries: Resumos mensais por município
+        granularity: Granularidade temporal (MES ou TRIMESTRE)
+        max_points: Número máximo de pontos por grupo
+        group_keys: Chave de grupo de cada linha de resumo (opcional)
+        group_names: Nomes de exibição de cada chave de grupo (opcional)
+
+    Returns:
+        Lista de agregados ordenada por grupo e período
+    """
+    if granularity not in (TimeGranularity.MONTH, TimeGranularity.QUARTER):
+        raise ValueError(f"Resumos mensais não suportam a granularidade {granularity.value}")
+
+    if len(summaries) == 0:
+        return []
+
+    valid, group_index, group_labels = _group_index(group_keys, len(summaries))
+    if not group_labels:
+        return []
+
+    months = summaries.months[valid].astype("datetime64[M]").astype(np.int64)
+    ordinals = months if granularity == TimeGranularity.MONTH else months // 3
+    first_ordinal = ordinals.min()
+    span = int(ordinals.max() - first_ordinal) + 1
+
+    factor = max(1, -(-span // max(1, max_points)))
+    buckets = (ordinals - first_ordinal) // factor
+    bucket_count = int(buckets.max()) + 1
+
+    unique_keys, stats = _summary_groups(summaries.take(valid), group_index * bucket_count + buckets)
+
+    bucket_of_key = unique_keys % bucket_count
+    group_of_key = unique_keys // bucket_count
+    period_starts = _bucket_starts(first_ordinal + bucket_of_key * factor, granularity)
+    period_ends = _bucket_starts(first_ordinal + (bucket_of_key + 1) * factor, granularity) - np.timedelta64(1, "D")
+
+    group_names = group_names or {}
+    aggregates = []
+    for i in range(len(unique_keys)):
+        group_id = group_labels[group_of_key[i]]
+        aggregates.append(PriceAggregate(
+            period_start=period_starts[i].item(),
+            period_end=period_ends[i].item(),
+            count=int(stats["count"][i]),
+            median=round(float(stats["median"][i]), 2),
+            p10=round(float(stats["p10"][i]), 2),
+            p90=round(float(stats["p90"][i]), 2),
+            min=float(stats["min"][i]),
+            max=float(stats["max"][i]),
+            group_id=group_id,
+            group_name=group_names.get(group_id, group_id) if group_id is not None else None
+        ))
+
+    return aggregates
+
+
+def summarize_monthly_by_group(
+    summaries: MonthlyPriceSummaries,
+    group_keys: np.ndarray,
+    group_names: Optional[Dict[str, str]] = None
+) -> List[PriceSummary]:
+    """
+    Resume resumos mensais materializados por grupo territorial.
+
+    Args:
+        summaries: Resumos mensais por município
+        group_keys: Chave de grupo de cada linha de resumo; linhas com chave None são descartadas
+        group_names: Nomes de exibição de cada chave de grupo (opcional)
+
+    Returns:
+        Lista de resumos ordenada pela chave de grupo
+    """
+    valid, group_index, labels = _group_index(group_keys, len(summaries))
+    if not labels:
+        return []
+
+    unique_keys, stats = _summary_groups(summaries.take(valid), group_index)
+
+    group_names = group_names or {}
+    result = []
+    for i, key in enumerate(unique_keys.tolist()):
+        group_id = labels[key]
+        result.append(PriceSummary(
+            count=int(stats["count"][i]),
+            mean=round(float(stats["mean"][i]), 2),
+            median=round(float(stats["median"][i]), 2),
+            p10=round(float(stats["p10"][i]), 2),
+            p90=round(float(stats["p90"][i]), 2),
+            min=float(stats["min"][i]),
+            max=float(stats["max"][i]),
+            group_id=group_id,
+            group_name=group_names.get(group_id, group_id)
+        ))
+
+    return result
@@ -0,0 +1,236 @@
+"""
+Sketch de quantis mesclável (KLL) para estimar medianas e percentis
+sem manter nem ordenar todos os preços de um período.
+"""
+
+import math
+import random
+import struct
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+_HEADER = struct.Struct("<HQH")
+
+
+class KLLSketch:
+    """
+    Sketch de quantis KLL (Karnin, Lang e Liberty).
+
+    Os valores são mantidos em níveis; cada item do nível ``h`` representa
+    ``2 ** h`` valores originais. Quando um nível excede a sua capacidade,
+    ele é ordenado e metade dos itens (pares ou ímpares, ao acaso) é promovida
+    ao nível seguinte. Enquanto nenhum nível foi compactado o sketch é exato.
+
+    Dois sketches com o mesmo ``k`` podem ser mesclados, e o resultado tem a
+    mesma garantia de erro de um sketch construído sobre a união dos dados.
+    """
+
+    __slots__ = ("k", "n", "levels", "_rng")
+
+    def __init__(self, k: int = 200, seed: Optional[int] = None):
+        self.k = k
+        self.n = 0
+        self.levels: List[List[float]] = [[]]
+        self._rng = random.Random(seed)
+
+    def __len__(self) -> int:
+        return self.n
+
+    @staticmethod
+    def normalized_rank_error(k: int) -> float:
+        """
+        Erro de posto normalizado esperado para um dado ``k`` (confiança de ~99%).
+
+        Aproximação empírica da literatura de KLL: com ``k=200`` o quantil
+        estimado fica, com alta probabilidade, a menos de ~1,3% de posto do
+        quantil exato. Dobrar ``k`` reduz o erro pela metade e dobra a memória.
+
+        Args:
+            k: Parâmetro de precisão
+
+        Returns:
+            Erro de posto como fração de 1
+        """
+        return 2.296 / k ** 0.9723
+
+    def _capacity(self, level: int) -> int:
+        """Capacidade de um nível: níveis mais baixos têm capacidade geometricamente menor."""
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2.0 / 3.0) ** depth)))
+
+    def _size(self) -> int:
+        return sum(len(level) for level in self.levels)
+
+    def _max_size(self) -> int:
+        return sum(self._capacity(level) for level in range(len(self.levels)))
+
+    def _compress(self) -> None:
+        """Compacta níveis até que o sketch caiba na sua capacidade total."""
+        while self._size() > self._max_size():
+            for level in range(len(self.levels)):
+                if len(self.levels[level]) >= self._capacity(level):
+                    if level + 1 == len(self.levels):
+                        self.levels.append([])
+
+                    items = sorted(self.levels[level])
+                    # Com quantidade ímpar, o último item permanece no nível
+                    leftover = [items.pop()] if len(items) % 2 else []
+                    offset = 1 if self._rng.random() < 0.5 else 0
+
+                    self.levels[level + 1].extend(items[offset::2])
+                    self.levels[level] = leftover
+                    break
+
+    def update(self, value: float) -> None:
+        """
+        Adiciona um valor ao sketch.
+
+        Args:
+            value: Valor a ser adicionado
+        """
+        self.levels[0].append(float(value))
+        self.n += 1
+        if len(self.levels[0]) >= self._capacity(0):
+            self._compress()
+
+    def update_many(self, values: Iterable[float]) -> None:
+        """
+        Adiciona vários valores ao sketch.
+
+        Args:
+            values: Valores a serem adicionados
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if len(values) == 0:
+            return
+
+        self.levels[0].extend(values.tolist())
+        self.n += len(values)
+        self._compress()
+
+    def merge(self, other: 'KLLSketch') -> 'KLLSketch':
+        """
+        Mescla outro sketch a este (in-place).
+
+        Args:
+            other: Sketch a ser mesclado
+
+        Returns:
+            Este sketch, para encadeamento
+        """
+        # Sketches com precisões diferentes resultam na menor delas
+        self.k = min(self.k, other.k)
+
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+
+        self.n += other.n
+        self._compress()
+        return self
+
+    def copy(self) -> 'KLLSketch':
+        """Cria uma cópia independente do sketch."""
+        sketch = KLLSketch(self.k)
+        sketch.n = self.n
+        sketch.levels = [list(level) for level in self.levels]
+        return sketch
+
+    @property
+    def is_exact(self) -> bool:
+        """Indica se nenhum nível foi compactado (os quantis são exatos)."""
+        return all(not level for level in self.levels[1:])
+
+    def quantiles(self, qs: Iterable[float]) -> List[float]:
+        """
+        Estima vários quantis de uma vez.
+
+        Args:
+            qs: Quantis desejados, entre 0 e 1
+
+        Returns:
+            Lista com a estimativa de cada quantil (NaN se o sketch estiver vazio)
+        """
+        qs = list(qs)
+        if self.n == 0:
+            return [float("nan")] * len(qs)
+
+        if self.is_exact:
+            return np.quantile(np.asarray(self.levels[0]), qs).tolist()
+
+        values = np.concatenate([np.asarray(level, dtype=np.float64) for level in self.levels])
+        weights = np.concatenate([
+            np.full(len(level), 2 ** height, dtype=np.float64)
+            for height, level in enumerate(self.levels)
+        ])
+        order = np.argsort(values, kind="mergesort")
+        values = values[order]
+        cumulative = np.cumsum(weights[order])
+        total = cumulative[-1]
+
+        positions = np.searchsorted(cumulative, np.asarray(qs) * total, side="left")
+        positions = np.minimum(positions, len(values) - 1)
+        return values[positions].tolist()
+
+    def quantile(self, q: float) -> float:
+        """
+        Estima um quantil.
+
+        Args:
+            q: Quantil desejado, entre 0 e 1
+
+        Returns:
+            Estimativa do quantil
+        """
+        return self.quantiles([q])[0]
+
+    def to_bytes(self) -> bytes:
+        """Serializa o sketch em formato binário compacto."""
+        parts = [_HEADER.pack(self.k, self.n, len(self.levels))]
+        parts.append(struct.pack(f"<{len(self.levels)}I", *(len(level) for level in self.levels)))
+        for level in self.levels:
+            parts.append(np.asarray(level, dtype="<f8").tobytes())
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'KLLSketch':
+        """
+        Reconstrói um sketch serializado por ``to_bytes``.
+
+        Args:
+            data: Conteúdo serializado
+
+        Returns:
+            Sketch reconstruído
+        """
+        k, n, level_count = _HEADER.unpack_from(data, 0)
+        offset = _HEADER.size
+        lengths = struct.unpack_from(f"<{level_count}I", data, offset)
+        offset += 4 * level_count
+
+        sketch = cls(k)
+        sketch.n = n
+        sketch.levels = []
+        for length in lengths:
+            sketch.levels.append(np.frombuffer(data, dtype="<f8", count=length, offset=offset).tolist())
+            offset += 8 * length
+        return sketch
+
+    @classmethod
+    def from_values(cls, values: Iterable[float], k: int = 200) -> 'KLLSketch':
+        """
+        Constrói um sketch a partir de um conjunto de valores.
+
+        Args:
+            values: Valores
+            k: Parâmetro de precisão
+
+        Returns:
+            Sketch com os valores
+        """
+        sketch = cls(k)
+        sketch.update_many(values)
+        return sketch
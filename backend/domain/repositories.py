@@ -1,7 +1,10 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import AsyncIterator, Dict, Iterable, List, Optional
 from domain.entities import Product, Territory, TerritoryType, PriceRecord
 from domain.value_objects import ProductFilter, TerritoryScope, PricePeriod
+from domain.price_series import PriceColumns, MonthlyPriceSummaries
+from domain.territory_index import TerritoryIndex
 
 class ProductRepository(ABC):
     """Interface para repositório de produtos."""
@@ -31,6 +34,24 @@ class ProductRepository(ABC):
             Produto encontrado ou None
         """
         pass
+    
+    async def get_products(self, product_ids: Iterable[str]) -> Dict[str, Optional[Product]]:
+        """
+        Obtém vários produtos de uma vez.
+        
+        Os IDs repetidos são consultados uma única vez. A implementação padrão
+        consulta os IDs concorrentemente com ``get_product``; repositórios com
+        uma fonte que aceite consultas em lote devem sobrescrevê-la.
+        
+        Args:
+            product_ids: IDs dos produtos
+            
+        Returns:
+            Dicionário do ID para o produto encontrado (ou None)
+        """
+        unique_ids = list(dict.fromkeys(product_ids))
+        products = await asyncio.gather(*(self.get_product(product_id) for product_id in unique_ids))
+        return dict(zip(unique_ids, products))
 
 
 class TerritoryRepository(ABC):
@@ -73,6 +94,18 @@ class TerritoryRepository(ABC):
         """
         pass
 
+    
+    async def get_index(self) -> TerritoryIndex:
+        """
+        Obtém o índice em memória de regiões e municípios.
+        
+        A implementação padrão constrói o índice a cada chamada; repositórios
+        com cache devem mantê-lo junto das listas de territórios.
+        
+        Returns:
+            Índice de territórios
+        """
+        return TerritoryIndex(await self.get_regions(), await self.get_municipalities())
 
 class PriceRepository(ABC):
     """Interface para repositório de preços."""
@@ -95,4 +128,99 @@ class PriceRepository(ABC):
         Returns:
             Lista de registros de preço
         """
-        pass 
\ No newline at end of file
+        pass 
+    
+    async def get_price_columns(
+        self,
+        product_filter: ProductFilter,
+        territory_scope: TerritoryScope,
+        price_period: PricePeriod
+    ) -> PriceColumns:
+        """
+        Obtém o histórico de preços em formato colunar.
+        
+        A implementação padrão converte o resultado de ``get_price_history``;
+        repositórios que já mantêm o histórico em colunas devem sobrescrevê-la.
+        
+        Args:
+            product_filter: Filtro de produto
+            territory_scope: Escopo territorial
+            price_period: Período de tempo
+            
+        Returns:
+            Histórico de preços em formato colunar
+        """
+        records = await self.get_price_history(product_filter, territory_scope, price_period)
+        return PriceColumns.from_records(product_filter.product_id, product_filter.unit, records)
+    
+    async def iter_price_columns(
+        self,
+        product_filter: ProductFilter,
+        territory_scope: TerritoryScope,
+        price_period: PricePeriod,
+        batch_size: int = 1000
+    ) -> AsyncIterator[PriceColumns]:
+        """
+        Obtém o histórico de preços em lotes colunares, para respostas em fluxo.
+        
+        O próximo lote só é produzido quando o consumidor pede, de modo que um
+        cliente lento desacelera a leitura da origem. A implementação padrão
+        divide o resultado de ``get_price_columns``; repositórios que conseguem
+        ler a origem incrementalmente devem sobrescrevê-la.
+        
+        Args:
+            product_filter: Filtro de produto
+            territory_scope: Escopo territorial
+            price_period: Período de tempo
+            batch_size: Quantidade máxima de registros por lote
+            
+        Returns:
+            Iterador assíncrono de lotes colunares
+        """
+        columns = await self.get_price_columns(product_filter, territory_scope, price_period)
+        for batch in columns.batches(batch_size):
+            yield batch
+    
+    async def get_price_summaries(
+        self,
+        product_filter: ProductFilter,
+        territory_scope: TerritoryScope,
+        price_period: PricePeriod
+    ) -> Optional[MonthlyPriceSummaries]:
+        """
+        Obtém os resumos mensais materializados por município, se disponíveis.
+        
+        Repositórios sem resumos materializados retornam None, e os serviços
+        recorrem ao histórico completo.
+        
+        Args:
+            product_filter: Filtro de produto
+            territory_scope: Escopo territorial
+            price_period: Período de tempo
+            
+        Returns:
+            Resumos mensais ou None
+        """
+        return None
+
+    async def get_price_year_summaries(
+        self,
+        product_filter: ProductFilter,
+        territory_scope: TerritoryScope,
+        price_period: PricePeriod
+    ) -> Optional[MonthlyPriceSummaries]:
+        """
+        Obtém os resumos anuais materializados por município, se disponíveis.
+        
+        Os resumos anuais usam a mesma estrutura dos mensais, com um período
+        por ano. Repositórios sem resumos anuais retornam None.
+        
+        Args:
+            product_filter: Filtro de produto
+            territory_scope: Escopo territorial
+            price_period: Período de tempo
+            
+        Returns:
+            Resumos anuais ou None
+        """
+        return None
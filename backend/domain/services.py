@@ -1,7 +1,21 @@
-from typing import List, Optional
+import asyncio
+from typing import AsyncIterator, Dict, Iterable, List, Optional
+import numpy as np
 from domain.entities import Product, Territory, TerritoryType, PriceRecord
 from domain.repositories import ProductRepository, TerritoryRepository, PriceRepository
 from domain.value_objects import ProductFilter, TerritoryScope, PricePeriod
+from domain.price_series import (
+    MonthlyPriceSummaries,
+    PriceColumns,
+    PriceAggregate,
+    PriceSummary,
+    TimeGranularity,
+    aggregate_price_series,
+    aggregate_monthly_summaries,
+    summarize_by_group,
+    summarize_monthly_by_group
+)
+from domain.units import common_base_unit, merge_unit_columns
 
 class ProductService:
     """Serviço de domínio para operações relacionadas a produtos."""
@@ -33,6 +47,18 @@ class ProductService:
             Produto encontrado ou None
         """
         return await self.product_repository.get_product(product_id)
+    
+    async def get_products(self, product_ids: Iterable[str]) -> Dict[str, Optional[Product]]:
+        """
+        Obtém vários produtos de uma vez.
+        
+        Args:
+            product_ids: IDs dos produtos
+            
+        Returns:
+            Dicionário do ID para o produto encontrado (ou None)
+        """
+        return await self.product_repository.get_products(product_ids)
 
 
 class TerritoryService:
@@ -61,13 +87,38 @@ class TerritoryService:
             Lista de municípios
         """
         return await self.territory_repository.get_municipalities(region_code)
+    
+    async def get_unmapped_municipalities(self) -> int:
+        """
+        Obtém a quantidade de municípios sem região conhecida.
+        
+        Returns:
+            Quantidade de municípios sem região (0 se o mapeamento estiver completo)
+        """
+        index = await self.territory_repository.get_index()
+        return index.unmapped_municipalities
 
 
 class PriceService:
     """Serviço de domínio para operações relacionadas a preços."""
     
-    def __init__(self, price_repository: PriceRepository):
+    def __init__(self, price_repository: PriceRepository, territory_repository: TerritoryRepository = None):
         self.price_repository = price_repository
+        self.territory_repository = territory_repository
+    
+    async def get_unmapped_municipalities(self) -> int:
+        """
+        Obtém a quantidade de municípios sem região conhecida, usada para
+        recusar consultas por região enquanto o mapeamento estiver incompleto.
+        
+        Returns:
+            Quantidade de municípios sem região (0 sem repositório de territórios)
+        """
+        if self.territory_repository is None:
+            return 0
+        
+        index = await self.territory_repository.get_index()
+        return index.unmapped_municipalities
     
     async def get_price_history(
         self,
@@ -76,7 +127,9 @@ class PriceService:
         territory_type: str,
         region_codes: List[str] = None,
         municipality_codes: List[str] = None,
-        year: int = None
+        year: int = None,
+        units: List[str] = None,
+        normalize: bool = False
     ) -> List[PriceRecord]:
         """
         Obtém o histórico de preços de acordo com os parâmetros especificados.
@@ -88,6 +141,8 @@ class PriceService:
             region_codes: Lista de códigos de região (opcional)
             municipality_codes: Lista de códigos de município (opcional)
             year: Ano de referência (opcional)
+            units: Outras unidades do produto a mesclar (opcional; implica ``normalize``)
+            normalize: Converte os preços para a unidade base (ver domain.units)
             
         Returns:
             Lista de registros de preço
@@ -105,8 +160,364 @@ class PriceService:
         
         price_period = PricePeriod(year=year)
         
+        if normalize or units:
+            columns = await self._unit_columns(product_id, unit, units, territory_scope, price_period)
+            return columns.to_records()
+        
         return await self.price_repository.get_price_history(
             product_filter,
             territory_scope,
             price_period
-        ) 
\ No newline at end of file
+        ) 
+    
+    async def iter_price_history(
+        self,
+        product_id: str,
+        unit: str,
+        territory_type: str,
+        region_codes: List[str] = None,
+        municipality_codes: List[str] = None,
+        year: int = None,
+        batch_size: int = 1000,
+        units: List[str] = None,
+        normalize: bool = False
+    ) -> AsyncIterator[PriceColumns]:
+        """
+        Obtém o histórico de preços em lotes colunares, para respostas em fluxo.
+        
+        Args:
+            product_id: ID do produto
+            unit: Unidade do produto
+            territory_type: Tipo de território (estado, região, município)
+            region_codes: Lista de códigos de região (opcional)
+            municipality_codes: Lista de códigos de município (opcional)
+            year: Ano de referência (opcional)
+            batch_size: Quantidade máxima de registros por lote
+            units: Outras unidades do produto a mesclar (opcional; implica ``normalize``)
+            normalize: Converte os preços para a unidade base (ver domain.units)
+            
+        Returns:
+            Iterador assíncrono de lotes colunares
+        """
+        territory_scope = TerritoryScope(
+            territory_type=TerritoryType(territory_type),
+            region_codes=region_codes,
+            municipality_codes=municipality_codes
+        )
+        
+        # A mescla ordena as linhas por data: o histórico é montado inteiro antes dos lotes
+        if normalize or units:
+            columns = await self._unit_columns(product_id, unit, units, territory_scope, PricePeriod(year=year))
+            for batch in columns.batches(batch_size):
+                yield batch
+            return
+        
+        async for batch in self.price_repository.iter_price_columns(
+            ProductFilter(product_id=product_id, unit=unit),
+            territory_scope,
+            PricePeriod(year=year),
+            batch_size
+        ):
+            yield batch
+    
+    async def get_price_timeseries(
+        self,
+        product_id: str,
+        unit: str,
+        territory_type: str,
+        region_codes: List[str] = None,
+        municipality_codes: List[str] = None,
+        year: int = None,
+        granularity: str = TimeGranularity.MONTH.value,
+        group_by: str = None,
+        max_points: int = 120,
+        units: List[str] = None,
+        normalize: bool = False
+    ) -> List[PriceAggregate]:
+        """
+        Obtém a série temporal agregada de preços.
+        
+        Args:
+            product_id: ID do produto
+            unit: Unidade do produto
+            territory_type: Tipo de território (estado, região, município)
+            region_codes: Lista de códigos de região (opcional)
+            municipality_codes: Lista de códigos de município (opcional)
+            year: Ano de referência (opcional)
+            granularity: Granularidade temporal (DIA, SEMANA, MES, TRIMESTRE)
+            group_by: Quebra territorial (MUNICIPIO ou REGIAO, opcional)
+            max_points: Número máximo de pontos por série
+            units: Outras unidades do produto a mesclar (opcional; implica ``normalize``)
+            normalize: Converte os preços para a unidade base (ver domain.units)
+            
+        Returns:
+            Lista de agregados por período
+        """
+        granularity_enum = TimeGranularity(granularity)
+        group_enum = TerritoryType(group_by) if group_by else None
+        
+        product_filter = ProductFilter(product_id=product_id, unit=unit)
+        territory_scope = TerritoryScope(
+            territory_type=TerritoryType(territory_type),
+            region_codes=region_codes,
+            municipality_codes=municipality_codes
+        )
+        price_period = PricePeriod(year=year)
+        normalized = normalize or bool(units)
+        
+        # Granularidades mensal e trimestral são compostas a partir dos resumos materializados
+        # (por unidade: as consultas normalizadas usam o histórico)
+        if granularity_enum in (TimeGranularity.MONTH, TimeGranularity.QUARTER) and not normalized:
+            summaries = await self.price_repository.get_price_summaries(product_filter, territory_scope, price_period)
+            if summaries is not None:
+                group_keys, group_names = await self._group_keys(group_enum, summaries.municipalities)
+                return aggregate_monthly_summaries(
+                    summaries,
+                    granularity_enum,
+                    max_points,
+                    group_keys=group_keys,
+                    group_names=group_names
+                )
+        
+        columns = await self._columns(product_filter, units, normalized, territory_scope, price_period)
+        group_keys, group_names = await self._group_keys(group_enum, columns.municipalities)
+        
+        return aggregate_price_series(
+            columns,
+            granularity_enum,
+            max_points,
+            group_keys=group_keys,
+            group_names=group_names
+        )
+    
+    async def _group_keys(self, group_by: Optional[TerritoryType], municipalities: np.ndarray):
+        """
+        Calcula a chave de grupo territorial de cada linha.
+        
+        Args:
+            group_by: Quebra territorial (opcional)
+            municipalities: Nomes dos municípios de cada linha
+            
+        Returns:
+            Tupla com as chaves de grupo (ou None) e os nomes de exibição dos grupos
+        """
+        if group_by == TerritoryType.MUNICIPALITY:
+            return municipalities, None
+        
+        if group_by == TerritoryType.REGION:
+            return await self._region_keys(municipalities)
+        
+        return None, None
+    
+    async def get_region_rollup(
+        self,
+        product_id: str,
+        unit: str,
+        year: int = None,
+        units: List[str] = None,
+        normalize: bool = False
+    ) -> List[PriceSummary]:
+        """
+        Resume o histórico de preços de todo o estado por região.
+        
+        Args:
+            product_id: ID do produto
+            unit: Unidade do produto
+            year: Ano de referência (opcional)
+            units: Outras unidades do produto a mesclar (opcional; implica ``normalize``)
+            normalize: Converte os preços para a unidade base (ver domain.units)
+            
+        Returns:
+            Lista de resumos de preço por região
+        """
+        product_filter = ProductFilter(product_id=product_id, unit=unit)
+        territory_scope = TerritoryScope(territory_type=TerritoryType.STATE)
+        price_period = PricePeriod(year=year)
+        normalized = normalize or bool(units)
+        
+        summaries = None if normalized else await self._materialized_summaries(product_filter, territory_scope, price_period)
+        if summaries is not None:
+            region_keys, region_names = await self._region_keys(summaries.municipalities)
+            return summarize_monthly_by_group(summaries, region_keys, region_names)
+        
+        columns = await self._columns(product_filter, units, normalized, territory_scope, price_period)
+        region_keys, region_names = await self._region_keys(columns.municipalities)
+        
+        return summarize_by_group(columns.prices, region_keys, region_names)
+    
+    async def get_price_summary(
+        self,
+        product_id: str,
+        unit: str,
+        territory_type: str,
+        region_codes: List[str] = None,
+        municipality_codes: List[str] = None,
+        year: int = None,
+        group_by: str = None,
+        units: List[str] = None,
+        normalize: bool = False
+    ) -> List[PriceSummary]:
+        """
+        Resume os preços de um escopo territorial (mediana, percentis, média e extremos).
+        
+        Quando há resumos materializados, os sketches de quantis das partições
+        (município, ano) são mesclados em vez de reler todos os preços.
+        
+        Args:
+            product_id: ID do produto
+            unit: Unidade do produto
+            territory_type: Tipo de território (estado, região, município)
+            region_codes: Lista de códigos de região (opcional)
+            municipality_codes: Lista de códigos de município (opcional)
+            year: Ano de referência (opcional)
+            group_by: Quebra territorial (MUNICIPIO ou REGIAO, opcional)
+            units: Outras unidades do produto a mesclar (opcional; implica ``normalize``)
+            normalize: Converte os preços para a unidade base (ver domain.units)
+            
+        Returns:
+            Lista de resumos, um por grupo (ou um único resumo sem quebra)
+        """
+        territory_enum = TerritoryType(territory_type)
+        group_enum = TerritoryType(group_by) if group_by else None
+        
+        product_filter = ProductFilter(product_id=product_id, unit=unit)
+        territory_scope = TerritoryScope(
+            territory_type=territory_enum,
+            region_codes=region_codes,
+            municipality_codes=municipality_codes
+        )
+        price_period = PricePeriod(year=year)
+        normalized = normalize or bool(units)
+        
+        summaries = None if normalized else await self._materialized_summaries(product_filter, territory_scope, price_period)
+        if summaries is not None:
+            group_keys, group_names = await self._summary_keys(group_enum, territory_enum, summaries.municipalities)
+            return summarize_monthly_by_group(summaries, group_keys, group_names)
+        
+        columns = await self._columns(product_filter, units, normalized, territory_scope, price_period)
+        group_keys, group_names = await self._summary_keys(group_enum, territory_enum, columns.municipalities)
+        
+        return summarize_by_group(columns.prices, group_keys, group_names)
+    
+    async def _columns(
+        self,
+        product_filter: ProductFilter,
+        units: Optional[List[str]],
+        normalize: bool,
+        territory_scope: TerritoryScope,
+        price_period: PricePeriod
+    ) -> PriceColumns:
+        """
+        Obtém o histórico colunar da unidade consultada ou, se normalizado, o
+        histórico mesclado das unidades com os preços por unidade base.
+        """
+        if not normalize:
+            return await self.price_repository.get_price_columns(product_filter, territory_scope, price_period)
+        
+        return await self._unit_columns(
+            product_filter.product_id, product_filter.unit, units, territory_scope, price_period
+        )
+    
+    async def _unit_columns(
+        self,
+        product_id: str,
+        unit: str,
+        units: Optional[List[str]],
+        territory_scope: TerritoryScope,
+        price_period: PricePeriod
+    ) -> PriceColumns:
+        """
+        Obtém os históricos de um produto em várias unidades, mesclados com os
+        preços convertidos para a unidade base comum.
+        
+        As unidades são validadas antes das consultas, e os históricos de
+        cada unidade são obtidos em paralelo (e armazenados no cache por
+        unidade, como nas consultas sem normalização).
+        
+        Args:
+            product_id: ID do produto
+            unit: Unidade consultada
+            units: Outras unidades do produto (opcional)
+            territory_scope: Escopo territorial
+            price_period: Período de tempo
+            
+        Returns:
+            Histórico colunar mesclado, com a unidade base como unidade
+            
+        Raises:
+            ValueError: Se as unidades não tiverem a mesma unidade base
+        """
+        all_units = list(dict.fromkeys([unit, *(units or [])]))
+        common_base_unit(all_units)
+        
+        parts = await asyncio.gather(*[
+            self.price_repository.get_price_columns(
+                ProductFilter(product_id=product_id, unit=part_unit),
+                territory_scope,
+                price_period
+            )
+            for part_unit in all_units
+        ])
+        return merge_unit_columns(parts)
+    
+    async def _materialized_summaries(
+        self,
+        product_filter: ProductFilter,
+        territory_scope: TerritoryScope,
+        price_period: PricePeriod
+    ) -> Optional[MonthlyPriceSummaries]:
+        """
+        Obtém os resumos materializados mais grossos disponíveis (anuais, depois mensais).
+        
+        Args:
+            product_filter: Filtro de produto
+            territory_scope: Escopo territorial
+            price_period: Período de tempo
+            
+        Returns:
+            Resumos por município ou None se o repositório não os materializa
+        """
+        summaries = await self.price_repository.get_price_year_summaries(product_filter, territory_scope, price_period)
+        if summaries is not None:
+            return summaries
+        
+        return await self.price_repository.get_price_summaries(product_filter, territory_scope, price_period)
+    
+    async def _summary_keys(
+        self,
+        group_by: Optional[TerritoryType],
+        territory_type: TerritoryType,
+        municipalities: np.ndarray
+    ):
+        """
+        Calcula a chave de grupo de cada linha para um resumo, agrupando tudo em um só grupo sem quebra.
+        
+        Args:
+            group_by: Quebra territorial (opcional)
+            territory_type: Tipo de território consultado, usado como grupo único
+            municipalities: Nomes dos municípios de cada linha
+            
+        Returns:
+            Tupla com as chaves de grupo e os nomes de exibição dos grupos
+        """
+        if group_by is None:
+            return np.full(len(municipalities), territory_type.value, dtype=object), None
+        
+        return await self._group_keys(group_by, municipalities)
+    
+    async def _region_keys(self, municipalities: np.ndarray):
+        """
+        Associa cada município de um histórico à sua região.
+        
+        Args:
+            municipalities: Nomes dos municípios de cada registro
+            
+        Returns:
+            Tupla com o código de região de cada registro e os nomes das regiões
+        """
+        if self.territory_repository is None:
+            return np.full(len(municipalities), None, dtype=object), {}
+        
+        index = await self.territory_repository.get_index()
+        
+        return index.region_keys(municipalities), index.region_names()
@@ -0,0 +1,176 @@
+"""
+Índice em memória dos territórios, com buscas em tempo constante por código,
+por nome e pela região de cada município.
+"""
+
+import hashlib
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from domain.entities import Territory, TerritoryType
+
+
+@lru_cache(maxsize=4096)
+def normalize_territory_name(name: str) -> str:
+    """
+    Normaliza o nome de um território para comparação.
+
+    Remove acentos, espaços excedentes e diferenças de caixa, de modo que
+    "Uberlândia" e "UBERLANDIA" resultem na mesma chave.
+
+    Args:
+        name: Nome do território
+
+    Returns:
+        Nome normalizado
+    """
+    decomposed = unicodedata.normalize("NFKD", name)
+    without_accents = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(without_accents.upper().split())
+
+
+class TerritoryIndex:
+    """
+    Índice imutável de regiões e municípios.
+
+    É construído uma única vez a partir das listas de territórios e
+    reconstruído apenas quando essas listas são atualizadas.
+    """
+
+    def __init__(self, regions: Iterable[Territory], municipalities: Iterable[Territory]):
+        self.regions: List[Territory] = list(regions)
+        self.municipalities: List[Territory] = list(municipalities)
+
+        self._regions_by_id: Dict[str, Territory] = {region.id: region for region in self.regions}
+        self._municipalities_by_id: Dict[str, Territory] = {}
+        self._municipality_id_by_name: Dict[str, str] = {}
+        self._municipalities_by_region: Dict[str, List[Territory]] = {}
+
+        for municipality in self.municipalities:
+            # Mantém a primeira ocorrência em caso de código ou nome repetido
+            self._municipalities_by_id.setdefault(municipality.id, municipality)
+            self._municipality_id_by_name.setdefault(normalize_territory_name(municipality.name), municipality.id)
+            if municipality.region_id:
+                self._municipalities_by_region.setdefault(municipality.region_id, []).append(municipality)
+
+        # Municípios sem região conhecida: enquanto houver algum, os agrupamentos
+        # e filtros por região seriam parciais
+        self.unmapped_municipalities = sum(
+            1 for municipality in self._municipalities_by_id.values() if not municipality.region_id
+        )
+
+    @property
+    def regions_complete(self) -> bool:
+        """Indica se todos os municípios têm região conhecida."""
+        return self.unmapped_municipalities == 0
+
+    def get(self, territory_id: str, territory_type: TerritoryType) -> Optional[Territory]:
+        """
+        Obtém um território pelo código e tipo.
+
+        Args:
+            territory_id: Código do território
+            territory_type: Tipo do território
+
+        Returns:
+            Território encontrado ou None
+        """
+        if territory_type == TerritoryType.REGION:
+            return self._regions_by_id.get(territory_id)
+
+        if territory_type == TerritoryType.MUNICIPALITY:
+            return self._municipalities_by_id.get(territory_id)
+
+        return None
+
+    def municipality_code(self, name: str) -> Optional[str]:
+        """
+        Obtém o código de um município pelo nome.
+
+        Args:
+            name: Nome do município (com ou sem acentos)
+
+        Returns:
+            Código do município ou None
+        """
+        return self._municipality_id_by_name.get(normalize_territory_name(name))
+
+    def region_of(self, municipality: str) -> Optional[str]:
+        """
+        Obtém o código da região de um município.
+
+        Args:
+            municipality: Código ou nome do município
+
+        Returns:
+            Código da região ou None
+        """
+        territory = self._municipalities_by_id.get(municipality)
+        if territory is None:
+            code = self.municipality_code(municipality)
+            territory = self._municipalities_by_id.get(code) if code else None
+        return territory.region_id if territory else None
+
+    def region_name(self, region_id: str) -> Optional[str]:
+        """
+        Obtém o nome de uma região.
+
+        Args:
+            region_id: Código da região
+
+        Returns:
+            Nome da região ou None
+        """
+        region = self._regions_by_id.get(region_id)
+        return region.name if region else None
+
+    def region_names(self) -> Dict[str, str]:
+        """Obtém o mapeamento de código para nome de todas as regiões."""
+        return {region.id: region.name for region in self.regions}
+
+    def municipalities_of(self, region_id: str) -> List[Territory]:
+        """
+        Obtém os municípios de uma região.
+
+        Args:
+            region_id: Código da região
+
+        Returns:
+            Lista de municípios da região
+        """
+        return list(self._municipalities_by_region.get(region_id, []))
+
+    def region_keys(self, municipalities: np.ndarray) -> np.ndarray:
+        """
+        Associa cada elemento de um array de municípios à sua região.
+
+        Cada município distinto é resolvido uma única vez; o resultado é
+        expandido para todas as linhas pelo índice inverso.
+
+        Args:
+            municipalities: Códigos ou nomes de municípios
+
+        Returns:
+            Array com o código da região de cada elemento (None se desconhecida)
+        """
+        if len(municipalities) == 0:
+            return np.empty(0, dtype=object)
+
+        names, inverse = np.unique(municipalities.astype(str), return_inverse=True)
+        regions = np.array([self.region_of(name) for name in names.tolist()], dtype=object)
+        return regions[inverse]
+
+    def content_digest(self) -> str:
+        """
+        Calcula um resumo (hash) do conteúdo, estável entre processos.
+
+        Returns:
+            Resumo hexadecimal do conteúdo
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        for territory in [*self.regions, *self.municipalities]:
+            digest.update(f"{territory.id}\x1f{territory.name}\x1f{territory.type.value}\x1f{territory.region_id}\x1e".encode())
+        return digest.hexdigest()
@@ -0,0 +1,229 @@
+"""
+Interpretação das unidades de fornecimento dos produtos (ex.: "CAIXA 100,00 UN")
+e conversão dos preços para uma unidade base comum, para comparar e mesclar
+históricos do mesmo produto comprado em embalagens diferentes.
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from domain.price_series import PriceColumns
+
+# Unidades reconhecidas: unidade base e quantas unidades base cada uma representa
+_UNIT_ALIASES: Dict[str, Tuple[str, float]] = {}
+for _names, _base, _scale in (
+    (("UN", "UND", "UNID", "UNIDADE", "UNIDADES", "U", "PC", "PECA", "PECAS"), "UN", 1.0),
+    (("DZ", "DUZIA", "DUZIAS"), "UN", 12.0),
+    (("CENTO", "CENTOS"), "UN", 100.0),
+    (("MILHEIRO", "MILHEIROS"), "UN", 1000.0),
+    (("FL", "FLS", "FOLHA", "FOLHAS"), "FL", 1.0),
+    (("PAR", "PARES"), "PAR", 1.0),
+    (("MG", "MILIGRAMA", "MILIGRAMAS"), "G", 0.001),
+    (("G", "GR", "GRS", "GRAMA", "GRAMAS"), "G", 1.0),
+    (("KG", "KGS", "QUILO", "QUILOS", "QUILOGRAMA", "QUILOGRAMAS", "KILO", "KILOS"), "G", 1000.0),
+    (("T", "TON", "TONELADA", "TONELADAS"), "G", 1000000.0),
+    (("ML", "MILILITRO", "MILILITROS"), "ML", 1.0),
+    (("L", "LT", "LTS", "LITRO", "LITROS"), "ML", 1000.0),
+    (("MM", "MILIMETRO", "MILIMETROS"), "M", 0.001),
+    (("CM", "CENTIMETRO", "CENTIMETROS"), "M", 0.01),
+    (("M", "MT", "MTS", "METRO", "METROS"), "M", 1.0),
+    (("KM", "QUILOMETRO", "QUILOMETROS"), "M", 1000.0),
+    (("M2", "METRO QUADRADO", "METROS QUADRADOS"), "M2", 1.0),
+    (("M3", "METRO CUBICO", "METROS CUBICOS"), "M3", 1.0),
+):
+    for _name in _names:
+        _UNIT_ALIASES[_name] = (_base, _scale)
+
+# Formas farmacêuticas: a quantidade que as acompanha é a dosagem, não o conteúdo
+# (ex.: "COMPRIMIDO 500 MG" é um comprimido); após uma quantidade, são unidades
+# avulsas (ex.: "CAIXA 30 COMPRIMIDOS" são 30 unidades)
+_DOSAGE_FORMS = {"COMPRIMIDO", "COMPRIMIDOS", "COMP", "CP", "CAPSULA", "CAPSULAS", "CAPS", "DRAGEA", "DRAGEAS"}
+
+# Embalagem opcional, quantidade (no formato brasileiro, opcionalmente com um
+# multiplicador, ex.: "12X1") e unidade opcional no fim do texto
+_QUANTITY_PATTERN = re.compile(
+    r"^(?P<package>.*?)\s*(?:\b(?:C/|COM|CONTENDO|DE)\s*)?(?P<quantity>\d[\d.,]*)"
+    r"(?:\s*X\s*(?P<multiplier>\d[\d.,]*))?\s*(?P<unit>[A-Z][A-Z0-9 ]*?)?\.?$"
+)
+
+
+class UnitOfMeasure:
+    """
+    Objeto de valor que representa uma unidade de fornecimento interpretada.
+
+    ``factor`` é a quantidade de unidades base contida em uma unidade de
+    fornecimento: o preço por unidade base é o preço dividido por ele. Ex.:
+    "CAIXA 100,00 UN" tem base "UN" e fator 100; "FRASCO 1,00 L" tem base
+    "ML" e fator 1000. Unidades não reconhecidas têm como base o próprio
+    texto normalizado e fator 1, e só se combinam com elas mesmas.
+    """
+
+    __slots__ = ("raw", "package", "quantity", "base_unit", "factor", "known")
+
+    def __init__(
+        self,
+        raw: str,
+        package: Optional[str],
+        quantity: float,
+        base_unit: str,
+        factor: float,
+        known: bool
+    ):
+        self.raw = raw
+        self.package = package
+        self.quantity = quantity
+        self.base_unit = base_unit
+        self.factor = factor
+        self.known = known
+
+    def __repr__(self) -> str:
+        return f"UnitOfMeasure({self.raw!r} -> {self.factor:g} {self.base_unit})"
+
+
+def _normalize_unit_text(text: str) -> str:
+    """Remove acentos, espaços excedentes e diferenças de caixa."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    without_accents = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(without_accents.upper().split())
+
+
+def _parse_quantity(text: str) -> Optional[float]:
+    """
+    Interpreta uma quantidade no formato brasileiro ("100,00", "1.000", "1.000,5").
+
+    Returns:
+        Quantidade ou None se o texto não for um número positivo
+    """
+    if "," in text:
+        text = text.replace(".", "").replace(",", ".")
+    elif re.fullmatch(r"\d{1,3}(?:\.\d{3})+", text):
+        text = text.replace(".", "")
+    try:
+        quantity = float(text)
+    except ValueError:
+        return None
+    return quantity if quantity > 0 else None
+
+
+@lru_cache(maxsize=4096)
+def parse_unit(raw: str) -> UnitOfMeasure:
+    """
+    Interpreta uma unidade de fornecimento.
+
+    O resultado é memorizado: cada texto distinto é interpretado uma única vez.
+
+    Args:
+        raw: Unidade como informada pela API (ex.: "CAIXA 100,00 UN", "LITRO")
+
+    Returns:
+        Unidade interpretada
+    """
+    text = _normalize_unit_text(raw)
+
+    # Unidade simples (ex.: "UNIDADE", "QUILOGRAMA")
+    alias = _UNIT_ALIASES.get(text)
+    if alias is not None:
+        return UnitOfMeasure(raw, None, 1.0, alias[0], alias[1], True)
+
+    # Forma farmacêutica sem dosagem (ex.: "COMPRIMIDO"): uma unidade, como "COMPRIMIDO 500 MG"
+    if text in _DOSAGE_FORMS:
+        return UnitOfMeasure(raw, text, 1.0, "UN", 1.0, True)
+
+    match = _QUANTITY_PATTERN.match(text)
+    quantity = _parse_quantity(match.group("quantity").rstrip(".,")) if match else None
+    if quantity is not None and match.group("multiplier"):
+        # Embalagem de embalagens (ex.: "CAIXA 12X1 UN"): 12 vezes 1 unidade
+        multiplier = _parse_quantity(match.group("multiplier").rstrip(".,"))
+        quantity = quantity * multiplier if multiplier is not None else None
+    if quantity is None:
+        # Embalagem sem conteúdo informado (ex.: "CAIXA", "PCT"): comparável só com ela mesma
+        return UnitOfMeasure(raw, text or None, 1.0, text, 1.0, False)
+
+    package = match.group("package") or None
+    if package and package.split()[0] in _DOSAGE_FORMS:
+        # Dosagem de uma forma farmacêutica (ex.: "COMPRIMIDO REVESTIDO 500 MG")
+        return UnitOfMeasure(raw, package, 1.0, "UN", 1.0, True)
+
+    unit_text = (match.group("unit") or "").strip()
+    if not unit_text or unit_text.split()[0] in _DOSAGE_FORMS:
+        # Quantidade sem unidade (ex.: "CAIXA 100") ou de uma forma farmacêutica,
+        # com ou sem dosagem (ex.: "CAIXA 30 COMPRIMIDOS 500 MG"): unidades avulsas
+        return UnitOfMeasure(raw, package, quantity, "UN", quantity, True)
+
+    alias = _UNIT_ALIASES.get(unit_text)
+    if alias is None:
+        return UnitOfMeasure(raw, package, quantity, unit_text, quantity, False)
+    return UnitOfMeasure(raw, package, quantity, alias[0], quantity * alias[1], True)
+
+
+def common_base_unit(units: Iterable[str]) -> str:
+    """
+    Obtém a unidade base comum a várias unidades de fornecimento.
+
+    Args:
+        units: Unidades como informadas pela API
+
+    Returns:
+        Unidade base comum
+
+    Raises:
+        ValueError: Se não houver unidades ou se elas não tiverem a mesma unidade base
+    """
+    parsed = [parse_unit(unit) for unit in units]
+    base_units = {unit.base_unit for unit in parsed}
+    if not base_units:
+        raise ValueError("Nenhuma unidade informada")
+    if len(base_units) > 1:
+        described = ", ".join(f"{unit.raw} ({unit.base_unit})" for unit in parsed)
+        raise ValueError(f"Unidades incompatíveis: {described}")
+    return base_units.pop()
+
+
+def merge_unit_columns(parts: Iterable[PriceColumns]) -> PriceColumns:
+    """
+    Mescla históricos do mesmo produto em unidades diferentes, com os preços
+    convertidos para a unidade base comum.
+
+    Cada unidade é interpretada uma vez (``parse_unit``) e a conversão é
+    feita em uma única operação vetorizada sobre todos os preços; as linhas
+    resultantes ficam em ordem de data. Com um único histórico, apenas
+    converte os preços. Os históricos recebidos não são alterados.
+
+    Args:
+        parts: Históricos colunares do mesmo produto, um por unidade
+
+    Returns:
+        Histórico colunar com a unidade base como unidade e os preços por unidade base
+
+    Raises:
+        ValueError: Se as unidades não tiverem a mesma unidade base
+    """
+    parts = list(parts)
+    base_unit = common_base_unit(part.unit for part in parts)
+    units = [parse_unit(part.unit) for part in parts]
+
+    product_id = parts[0].product_id
+    merged = PriceColumns.concat(product_id, base_unit, parts)
+    if not len(merged):
+        return PriceColumns.empty(product_id, base_unit)
+
+    factors = np.repeat(
+        np.array([unit.factor for unit in units], dtype=np.float64),
+        [len(part) for part in parts]
+    )
+    columns = PriceColumns(
+        product_id=product_id,
+        unit=base_unit,
+        ids=merged.ids,
+        dates=merged.dates,
+        municipalities=merged.municipalities,
+        prices=merged.prices / factors
+    )
+
+    if sum(1 for part in parts if len(part)) > 1:
+        columns = columns.take(np.argsort(columns.dates, kind="stable"))
+    return columns
@@ -1,5 +1,9 @@
+import hashlib
+import json
 from datetime import date
-from typing import List, Optional
+from enum import Enum
+from typing import Any, Iterable, List, Mapping, Optional, Tuple, Union
+from urllib.parse import parse_qsl
 from domain.entities import TerritoryType
 
 class ProductFilter:
@@ -21,6 +25,11 @@ class ProductFilter:
         return result
 
 
+def _normalize_codes(codes: Optional[Iterable[str]]) -> List[str]:
+    """Remove espaços, vazios e repetições de uma lista de códigos e a ordena."""
+    return sorted({str(code).strip() for code in codes or () if str(code).strip()})
+
+
 class TerritoryScope:
     """Objeto de valor que representa o escopo territorial de uma consulta."""
     
@@ -31,8 +40,9 @@ class TerritoryScope:
         municipality_codes: Optional[List[str]] = None
     ):
         self.territory_type = territory_type
-        self.region_codes = region_codes if region_codes else []
-        self.municipality_codes = municipality_codes if municipality_codes else []
+        # Códigos sem repetição e ordenados: a ordem informada não muda a consulta
+        self.region_codes = _normalize_codes(region_codes)
+        self.municipality_codes = _normalize_codes(municipality_codes)
     
     def to_dict(self) -> dict:
         result = {
@@ -73,4 +83,142 @@ class PricePeriod:
         if self.end_date:
             result["dataFinal"] = self.end_date.isoformat()
         
-        return result 
\ No newline at end of file
+        return result
+
+
+def _canonical_value(value: Any, casefold: bool) -> Any:
+    """
+    Normaliza o valor de um campo de consulta.
+    
+    Textos têm os espaços normalizados (e são convertidos para maiúsculas se
+    ``casefold``); listas viram listas ordenadas sem repetição (ou o próprio
+    item, se houver um só); datas, enums e números viram texto. Valores
+    vazios viram None.
+    """
+    if value is None:
+        return None
+    if isinstance(value, Enum):
+        value = value.value
+    if isinstance(value, (list, tuple, set, frozenset)):
+        if all(type(item) is str for item in value):
+            # Caso comum (listas de códigos): normaliza os textos sem recursão
+            items = {" ".join(item.split()) for item in value}
+            if casefold:
+                items = {item.upper() for item in items}
+            items.discard("")
+        else:
+            items = {_canonical_value(item, casefold) for item in value}
+            items.discard(None)
+        if len(items) == 1:
+            return items.pop()
+        return sorted(items) or None
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, (int, float)):
+        return str(value)
+    text = " ".join(str(value).split())
+    if casefold:
+        text = text.upper()
+    return text or None
+
+
+class QueryKey:
+    """
+    Objeto de valor que representa uma consulta em forma canônica.
+    
+    Os campos são normalizados (vazios e None descartados, textos sem
+    espaços extras, listas ordenadas sem repetição, campos ordenados pelo
+    nome), de modo que consultas equivalentes geram a mesma chave. A chave
+    tem tamanho fixo: namespace, partição opcional (ex.: o produto, para
+    invalidações por prefixo) e um resumo de 128 bits dos campos.
+    
+    Usada como chave de cache dos repositórios, na coalescência de
+    requisições idênticas à API do TCE-MG e no ETag das respostas HTTP.
+    """
+    
+    __slots__ = ("namespace", "partition", "fields", "canonical", "digest", "key")
+    
+    def __init__(
+        self,
+        namespace: str,
+        partition: Optional[str] = None,
+        casefold: Iterable[str] = (),
+        **fields: Any
+    ):
+        """
+        Args:
+            namespace: Namespace da chave (ex.: "prices:history")
+            partition: Partição da chave, mantida legível (ex.: ID do produto)
+            casefold: Campos comparados sem diferenciar maiúsculas e minúsculas
+            **fields: Campos da consulta
+        """
+        casefold = set(casefold)
+        normalized = {}
+        for name, value in fields.items():
+            value = _canonical_value(value, name in casefold)
+            if value is not None:
+                normalized[name] = value
+        
+        self.namespace = namespace
+        self.partition = _canonical_value(partition, False)
+        self.fields: Tuple[Tuple[str, Any], ...] = tuple(sorted(normalized.items()))
+        self.canonical = json.dumps(self.fields, ensure_ascii=False, separators=(",", ":"))
+        self.digest = hashlib.blake2b(self.canonical.encode("utf-8"), digest_size=16).hexdigest()
+        prefix = f"{namespace}:{self.partition}" if self.partition else namespace
+        self.key = f"{prefix}:{self.digest}"
+    
+    @classmethod
+    def from_params(
+        cls,
+        namespace: str,
+        params: Union[Mapping[str, Any], str, bytes, None],
+        partition: Optional[str] = None
+    ) -> 'QueryKey':
+        """
+        Cria a chave de parâmetros de URL (dicionário ou query string).
+        
+        Parâmetros repetidos na query string viram listas (sem ordem).
+        
+        Args:
+            namespace: Namespace da chave
+            params: Parâmetros, como dicionário ou query string
+            partition: Partição da chave (opcional)
+            
+        Returns:
+            Chave canônica
+        """
+        if isinstance(params, (str, bytes)):
+            text = params.decode("latin-1") if isinstance(params, bytes) else params
+            grouped = {}
+            for name, value in parse_qsl(text, keep_blank_values=True):
+                grouped.setdefault(name, []).append(value)
+            params = {name: values[0] if len(values) == 1 else values for name, values in grouped.items()}
+        return cls(namespace, partition, **(params or {}))
+    
+    @staticmethod
+    def partition_prefix(namespace: str, partition: str) -> str:
+        """
+        Obtém o prefixo comum às chaves de uma partição (ex.: de um produto).
+        
+        Args:
+            namespace: Namespace das chaves
+            partition: Partição das chaves
+            
+        Returns:
+            Prefixo das chaves, para invalidações por prefixo
+        """
+        return f"{namespace}:{_canonical_value(partition, False)}:"
+    
+    def __str__(self) -> str:
+        return self.key
+    
+    def __repr__(self) -> str:
+        return f"QueryKey({self.key!r}, {self.canonical})"
+    
+    def __eq__(self, other) -> bool:
+        return isinstance(other, QueryKey) and self.key == other.key
+    
+    def __hash__(self) -> int:
+        return hash(self.key)
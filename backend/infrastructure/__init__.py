@@ -3,18 +3,28 @@ Camada de Infraestrutura - Contém as implementações concretas dos repositóri
 serviços de acesso a APIs externas, banco de dados e outras infraestruturas.
 """
 
+import importlib
+
 from infrastructure.config import Config
-from infrastructure.cache import CacheService
-from infrastructure.external import TCEMGApiClient
-from infrastructure.export import ExcelExportService
-from infrastructure.repositories import TCEMGProductRepository, TCEMGTerritoryRepository, TCEMGPriceRepository
 
-__all__ = [
-    'Config',
-    'CacheService',
-    'TCEMGApiClient',
-    'ExcelExportService',
-    'TCEMGProductRepository',
-    'TCEMGTerritoryRepository',
-    'TCEMGPriceRepository'
-] 
\ No newline at end of file
+# Os demais módulos (aiohttp, SQLite, pandas) são importados apenas no primeiro
+# acesso, para não pesar na inicialização de quem só precisa da configuração
+_LAZY_IMPORTS = {
+    'CacheService': 'infrastructure.cache',
+    'TCEMGApiClient': 'infrastructure.external',
+    'ExcelExportService': 'infrastructure.export',
+    'TCEMGProductRepository': 'infrastructure.repositories',
+    'TCEMGTerritoryRepository': 'infrastructure.repositories',
+    'TCEMGPriceRepository': 'infrastructure.repositories',
+    'SQLitePriceRepository': 'infrastructure.repositories',
+    'PriceStore': 'infrastructure.warehouse',
+    'PriceIngestionService': 'infrastructure.warehouse',
+    'SyntheticPriceGenerator': 'infrastructure.synthetic'
+}
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        return getattr(importlib.import_module(_LAZY_IMPORTS[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+__all__ = ['Config', *_LAZY_IMPORTS]
@@ -2,6 +2,22 @@
 Módulo de cache para armazenamento temporário de dados.
 """
 
-from .cache_service import CacheService
+from .cache_admin import CacheAdmin
+from .cache_broadcast import CacheBroadcast
+from .cache_reaper import CacheReaper
+from .cache_service import CacheService, content_version, record_content_version, track_cache_versions
+from .cache_warmer import CacheWarmer
+from .popularity_log import PopularityLog, PopularQuery
 
-__all__ = ['CacheService'] 
\ No newline at end of file
+__all__ = [
+    'CacheAdmin',
+    'CacheBroadcast',
+    'CacheReaper',
+    'CacheService',
+    'CacheWarmer',
+    'PopularQuery',
+    'PopularityLog',
+    'content_version',
+    'record_content_version',
+    'track_cache_versions'
+]
@@ -0,0 +1,253 @@
+import asyncio
+import logging
+import os
+from typing import Any, Dict, List, Optional, Set
+
+from domain.value_objects import QueryKey
+from ..telemetry.metrics import CACHE_BYTES, CACHE_ENTRIES, CACHE_EVICTIONS, CACHE_REQUESTS, collect
+from .cache_broadcast import CacheBroadcast
+from .cache_service import CacheService
+from .cache_warmer import CacheWarmer
+
+# Namespaces com entradas de um produto, com a partição (ou a chave) do produto
+_PRODUCT_PREFIXES = ("prices:history",)
+_PRODUCT_KEYS = ("products:id:{product_id}",)
+
+# Campo das estatísticas para cada resultado das consultas ao cache
+_REQUEST_FIELDS = {"hit": "hits", "negative_hit": "negative_hits", "error_hit": "error_hits", "miss": "misses"}
+
+
+class CacheAdmin:
+    """
+    Operações administrativas sobre o cache: estatísticas por namespace,
+    inspeção de chaves, invalidações e aquecimento sob demanda.
+
+    As invalidações e o aquecimento são aplicados neste worker e repassados
+    aos demais pelo ``CacheBroadcast`` (se houver vários workers). A
+    invalidação de um produto também remove as suas partições do armazém
+    local (compartilhado entre os workers), para que as correções publicadas
+    pela API sejam lidas de novo.
+    """
+
+    def __init__(
+        self,
+        cache_service: CacheService,
+        cache_warmer: Optional[CacheWarmer] = None,
+        price_store=None,
+        shared_dir: Optional[str] = None,
+        broadcast_interval: float = 1.0
+    ):
+        """
+        Args:
+            cache_service: Cache deste worker
+            cache_warmer: Aquecedor do cache (opcional)
+            price_store: Armazém local de preços (opcional)
+            shared_dir: Diretório compartilhado entre os workers (o das
+                métricas), usado nas estatísticas e no repasse dos comandos;
+                sem ele, as operações valem apenas para este processo
+            broadcast_interval: Intervalo entre leituras dos comandos dos
+                demais workers, em segundos
+        """
+        self.cache_service = cache_service
+        self.cache_warmer = cache_warmer
+        self.price_store = price_store
+        self.shared_dir = shared_dir
+        self.logger = logging.getLogger(__name__)
+        self.broadcast: Optional[CacheBroadcast] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+        if shared_dir:
+            self.broadcast = CacheBroadcast(
+                os.path.join(shared_dir, "cache-commands.jsonl"), broadcast_interval, self.apply
+            )
+
+    def start(self) -> None:
+        """Inicia a leitura dos comandos enviados pelos demais workers."""
+        if self.broadcast is not None:
+            self.broadcast.start()
+
+    async def stop(self) -> None:
+        """Interrompe a leitura dos comandos e os aquecimentos em andamento."""
+        if self.broadcast is not None:
+            await self.broadcast.stop()
+        for task in list(self._tasks):
+            task.cancel()
+
+    def namespaces(self) -> List[Dict[str, Any]]:
+        """
+        Obtém as estatísticas do cache por namespace, somadas entre os workers.
+
+        Entradas e bytes dos demais workers refletem a última gravação das
+        suas métricas; as entradas vazias e as falhas memorizadas são as
+        deste worker.
+
+        Returns:
+            Estatísticas por namespace, em ordem alfabética
+        """
+        snapshot = collect(self.shared_dir)
+        stats: Dict[str, Dict[str, Any]] = {}
+
+        def namespace_entry(namespace: str) -> Dict[str, Any]:
+            entry = stats.get(namespace)
+            if entry is None:
+                entry = stats[namespace] = {
+                    "namespace": namespace,
+                    "entries": 0,
+                    "bytes": 0,
+                    "hits": 0,
+                    "negative_hits": 0,
+                    "error_hits": 0,
+                    "misses": 0,
+                    "evictions": {},
+                    "worker": {"entries": 0, "negative": 0, "errors": 0, "bytes": 0}
+                }
+            return entry
+
+        def samples(metric) -> list:
+            return snapshot.get(metric.name, {}).get("samples", [])
+
+        for (namespace,), value in samples(CACHE_ENTRIES):
+            namespace_entry(namespace)["entries"] = int(value)
+        for (namespace,), value in samples(CACHE_BYTES):
+            namespace_entry(namespace)["bytes"] = int(value)
+        for (namespace, result), value in samples(CACHE_REQUESTS):
+            field = _REQUEST_FIELDS.get(result)
+            if field:
+                namespace_entry(namespace)[field] = int(value)
+        for (namespace, reason), value in samples(CACHE_EVICTIONS):
+            namespace_entry(namespace)["evictions"][reason] = int(value)
+        for namespace, local in self.cache_service.namespace_stats().items():
+            namespace_entry(namespace)["worker"] = local
+
+        for entry in stats.values():
+            hits = entry["hits"] + entry["negative_hits"]
+            lookups = hits + entry["misses"]
+            entry["hit_rate"] = hits / lookups if lookups else None
+
+        return [stats[namespace] for namespace in sorted(stats)]
+
+    def inspect(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Descreve uma entrada do cache deste worker.
+
+        Args:
+            key: Chave do cache
+
+        Returns:
+            Descrição da entrada (ver ``CacheService.inspect``) ou None se não existir
+        """
+        entry = self.cache_service.inspect(key)
+        if entry is not None:
+            entry["worker"] = os.getpid()
+        return entry
+
+    def apply(self, command: Dict[str, Any]) -> int:
+        """
+        Aplica um comando ao cache deste worker.
+
+        Args:
+            command: Comando ("invalidate", com "prefixes", "keys" e/ou
+                "pattern", ou "warm")
+
+        Returns:
+            Quantidade de entradas removidas
+        """
+        action = command.get("action")
+        if action == "warm":
+            self._schedule_warm()
+            return 0
+        if action != "invalidate":
+            raise ValueError(f"Comando de cache desconhecido: {action}")
+
+        removed = 0
+        for prefix in command.get("prefixes") or ():
+            removed += self.cache_service.clear_by_prefix(prefix)
+        for key in command.get("keys") or ():
+            removed += self.cache_service.delete(key)
+        if command.get("pattern"):
+            removed += self.cache_service.clear_by_pattern(command["pattern"])
+        return removed
+
+    def _execute(self, command: Dict[str, Any]) -> int:
+        """Aplica um comando neste worker e o repassa aos demais."""
+        removed = self.apply(command)
+        if self.broadcast is not None:
+            try:
+                self.broadcast.publish(command)
+            except OSError as e:
+                self.logger.error(f"Falha ao repassar o comando de cache aos demais workers: {e}")
+                raise
+        self.logger.info(f"Comando de cache {command} aplicado: {removed} entradas removidas neste worker")
+        return removed
+
+    async def invalidate_product(self, product_id: str) -> Dict[str, Any]:
+        """
+        Invalida todas as entradas de um produto e as suas partições do armazém local.
+
+        Args:
+            product_id: ID do produto
+
+        Returns:
+            Entradas removidas neste worker e partições removidas do armazém
+        """
+        command = {
+            "action": "invalidate",
+            "prefixes": [QueryKey.partition_prefix(namespace, product_id) for namespace in _PRODUCT_PREFIXES],
+            "keys": [key.format(product_id=product_id) for key in _PRODUCT_KEYS]
+        }
+
+        partitions = 0
+        if self.price_store is not None:
+            partitions = await asyncio.to_thread(self.price_store.drop_product, product_id)
+
+        return {"removed": self._execute(command), "warehouse_partitions": partitions}
+
+    def invalidate_namespace(self, namespace: str) -> Dict[str, Any]:
+        """
+        Invalida todas as entradas de um namespace (ex.: "prices:history").
+
+        Args:
+            namespace: Namespace das chaves
+
+        Returns:
+            Entradas removidas neste worker
+        """
+        prefix = namespace if namespace.endswith(":") else f"{namespace}:"
+        return {"removed": self._execute({"action": "invalidate", "prefixes": [prefix]})}
+
+    def invalidate_pattern(self, pattern: str) -> Dict[str, Any]:
+        """
+        Invalida as entradas cujas chaves correspondem a um padrão com curingas de shell.
+
+        Args:
+            pattern: Padrão das chaves (ex.: "products:search:*")
+
+        Returns:
+            Entradas removidas neste worker
+        """
+        return {"removed": self._execute({"action": "invalidate", "pattern": pattern})}
+
+    async def warm(self) -> Dict[str, Any]:
+        """
+        Executa um ciclo de aquecimento neste worker e o solicita aos demais.
+
+        Returns:
+            Consultas recarregadas neste worker
+
+        Raises:
+            RuntimeError: Se o aquecimento do cache estiver desativado
+        """
+        if self.cache_warmer is None:
+            raise RuntimeError("Aquecimento do cache desativado (CACHE_WARM_TOP_K)")
+
+        if self.broadcast is not None:
+            self.broadcast.publish({"action": "warm"})
+        return {"warmed": await self.cache_warmer.warm()}
+
+    def _schedule_warm(self) -> None:
+        """Agenda um ciclo de aquecimento em segundo plano, solicitado por outro worker."""
+        if self.cache_warmer is None:
+            return
+        task = asyncio.create_task(self.cache_warmer.warm())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
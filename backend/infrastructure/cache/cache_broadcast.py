@@ -0,0 +1,129 @@
+import asyncio
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, List, Optional
+
+# Aplica um comando recebido de outro worker
+Handler = Callable[[Dict[str, Any]], None]
+
+
+class CacheBroadcast:
+    """
+    Repassa comandos do cache (invalidações, aquecimento) entre os workers.
+
+    Cada worker tem o seu próprio cache em memória; para que uma invalidação
+    feita em um worker valha para todos, o comando é acrescentado, como uma
+    linha JSON, a um arquivo no diretório compartilhado entre os workers (o
+    mesmo das métricas). Cada worker lê periodicamente as linhas novas e
+    aplica as dos demais workers, com atraso de até ``interval`` segundos.
+
+    Os comandos são raros (ações administrativas) e pequenos; as linhas são
+    gravadas com uma única escrita em modo de acréscimo, que não se
+    intercala entre processos. Um worker iniciado depois de um comando não o
+    aplica, pois começa com o cache vazio.
+    """
+
+    def __init__(self, path: str, interval: float, handler: Handler):
+        """
+        Args:
+            path: Arquivo de comandos compartilhado entre os workers
+            interval: Intervalo entre leituras, em segundos
+            handler: Função que aplica um comando de outro worker
+        """
+        self.path = path
+        self.interval = interval
+        self.handler = handler
+        self.logger = logging.getLogger(__name__)
+        self._offset = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def publish(self, command: Dict[str, Any]) -> None:
+        """
+        Envia um comando aos demais workers.
+
+        Args:
+            command: Comando serializável em JSON
+        """
+        line = json.dumps({"pid": os.getpid(), "command": command}, ensure_ascii=False) + "\n"
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "ab") as file:
+            file.write(line.encode("utf-8"))
+
+    def _read(self) -> List[Dict[str, Any]]:
+        """Lê as linhas completas gravadas desde a última leitura."""
+        try:
+            with open(self.path, "rb") as file:
+                file.seek(0, os.SEEK_END)
+                size = file.tell()
+                # Arquivo recriado: começa do início
+                if size < self._offset:
+                    self._offset = 0
+                file.seek(self._offset)
+                data = file.read(size - self._offset)
+        except FileNotFoundError:
+            return []
+
+        complete = data.rfind(b"\n") + 1
+        self._offset += complete
+
+        messages = []
+        for line in data[:complete].splitlines():
+            try:
+                messages.append(json.loads(line))
+            except ValueError:
+                self.logger.warning(f"Comando de cache inválido em {self.path}: {line[:200]!r}")
+        return messages
+
+    def poll(self) -> int:
+        """
+        Aplica os comandos dos demais workers gravados desde a última leitura.
+
+        Returns:
+            Quantidade de comandos aplicados
+        """
+        pid = os.getpid()
+        applied = 0
+        for message in self._read():
+            if not isinstance(message, dict) or message.get("pid") == pid:
+                continue
+            try:
+                self.handler(message.get("command") or {})
+            except Exception as e:
+                self.logger.error(f"Erro ao aplicar o comando de cache {message.get('command')}: {e}")
+                continue
+            applied += 1
+        return applied
+
+    async def _run(self) -> None:
+        """Lê os comandos em laço até ser cancelado."""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.poll()
+            except OSError as e:
+                self.logger.warning(f"Falha ao ler os comandos de cache em {self.path}: {e}")
+
+    def start(self) -> None:
+        """Inicia a leitura periódica a partir do fim atual do arquivo."""
+        if self._task is not None:
+            return
+
+        try:
+            self._offset = os.path.getsize(self.path)
+        except OSError:
+            self._offset = 0
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Interrompe a leitura periódica."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
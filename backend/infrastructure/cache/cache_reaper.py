@@ -0,0 +1,72 @@
+import asyncio
+import logging
+from typing import Optional
+
+from .cache_service import CacheService
+
+
+class CacheReaper:
+    """
+    Remove periodicamente as entradas expiradas do cache.
+
+    Sem a remoção em segundo plano, uma entrada expirada só sai do cache
+    quando é lida de novo, e consultas que não se repetem ocupam memória
+    indefinidamente. A cada ``interval`` segundos, o removedor processa as
+    expirações vencidas em lotes de ``batch_size`` (ver
+    ``CacheService.reap_expired``), devolvendo o controle ao laço de eventos
+    entre os lotes, para não atrasar as requisições.
+    """
+
+    def __init__(self, cache_service: CacheService, interval: float, batch_size: int):
+        """
+        Args:
+            cache_service: Cache verificado
+            interval: Intervalo entre verificações, em segundos
+            batch_size: Máximo de expirações processadas por lote
+        """
+        self.cache_service = cache_service
+        self.interval = interval
+        self.batch_size = max(1, batch_size)
+        self.logger = logging.getLogger(__name__)
+        self._task: Optional[asyncio.Task] = None
+
+    async def reap(self) -> int:
+        """
+        Remove todas as entradas vencidas, em lotes.
+
+        Returns:
+            Quantidade de entradas e falhas memorizadas removidas
+        """
+        total = 0
+        while True:
+            total += self.cache_service.reap_expired(self.batch_size)
+            if not self.cache_service.has_due_expirations():
+                return total
+            await asyncio.sleep(0)
+
+    async def _run(self) -> None:
+        """Remove as entradas expiradas em laço até ser cancelado."""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                removed = await self.reap()
+            except Exception as e:
+                self.logger.error(f"Erro na remoção das entradas expiradas do cache: {e}")
+                continue
+            if removed:
+                self.logger.debug(f"{removed} entradas expiradas removidas do cache")
+
+    def start(self) -> None:
+        """Inicia a remoção periódica em segundo plano."""
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Interrompe a remoção periódica."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
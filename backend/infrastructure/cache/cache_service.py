@@ -1,16 +1,176 @@
+import asyncio
+import fnmatch
+import hashlib
+import heapq
+import json
 import logging
+import pickle
+import re
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime
-from typing import Optional, Any
+from typing import Optional, Any, Awaitable, Callable, Dict, Iterator, List, Tuple
 
 from ..config import Config
+from ..telemetry.metrics import CACHE_BYTES, CACHE_ENTRIES, CACHE_EVICTIONS, CACHE_REQUESTS
+
+# Versões das entradas de cache usadas na requisição atual (ver track_cache_versions)
+_accessed_versions: ContextVar[Optional[List[str]]] = ContextVar("accessed_cache_versions", default=None)
+
+
+def content_version(value: Any) -> str:
+    """
+    Calcula a versão de conteúdo de um valor armazenado no cache.
+    
+    A versão é um resumo do conteúdo, e não um contador, para que seja a
+    mesma em todos os workers e após reinicializações enquanto os dados da
+    API não mudarem.
+    
+    Args:
+        value: Valor armazenado
+        
+    Returns:
+        Versão do conteúdo (hexadecimal)
+    """
+    if hasattr(value, "content_digest"):
+        return value.content_digest()
+    
+    return hashlib.blake2b(_serialize(value), digest_size=16).hexdigest()
+
+
+def _serialize(value: Any) -> bytes:
+    """Serializa um valor do cache em JSON canônico."""
+    def to_jsonable(obj):
+        if hasattr(obj, "to_dict"):
+            return obj.to_dict()
+        return str(obj)
+    
+    return json.dumps(value, sort_keys=True, default=to_jsonable, ensure_ascii=False).encode()
+
+
+def _version_and_size(value: Any) -> Tuple[str, int]:
+    """
+    Calcula a versão de conteúdo e o tamanho aproximado (em bytes) de um valor.
+    
+    Valores simples são serializados uma única vez para as duas medidas.
+    """
+    if hasattr(value, "content_digest"):
+        size = value.nbytes if hasattr(value, "nbytes") else len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        return value.content_digest(), size
+    
+    serialized = _serialize(value)
+    return hashlib.blake2b(serialized, digest_size=16).hexdigest(), len(serialized)
+
+
+def cache_namespace(key: str) -> str:
+    """
+    Obtém o namespace de uma chave de cache (os dois primeiros segmentos).
+    
+    Ex.: "prices:history:{...}" -> "prices:history".
+    
+    Args:
+        key: Chave do cache
+        
+    Returns:
+        Namespace da chave
+    """
+    return ":".join(key.split(":", 2)[:2])
+
+
+def record_content_version(name: str, version: Any) -> None:
+    """
+    Registra a versão de uma fonte de dados usada pela requisição atual.
+    
+    Fontes que não passam pelo cache (ex.: o armazém local) devem registrar
+    a sua versão para que o ETag da resposta mude quando os dados mudarem.
+    
+    Args:
+        name: Nome da fonte de dados
+        version: Versão do conteúdo
+    """
+    versions = _accessed_versions.get()
+    if versions is not None:
+        versions.append(f"{name}={version}")
+
+
+@contextmanager
+def track_cache_versions() -> Iterator[List[str]]:
+    """
+    Registra as versões das entradas de cache lidas ou gravadas no contexto atual.
+    
+    Usado pela camada HTTP para derivar ETags das versões dos dados que
+    compõem a resposta, sem serializar nem comparar o corpo.
+    
+    Yields:
+        Lista (preenchida durante o contexto) com as chaves e versões acessadas
+    """
+    versions: List[str] = []
+    token = _accessed_versions.set(versions)
+    try:
+        yield versions
+    finally:
+        _accessed_versions.reset(token)
 
 class CacheService:
-    """Serviço de cache em memória."""
+    """
+    Serviço de cache em memória.
+    
+    Acertos, faltas, remoções, quantidade de entradas e tamanho aproximado
+    são contabilizados por namespace nas métricas (ver /metrics).
+    
+    Além dos valores, o cache guarda dois tipos de entrada de curta duração:
+    resultados sabidamente vazios (``set_negative``), que são valores como os
+    demais, mas expiram em ``Config.CACHE_NEGATIVE_EXPIRATION``; e falhas
+    recentes da API (``set_error``), mantidas à parte e nunca devolvidas por
+    ``get``, para que uma consulta com falha não seja repetida a cada
+    requisição durante ``Config.CACHE_ERROR_EXPIRATION``.
+    
+    O cache pode ser usado por várias corrotinas e threads: as operações
+    sobre uma chave são feitas sob um lock da chave (um de ``_STRIPES``
+    locks, escolhido pelo hash da chave), mantido apenas durante a
+    atualização dos dicionários, nunca durante um ``await``. Para consultas
+    concorrentes à mesma chave ausente, ``compute_if_absent`` calcula o
+    valor uma única vez. As entradas expiradas são removidas ao serem lidas
+    e, em segundo plano, aos poucos, por ``reap_expired`` (ver CacheReaper).
+    """
+    
+    # Quantidade de locks entre os quais as chaves são distribuídas
+    _STRIPES = 64
     
     def __init__(self):
         self.cache = {}
         self.expiration_times = {}
+        self.versions = {}
+        self.sizes = {}
+        self.stored_at = {}
+        self.negative = set()
+        self.errors = {}
         self.logger = logging.getLogger(__name__)
+        self._stripes = [threading.Lock() for _ in range(self._STRIPES)]
+        self._pending: Dict[str, asyncio.Future] = {}
+        # Expirações agendadas (instante, chave, tipo), para a remoção em segundo plano
+        self._expirations: List[Tuple[float, str, str]] = []
+        self._expirations_lock = threading.Lock()
+    
+    def _lock(self, key: str) -> threading.Lock:
+        """Obtém o lock responsável pela chave."""
+        return self._stripes[hash(key) % self._STRIPES]
+    
+    def _schedule_expiration(self, expiration_time: float, key: str, kind: str) -> None:
+        """Agenda a verificação de uma entrada ("value") ou falha ("error") no instante da expiração."""
+        with self._expirations_lock:
+            heapq.heappush(self._expirations, (expiration_time, key, kind))
+            
+            # Entradas substituídas deixam agendamentos obsoletos: refaz o heap
+            # quando eles passam a ser a maioria (custo amortizado constante)
+            if len(self._expirations) > 2 * (len(self.cache) + len(self.errors)) + 1024:
+                self._expirations = [
+                    (expiration, entry_key, "value") for entry_key, expiration in list(self.expiration_times.items())
+                ] + [
+                    (entry[0], entry_key, "error") for entry_key, entry in list(self.errors.items())
+                ]
+                heapq.heapify(self._expirations)
     
     def get(self, key: str) -> Optional[Any]:
         """
@@ -26,18 +186,23 @@ class CacheService:
             return None
         
         current_time = datetime.now().timestamp()
+        namespace = cache_namespace(key)
         
-        if key in self.cache and key in self.expiration_times:
-            # Verifica se o cache expirou
-            if current_time < self.expiration_times[key]:
-                self.logger.debug(f"Cache hit para {key}")
-                return self.cache[key]
-            else:
-                # Remove o item expirado
-                self.logger.debug(f"Cache expirado para {key}")
-                del self.cache[key]
-                del self.expiration_times[key]
-                
+        with self._lock(key):
+            expiration_time = self.expiration_times.get(key)
+            if key in self.cache and expiration_time is not None:
+                # Verifica se o cache expirou
+                if current_time < expiration_time:
+                    self.logger.debug(f"Cache hit para {key}")
+                    CACHE_REQUESTS.labels(namespace, "negative_hit" if key in self.negative else "hit").inc()
+                    self._record_version(key)
+                    return self.cache[key]
+                else:
+                    # Remove o item expirado
+                    self.logger.debug(f"Cache expirado para {key}")
+                    self._remove(key, "expired")
+        
+        CACHE_REQUESTS.labels(namespace, "miss").inc()
         return None
     
     def set(self, key: str, value: Any, expiration: int = None) -> None:
@@ -49,35 +214,434 @@ class CacheService:
             value: Valor a ser armazenado
             expiration: Tempo de expiração em segundos (opcional, usa o padrão se None)
         """
+        self._store(key, value, expiration or Config.CACHE_EXPIRATION, False)
+    
+    def _store(self, key: str, value: Any, expiration: float, negative: bool) -> None:
+        """
+        Armazena um valor no cache, substituindo de uma só vez a entrada anterior.
+        
+        Args:
+            key: Chave do cache
+            value: Valor a ser armazenado
+            expiration: Tempo de expiração em segundos
+            negative: Se o valor é um resultado sabidamente vazio
+        """
         if not Config.CACHE_ENABLED:
             return
         
-        expiration = expiration or Config.CACHE_EXPIRATION
-        expiration_time = datetime.now().timestamp() + expiration
+        # A serialização (versão e tamanho) é feita fora do lock
+        version, size = _version_and_size(value)
+        namespace = cache_namespace(key)
         
-        self.cache[key] = value
-        self.expiration_times[key] = expiration_time
+        with self._lock(key):
+            current_time = datetime.now().timestamp()
+            expiration_time = current_time + expiration
+            
+            if key not in self.cache:
+                CACHE_ENTRIES.labels(namespace).inc()
+            CACHE_BYTES.labels(namespace).inc(size - self.sizes.get(key, 0))
+            
+            self.cache[key] = value
+            self.expiration_times[key] = expiration_time
+            self.versions[key] = version
+            self.sizes[key] = size
+            self.stored_at[key] = current_time
+            if negative:
+                self.negative.add(key)
+            else:
+                self.negative.discard(key)
+            self.errors.pop(key, None)
+            self._record_version(key)
         
+        self._schedule_expiration(expiration_time, key, "value")
         self.logger.debug(f"Item armazenado no cache: {key}")
     
+    def set_negative(self, key: str, value: Any) -> None:
+        """
+        Armazena um resultado sabidamente vazio (ex.: busca sem resultados).
+        
+        A entrada é lida por ``get`` como qualquer outra, mas expira em
+        ``Config.CACHE_NEGATIVE_EXPIRATION``, para que dados publicados
+        depois pela API apareçam logo.
+        
+        Args:
+            key: Chave do cache
+            value: Resultado vazio a ser devolvido (ex.: lista vazia)
+        """
+        self._store(key, value, Config.CACHE_NEGATIVE_EXPIRATION, True)
+    
+    def store(self, key: str, value: Any, expiration: int = None) -> None:
+        """
+        Armazena um resultado, como vazio (``set_negative``) se não tiver itens.
+        
+        Args:
+            key: Chave do cache
+            value: Valor a ser armazenado
+            expiration: Tempo de expiração dos resultados não vazios em
+                segundos (opcional, usa o padrão se None)
+        """
+        if hasattr(value, "__len__") and len(value) == 0:
+            self.set_negative(key, value)
+        else:
+            self.set(key, value, expiration)
+    
+    async def compute_if_absent(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        expiration: int = None
+    ) -> Any:
+        """
+        Obtém o valor da chave, calculando-o e armazenando-o se estiver ausente.
+        
+        Deve ser chamado depois de um ``get`` sem resultado. Consultas
+        concorrentes à mesma chave (no mesmo laço de eventos) aguardam o
+        mesmo cálculo e recebem o mesmo valor ou o mesmo erro. O resultado é
+        armazenado com ``store``; erros não são memorizados (ver ``set_error``).
+        
+        Args:
+            key: Chave do cache
+            compute: Função assíncrona que calcula o valor
+            expiration: Tempo de expiração em segundos (opcional, usa o padrão se None)
+            
+        Returns:
+            Valor armazenado ou calculado
+            
+        Raises:
+            Exception: O erro do cálculo
+        """
+        loop = asyncio.get_running_loop()
+        
+        with self._lock(key):
+            # Preenchida por outra thread entre o ``get`` e esta chamada
+            expiration_time = self.expiration_times.get(key)
+            if key in self.cache and expiration_time is not None and datetime.now().timestamp() < expiration_time:
+                return self.cache[key]
+            
+            pending = self._pending.get(key)
+            owner = pending is None or pending.get_loop() is not loop
+            if owner:
+                future = loop.create_future()
+                self._pending[key] = future
+        
+        if not owner:
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # O cálculo foi cancelado com a consulta que o iniciou: recomeça
+                return await self.compute_if_absent(key, compute, expiration)
+        
+        try:
+            value = await compute()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Evita o aviso de exceção não lida quando não há outras consultas aguardando
+            future.exception()
+            raise
+        else:
+            self.store(key, value, expiration)
+            future.set_result(value)
+            return value
+        finally:
+            with self._lock(key):
+                if self._pending.get(key) is future:
+                    del self._pending[key]
+    
+    def set_error(self, key: str, error: Exception) -> None:
+        """
+        Memoriza uma falha da API para a consulta da chave.
+        
+        A falha não substitui o valor da chave nem é devolvida por ``get``;
+        enquanto não expirar (``Config.CACHE_ERROR_EXPIRATION``), ``get_error``
+        a informa, para que a consulta não seja repetida.
+        
+        Args:
+            key: Chave do cache da consulta
+            error: Erro ocorrido
+        """
+        if not Config.CACHE_ENABLED or Config.CACHE_ERROR_EXPIRATION <= 0:
+            return
+        
+        expiration_time = datetime.now().timestamp() + Config.CACHE_ERROR_EXPIRATION
+        with self._lock(key):
+            self.errors[key] = (expiration_time, f"{type(error).__name__}: {error}")
+        self._schedule_expiration(expiration_time, key, "error")
+        self.logger.debug(f"Falha memorizada no cache: {key}")
+    
+    def get_error(self, key: str) -> Optional[str]:
+        """
+        Obtém a falha recente da API memorizada para a consulta da chave.
+        
+        Args:
+            key: Chave do cache da consulta
+            
+        Returns:
+            Descrição da falha ou None se não houver falha recente
+        """
+        entry = self.errors.get(key)
+        if entry is None:
+            return None
+        
+        expiration_time, message = entry
+        if datetime.now().timestamp() >= expiration_time:
+            with self._lock(key):
+                if self.errors.get(key) is entry:
+                    del self.errors[key]
+            return None
+        
+        CACHE_REQUESTS.labels(cache_namespace(key), "error_hit").inc()
+        return message
+    
+    def ttl(self, key: str) -> Optional[float]:
+        """
+        Obtém o tempo restante até a expiração de uma entrada, sem contá-la como acesso.
+        
+        Args:
+            key: Chave do cache
+            
+        Returns:
+            Segundos até a expiração, ou None se a chave não existir ou estiver expirada
+        """
+        expiration_time = self.expiration_times.get(key)
+        if expiration_time is None or key not in self.cache:
+            return None
+        
+        remaining = expiration_time - datetime.now().timestamp()
+        return remaining if remaining > 0 else None
+    
+    def get_version(self, key: str) -> Optional[str]:
+        """
+        Obtém a versão de conteúdo de uma entrada do cache.
+        
+        Args:
+            key: Chave do cache
+            
+        Returns:
+            Versão do conteúdo ou None se a chave não existir
+        """
+        return self.versions.get(key)
+    
+    def inspect(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Descreve uma entrada do cache, sem contá-la como acesso.
+        
+        Args:
+            key: Chave do cache
+            
+        Returns:
+            Idade e tempo restante (em segundos), tamanho aproximado, versão de
+            conteúdo e falha memorizada da entrada, ou None se a chave não
+            tiver valor nem falha memorizada
+        """
+        current_time = datetime.now().timestamp()
+        error = self.errors.get(key)
+        if error is not None and current_time >= error[0]:
+            error = None
+        
+        if key not in self.cache and error is None:
+            return None
+        
+        stored_at = self.stored_at.get(key)
+        expiration_time = self.expiration_times.get(key)
+        return {
+            "key": key,
+            "namespace": cache_namespace(key),
+            "cached": key in self.cache,
+            "negative": key in self.negative,
+            "age": current_time - stored_at if stored_at is not None else None,
+            "ttl": expiration_time - current_time if expiration_time is not None else None,
+            "bytes": self.sizes.get(key),
+            "version": self.versions.get(key),
+            "error": error[1] if error is not None else None,
+            "error_ttl": error[0] - current_time if error is not None else None
+        }
+    
+    def namespace_stats(self) -> Dict[str, Dict[str, int]]:
+        """
+        Obtém a quantidade de entradas e o tamanho aproximado do cache por namespace.
+        
+        Returns:
+            Dicionário do namespace para as suas entradas, entradas vazias
+            (``set_negative``), falhas memorizadas e bytes
+        """
+        stats: Dict[str, Dict[str, int]] = {}
+        
+        def namespace_entry(key: str) -> Dict[str, int]:
+            namespace = cache_namespace(key)
+            entry = stats.get(namespace)
+            if entry is None:
+                entry = stats[namespace] = {"entries": 0, "negative": 0, "errors": 0, "bytes": 0}
+            return entry
+        
+        for key in list(self.cache):
+            entry = namespace_entry(key)
+            entry["entries"] += 1
+            entry["bytes"] += self.sizes.get(key, 0)
+            if key in self.negative:
+                entry["negative"] += 1
+        
+        for key in list(self.errors):
+            namespace_entry(key)["errors"] += 1
+        
+        return stats
+    
+    def _record_version(self, key: str) -> None:
+        """Registra a versão de uma entrada no rastreamento da requisição atual, se houver."""
+        record_content_version(key, self.versions.get(key))
+    
+    def _remove(self, key: str, reason: str) -> bool:
+        """
+        Remove uma entrada e atualiza as métricas do seu namespace.
+        
+        Deve ser chamado com o lock da chave.
+        
+        Args:
+            key: Chave do cache
+            reason: Motivo da remoção ("expired" ou "invalidated")
+            
+        Returns:
+            True se havia uma entrada com a chave
+        """
+        if key not in self.cache:
+            return False
+        
+        namespace = cache_namespace(key)
+        del self.cache[key]
+        self.expiration_times.pop(key, None)
+        self.versions.pop(key, None)
+        self.stored_at.pop(key, None)
+        self.negative.discard(key)
+        
+        CACHE_EVICTIONS.labels(namespace, reason).inc()
+        CACHE_ENTRIES.labels(namespace).dec()
+        CACHE_BYTES.labels(namespace).dec(self.sizes.pop(key, 0))
+        return True
+    
+    def reap_expired(self, limit: int = 500) -> int:
+        """
+        Remove entradas e falhas memorizadas já expiradas, no máximo ``limit`` por chamada.
+        
+        As expirações são agendadas em um heap ao armazenar cada entrada;
+        agendamentos de entradas substituídas ou já removidas são apenas
+        descartados. Assim, cada chamada tem custo proporcional a ``limit``,
+        e não ao tamanho do cache.
+        
+        Args:
+            limit: Máximo de agendamentos verificados
+            
+        Returns:
+            Quantidade de entradas e falhas removidas
+        """
+        current_time = datetime.now().timestamp()
+        removed = 0
+        
+        for _ in range(limit):
+            with self._expirations_lock:
+                if not self._expirations or self._expirations[0][0] > current_time:
+                    break
+                expiration_time, key, kind = heapq.heappop(self._expirations)
+            
+            with self._lock(key):
+                if kind == "error":
+                    entry = self.errors.get(key)
+                    if entry is not None and entry[0] <= current_time:
+                        del self.errors[key]
+                        removed += 1
+                elif self.expiration_times.get(key, current_time + 1) <= current_time:
+                    removed += self._remove(key, "expired")
+        
+        return removed
+    
+    def has_due_expirations(self) -> bool:
+        """
+        Indica se há expirações vencidas a processar por ``reap_expired``.
+        
+        Returns:
+            True se a próxima expiração agendada já venceu
+        """
+        with self._expirations_lock:
+            return bool(self._expirations) and self._expirations[0][0] <= datetime.now().timestamp()
+    
     def clear(self) -> None:
         """Limpa todo o cache."""
-        self.cache.clear()
-        self.expiration_times.clear()
+        self._clear_matching(lambda key: True)
+        with self._expirations_lock:
+            self._expirations.clear()
         self.logger.debug("Cache limpo")
     
-    def clear_by_prefix(self, prefix: str) -> None:
+    def _clear_matching(self, predicate: Callable[[str], bool]) -> int:
+        """
+        Remove as entradas e as falhas memorizadas cujas chaves atendem ao predicado.
+        
+        Args:
+            predicate: Função que indica se a chave deve ser removida
+            
+        Returns:
+            Quantidade de entradas removidas (sem contar as falhas memorizadas)
+        """
+        # Cópias das chaves: outras threads podem alterar os dicionários durante a limpeza
+        removed = 0
+        for key in [key for key in list(self.cache) if predicate(key)]:
+            with self._lock(key):
+                removed += self._remove(key, "invalidated")
+        
+        for key in [key for key in list(self.errors) if predicate(key)]:
+            with self._lock(key):
+                self.errors.pop(key, None)
+        
+        return removed
+    
+    def delete(self, key: str) -> bool:
+        """
+        Remove uma entrada do cache e a falha memorizada da sua chave.
+        
+        Args:
+            key: Chave do cache
+            
+        Returns:
+            True se havia uma entrada com a chave
+        """
+        with self._lock(key):
+            self.errors.pop(key, None)
+            return self._remove(key, "invalidated")
+    
+    def clear_by_prefix(self, prefix: str) -> int:
         """
         Limpa todos os itens do cache que começam com o prefixo.
         
         Args:
             prefix: Prefixo para filtrar as chaves
+            
+        Returns:
+            Quantidade de entradas removidas
+        """
+        removed = self._clear_matching(lambda key: key.startswith(prefix))
+        self.logger.debug(f"Cache limpo para o prefixo: {prefix}")
+        return removed
+    
+    def clear_by_pattern(self, pattern: str) -> int:
         """
-        keys_to_remove = [key for key in self.cache.keys() if key.startswith(prefix)]
+        Limpa todos os itens do cache cujas chaves correspondem ao padrão.
         
-        for key in keys_to_remove:
-            del self.cache[key]
-            if key in self.expiration_times:
-                del self.expiration_times[key]
+        O padrão usa curingas de shell (``*``, ``?`` e ``[...]``), com
+        diferenciação de maiúsculas e minúsculas. Um padrão sem curingas a
+        não ser um ``*`` final equivale a ``clear_by_prefix``.
+        
+        Args:
+            pattern: Padrão das chaves (ex.: "prices:history:*")
+            
+        Returns:
+            Quantidade de entradas removidas
+        """
+        if pattern.endswith("*") and not any(char in pattern[:-1] for char in "*?["):
+            return self.clear_by_prefix(pattern[:-1])
         
-        self.logger.debug(f"Cache limpo para o prefixo: {prefix}") 
\ No newline at end of file
+        matcher = re.compile(fnmatch.translate(pattern)).match
+        removed = self._clear_matching(lambda key: matcher(key) is not None)
+        self.logger.debug(f"Cache limpo para o padrão: {pattern}")
+        return removed
@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from ..external.rate_limiter import RateLimiter
+from ..telemetry.metrics import CACHE_WARMED
+from .cache_service import CacheService
+from .popularity_log import PopularityLog
+
+# Recarrega uma consulta a partir da sua descrição no registro de popularidade
+Loader = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class CacheWarmer:
+    """
+    Aquece o cache com as consultas mais populares antes que os usuários as repitam.
+
+    A cada ciclo (na inicialização e depois a cada ``interval`` segundos),
+    percorre as ``top_k`` consultas mais populares do registro e recarrega
+    da API as que não estão no cache ou expiram em menos de
+    ``refresh_ahead`` segundos, até o limite de ``budget`` requisições por
+    ciclo. Consultas com falha recente memorizada são ignoradas.
+
+    O aquecimento tem baixa prioridade: antes de cada requisição, aguarda o
+    limitador da API ficar ocioso (ver ``RateLimiter.wait_idle``), e as
+    requisições passam pelo mesmo limitador das demais.
+
+    O registro é gravado em ``log_path`` ao fim de cada ciclo e carregado na
+    inicialização, para que o primeiro ciclo já aqueça as consultas
+    populares antes da reinicialização.
+    """
+
+    def __init__(
+        self,
+        cache_service: CacheService,
+        popularity_log: PopularityLog,
+        rate_limiter: RateLimiter,
+        loaders: Dict[str, Loader],
+        top_k: int,
+        budget: int,
+        interval: float,
+        refresh_ahead: float,
+        log_path: Optional[str] = None
+    ):
+        """
+        Args:
+            cache_service: Cache aquecido
+            popularity_log: Registro de popularidade das consultas
+            rate_limiter: Limitador das requisições à API do TCE-MG
+            loaders: Função de recarga por namespace da consulta
+            top_k: Quantidade de consultas populares consideradas por ciclo
+            budget: Máximo de requisições à API por ciclo
+            interval: Intervalo entre ciclos, em segundos
+            refresh_ahead: Antecedência da recarga em relação à expiração, em segundos
+            log_path: Arquivo do registro de popularidade (opcional)
+        """
+        self.cache_service = cache_service
+        self.popularity_log = popularity_log
+        self.rate_limiter = rate_limiter
+        self.loaders = dict(loaders)
+        self.top_k = top_k
+        self.budget = budget
+        self.interval = interval
+        self.refresh_ahead = refresh_ahead
+        self.log_path = log_path
+        self.logger = logging.getLogger(__name__)
+        self._task: Optional[asyncio.Task] = None
+
+    def _needs_refresh(self, key: str) -> bool:
+        """Indica se a entrada da consulta está ausente ou próxima da expiração."""
+        remaining = self.cache_service.ttl(key)
+        return remaining is None or remaining < self.refresh_ahead
+
+    async def warm(self) -> int:
+        """
+        Executa um ciclo de aquecimento.
+
+        Returns:
+            Quantidade de consultas recarregadas com sucesso
+        """
+        started = time.perf_counter()
+        spent = 0
+        warmed = 0
+
+        for query in self.popularity_log.top(self.top_k):
+            if spent >= self.budget:
+                break
+
+            loader = self.loaders.get(query.namespace)
+            if loader is None or not self._needs_refresh(query.key):
+                continue
+            if self.cache_service.get_error(query.key) is not None:
+                CACHE_WARMED.labels(query.namespace, "skipped").inc()
+                continue
+
+            await self.rate_limiter.wait_idle()
+            spent += 1
+            try:
+                await loader(query.query)
+            except Exception as e:
+                self.logger.warning(f"Falha ao aquecer {query.key}: {e}")
+                self.cache_service.set_error(query.key, e)
+                CACHE_WARMED.labels(query.namespace, "error").inc()
+                continue
+
+            warmed += 1
+            CACHE_WARMED.labels(query.namespace, "ok").inc()
+
+        if spent:
+            self.logger.info(
+                f"Cache aquecido: {warmed} de {spent} consultas em {time.perf_counter() - started:.1f}s"
+            )
+        return warmed
+
+    def save_log(self) -> None:
+        """Grava o registro de popularidade, se houver arquivo configurado."""
+        if not self.log_path:
+            return
+        try:
+            self.popularity_log.save(self.log_path)
+        except OSError as e:
+            self.logger.warning(f"Falha ao gravar o registro de popularidade em {self.log_path}: {e}")
+
+    async def _run(self) -> None:
+        """Executa o aquecimento em laço até ser cancelado."""
+        while True:
+            try:
+                await self.warm()
+            except Exception as e:
+                self.logger.error(f"Erro no aquecimento do cache: {e}")
+            self.save_log()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Carrega o registro gravado e inicia o aquecimento periódico em segundo plano."""
+        if self._task is not None:
+            return
+
+        if self.log_path:
+            loaded = self.popularity_log.load(self.log_path)
+            if loaded:
+                self.logger.info(f"Registro de popularidade carregado com {loaded} consultas")
+
+        self._task = asyncio.create_task(self._run())
+        self.logger.info(
+            f"Aquecimento do cache iniciado: {self.top_k} consultas mais populares, "
+            f"até {self.budget} requisições a cada {self.interval:.0f}s"
+        )
+
+    async def stop(self) -> None:
+        """Interrompe o aquecimento periódico e grava o registro de popularidade."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.save_log()
@@ -0,0 +1,223 @@
+import heapq
+import json
+import logging
+import math
+import os
+import time
+from typing import Any, Dict, List, NamedTuple, Optional
+
+
+class PopularQuery(NamedTuple):
+    """Consulta do registro de popularidade, com o necessário para repeti-la."""
+    key: str
+    namespace: str
+    query: Dict[str, Any]
+    score: float
+
+
+class PopularityLog:
+    """
+    Registro compacto da popularidade das consultas (chaves de cache).
+
+    Cada consulta tem uma contagem com decaimento exponencial: um acesso
+    vale 1 agora e metade depois de ``half_life`` segundos. Para não
+    atualizar todas as contagens a cada acesso, os pesos crescem com o
+    tempo (decaimento "para frente"): o acesso no instante t soma
+    2^((t - t0) / half_life), o que preserva a ordem entre as consultas; as
+    contagens são reescaladas quando os pesos ficam grandes.
+
+    O registro guarda no máximo ``capacity`` consultas; ao ultrapassar o
+    limite em 10%, as menos populares são descartadas. Junto com a chave,
+    guarda a descrição da consulta (um dicionário serializável em JSON),
+    para que o aquecedor do cache possa repeti-la.
+    """
+
+    # Expoente a partir do qual as contagens são reescaladas (evita estouro do float)
+    _RESCALE_EXPONENT = 64.0
+
+    def __init__(self, capacity: int = 5000, half_life: float = 21600):
+        """
+        Args:
+            capacity: Máximo de consultas registradas
+            half_life: Meia-vida das contagens, em segundos
+        """
+        self.capacity = max(1, capacity)
+        self.half_life = half_life
+        self.logger = logging.getLogger(__name__)
+        self._entries: Dict[str, list] = {}
+        self._origin = time.time()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _weight(self, now: float) -> float:
+        """Peso de um acesso no instante dado, relativo à origem das contagens."""
+        exponent = (now - self._origin) / self.half_life
+        if exponent > self._RESCALE_EXPONENT:
+            self._rescale(now)
+            exponent = 0.0
+        return 2.0 ** exponent
+
+    def _rescale(self, now: float) -> None:
+        """Move a origem das contagens para o instante dado."""
+        factor = 2.0 ** (-(now - self._origin) / self.half_life)
+        for entry in self._entries.values():
+            entry[0] *= factor
+        self._origin = now
+
+    def record(self, key: str, namespace: str, query: Dict[str, Any], now: Optional[float] = None) -> None:
+        """
+        Registra um acesso a uma consulta.
+
+        Args:
+            key: Chave de cache da consulta
+            namespace: Namespace da consulta (ex.: "prices:history")
+            query: Descrição da consulta, serializável em JSON
+            now: Instante do acesso (padrão: agora)
+        """
+        weight = self._weight(time.time() if now is None else now)
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry[0] += weight
+            return
+
+        self._entries[key] = [weight, namespace, query]
+        if len(self._entries) > self.capacity * 1.1:
+            self._prune()
+
+    def touch(self, key: str, now: Optional[float] = None) -> bool:
+        """
+        Registra um acesso a uma consulta já registrada.
+
+        Permite evitar a montagem da descrição da consulta no caso comum
+        (consulta repetida).
+
+        Args:
+            key: Chave de cache da consulta
+            now: Instante do acesso (padrão: agora)
+
+        Returns:
+            True se a consulta já estava registrada
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return False
+        entry[0] += self._weight(time.time() if now is None else now)
+        return True
+
+    def _prune(self) -> None:
+        """Mantém apenas as ``capacity`` consultas mais populares."""
+        kept = heapq.nlargest(self.capacity, self._entries.items(), key=lambda item: item[1][0])
+        self._entries = dict(kept)
+
+    def score(self, key: str, now: Optional[float] = None) -> float:
+        """
+        Obtém a contagem atual (com decaimento) de uma consulta.
+
+        Args:
+            key: Chave de cache da consulta
+            now: Instante de referência (padrão: agora)
+
+        Returns:
+            Contagem com decaimento, ou 0 se a consulta não estiver registrada
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return 0.0
+        now = time.time() if now is None else now
+        return entry[0] * 2.0 ** (-(now - self._origin) / self.half_life)
+
+    def top(self, k: int, namespace: Optional[str] = None, now: Optional[float] = None) -> List[PopularQuery]:
+        """
+        Obtém as consultas mais populares.
+
+        Args:
+            k: Quantidade de consultas
+            namespace: Restringe a um namespace (opcional)
+            now: Instante de referência das contagens (padrão: agora)
+
+        Returns:
+            Consultas em ordem decrescente de popularidade
+        """
+        items = self._entries.items()
+        if namespace is not None:
+            items = [item for item in items if item[1][1] == namespace]
+        now = time.time() if now is None else now
+        decay = 2.0 ** (-(now - self._origin) / self.half_life)
+        return [
+            PopularQuery(key, entry[1], entry[2], entry[0] * decay)
+            for key, entry in heapq.nlargest(k, items, key=lambda item: item[1][0])
+        ]
+
+    def save(self, path: str) -> None:
+        """
+        Grava o registro em JSON (substituição atômica do arquivo).
+
+        Args:
+            path: Caminho do arquivo
+        """
+        now = time.time()
+        decay = 2.0 ** (-(now - self._origin) / self.half_life)
+        data = {
+            "saved_at": now,
+            "half_life": self.half_life,
+            "entries": [
+                [key, entry[0] * decay, entry[1], entry[2]]
+                for key, entry in heapq.nlargest(self.capacity, self._entries.items(), key=lambda item: item[1][0])
+            ]
+        }
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(data, file, ensure_ascii=False, separators=(",", ":"))
+        os.replace(temporary, path)
+
+    def load(self, path: str) -> int:
+        """
+        Carrega um registro gravado por ``save``, somando às contagens atuais.
+
+        As contagens gravadas continuam decaindo pelo tempo decorrido desde a
+        gravação. Arquivos ausentes ou inválidos são ignorados.
+
+        Args:
+            path: Caminho do arquivo
+
+        Returns:
+            Quantidade de consultas carregadas
+        """
+        try:
+            with open(path, encoding="utf-8") as file:
+                data = json.load(file)
+            entries = data["entries"]
+            elapsed = max(0.0, time.time() - float(data["saved_at"]))
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self.logger.warning(f"Registro de popularidade inválido em {path}: {e}")
+            return 0
+
+        # Contagem gravada, com decaimento, expressa na escala atual dos pesos
+        scale = self._weight(time.time()) * 2.0 ** (-elapsed / self.half_life)
+        loaded = 0
+        for item in entries:
+            try:
+                key, score, namespace, query = item
+                score = float(score)
+            except (TypeError, ValueError):
+                continue
+            if not math.isfinite(score) or score <= 0 or not isinstance(query, dict):
+                continue
+
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry[0] += score * scale
+            else:
+                self._entries[key] = [score * scale, namespace, query]
+            loaded += 1
+
+        if len(self._entries) > self.capacity:
+            self._prune()
+        return loaded
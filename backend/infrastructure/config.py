@@ -12,17 +12,99 @@ class Config:
     TCE_MUNICIPALITIES_ENDPOINT = f"{TCE_API_BASE_URL}/municipios"  # Endpoint hipotético
     TCE_PRICE_HISTORY_ENDPOINT = f"{TCE_API_BASE_URL}/precos/historico"
     
+    # Limites de requisições à API do TCE-MG (0 desativa)
+    TCE_MAX_CONCURRENT_REQUESTS = 8
+    TCE_MAX_REQUESTS_PER_SECOND = 10.0
+    TCE_REQUEST_BURST = 10
+    TCE_MAX_RETRIES = 2  # Novas tentativas em falhas transitórias (conexão, 429, 502, 503, 504)
+    TCE_RETRY_BACKOFF = 0.5  # Espera antes da primeira nova tentativa, dobrada a cada tentativa (segundos)
+    TCE_STREAM_DEADLINE = 120  # Prazo total de um histórico lido em fluxo, em segundos (0 desativa)
+    
+    # Gravação das respostas da API do TCE-MG para reprodução sem rede (benchmarks.fake_tce_server)
+    TCE_RECORD_DIR = ""  # Vazio desativa a gravação
+    
     # Configurações de cache
     CACHE_ENABLED = True
     CACHE_EXPIRATION = 3600  # 1 hora em segundos
+    CACHE_NEGATIVE_EXPIRATION = 300  # Resultados vazios (buscas sem resultados), em segundos
+    CACHE_ERROR_EXPIRATION = 30  # Falhas da API memorizadas por consulta, em segundos (0 desativa)
+    CACHE_REAP_INTERVAL = 60  # Remoção das entradas expiradas em segundo plano, em segundos (0 desativa)
+    CACHE_REAP_BATCH_SIZE = 500  # Expirações processadas por lote, entre as quais o laço de eventos é liberado
+    
+    # Aquecimento do cache com as consultas mais populares (em cada worker)
+    CACHE_WARM_TOP_K = 100  # Consultas mais populares consideradas por ciclo (0 desativa)
+    CACHE_WARM_BUDGET = 50  # Máximo de requisições à API por ciclo
+    CACHE_WARM_INTERVAL = 300  # Segundos entre ciclos
+    CACHE_WARM_REFRESH_AHEAD = 600  # Recarrega as entradas que expiram em menos que isso (segundos)
+    POPULARITY_LOG_CAPACITY = 5000  # Consultas guardadas no registro de popularidade
+    POPULARITY_HALF_LIFE = 21600  # Meia-vida das contagens de popularidade (6 horas)
+    POPULARITY_LOG_PATH = ""  # Arquivo do registro, carregado na inicialização (vazio: não gravado)
+    CACHE_BROADCAST_INTERVAL = 1  # Atraso máximo das invalidações administrativas nos demais workers (segundos)
+    
+    # Territórios: snapshot distribuído com a aplicação, atualizado em segundo plano pela API
+    TERRITORY_SNAPSHOT_PATH = ""  # Arquivo do snapshot atualizado (vazio: não gravado)
+    TERRITORY_REFRESH_INTERVAL = 86400  # 1 dia em segundos (0 desativa a atualização)
     
     # Configurações de logging
     LOG_LEVEL = logging.INFO
     LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     
+    # Compressão e cache HTTP das respostas
+    HTTP_COMPRESSION_MIN_SIZE = 1024  # Bytes
+    HTTP_CACHE_TERRITORY_MAX_AGE = 86400  # 1 dia
+    HTTP_CACHE_PRODUCT_MAX_AGE = 3600  # 1 hora
+    HTTP_CACHE_PRICE_MAX_AGE = 300  # 5 minutos
+    
+    # Respostas em fluxo (NDJSON) do histórico de preços
+    STREAM_BATCH_SIZE = 1000  # Registros por lote
+    STREAM_CACHE_MAX_ROWS = 500000  # Acima disso, o histórico em fluxo não é guardado no cache
+    
+    # Consultas em lote (POST /api/prices/batch)
+    BATCH_MAX_QUERIES = 200
+    
+    # Medição de latência por etapa (Server-Timing, logs e histogramas)
+    TIMING_SAMPLE_RATE = 0.1  # Fração das requisições medidas (0 desativa)
+    TIMING_LOG_THRESHOLD_MS = 1000  # Registra o log das requisições medidas a partir desta duração
+    
+    # Métricas (/metrics): diretório compartilhado entre os workers e intervalo de gravação
+    METRICS_DIR = ""  # Vazio: o api.launcher cria um diretório temporário quando há vários workers
+    METRICS_FLUSH_INTERVAL = 5  # Segundos
+    
+    # Rotas administrativas (/api/admin): token exigido no cabeçalho X-Admin-Token (vazio desativa)
+    ADMIN_TOKEN = ""
+    
+    # Perfis estatísticos sob demanda (cabeçalho X-Profile com o token administrativo ou amostragem)
+    PROFILING_SAMPLE_RATE = 0.0  # Fração das requisições elegíveis perfiladas (0 desativa a amostragem)
+    PROFILING_PATH_PATTERN = ""  # Expressão regular dos caminhos elegíveis à amostragem (vazio: todos)
+    PROFILING_MIN_DURATION_MS = 1000  # Guarda os perfis da amostragem apenas a partir desta duração
+    PROFILING_INTERVAL_MS = 2  # Intervalo entre amostras das pilhas
+    PROFILING_MAX_STORED = 50  # Perfis guardados (os mais antigos são descartados)
+    PROFILING_DIR = ""  # Diretório compartilhado entre os workers (vazio: memória de cada worker)
+    
     # Diretório para armazenar arquivos exportados
     EXPORT_DIR = "exports"
     
+    # Armazém local de preços (SQLite) e ingestão incremental
+    WAREHOUSE_ENABLED = False
+    WAREHOUSE_PATH = "data/warehouse.sqlite3"
+    INGESTION_WATCHLIST = []  # Lista de tuplas (id do produto, unidade)
+    INGESTION_INTERVAL = 3600  # 1 hora em segundos
+    
+    # Precisão dos sketches de quantis (maior = mais preciso e mais memória)
+    QUANTILE_SKETCH_K = 200
+    
+    # Servidor de produção (api.launcher)
+    SERVER_HOST = "0.0.0.0"
+    SERVER_PORT = 8000
+    SERVER_WORKERS = 1
+    SERVER_MAX_REQUESTS = 0  # Reciclagem de workers desativada
+    SERVER_MAX_REQUESTS_JITTER = 0
+    SERVER_GRACEFUL_TIMEOUT = 30  # Segundos para drenar requisições no encerramento
+    SERVER_PRELOAD = True
+    
+    # Tarefas em segundo plano (ingestão); com vários workers, apenas um as executa
+    BACKGROUND_TASKS_ENABLED = True
+    
     @classmethod
     def setup(cls):
         """Configura a aplicação."""
@@ -37,19 +119,177 @@ class Config:
             cls.TCE_MUNICIPALITIES_ENDPOINT = f"{cls.TCE_API_BASE_URL}/municipios"
             cls.TCE_PRICE_HISTORY_ENDPOINT = f"{cls.TCE_API_BASE_URL}/precos/historico"
             
+        if os.getenv("TCE_RECORD_DIR"):
+            cls.TCE_RECORD_DIR = os.getenv("TCE_RECORD_DIR")
+            
         if os.getenv("CACHE_ENABLED"):
             cls.CACHE_ENABLED = os.getenv("CACHE_ENABLED").lower() in ["true", "1", "t", "y", "yes"]
             
         if os.getenv("CACHE_EXPIRATION"):
             cls.CACHE_EXPIRATION = int(os.getenv("CACHE_EXPIRATION"))
             
+        if os.getenv("CACHE_NEGATIVE_EXPIRATION"):
+            cls.CACHE_NEGATIVE_EXPIRATION = int(os.getenv("CACHE_NEGATIVE_EXPIRATION"))
+            
+        if os.getenv("CACHE_ERROR_EXPIRATION"):
+            cls.CACHE_ERROR_EXPIRATION = int(os.getenv("CACHE_ERROR_EXPIRATION"))
+            
+        if os.getenv("CACHE_REAP_INTERVAL"):
+            cls.CACHE_REAP_INTERVAL = float(os.getenv("CACHE_REAP_INTERVAL"))
+            
+        if os.getenv("CACHE_REAP_BATCH_SIZE"):
+            cls.CACHE_REAP_BATCH_SIZE = int(os.getenv("CACHE_REAP_BATCH_SIZE"))
+            
+        if os.getenv("TERRITORY_SNAPSHOT_PATH"):
+            cls.TERRITORY_SNAPSHOT_PATH = os.getenv("TERRITORY_SNAPSHOT_PATH")
+            
+        if os.getenv("TERRITORY_REFRESH_INTERVAL"):
+            cls.TERRITORY_REFRESH_INTERVAL = int(os.getenv("TERRITORY_REFRESH_INTERVAL"))
+            
+        if os.getenv("CACHE_WARM_TOP_K"):
+            cls.CACHE_WARM_TOP_K = int(os.getenv("CACHE_WARM_TOP_K"))
+            
+        if os.getenv("CACHE_WARM_BUDGET"):
+            cls.CACHE_WARM_BUDGET = int(os.getenv("CACHE_WARM_BUDGET"))
+            
+        if os.getenv("CACHE_WARM_INTERVAL"):
+            cls.CACHE_WARM_INTERVAL = int(os.getenv("CACHE_WARM_INTERVAL"))
+            
+        if os.getenv("CACHE_WARM_REFRESH_AHEAD"):
+            cls.CACHE_WARM_REFRESH_AHEAD = int(os.getenv("CACHE_WARM_REFRESH_AHEAD"))
+            
+        if os.getenv("POPULARITY_LOG_CAPACITY"):
+            cls.POPULARITY_LOG_CAPACITY = int(os.getenv("POPULARITY_LOG_CAPACITY"))
+            
+        if os.getenv("POPULARITY_HALF_LIFE"):
+            cls.POPULARITY_HALF_LIFE = int(os.getenv("POPULARITY_HALF_LIFE"))
+            
+        if os.getenv("POPULARITY_LOG_PATH"):
+            cls.POPULARITY_LOG_PATH = os.getenv("POPULARITY_LOG_PATH")
+            
+        if os.getenv("CACHE_BROADCAST_INTERVAL"):
+            cls.CACHE_BROADCAST_INTERVAL = float(os.getenv("CACHE_BROADCAST_INTERVAL"))
+            
         if os.getenv("LOG_LEVEL"):
             level_name = os.getenv("LOG_LEVEL").upper()
             level = getattr(logging, level_name, logging.INFO)
             cls.LOG_LEVEL = level
             
+        if os.getenv("HTTP_COMPRESSION_MIN_SIZE"):
+            cls.HTTP_COMPRESSION_MIN_SIZE = int(os.getenv("HTTP_COMPRESSION_MIN_SIZE"))
+            
+        if os.getenv("HTTP_CACHE_TERRITORY_MAX_AGE"):
+            cls.HTTP_CACHE_TERRITORY_MAX_AGE = int(os.getenv("HTTP_CACHE_TERRITORY_MAX_AGE"))
+            
+        if os.getenv("HTTP_CACHE_PRODUCT_MAX_AGE"):
+            cls.HTTP_CACHE_PRODUCT_MAX_AGE = int(os.getenv("HTTP_CACHE_PRODUCT_MAX_AGE"))
+            
+        if os.getenv("HTTP_CACHE_PRICE_MAX_AGE"):
+            cls.HTTP_CACHE_PRICE_MAX_AGE = int(os.getenv("HTTP_CACHE_PRICE_MAX_AGE"))
+            
+        if os.getenv("STREAM_BATCH_SIZE"):
+            cls.STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE"))
+            
+        if os.getenv("STREAM_CACHE_MAX_ROWS"):
+            cls.STREAM_CACHE_MAX_ROWS = int(os.getenv("STREAM_CACHE_MAX_ROWS"))
+            
+        if os.getenv("BATCH_MAX_QUERIES"):
+            cls.BATCH_MAX_QUERIES = int(os.getenv("BATCH_MAX_QUERIES"))
+            
+        if os.getenv("TIMING_SAMPLE_RATE"):
+            cls.TIMING_SAMPLE_RATE = float(os.getenv("TIMING_SAMPLE_RATE"))
+            
+        if os.getenv("TIMING_LOG_THRESHOLD_MS"):
+            cls.TIMING_LOG_THRESHOLD_MS = float(os.getenv("TIMING_LOG_THRESHOLD_MS"))
+            
+        if os.getenv("METRICS_DIR"):
+            cls.METRICS_DIR = os.getenv("METRICS_DIR")
+            
+        if os.getenv("METRICS_FLUSH_INTERVAL"):
+            cls.METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL"))
+            
+        if os.getenv("ADMIN_TOKEN"):
+            cls.ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+            
+        if os.getenv("PROFILING_SAMPLE_RATE"):
+            cls.PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE"))
+            
+        if os.getenv("PROFILING_PATH_PATTERN"):
+            cls.PROFILING_PATH_PATTERN = os.getenv("PROFILING_PATH_PATTERN")
+            
+        if os.getenv("PROFILING_MIN_DURATION_MS"):
+            cls.PROFILING_MIN_DURATION_MS = float(os.getenv("PROFILING_MIN_DURATION_MS"))
+            
+        if os.getenv("PROFILING_INTERVAL_MS"):
+            cls.PROFILING_INTERVAL_MS = float(os.getenv("PROFILING_INTERVAL_MS"))
+            
+        if os.getenv("PROFILING_MAX_STORED"):
+            cls.PROFILING_MAX_STORED = int(os.getenv("PROFILING_MAX_STORED"))
+            
+        if os.getenv("PROFILING_DIR"):
+            cls.PROFILING_DIR = os.getenv("PROFILING_DIR")
+            
+        if os.getenv("TCE_MAX_CONCURRENT_REQUESTS"):
+            cls.TCE_MAX_CONCURRENT_REQUESTS = int(os.getenv("TCE_MAX_CONCURRENT_REQUESTS"))
+            
+        if os.getenv("TCE_MAX_REQUESTS_PER_SECOND"):
+            cls.TCE_MAX_REQUESTS_PER_SECOND = float(os.getenv("TCE_MAX_REQUESTS_PER_SECOND"))
+            
+        if os.getenv("TCE_REQUEST_BURST"):
+            cls.TCE_REQUEST_BURST = int(os.getenv("TCE_REQUEST_BURST"))
+            
+        if os.getenv("TCE_MAX_RETRIES"):
+            cls.TCE_MAX_RETRIES = int(os.getenv("TCE_MAX_RETRIES"))
+            
+        if os.getenv("TCE_RETRY_BACKOFF"):
+            cls.TCE_RETRY_BACKOFF = float(os.getenv("TCE_RETRY_BACKOFF"))
+            
+        if os.getenv("TCE_STREAM_DEADLINE"):
+            cls.TCE_STREAM_DEADLINE = float(os.getenv("TCE_STREAM_DEADLINE"))
+            
         if os.getenv("EXPORT_DIR"):
             cls.EXPORT_DIR = os.getenv("EXPORT_DIR")
+            
+        if os.getenv("WAREHOUSE_ENABLED"):
+            cls.WAREHOUSE_ENABLED = os.getenv("WAREHOUSE_ENABLED").lower() in ["true", "1", "t", "y", "yes"]
+            
+        if os.getenv("WAREHOUSE_PATH"):
+            cls.WAREHOUSE_PATH = os.getenv("WAREHOUSE_PATH")
+            
+        if os.getenv("INGESTION_WATCHLIST"):
+            # Formato: "idProduto|unidade;idProduto|unidade"
+            cls.INGESTION_WATCHLIST = [
+                tuple(item.split("|", 1))
+                for item in os.getenv("INGESTION_WATCHLIST").split(";")
+                if "|" in item
+            ]
+            
+        if os.getenv("INGESTION_INTERVAL"):
+            cls.INGESTION_INTERVAL = int(os.getenv("INGESTION_INTERVAL"))
+            
+        if os.getenv("QUANTILE_SKETCH_K"):
+            cls.QUANTILE_SKETCH_K = int(os.getenv("QUANTILE_SKETCH_K"))
+            
+        if os.getenv("SERVER_HOST"):
+            cls.SERVER_HOST = os.getenv("SERVER_HOST")
+            
+        if os.getenv("SERVER_PORT"):
+            cls.SERVER_PORT = int(os.getenv("SERVER_PORT"))
+            
+        if os.getenv("SERVER_WORKERS"):
+            cls.SERVER_WORKERS = int(os.getenv("SERVER_WORKERS"))
+            
+        if os.getenv("SERVER_MAX_REQUESTS"):
+            cls.SERVER_MAX_REQUESTS = int(os.getenv("SERVER_MAX_REQUESTS"))
+            
+        if os.getenv("SERVER_MAX_REQUESTS_JITTER"):
+            cls.SERVER_MAX_REQUESTS_JITTER = int(os.getenv("SERVER_MAX_REQUESTS_JITTER"))
+            
+        if os.getenv("SERVER_GRACEFUL_TIMEOUT"):
+            cls.SERVER_GRACEFUL_TIMEOUT = int(os.getenv("SERVER_GRACEFUL_TIMEOUT"))
+            
+        if os.getenv("SERVER_PRELOAD"):
+            cls.SERVER_PRELOAD = os.getenv("SERVER_PRELOAD").lower() in ["true", "1", "t", "y", "yes"]
         
         # Configura o logging
         logging.basicConfig(
@@ -1,4 +1,3 @@
-import pandas as pd
 import logging
 from typing import List, Dict, Any, Optional
 from datetime import datetime
@@ -30,6 +29,9 @@ class ExcelExportService:
         Returns:
             BytesIO contendo o arquivo Excel
         """
+        # pandas e openpyxl são importados só na primeira exportação (inicialização mais rápida)
+        import pandas as pd
+        
         # Cria um DataFrame pandas com os dados
         df = pd.DataFrame(data)
         
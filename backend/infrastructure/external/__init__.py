@@ -2,6 +2,8 @@
 Módulo para clientes que acessam APIs externas.
 """
 
+from .rate_limiter import RateLimiter
+from .response_recorder import ResponseRecorder, fixture_name
 from .tce_mg_api_client import TCEMGApiClient
 
-__all__ = ['TCEMGApiClient'] 
\ No newline at end of file
+__all__ = ['RateLimiter', 'ResponseRecorder', 'TCEMGApiClient', 'fixture_name'] 
\ No newline at end of file
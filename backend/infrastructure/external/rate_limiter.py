@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+
+class RateLimiter:
+    """
+    Limita as requisições feitas à API do TCE-MG.
+
+    Combina dois limites:
+
+    - concorrência: no máximo ``max_concurrent`` requisições em andamento;
+    - taxa: no máximo ``rate`` inícios de requisição por segundo, com rajadas
+      de até ``burst`` requisições (algoritmo GCRA, equivalente a um balde de
+      fichas, sem precisar de trava).
+
+    Uso:
+        async with limiter:
+            ...
+    """
+
+    def __init__(self, max_concurrent: int = 0, rate: float = 0, burst: int = 1):
+        """
+        Args:
+            max_concurrent: Máximo de requisições simultâneas (0 desativa)
+            rate: Máximo de requisições por segundo (0 desativa)
+            burst: Quantidade de requisições permitidas em rajada
+        """
+        self.max_concurrent = max_concurrent
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.logger = logging.getLogger(__name__)
+
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop = None
+        self._theoretical_arrival = 0.0
+        self.in_flight = 0
+        self.waiting = 0
+
+    def _get_semaphore(self) -> Optional[asyncio.Semaphore]:
+        """
+        Obtém o semáforo do laço de eventos atual.
+
+        O semáforo é recriado quando o laço muda (ex.: pré-carregamento antes
+        do fork e, depois, o laço do worker).
+        """
+        if not self.max_concurrent:
+            return None
+
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+            self._loop = loop
+        return self._semaphore
+
+    def _reserve(self) -> float:
+        """
+        Reserva o próximo horário de início permitido pelo limite de taxa.
+
+        Returns:
+            Tempo de espera em segundos até o horário reservado
+        """
+        if not self.rate:
+            return 0.0
+
+        interval = 1.0 / self.rate
+        now = time.monotonic()
+        arrival = max(self._theoretical_arrival, now)
+        self._theoretical_arrival = arrival + interval
+        return max(0.0, arrival - now - (self.burst - 1) * interval)
+
+    async def acquire(self) -> None:
+        """Aguarda até que uma nova requisição possa começar."""
+        semaphore = self._get_semaphore()
+        self.waiting += 1
+        try:
+            if semaphore is not None:
+                await semaphore.acquire()
+
+            delay = self._reserve()
+            if delay > 0:
+                try:
+                    await asyncio.sleep(delay)
+                except BaseException:
+                    if semaphore is not None:
+                        semaphore.release()
+                    raise
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+
+    async def wait_idle(self, poll_interval: float = 0.05) -> None:
+        """
+        Aguarda até que o limitador esteja ocioso: nenhuma requisição na fila,
+        vaga de concorrência livre e pelo menos metade da rajada disponível.
+
+        Usado por tarefas de baixa prioridade (ex.: aquecimento do cache),
+        que só devem ocupar o limitador quando não atrasarem as requisições
+        dos usuários. A espera é por consulta periódica, sem reservar vaga.
+
+        Args:
+            poll_interval: Intervalo entre verificações, em segundos
+        """
+        while not self._idle():
+            await asyncio.sleep(poll_interval)
+
+    def _idle(self) -> bool:
+        """Indica se uma requisição de baixa prioridade pode começar sem atrasar as demais."""
+        if self.waiting:
+            return False
+        if self.max_concurrent and self.in_flight >= self.max_concurrent:
+            return False
+        if self.rate:
+            # Fichas já consumidas da rajada (o horário teórico avança um intervalo por requisição)
+            used = (self._theoretical_arrival - time.monotonic()) * self.rate
+            return used <= self.burst / 2
+        return True
+
+    def release(self) -> None:
+        """Libera a vaga de uma requisição concluída."""
+        self.in_flight -= 1
+        if self._semaphore is not None and self._loop is asyncio.get_running_loop():
+            self._semaphore.release()
+
+    async def __aenter__(self) -> 'RateLimiter':
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.release()
@@ -0,0 +1,99 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+
+def fixture_name(endpoint: str, params: Optional[Dict[str, Any]]) -> str:
+    """
+    Nome do arquivo de uma resposta gravada, relativo ao diretório das gravações.
+
+    O nome depende apenas do endpoint e dos parâmetros (ordenados e convertidos
+    em texto, como são enviados na URL), de modo que o cliente, ao gravar, e o
+    servidor simulado, ao reproduzir, chegam ao mesmo arquivo.
+
+    Args:
+        endpoint: Caminho do endpoint relativo à URL base (ex.: "/precos/historico")
+        params: Parâmetros da requisição
+
+    Returns:
+        Caminho relativo (ex.: "precos_historico/3f2a9c0d1b7e4a55.json")
+    """
+    canonical = json.dumps(
+        {str(key): str(value) for key, value in (params or {}).items()},
+        sort_keys=True,
+        ensure_ascii=False
+    )
+    digest = hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:16]
+    folder = endpoint.strip("/").replace("/", "_") or "root"
+    return os.path.join(folder, f"{digest}.json")
+
+
+class ResponseRecorder:
+    """
+    Grava as respostas da API do TCE-MG em arquivos, para reprodução sem rede
+    (ver ``benchmarks.fake_tce_server``).
+
+    Cada resposta é gravada como o corpo original, em um arquivo por endpoint
+    e parâmetros; o arquivo ``manifest.jsonl`` lista as gravações com os
+    parâmetros legíveis.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Args:
+            directory: Diretório das gravações
+        """
+        self.directory = directory
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, params: Optional[Dict[str, Any]], body: bytes) -> None:
+        """
+        Grava uma resposta bem-sucedida; falhas de gravação são apenas registradas no log.
+
+        Args:
+            endpoint: Caminho do endpoint relativo à URL base
+            params: Parâmetros da requisição
+            body: Corpo da resposta
+        """
+        name = fixture_name(endpoint, params)
+        path = os.path.join(self.directory, name)
+
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(f"{path}.tmp", "wb") as file:
+                file.write(body)
+            os.replace(f"{path}.tmp", path)
+
+            entry = {
+                "endpoint": endpoint,
+                "params": {str(key): str(value) for key, value in (params or {}).items()},
+                "file": name,
+                "bytes": len(body),
+                "recorded_at": datetime.now().isoformat(timespec="seconds")
+            }
+            with self._lock, open(os.path.join(self.directory, "manifest.jsonl"), "a", encoding="utf-8") as file:
+                file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except OSError as e:
+            self.logger.warning(f"Falha ao gravar a resposta de {endpoint} em {path}: {e}")
+
+    def load(self, endpoint: str, params: Optional[Dict[str, Any]]) -> Optional[bytes]:
+        """
+        Obtém uma resposta gravada.
+
+        Args:
+            endpoint: Caminho do endpoint relativo à URL base
+            params: Parâmetros da requisição
+
+        Returns:
+            Corpo da resposta ou None se não houver gravação
+        """
+        try:
+            with open(os.path.join(self.directory, fixture_name(endpoint, params)), "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
@@ -1,14 +1,132 @@
 import aiohttp
+import asyncio
+import codecs
+import json
 import logging
-from typing import Dict, Any, List, Optional
+import time
+from typing import Dict, Any, AsyncIterator, List, Optional, Tuple
 
 from ..config import Config
+from .rate_limiter import RateLimiter
+from .response_recorder import ResponseRecorder
+from ..telemetry import span
+from ..telemetry.metrics import (
+    UPSTREAM_COALESCED,
+    UPSTREAM_REQUEST_DURATION,
+    UPSTREAM_REQUESTS,
+    UPSTREAM_REQUESTS_IN_FLIGHT,
+    UPSTREAM_RETRIES
+)
+
+# Status HTTP que indicam falha transitória da API (nova tentativa)
+_TRANSIENT_STATUSES = {429, 502, 503, 504}
+
+
+def _is_transient(error: Exception) -> bool:
+    """Indica se o erro de uma requisição justifica uma nova tentativa."""
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status in _TRANSIENT_STATUSES
+    return isinstance(error, (aiohttp.ClientConnectionError, asyncio.TimeoutError))
+
+
+def _request_key(params: Optional[Dict[str, Any]]) -> Tuple[Tuple[str, str], ...]:
+    """
+    Identifica os parâmetros exatamente como são enviados na query string.
+    
+    Só a ordem dos nomes é desconsiderada; valores com espaços ou caixa
+    diferentes são requisições diferentes, pois a API pode responder de
+    outra forma a cada um.
+    """
+    return tuple(sorted((str(name), str(value)) for name, value in (params or {}).items()))
+
+
+class JSONArrayStream:
+    """
+    Decodificador incremental de um array JSON de objetos.
+    
+    Recebe o corpo da resposta em pedaços e devolve os elementos completos
+    assim que chegam, sem esperar o fim do array nem manter o corpo inteiro
+    em memória.
+    """
+    
+    _WHITESPACE = " \t\r\n"
+    
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._started = False
+        self._finished = False
+    
+    def feed(self, chunk: bytes) -> List[Any]:
+        """
+        Processa um pedaço do corpo.
+        
+        Args:
+            chunk: Bytes recebidos
+            
+        Returns:
+            Elementos completos decodificados neste pedaço
+        """
+        self._buffer += self._text.decode(chunk)
+        items = []
+        position = 0
+        buffer = self._buffer
+        
+        while not self._finished:
+            while position < len(buffer) and buffer[position] in self._WHITESPACE:
+                position += 1
+            if position >= len(buffer):
+                break
+            
+            if not self._started:
+                if buffer[position] != "[":
+                    raise ValueError("A resposta não é um array JSON")
+                self._started = True
+                position += 1
+                continue
+            
+            if buffer[position] == ",":
+                position += 1
+                continue
+            
+            if buffer[position] == "]":
+                self._finished = True
+                position += 1
+                break
+            
+            try:
+                item, position = self._decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # Elemento incompleto: aguarda o próximo pedaço
+                break
+            items.append(item)
+        
+        self._buffer = buffer[position:]
+        return items
+    
+    @property
+    def finished(self) -> bool:
+        """Indica se o fechamento do array já foi recebido."""
+        return self._finished
 
 class TCEMGApiClient:
     """Cliente para a API do Banco de Preços do TCE-MG."""
     
-    def __init__(self):
+    def __init__(self, rate_limiter: RateLimiter = None, recorder: ResponseRecorder = None):
+        """
+        Args:
+            rate_limiter: Limitador das requisições (padrão: limites da configuração)
+            recorder: Gravador das respostas (padrão: TCE_RECORD_DIR, se configurado)
+        """
         self.session = None
+        self._in_flight: Dict[tuple, asyncio.Future] = {}
+        self.rate_limiter = rate_limiter or RateLimiter(
+            max_concurrent=Config.TCE_MAX_CONCURRENT_REQUESTS,
+            rate=Config.TCE_MAX_REQUESTS_PER_SECOND,
+            burst=Config.TCE_REQUEST_BURST
+        )
+        self.recorder = recorder or (ResponseRecorder(Config.TCE_RECORD_DIR) if Config.TCE_RECORD_DIR else None)
         self.logger = logging.getLogger(__name__)
     
     async def __aenter__(self):
@@ -18,45 +136,153 @@ class TCEMGApiClient:
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Fecha a sessão HTTP."""
+        await self.close()
+    
+    async def close(self):
+        """
+        Fecha a sessão HTTP, se existir.
+        
+        A sessão está presa ao laço de eventos que a criou; por isso deve ser
+        fechada antes de um fork, e uma nova é criada na próxima requisição.
+        """
         if self.session:
             await self.session.close()
+            self.session = None
     
-    async def get(self, url: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
+    async def get(self, url: str, params: Dict[str, Any] = None, raw: bool = False) -> Any:
         """
         Realiza uma requisição GET para a API.
         
+        Requisições idênticas (mesma URL e mesmos parâmetros enviados, em
+        qualquer ordem) feitas enquanto uma delas ainda está em andamento são
+        atendidas pela mesma requisição; por isso o resultado é compartilhado
+        e não deve ser modificado.
+        
         Args:
             url: URL da requisição
             params: Parâmetros da requisição
+            raw: Devolve o corpo da resposta sem decodificar (None se a API responder 404)
             
         Returns:
-            Resposta da API em formato JSON
+            Resposta da API em formato JSON, ou o corpo em bytes se ``raw``
+        """
+        endpoint = self._endpoint_label(url)
+        key = (url, _request_key(params), raw)
+        
+        task = self._in_flight.get(key)
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            UPSTREAM_COALESCED.labels(endpoint).inc()
+            return await asyncio.shield(task)
+        
+        # A requisição roda em uma tarefa própria, para que o cancelamento de
+        # quem a iniciou não cancele as demais que aguardam o mesmo resultado
+        task = asyncio.ensure_future(self._fetch(url, params, endpoint, raw))
+        self._in_flight[key] = task
+        
+        def forget(done: asyncio.Task) -> None:
+            if self._in_flight.get(key) is done:
+                del self._in_flight[key]
+            if not done.cancelled():
+                done.exception()  # Evita o aviso de exceção não lida
+        
+        task.add_done_callback(forget)
+        return await asyncio.shield(task)
+    
+    async def _fetch(self, url: str, params: Optional[Dict[str, Any]], endpoint: str, raw: bool = False) -> Any:
+        """
+        Executa a requisição GET, com novas tentativas para falhas transitórias.
+        
+        Args:
+            url: URL da requisição
+            params: Parâmetros da requisição
+            endpoint: Rótulo do endpoint nas métricas
+            raw: Devolve o corpo da resposta sem decodificar
+            
+        Returns:
+            Resposta da API em formato JSON, ou o corpo em bytes se ``raw``
         """
         if not self.session:
             self.session = aiohttp.ClientSession()
         
+        self.logger.debug(f"Requisição GET para {url} com parâmetros: {params}")
+        
+        attempt = 0
+        while True:
+            try:
+                body = await self._request(url, params, endpoint)
+                break
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt >= Config.TCE_MAX_RETRIES or not _is_transient(e):
+                    self.logger.error(f"Erro na requisição para {url}: {e}")
+                    raise
+                
+                delay = Config.TCE_RETRY_BACKOFF * 2 ** attempt
+                attempt += 1
+                UPSTREAM_RETRIES.labels(endpoint).inc()
+                self.logger.warning(f"Falha transitória na requisição para {url} ({e}); tentativa {attempt + 1} em {delay:.1f}s")
+                await asyncio.sleep(delay)
+            except Exception as e:
+                self.logger.error(f"Erro inesperado na requisição para {url}: {e}")
+                raise
+        
+        if raw:
+            return body
+        
+        # Se a resposta for 404, retornamos um array vazio
+        if body is None:
+            return []
+        
+        with span("decode"):
+            return json.loads(body)
+    
+    async def _request(self, url: str, params: Optional[Dict[str, Any]], endpoint: str) -> Optional[bytes]:
+        """
+        Executa uma tentativa da requisição, dentro dos limites do limitador.
+        
+        Args:
+            url: URL da requisição
+            params: Parâmetros da requisição
+            endpoint: Rótulo do endpoint nas métricas
+            
+        Returns:
+            Corpo da resposta, ou None se a API responder 404
+        """
+        with span("upstream-wait"):
+            await self.rate_limiter.acquire()
+        
+        UPSTREAM_REQUESTS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        status = "error"
+        
         try:
-            self.logger.debug(f"Requisição GET para {url} com parâmetros: {params}")
+            with span("upstream"):
+                async with self.session.get(url, params=params) as response:
+                    status = str(response.status)
+                    
+                    # Se a resposta for 404, registramos o erro
+                    if response.status == 404:
+                        self.logger.error(f"Erro na requisição para {url}: {response.status}, message='', url={response.url}")
+                        return None
+                    
+                    # Para outros erros, levantamos a exceção normalmente
+                    response.raise_for_status()
+                    body = await response.read()
             
-            async with self.session.get(url, params=params) as response:
-                # Se a resposta for 404, registramos o erro e retornamos um array vazio
-                if response.status == 404:
-                    self.logger.error(f"Erro na requisição para {url}: {response.status}, message='', url={response.url}")
-                    return []
-                
-                # Para outros erros, levantamos a exceção normalmente
-                response.raise_for_status()
-                return await response.json()
-                
-        except aiohttp.ClientResponseError as e:
-            self.logger.error(f"Erro na requisição para {url}: {e}")
-            raise
-        except aiohttp.ClientError as e:
-            self.logger.error(f"Erro na requisição para {url}: {e}")
-            raise
-        except Exception as e:
-            self.logger.error(f"Erro inesperado na requisição para {url}: {e}")
-            raise
+            if self.recorder:
+                self.recorder.record(endpoint, params, body)
+            return body
+        finally:
+            self.rate_limiter.release()
+            UPSTREAM_REQUESTS_IN_FLIGHT.dec()
+            UPSTREAM_REQUESTS.labels(endpoint, status).inc()
+            UPSTREAM_REQUEST_DURATION.labels(endpoint).observe(time.perf_counter() - started)
+    
+    @staticmethod
+    def _endpoint_label(url: str) -> str:
+        """Rótulo do endpoint nas métricas: o caminho relativo à URL base da API."""
+        if url.startswith(Config.TCE_API_BASE_URL):
+            return url[len(Config.TCE_API_BASE_URL):] or "/"
+        return url
     
     async def search_products(self, search_term: str) -> List[Dict[str, Any]]:
         """
@@ -66,15 +292,16 @@ class TCEMGApiClient:
             search_term: Termo de busca
             
         Returns:
-            Lista de produtos encontrados
+            Lista de produtos encontrados (vazia se a API responder 404)
+            
+        Raises:
+            aiohttp.ClientError, asyncio.TimeoutError: Se a API falhar; a falha
+                não é convertida em lista vazia, para não ser confundida com
+                uma busca sem resultados
         """
-        try:
-            params = {"descricao": search_term}
-            results = await self.get(Config.TCE_PRODUCTS_ENDPOINT, params)
-            return results if isinstance(results, list) else []
-        except Exception as e:
-            self.logger.error(f"Erro ao buscar produtos com termo '{search_term}': {e}")
-            return []
+        params = {"descricao": search_term}
+        results = await self.get(Config.TCE_PRODUCTS_ENDPOINT, params)
+        return results if isinstance(results, list) else []
     
     async def get_regions(self) -> List[Dict[str, Any]]:
         """
@@ -82,13 +309,12 @@ class TCEMGApiClient:
         
         Returns:
             Lista de regiões
+            
+        Raises:
+            aiohttp.ClientError, asyncio.TimeoutError: Se a API falhar
         """
-        try:
-            results = await self.get(Config.TCE_REGIONS_ENDPOINT)
-            return results if isinstance(results, list) else []
-        except Exception as e:
-            self.logger.error(f"Erro ao buscar regiões: {e}")
-            return []
+        results = await self.get(Config.TCE_REGIONS_ENDPOINT)
+        return results if isinstance(results, list) else []
     
     async def get_municipalities(self, region_code: str = None) -> List[Dict[str, Any]]:
         """
@@ -99,17 +325,16 @@ class TCEMGApiClient:
             
         Returns:
             Lista de municípios
+            
+        Raises:
+            aiohttp.ClientError, asyncio.TimeoutError: Se a API falhar
         """
-        try:
-            params = {}
-            if region_code:
-                params["codRegiao"] = region_code
-                
-            results = await self.get(Config.TCE_MUNICIPALITIES_ENDPOINT, params)
-            return results if isinstance(results, list) else []
-        except Exception as e:
-            self.logger.error(f"Erro ao buscar municípios: {e}")
-            return []
+        params = {}
+        if region_code:
+            params["codRegiao"] = region_code
+            
+        results = await self.get(Config.TCE_MUNICIPALITIES_ENDPOINT, params)
+        return results if isinstance(results, list) else []
     
     async def get_price_history(
         self,
@@ -129,21 +354,162 @@ class TCEMGApiClient:
             
         Returns:
             Lista de registros de preço
+            
+        Raises:
+            aiohttp.ClientError, asyncio.TimeoutError: Se a API falhar
+        """
+        params = {
+            "idProduto": product_id,
+            "unidade": unit
+        }
+        
+        # Adiciona parâmetros de escopo territorial
+        params.update(territory_scope)
+        
+        # Adiciona parâmetros de período
+        params.update(period)
+        
+        results = await self.get(Config.TCE_PRICE_HISTORY_ENDPOINT, params)
+        return results if isinstance(results, list) else []
+    
+    async def get_price_history_body(
+        self,
+        product_id: str,
+        unit: str,
+        territory_scope: Dict[str, Any],
+        period: Dict[str, Any]
+    ) -> Optional[bytes]:
+        """
+        Obtém o histórico de preços como o corpo original da resposta, para
+        decodificação em lote (ver ``PriceHistoryDecoder``).
+        
+        Args:
+            product_id: ID do produto
+            unit: Unidade do produto
+            territory_scope: Escopo territorial
+            period: Período de tempo
+            
+        Returns:
+            Corpo da resposta (array JSON), ou None se a API responder 404
         """
+        params = {
+            "idProduto": product_id,
+            "unidade": unit
+        }
+        params.update(territory_scope)
+        params.update(period)
+        
+        return await self.get(Config.TCE_PRICE_HISTORY_ENDPOINT, params, raw=True)
+    
+    async def iter_price_history(
+        self,
+        product_id: str,
+        unit: str,
+        territory_scope: Dict[str, Any],
+        period: Dict[str, Any],
+        chunk_size: int = 65536
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Obtém o histórico de preços em fluxo, à medida que o corpo da resposta chega.
+        
+        A leitura do socket só avança quando o consumidor pede o próximo lote,
+        o que propaga a contrapressão de um cliente lento até a API do TCE-MG.
+        Para que um cliente lento não ocupe indefinidamente uma vaga do
+        limitador, a leitura tem prazo total (``Config.TCE_STREAM_DEADLINE``):
+        vencido o prazo, a conexão é fechada e a vaga liberada mesmo que o
+        consumidor esteja parado. Os erros são propagados, inclusive o de um
+        corpo truncado, para que uma resposta interrompida não pareça completa.
+        
+        Args:
+            product_id: ID do produto
+            unit: Unidade do produto
+            territory_scope: Escopo territorial
+            period: Período de tempo
+            chunk_size: Tamanho dos pedaços lidos do socket, em bytes
+            
+        Returns:
+            Iterador assíncrono de lotes de registros brutos
+        """
+        if not self.session:
+            self.session = aiohttp.ClientSession()
+        
+        params = {
+            "idProduto": product_id,
+            "unidade": unit
+        }
+        params.update(territory_scope)
+        params.update(period)
+        
+        self.logger.debug(f"Requisição GET em fluxo para {Config.TCE_PRICE_HISTORY_ENDPOINT} com parâmetros: {params}")
+        
+        endpoint = self._endpoint_label(Config.TCE_PRICE_HISTORY_ENDPOINT)
+        
+        await self.rate_limiter.acquire()
+        UPSTREAM_REQUESTS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        status = "error"
+        response: Optional[aiohttp.ClientResponse] = None
+        state = {"released": False, "expired": False}
+        
+        def release() -> None:
+            if not state["released"]:
+                state["released"] = True
+                UPSTREAM_REQUESTS_IN_FLIGHT.dec()
+                self.rate_limiter.release()
+        
+        def expire() -> None:
+            # Executado pelo laço de eventos, mesmo com o consumidor parado
+            state["expired"] = True
+            if response is not None:
+                response.close()
+            release()
+        
+        deadline = None
+        if Config.TCE_STREAM_DEADLINE > 0:
+            deadline = asyncio.get_running_loop().call_later(Config.TCE_STREAM_DEADLINE, expire)
+        
         try:
-            params = {
-                "idProduto": product_id,
-                "unidade": unit
-            }
-            
-            # Adiciona parâmetros de escopo territorial
-            params.update(territory_scope)
-            
-            # Adiciona parâmetros de período
-            params.update(period)
-            
-            results = await self.get(Config.TCE_PRICE_HISTORY_ENDPOINT, params)
-            return results if isinstance(results, list) else []
-        except Exception as e:
-            self.logger.error(f"Erro ao buscar histórico de preços para produto {product_id}: {e}")
-            return [] 
\ No newline at end of file
+            async with self.session.get(Config.TCE_PRICE_HISTORY_ENDPOINT, params=params) as response:
+                status = str(response.status)
+                if response.status == 404:
+                    self.logger.error(f"Erro na requisição para {Config.TCE_PRICE_HISTORY_ENDPOINT}: 404, url={response.url}")
+                    return
+                response.raise_for_status()
+                
+                stream = JSONArrayStream()
+                recorded = [] if self.recorder else None
+                try:
+                    async for chunk in response.content.iter_chunked(chunk_size):
+                        if recorded is not None:
+                            recorded.append(chunk)
+                        items = stream.feed(chunk)
+                        if items:
+                            yield items
+                        if stream.finished:
+                            break
+                except aiohttp.ClientError:
+                    status = "error"
+                    if state["expired"]:
+                        raise asyncio.TimeoutError(
+                            f"Histórico em fluxo excedeu o prazo de {Config.TCE_STREAM_DEADLINE:g}s"
+                        )
+                    raise
+                
+                if state["expired"]:
+                    status = "error"
+                    raise asyncio.TimeoutError(f"Histórico em fluxo excedeu o prazo de {Config.TCE_STREAM_DEADLINE:g}s")
+                if not stream.finished:
+                    status = "error"
+                    raise aiohttp.ClientPayloadError(
+                        f"Resposta truncada de {Config.TCE_PRICE_HISTORY_ENDPOINT}: o array JSON não foi fechado"
+                    )
+                
+                # Grava apenas respostas completas
+                if recorded is not None:
+                    self.recorder.record(endpoint, params, b"".join(recorded))
+        finally:
+            if deadline is not None:
+                deadline.cancel()
+            release()
+            UPSTREAM_REQUESTS.labels(endpoint, status).inc()
+            UPSTREAM_REQUEST_DURATION.labels(endpoint).observe(time.perf_counter() - started) 
\ No newline at end of file
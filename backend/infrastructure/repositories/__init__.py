@@ -4,10 +4,17 @@ Módulo para implementações concretas dos repositórios de domínio.
 
 from infrastructure.repositories.tce_mg_product_repository import TCEMGProductRepository
 from infrastructure.repositories.tce_mg_territory_repository import TCEMGTerritoryRepository
+from infrastructure.repositories.territory_snapshot import TerritorySnapshot
 from infrastructure.repositories.tce_mg_price_repository import TCEMGPriceRepository
+from infrastructure.repositories.sqlite_price_repository import SQLitePriceRepository
+from infrastructure.repositories.price_history_decoder import PriceHistoryDecoder, decode_price_history
 
 __all__ = [
     'TCEMGProductRepository',
     'TCEMGTerritoryRepository',
-    'TCEMGPriceRepository'
+    'TerritorySnapshot',
+    'TCEMGPriceRepository',
+    'SQLitePriceRepository',
+    'PriceHistoryDecoder',
+    'decode_price_history'
 ] 
\ No newline at end of file
@@ -0,0 +1,201 @@
+import json
+import sys
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from domain.price_series import PriceColumns
+
+try:
+    import orjson
+except ImportError:  # Dependência opcional
+    orjson = None
+
+# Variantes dos nomes de campo da API do TCE-MG, na ordem de preferência
+_DATE_FIELDS = ("dataNotaFiscal", "data")
+_PRICE_FIELDS = ("valorUnitario", "valor")
+_MUNICIPALITY_FIELD = "municipio"
+
+
+def _resolve(row: dict, variants: Tuple[str, str]) -> Tuple[str, str]:
+    """Escolhe o campo principal pela primeira linha; o outro fica como alternativa."""
+    primary = variants[0] if variants[0] in row else variants[1]
+    return primary, variants[1] if primary == variants[0] else variants[0]
+
+
+def _column(rows: Sequence[dict], field: str, alternative: str) -> List[Any]:
+    """
+    Extrai uma coluna das linhas, recorrendo ao campo alternativo apenas
+    nas linhas em que o principal está ausente ou vazio.
+    """
+    values = [row.get(field) for row in rows]
+    if None in values or "" in values:
+        for position, value in enumerate(values):
+            if value is None or value == "":
+                values[position] = rows[position].get(alternative)
+    return values
+
+
+def _parse_dates(values: List[Any]) -> np.ndarray:
+    """
+    Converte datas ISO (com ou sem horário) para datetime64[D] em lote.
+
+    Cada texto distinto é convertido uma única vez (um histórico tem poucos
+    dias distintos e muitos registros por dia). Valores ausentes ou inválidos
+    viram NaT; a conversão elemento a elemento só é usada se houver algum
+    valor inválido.
+    """
+    try:
+        distinct = list(dict.fromkeys(values))
+    except TypeError:
+        # Algum valor não é texto (ex.: objeto): tratado como ausente
+        values = [value if type(value) is str else None for value in values]
+        distinct = list(dict.fromkeys(values))
+    # "U10" mantém só a parte da data ("2024-01-05T00:00:00" -> "2024-01-05")
+    days = np.array(["" if value is None else value for value in distinct], dtype="U10")
+    try:
+        parsed = days.astype("datetime64[D]")
+    except ValueError:
+        parsed = np.empty(len(days), dtype="datetime64[D]")
+        for position, day in enumerate(days.tolist()):
+            try:
+                parsed[position] = np.datetime64(day, "D")
+            except ValueError:
+                parsed[position] = np.datetime64("NaT")
+
+    if len(distinct) == len(values):
+        return parsed
+    position_of = dict(zip(distinct, range(len(distinct))))
+    return parsed[np.fromiter(map(position_of.__getitem__, values), dtype=np.intp, count=len(values))]
+
+
+def _parse_prices(values: List[Any]) -> np.ndarray:
+    """
+    Converte preços (números ou textos numéricos) para float64 em lote.
+
+    Valores ausentes ou inválidos viram NaN; a conversão elemento a elemento
+    só é usada se o lote tiver algum valor inválido.
+    """
+    try:
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        parsed = np.empty(len(values), dtype=np.float64)
+        for position, value in enumerate(values):
+            try:
+                parsed[position] = float(value)
+            except (TypeError, ValueError):
+                parsed[position] = np.nan
+        return parsed
+
+
+def _intern_all(values: List[Any]) -> List[Any]:
+    """Interna os textos da coluna, para que cada valor repetido ocupe memória uma única vez."""
+    try:
+        return list(map(sys.intern, values))
+    except TypeError:
+        return [sys.intern(value) if type(value) is str else value for value in values]
+
+
+class PriceHistoryDecoder:
+    """
+    Decodificador em lote das respostas de histórico de preços da API do TCE-MG.
+
+    Converte o corpo da resposta (ou os registros já decodificados) direto
+    para o formato colunar, sem criar entidades: os nomes de campo
+    ("dataNotaFiscal" ou "data", "valorUnitario" ou "valor") são resolvidos
+    uma vez por resposta, a partir da primeira linha, e datas e preços são
+    convertidos em arrays NumPy de uma só vez.
+
+    Linhas sem data, município ou preço válidos são descartadas, como em
+    ``map_price_results``. Uma mesma instância pode decodificar vários lotes
+    de uma resposta em fluxo; os campos resolvidos no primeiro lote valem
+    para os seguintes.
+    """
+
+    def __init__(self, product_id: str, unit: str):
+        """
+        Args:
+            product_id: ID do produto
+            unit: Unidade do produto
+        """
+        self.product_id = product_id
+        self.unit = unit
+        self._date_fields: Optional[Tuple[str, str]] = None
+        self._price_fields: Optional[Tuple[str, str]] = None
+
+    def decode(self, body: Optional[bytes]) -> PriceColumns:
+        """
+        Decodifica o corpo de uma resposta (array JSON), com orjson se instalado.
+
+        Args:
+            body: Corpo da resposta (None ou vazio para resposta sem registros)
+
+        Returns:
+            Histórico colunar
+        """
+        if not body:
+            return PriceColumns.empty(self.product_id, self.unit)
+
+        rows = orjson.loads(body) if orjson is not None else json.loads(body)
+        return self.columns(rows if isinstance(rows, list) else [])
+
+    def columns(self, rows: Sequence[dict]) -> PriceColumns:
+        """
+        Converte registros brutos já decodificados para o formato colunar.
+
+        Args:
+            rows: Registros da API do TCE-MG
+
+        Returns:
+            Histórico colunar
+        """
+        rows = [row for row in rows if isinstance(row, dict)]
+        if not rows:
+            return PriceColumns.empty(self.product_id, self.unit)
+
+        if self._date_fields is None:
+            self._date_fields = _resolve(rows[0], _DATE_FIELDS)
+            self._price_fields = _resolve(rows[0], _PRICE_FIELDS)
+
+        raw_dates = _column(rows, *self._date_fields)
+        municipalities = [row.get(_MUNICIPALITY_FIELD) for row in rows]
+        dates = _parse_dates(raw_dates)
+        prices = _parse_prices(_column(rows, *self._price_fields))
+
+        valid = ~np.isnat(dates) & ~np.isnan(prices)
+        if None in municipalities:
+            valid &= np.array([municipality is not None for municipality in municipalities], dtype=bool)
+        if not valid.all():
+            keep = np.flatnonzero(valid).tolist()
+            raw_dates = [raw_dates[position] for position in keep]
+            municipalities = [municipalities[position] for position in keep]
+            dates = dates[valid]
+            prices = prices[valid]
+
+        # Mesmo formato de ID de map_price_results (a API não fornece um)
+        product_id = self.product_id
+        ids = [f"{product_id}_{day}_{municipality}" for day, municipality in zip(raw_dates, municipalities)]
+
+        return PriceColumns(
+            product_id=product_id,
+            unit=self.unit,
+            ids=np.array(ids, dtype=object),
+            dates=dates,
+            municipalities=np.array(_intern_all(municipalities), dtype=object),
+            prices=prices
+        )
+
+
+def decode_price_history(product_id: str, unit: str, body: Optional[bytes]) -> PriceColumns:
+    """
+    Decodifica o corpo de uma resposta de histórico de preços para o formato colunar.
+
+    Args:
+        product_id: ID do produto
+        unit: Unidade do produto
+        body: Corpo da resposta da API do TCE-MG
+
+    Returns:
+        Histórico colunar
+    """
+    return PriceHistoryDecoder(product_id, unit).decode(body)
@@ -0,0 +1,321 @@
+import asyncio
+import logging
+from datetime import date
+from typing import AsyncIterator, List, Optional
+
+from domain.entities import PriceRecord, TerritoryType
+from domain.repositories import PriceRepository, TerritoryRepository
+from domain.value_objects import ProductFilter, TerritoryScope, PricePeriod
+from domain.price_series import PriceColumns, MonthlyPriceSummaries
+from infrastructure.warehouse.price_store import PriceStore
+from infrastructure.cache import record_content_version
+from infrastructure.telemetry import span
+
+class SQLitePriceRepository(PriceRepository):
+    """
+    Implementação do repositório de preços sobre o armazém local em SQLite.
+
+    Produtos que ainda não foram sincronizados para o armazém são consultados
+    no repositório de fallback (normalmente a API do TCE-MG), assim como as
+    consultas por região enquanto o mapeamento de municípios por região
+    estiver incompleto.
+    """
+
+    def __init__(
+        self,
+        price_store: PriceStore,
+        fallback_repository: PriceRepository,
+        territory_repository: TerritoryRepository
+    ):
+        self.price_store = price_store
+        self.fallback_repository = fallback_repository
+        self.territory_repository = territory_repository
+        self.logger = logging.getLogger(__name__)
+
+    async def get_price_history(
+        self,
+        product_filter: ProductFilter,
+        territory_scope: TerritoryScope,
+        price_period: PricePeriod
+    ) -> List[PriceRecord]:
+        """
+        Obtém o histórico de preços de acordo com os filtros especificados.
+
+        Args:
+            product_filter: Filtro de produto
+            territory_scope: Escopo territorial
+            price_period: Período de tempo
+
+        Returns:
+            Lista de registros de preço
+        """
+        if not product_filter.product_id or not product_filter.unit:
+            return []
+
+        columns = await self.get_price_columns(product_filter, territory_scope, price_period)
+        return columns.to_records()
+
+    async def get_price_columns(
+        self,
+        product_filter: ProductFilter,
+        territory_scope: TerritoryScope,
+        price_period: PricePeriod
+    ) -> PriceColumns:
+        """
+        Obtém o histórico de preços em formato colunar a partir do armazém local.
+
+        Args:
+            product_filter: Filtro de produto
+            territory_scope: Escopo territorial
+            price_period: Período de tempo
+
+        Returns:
+            Histórico de preços em formato colunar
+        """
+        product_id = product_filter.product_id
+        unit = product_filter.unit
+
+        if not await self._serves_locally(product_id, unit, territory_scope):
+            return await self.fallback_repository.get_price_columns(product_filter, territory_scope, price_period)
+
+        municipalities = await self._municipality_names(territory_scope)
+        start_date, end_date = self._date_range(price_period)
+
+        with span("warehouse"):
+            return await asyncio.to_thread(
+                self.price_store.query_columns,
+                product_id,
+                unit,
+                municipalities,
+                start_date,
+                end_date
+            )
+
+    async def iter_price_columns(
+        self,
+        product_filter: ProductFilter,
+        territory_scope: TerritoryScope,
+        price_period: PricePeriod,
+        batch_size: int = 1000
+    ) -> AsyncIterator[PriceColumns]:
+        """
+        Obtém o histórico de preços do armazém local em lotes, para respostas em fluxo.
+
+        Cada lote é uma consulta paginada por chave, executada apenas quando o
+        consumidor pede o próximo lote.
+
+        Args:
+            product_filter: Filtro de produto
+            territory_scope: Escopo territorial
+            price_period: Período de tempo
+            batch_size: Quantidade máxima de registros por lote
+
+        Returns:
+            Iterador assíncrono de lotes colunares
+        """
+        product_id = product_filter.product_id
+        unit = product_filter.unit
+
+        if not await self._serves_locally(product_id, unit, territory_scope):
+            async for batch in self.fallback_repository.iter_price_columns(
+                product_filter, territory_scope, price_period, batch_size
+            ):
+                yield batch
+            return
+
+        municipalities = await self._municipality_names(territory_scope)
+        start_date, end_date = self._date_range(price_period)
+        cursor = None
+
+        while True:
+            with span("warehouse"):
+                batch, cursor = await asyncio.to_thread(
+                    self.price_store.query_column_page,
+                    product_id,
+                    unit,
+                    municipalities,
+                    start_date,
+                    end_date,
+                    cursor,
+                    batch_size
+                )
+            if len(batch):
+                yield batch
+            if cursor is None:
+                return
+
+    async def get_price_summaries(
+        self,
+        product_filter: ProductFilter,
+        territory_scope: TerritoryScope,
+        price_period: PricePeriod
+    ) -> Optional[MonthlyPriceSummaries]:
+        """
+        Obtém os resumos mensais materializados do armazém local.
+
+        Retorna None quando a partição não foi sincronizada ou quando o período
+        não é alinhado a meses (datas inicial/final arbitrárias).
+
+        Args:
+            product_filter: Filtro de produto
+            territory_scope: Escopo territorial
+            price_period: Período de tempo
+
+        Returns:
+            Resumos mensais por município ou None
+        """
+        product_id = product_filter.product_id
+        unit = product_filter.unit
+
+        if not await self._serves_locally(product_id, unit, territory_scope):
+            return await self.fallback_repository.get_price_summaries(product_filter, territory_scope, price_period)
+
+        if price_period.start_date or price_period.end_date:
+            return None
+
+        municipalities = await self._municipality_names(territory_scope)
+        start_month = f"{price_period.year:04d}-01" if price_period.year else None
+        end_month = f"{price_period.year:04d}-12" if price_period.year else None
+
+        with span("warehouse"):
+            return await asyncio.to_thread(
+                self.price_store.query_summaries,
+                product_id,
+                unit,
+                municipalities,
+                start_month,
+                end_month
+            )
+
+    async def get_price_year_summaries(
+        self,
+        product_filter: ProductFilter,
+        territory_scope: TerritoryScope,
+        price_period: PricePeriod
+    ) -> Optional[MonthlyPriceSummaries]:
+        """
+        Obtém os resumos anuais materializados do armazém local.
+
+        Retorna None quando a partição não foi sincronizada ou quando o período
+        não é alinhado a anos (datas inicial/final arbitrárias).
+
+        Args:
+            product_filter: Filtro de produto
+            territory_scope: Escopo territorial
+            price_period: Período de tempo
+
+        Returns:
+            Resumos anuais por município ou None
+        """
+        product_id = product_filter.product_id
+        unit = product_filter.unit
+
+        if not await self._serves_locally(product_id, unit, territory_scope):
+            return await self.fallback_repository.get_price_year_summaries(product_filter, territory_scope, price_period)
+
+        if price_period.start_date or price_period.end_date:
+            return None
+
+        municipalities = await self._municipality_names(territory_scope)
+
+        with span("warehouse"):
+            return await asyncio.to_thread(
+                self.price_store.query_year_summaries,
+                product_id,
+                unit,
+                municipalities,
+                price_period.year,
+                price_period.year
+            )
+
+    async def _serves_locally(self, product_id: str, unit: str, territory_scope: TerritoryScope) -> bool:
+        """
+        Indica se a consulta pode ser respondida pelo armazém local.
+
+        Além da partição sincronizada, o escopo de região exige o mapeamento
+        local de municípios por região completo: sem ele, a região seria
+        resolvida para parte dos seus municípios, e a consulta vai para o
+        repositório de fallback, que filtra as regiões na API do TCE-MG.
+
+        Args:
+            product_id: ID do produto
+            unit: Unidade do produto
+            territory_scope: Escopo territorial
+
+        Returns:
+            True se a consulta deve ser respondida pelo armazém
+        """
+        if territory_scope.territory_type == TerritoryType.REGION:
+            index = await self.territory_repository.get_index()
+            if not index.regions_complete:
+                return False
+
+        return await self._has_partition(product_id, unit)
+
+    async def _has_partition(self, product_id: str, unit: str) -> bool:
+        """
+        Verifica se a partição está no armazém e registra a sua versão para o ETag da resposta.
+
+        Args:
+            product_id: ID do produto
+            unit: Unidade do produto
+
+        Returns:
+            True se a partição já foi sincronizada
+        """
+        version = await asyncio.to_thread(self.price_store.get_version, product_id, unit)
+        if version is None:
+            return False
+
+        record_content_version(f"warehouse:{product_id}:{unit}", version)
+        return True
+
+    async def _municipality_names(self, territory_scope: TerritoryScope) -> Optional[List[str]]:
+        """
+        Resolve o escopo territorial para a lista de nomes de municípios armazenados.
+
+        Args:
+            territory_scope: Escopo territorial
+
+        Returns:
+            Lista de nomes de municípios, ou None para todo o estado
+        """
+        if territory_scope.territory_type == TerritoryType.STATE:
+            return None
+
+        index = await self.territory_repository.get_index()
+
+        if territory_scope.territory_type == TerritoryType.REGION:
+            return [
+                municipality.name
+                for region_code in territory_scope.region_codes
+                for municipality in index.municipalities_of(region_code)
+            ]
+
+        names = []
+        for code in territory_scope.municipality_codes:
+            municipality = index.get(code, TerritoryType.MUNICIPALITY)
+            if municipality:
+                names.append(municipality.name)
+        return names
+
+    def _date_range(self, price_period: PricePeriod):
+        """
+        Converte o período de consulta em um intervalo de datas.
+
+        Args:
+            price_period: Período de tempo
+
+        Returns:
+            Tupla com as datas inicial e final (inclusive), ambas opcionais
+        """
+        start_date = price_period.start_date
+        end_date = price_period.end_date
+
+        if price_period.year:
+            year_start = date(price_period.year, 1, 1)
+            year_end = date(price_period.year, 12, 31)
+            start_date = max(start_date, year_start) if start_date else year_start
+            end_date = min(end_date, year_end) if end_date else year_end
+
+        return start_date, end_date
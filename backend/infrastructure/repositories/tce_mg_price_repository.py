@@ -1,21 +1,182 @@
 import logging
-import json
-from typing import List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from datetime import datetime, date, timedelta
-import random
 
-from domain.entities import PriceRecord
+from domain.entities import PriceRecord, TerritoryType
 from domain.repositories import PriceRepository
-from domain.value_objects import ProductFilter, TerritoryScope, PricePeriod
+from domain.value_objects import ProductFilter, TerritoryScope, PricePeriod, QueryKey
+from domain.price_series import PriceColumns
 from infrastructure.external import TCEMGApiClient
-from infrastructure.cache import CacheService
+from infrastructure.cache import CacheService, PopularityLog
+from infrastructure.config import Config
+from infrastructure.repositories.price_history_decoder import PriceHistoryDecoder, decode_price_history
+from infrastructure.synthetic import SyntheticMunicipality, SyntheticPriceGenerator
+from infrastructure.telemetry import span
+
+# Preços base dos produtos simulados
+_MOCK_BASE_PRICES = {
+    "1001": 32.50,  # AGULHA DESCARTÁVEL 13X4,5
+    "1002": 35.75,  # AGULHA DESCARTÁVEL 25X7
+    "1003": 35.90,  # AGULHA DESCARTÁVEL 25X8
+    "1004": 43.25,  # AGULHA DESCARTÁVEL 40X12
+    "1005": 89.90,  # AGULHA GENGIVAL CURTA 30G
+    "1006": 93.50,  # AGULHA GENGIVAL LONGA 27G
+    "1007": 47.80,  # AGULHA PARA COLETA A VÁCUO 25X7
+    "1008": 48.20,  # AGULHA PARA COLETA A VÁCUO 25X8
+    "1009": 37.50,  # AGULHA HIPODERMICA 20X5,5
+    "1010": 39.75   # AGULHA HIPODERMICA 30X7
+}
+
+# Municípios simulados
+_MOCK_MUNICIPALITIES = [
+    "BELO HORIZONTE",
+    "CONTAGEM",
+    "BETIM",
+    "JUIZ DE FORA",
+    "UBERLÂNDIA",
+    "MONTES CLAROS",
+    "DIVINÓPOLIS",
+    "POÇOS DE CALDAS",
+    "UBERABA",
+    "IPATINGA"
+]
+
+# Gerador dos históricos simulados: determinístico, sem tendência, sazonalidade
+# nem valores discrepantes, com pouca dispersão em torno do preço base
+_MOCK_GENERATOR = SyntheticPriceGenerator(
+    municipalities=[SyntheticMunicipality("", name, "") for name in _MOCK_MUNICIPALITIES],
+    products=_MOCK_BASE_PRICES,
+    municipality_skew=0.0,
+    annual_inflation=0.0,
+    seasonality=0.0,
+    dispersion=0.08,
+    outlier_rate=0.0
+)
+
+def map_price_results(product_id: str, unit: str, results: List[dict]) -> List[PriceRecord]:
+    """
+    Mapeia os registros retornados pela API do TCE-MG para entidades PriceRecord.
+    
+    Args:
+        product_id: ID do produto
+        unit: Unidade do produto
+        results: Registros brutos retornados pela API
+        
+    Returns:
+        Lista de registros de preço
+    """
+    price_records = []
+    for result in results:
+        # Mapeia os campos da API para os campos da entidade PriceRecord
+        # Considerando que a API pode ter diferentes nomes para os campos
+        
+        # Verifica as diferentes possibilidades de nomes de campos
+        date_field = result.get("dataNotaFiscal") or result.get("data")
+        municipality_field = result.get("municipio")
+        unit_price_field = result.get("valorUnitario") or result.get("valor")
+        
+        # Cria um ID único para o registro (pode não existir na API)
+        record_id = f"{product_id}_{date_field}_{municipality_field}"
+        
+        if date_field and municipality_field is not None and unit_price_field is not None:
+            # Converte a data para o formato correto
+            try:
+                record_date = datetime.fromisoformat(date_field).date()
+            except (ValueError, TypeError):
+                record_date = date_field  # Mantém como string se a conversão falhar
+            
+            price_record = PriceRecord(
+                id=record_id,
+                product_id=product_id,
+                product_name="",  # A API pode não retornar o nome do produto
+                unit=unit,
+                date=record_date,
+                municipality=municipality_field,
+                unit_price=float(unit_price_field)
+            )
+            price_records.append(price_record)
+    
+    return price_records
+
+
+def _history_query(
+    product_filter: ProductFilter,
+    territory_scope: TerritoryScope,
+    price_period: PricePeriod
+) -> Dict[str, Any]:
+    """Descrição serializável (JSON) de uma consulta de histórico, para o registro de popularidade."""
+    query = {
+        "product_id": product_filter.product_id,
+        "unit": product_filter.unit,
+        "territory_type": territory_scope.territory_type.value
+    }
+    if territory_scope.region_codes:
+        query["region_codes"] = territory_scope.region_codes
+    if territory_scope.municipality_codes:
+        query["municipality_codes"] = territory_scope.municipality_codes
+    if price_period.year:
+        query["year"] = price_period.year
+    if price_period.start_date:
+        query["start_date"] = price_period.start_date.isoformat()
+    if price_period.end_date:
+        query["end_date"] = price_period.end_date.isoformat()
+    return query
+
+
+def _upstream_filter(product_filter: ProductFilter) -> ProductFilter:
+    """
+    Filtro de produto como é enviado à API, com os espaços do ID e da
+    unidade normalizados como na chave de cache.
+    
+    A chave e a requisição partem dos mesmos valores: duas consultas só
+    compartilham uma entrada do cache (inclusive um histórico vazio ou uma
+    falha memorizada) se enviarem à API exatamente os mesmos parâmetros.
+    """
+    product_id = " ".join(product_filter.product_id.split()) if product_filter.product_id else product_filter.product_id
+    unit = " ".join(product_filter.unit.split()) if product_filter.unit else product_filter.unit
+    if product_id == product_filter.product_id and unit == product_filter.unit:
+        return product_filter
+    return ProductFilter(search_term=product_filter.search_term, product_id=product_id, unit=unit)
+
+
+def _history_filters(query: Dict[str, Any]) -> Tuple[ProductFilter, TerritoryScope, PricePeriod]:
+    """Reconstrói os filtros de uma consulta descrita por ``_history_query``."""
+    start_date = query.get("start_date")
+    end_date = query.get("end_date")
+    return (
+        ProductFilter(product_id=query["product_id"], unit=query["unit"]),
+        TerritoryScope(
+            TerritoryType(query["territory_type"]),
+            region_codes=query.get("region_codes"),
+            municipality_codes=query.get("municipality_codes")
+        ),
+        PricePeriod(
+            year=query.get("year"),
+            start_date=date.fromisoformat(start_date) if start_date else None,
+            end_date=date.fromisoformat(end_date) if end_date else None
+        )
+    )
+
 
 class TCEMGPriceRepository(PriceRepository):
     """Implementação do repositório de preços usando a API do TCE-MG."""
     
-    def __init__(self, api_client: TCEMGApiClient, cache_service: CacheService):
+    def __init__(
+        self,
+        api_client: TCEMGApiClient,
+        cache_service: CacheService,
+        popularity_log: Optional[PopularityLog] = None
+    ):
+        """
+        Args:
+            api_client: Cliente da API do TCE-MG
+            cache_service: Serviço de cache
+            popularity_log: Registro de popularidade das consultas, usado no
+                aquecimento do cache (opcional)
+        """
         self.api_client = api_client
         self.cache_service = cache_service
+        self.popularity_log = popularity_log
         self.logger = logging.getLogger(__name__)
     
     async def get_price_history(
@@ -38,166 +199,296 @@ class TCEMGPriceRepository(PriceRepository):
         if not product_filter.product_id or not product_filter.unit:
             return []
         
+        columns = await self.get_price_columns(product_filter, territory_scope, price_period)
+        return columns.to_records()
+    
+    async def get_price_columns(
+        self,
+        product_filter: ProductFilter,
+        territory_scope: TerritoryScope,
+        price_period: PricePeriod
+    ) -> PriceColumns:
+        """
+        Obtém o histórico de preços em formato colunar.
+        
+        O cache armazena o histórico já em colunas, de modo que as agregações
+        não precisam reconstruir os registros a cada requisição.
+        
+        Args:
+            product_filter: Filtro de produto
+            territory_scope: Escopo territorial
+            price_period: Período de tempo
+            
+        Returns:
+            Histórico de preços em formato colunar
+        """
+        product_filter = _upstream_filter(product_filter)
+        if not product_filter.product_id or not product_filter.unit:
+            return PriceColumns.empty(product_filter.product_id, product_filter.unit)
+        
         # Gera uma chave de cache única com base nos parâmetros
-        cache_params = {
-            "product_id": product_filter.product_id,
-            "unit": product_filter.unit,
-            "territory": territory_scope.to_dict(),
-            "period": price_period.to_dict()
-        }
-        cache_key = f"prices:history:{json.dumps(cache_params, sort_keys=True)}"
+        cache_key = self._history_cache_key(product_filter, territory_scope, price_period)
+        self._record_query(cache_key, product_filter, territory_scope, price_period)
         
-        # Verifica se os resultados estão no cache
-        cached_results = self.cache_service.get(cache_key)
+        # Verifica se os resultados estão no cache (inclusive históricos sabidamente vazios)
+        cached_columns = self.cache_service.get(cache_key)
         
-        if cached_results:
-            return [PriceRecord(**record) for record in cached_results]
+        if cached_columns is not None:
+            return cached_columns
         
-        # Busca na API
+        # Falha recente da API para a mesma consulta: não repete a requisição
+        if self.cache_service.get_error(cache_key) is not None:
+            return self._fallback_columns(product_filter, territory_scope)
+        
+        # Busca na API (consultas concorrentes idênticas aguardam a mesma busca e decodificação)
         try:
-            results = await self.api_client.get_price_history(
-                product_filter.product_id,
-                product_filter.unit,
-                territory_scope.to_dict(),
-                price_period.to_dict()
+            return await self.cache_service.compute_if_absent(
+                cache_key,
+                lambda: self._load_columns(product_filter, territory_scope, price_period)
             )
-            
-            price_records = []
-            for result in results:
-                # Mapeia os campos da API para os campos da entidade PriceRecord
-                # Considerando que a API pode ter diferentes nomes para os campos
-                
-                # Verifica as diferentes possibilidades de nomes de campos
-                date_field = result.get("dataNotaFiscal") or result.get("data")
-                municipality_field = result.get("municipio")
-                unit_price_field = result.get("valorUnitario") or result.get("valor")
-                
-                # Cria um ID único para o registro (pode não existir na API)
-                record_id = f"{product_filter.product_id}_{date_field}_{municipality_field}"
-                
-                if date_field and municipality_field is not None and unit_price_field is not None:
-                    # Converte a data para o formato correto
-                    try:
-                        record_date = datetime.fromisoformat(date_field).date()
-                    except (ValueError, TypeError):
-                        record_date = date_field  # Mantém como string se a conversão falhar
-                    
-                    price_record = PriceRecord(
-                        id=record_id,
-                        product_id=product_filter.product_id,
-                        product_name="",  # A API pode não retornar o nome do produto
-                        unit=product_filter.unit,
-                        date=record_date,
-                        municipality=municipality_field,
-                        unit_price=float(unit_price_field)
-                    )
-                    price_records.append(price_record)
-            
-            # Armazena no cache
-            if price_records:
-                self.cache_service.set(
-                    cache_key,
-                    [record.to_dict() for record in price_records]
-                )
-                
-            return price_records
-            
         except Exception as e:
             self.logger.error(f"Erro ao buscar histórico de preços: {e}")
+            self.cache_service.set_error(cache_key, e)
+            return self._fallback_columns(product_filter, territory_scope)
+    
+    async def _load_columns(
+        self,
+        product_filter: ProductFilter,
+        territory_scope: TerritoryScope,
+        price_period: PricePeriod
+    ) -> PriceColumns:
+        """
+        Busca o histórico na API, propagando os erros.
+        
+        O resultado é armazenado no cache por quem chama (históricos vazios
+        expiram mais cedo; ver ``CacheService.store``).
+        
+        Args:
+            product_filter: Filtro de produto
+            territory_scope: Escopo territorial
+            price_period: Período de tempo
             
-            # Se for um produto simulado (começa com "10"), retorna preços simulados
-            if product_filter.product_id.startswith("10"):
-                mock_price_records = self._generate_mock_price_history(
-                    product_filter.product_id, 
-                    product_filter.unit,
-                    territory_scope
-                )
-                
-                # Armazena no cache
-                self.cache_service.set(
-                    cache_key,
-                    [record.to_dict() for record in mock_price_records]
-                )
-                
-                self.logger.info(f"Retornando {len(mock_price_records)} registros de preço simulados para produto {product_filter.product_id}")
-                return mock_price_records
-            
-            return []
+        Returns:
+            Histórico de preços em formato colunar
+        """
+        body = await self.api_client.get_price_history_body(
+            product_filter.product_id,
+            product_filter.unit,
+            territory_scope.to_dict(),
+            price_period.to_dict()
+        )
+        
+        # Decodifica a resposta direto para colunas, sem criar entidades
+        with span("mapping"):
+            return decode_price_history(product_filter.product_id, product_filter.unit, body)
+    
+    async def refresh_history(self, query: Dict[str, Any]) -> PriceColumns:
+        """
+        Recarrega da API uma consulta do registro de popularidade, ignorando o
+        cache e substituindo a entrada (usado pelo aquecimento do cache).
+        
+        Args:
+            query: Descrição da consulta no registro de popularidade
             
-    def _generate_mock_price_history(self, product_id: str, unit: str, territory_scope: TerritoryScope) -> List[PriceRecord]:
+        Returns:
+            Histórico de preços em formato colunar
+        """
+        product_filter, territory_scope, price_period = _history_filters(query)
+        product_filter = _upstream_filter(product_filter)
+        columns = await self._load_columns(product_filter, territory_scope, price_period)
+        self.cache_service.store(self._history_cache_key(product_filter, territory_scope, price_period), columns)
+        return columns
+    
+    def _record_query(
+        self,
+        cache_key: str,
+        product_filter: ProductFilter,
+        territory_scope: TerritoryScope,
+        price_period: PricePeriod
+    ) -> None:
+        """Registra o acesso à consulta no registro de popularidade, se houver."""
+        if self.popularity_log is not None and not self.popularity_log.touch(cache_key):
+            self.popularity_log.record(
+                cache_key,
+                "prices:history",
+                _history_query(product_filter, territory_scope, price_period)
+            )
+    
+    async def iter_price_columns(
+        self,
+        product_filter: ProductFilter,
+        territory_scope: TerritoryScope,
+        price_period: PricePeriod,
+        batch_size: int = 1000
+    ) -> AsyncIterator[PriceColumns]:
         """
-        Gera histórico de preços simulado para produtos.
+        Obtém o histórico de preços em lotes, lendo a resposta da API em fluxo.
+        
+        Os lotes são convertidos e entregues à medida que o corpo da resposta
+        chega, sem materializar o histórico inteiro. As partes entregues são
+        guardadas para o cache apenas enquanto o total não passa de
+        ``Config.STREAM_CACHE_MAX_ROWS``; acima disso o histórico não é
+        armazenado, para que uma consulta enorme não ocupe a memória.
         
         Args:
-            product_id: ID do produto
-            unit: Unidade do produto
+            product_filter: Filtro de produto
             territory_scope: Escopo territorial
+            price_period: Período de tempo
+            batch_size: Quantidade máxima de registros por lote
             
         Returns:
-            Lista de registros de preço simulados
-        """
-        # Mapeamento de produtos simulados para preços base
-        product_base_prices = {
-            "1001": 32.50,  # AGULHA DESCARTÁVEL 13X4,5
-            "1002": 35.75,  # AGULHA DESCARTÁVEL 25X7
-            "1003": 35.90,  # AGULHA DESCARTÁVEL 25X8
-            "1004": 43.25,  # AGULHA DESCARTÁVEL 40X12
-            "1005": 89.90,  # AGULHA GENGIVAL CURTA 30G
-            "1006": 93.50,  # AGULHA GENGIVAL LONGA 27G
-            "1007": 47.80,  # AGULHA PARA COLETA A VÁCUO 25X7
-            "1008": 48.20,  # AGULHA PARA COLETA A VÁCUO 25X8
-            "1009": 37.50,  # AGULHA HIPODERMICA 20X5,5
-            "1010": 39.75   # AGULHA HIPODERMICA 30X7
-        }
-        
-        # Municípios simulados
-        municipalities = [
-            "BELO HORIZONTE",
-            "CONTAGEM",
-            "BETIM",
-            "JUIZ DE FORA",
-            "UBERLÂNDIA",
-            "MONTES CLAROS",
-            "DIVINÓPOLIS",
-            "POÇOS DE CALDAS",
-            "UBERABA",
-            "IPATINGA"
-        ]
-        
-        # Data atual
-        today = date.today()
-        
-        # Gera registros de preço para os últimos 12 meses
-        price_records = []
-        
-        # Preço base para este produto
-        base_price = product_base_prices.get(product_id, 50.0)
-        
-        # Para cada mês nos últimos 12 meses
-        for month_offset in range(12):
-            # Data do mês atual (indo para trás)
-            record_date = (today - timedelta(days=30 * month_offset))
-            
-            # Para cada município, gera um preço simulado
-            for municipality in municipalities:
-                # Adiciona uma variação aleatória de -15% a +15%
-                price_variation = random.uniform(-0.15, 0.15)
-                price = round(base_price * (1 + price_variation), 2)
+            Iterador assíncrono de lotes colunares
+        """
+        product_filter = _upstream_filter(product_filter)
+        product_id = product_filter.product_id
+        unit = product_filter.unit
+        if not product_id or not unit:
+            return
+        
+        cache_key = self._history_cache_key(product_filter, territory_scope, price_period)
+        self._record_query(cache_key, product_filter, territory_scope, price_period)
+        cached_columns = self.cache_service.get(cache_key)
+        
+        if cached_columns is not None:
+            for batch in cached_columns.batches(batch_size):
+                yield batch
+            return
+        
+        if self.cache_service.get_error(cache_key) is not None:
+            for batch in self._fallback_columns(product_filter, territory_scope).batches(batch_size):
+                yield batch
+            return
+        
+        cached_parts = []
+        cached_rows = 0
+        pending = []
+        pending_rows = 0
+        started = False
+        decoder = PriceHistoryDecoder(product_id, unit)
+        
+        try:
+            async for results in self.api_client.iter_price_history(
+                product_id,
+                unit,
+                territory_scope.to_dict(),
+                price_period.to_dict()
+            ):
+                batch = decoder.columns(results)
+                if not len(batch):
+                    continue
                 
-                # ID único para o registro
-                record_id = f"{product_id}_{record_date.isoformat()}_{municipality}"
+                pending.append(batch)
+                pending_rows += len(batch)
+                if pending_rows < batch_size:
+                    continue
                 
-                # Cria o registro
-                price_record = PriceRecord(
-                    id=record_id,
-                    product_id=product_id,
-                    product_name="",  # Será preenchido pelo controlador
-                    unit=unit,
-                    date=record_date,
-                    municipality=municipality,
-                    unit_price=price
-                )
+                for part in PriceColumns.concat(product_id, unit, pending).batches(batch_size):
+                    cached_parts, cached_rows = self._keep_for_cache(cached_parts, cached_rows, part)
+                    started = True
+                    yield part
+                pending = []
+                pending_rows = 0
                 
-                price_records.append(price_record)
+        except Exception as e:
+            if started:
+                # A resposta já começou a ser enviada; não é possível trocar de fonte
+                self.logger.error(f"Fluxo do histórico de preços interrompido: {e}")
+                raise
+            
+            self.logger.error(f"Erro ao buscar histórico de preços em fluxo: {e}")
+            self.cache_service.set_error(cache_key, e)
+            columns = self._fallback_columns(product_filter, territory_scope)
+            for batch in columns.batches(batch_size):
+                yield batch
+            return
+        
+        if pending:
+            tail = PriceColumns.concat(product_id, unit, pending)
+            cached_parts, cached_rows = self._keep_for_cache(cached_parts, cached_rows, tail)
+            yield tail
+        
+        if cached_parts:
+            self.cache_service.set(cache_key, PriceColumns.concat(product_id, unit, cached_parts))
+        elif cached_parts is not None:
+            self.cache_service.set_negative(cache_key, PriceColumns.empty(product_id, unit))
+    
+    def _fallback_columns(
+        self,
+        product_filter: ProductFilter,
+        territory_scope: TerritoryScope
+    ) -> PriceColumns:
+        """
+        Histórico usado quando a API falha.
+        
+        O resultado não é armazenado no cache, para que não seja confundido
+        com uma resposta da API; a falha memorizada (``CacheService.set_error``)
+        evita novas requisições enquanto não expirar.
         
-        return price_records 
\ No newline at end of file
+        Args:
+            product_filter: Filtro de produto
+            territory_scope: Escopo territorial
+            
+        Returns:
+            Preços simulados para produtos simulados, ou um histórico vazio
+        """
+        # Se for um produto simulado (começa com "10"), retorna preços simulados
+        if product_filter.product_id.startswith("10"):
+            # Últimos 12 meses, um registro por município e mês em média
+            today = date.today()
+            columns = _MOCK_GENERATOR.price_columns(
+                product_filter.product_id,
+                product_filter.unit,
+                rows=12 * len(_MOCK_MUNICIPALITIES),
+                start=today - timedelta(days=365),
+                end=today
+            )
+            
+            self.logger.info(f"Retornando {len(columns)} registros de preço simulados para produto {product_filter.product_id}")
+            return columns
+        
+        return PriceColumns.empty(product_filter.product_id, product_filter.unit)
+    
+    @staticmethod
+    def _keep_for_cache(parts: Optional[List[PriceColumns]], rows: int, part: PriceColumns):
+        """
+        Guarda um lote para o cache enquanto o total couber no limite.
+        
+        Returns:
+            Tupla com as partes guardadas (None se o limite foi excedido) e o total de linhas
+        """
+        if parts is None:
+            return None, rows
+        rows += len(part)
+        if rows > Config.STREAM_CACHE_MAX_ROWS:
+            return None, rows
+        parts.append(part)
+        return parts, rows
+    
+    def _history_cache_key(
+        self,
+        product_filter: ProductFilter,
+        territory_scope: TerritoryScope,
+        price_period: PricePeriod
+    ) -> str:
+        """
+        Gera a chave de cache do histórico de preços.
+        
+        A chave é canônica (consultas equivalentes, como códigos em outra
+        ordem, compartilham a entrada) e tem tamanho fixo; o produto fica
+        legível, para invalidações por prefixo. A unidade não é comparada sem
+        diferenciar maiúsculas e minúsculas: a API recebe a unidade como
+        informada (ver ``_upstream_filter``), e a resposta para uma grafia
+        não vale para outra.
+        """
+        territory_type = territory_scope.territory_type
+        return QueryKey(
+            "prices:history",
+            partition=product_filter.product_id,
+            unit=product_filter.unit,
+            territory=territory_type,
+            regions=territory_scope.region_codes if territory_type == TerritoryType.REGION else None,
+            municipalities=territory_scope.municipality_codes if territory_type == TerritoryType.MUNICIPALITY else None,
+            year=price_period.year or None,
+            start=price_period.start_date,
+            end=price_period.end_date
+        ).key
@@ -1,20 +1,34 @@
 import logging
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 import json
 import re
 
 from domain.entities import Product
 from domain.repositories import ProductRepository
-from domain.value_objects import ProductFilter
+from domain.value_objects import ProductFilter, QueryKey
 from infrastructure.external import TCEMGApiClient
-from infrastructure.cache import CacheService
+from infrastructure.cache import CacheService, PopularityLog
+from infrastructure.telemetry import span
 
 class TCEMGProductRepository(ProductRepository):
     """Implementação do repositório de produtos usando a API do TCE-MG."""
     
-    def __init__(self, api_client: TCEMGApiClient, cache_service: CacheService):
+    def __init__(
+        self,
+        api_client: TCEMGApiClient,
+        cache_service: CacheService,
+        popularity_log: Optional[PopularityLog] = None
+    ):
+        """
+        Args:
+            api_client: Cliente da API do TCE-MG
+            cache_service: Serviço de cache
+            popularity_log: Registro de popularidade das consultas, usado no
+                aquecimento do cache (opcional)
+        """
         self.api_client = api_client
         self.cache_service = cache_service
+        self.popularity_log = popularity_log
         self.logger = logging.getLogger(__name__)
     
     async def search_products(self, product_filter: ProductFilter) -> List[Product]:
@@ -31,17 +45,68 @@ class TCEMGProductRepository(ProductRepository):
             return []
         
         # Verifica se os resultados estão no cache
-        cache_key = f"products:search:{product_filter.search_term}"
+        cache_key = self._search_cache_key(product_filter.search_term)
+        if self.popularity_log is not None and not self.popularity_log.touch(cache_key):
+            self.popularity_log.record(cache_key, "products:search", {"term": product_filter.search_term})
+        
         cached_results = self.cache_service.get(cache_key)
         
-        if cached_results:
+        # Uma lista vazia também é um resultado (busca sabidamente sem produtos)
+        if cached_results is not None:
             return [Product(**product) for product in cached_results]
         
-        # Busca na API
-        try:
-            results = await self.api_client.search_products(product_filter.search_term)
+        # Falha recente da API para a mesma busca: não repete a requisição
+        if self.cache_service.get_error(cache_key) is None:
+            # Busca na API (buscas concorrentes pelo mesmo termo aguardam a mesma requisição)
+            try:
+                results = await self.cache_service.compute_if_absent(
+                    cache_key,
+                    lambda: self._load_products(product_filter.search_term)
+                )
+                return [Product(**product) for product in results]
+            except Exception as e:
+                self.logger.error(f"Erro ao buscar produtos: {e}")
+                self.cache_service.set_error(cache_key, e)
+        
+        return self._fallback_products(product_filter.search_term)
+    
+    async def refresh_search(self, query: Dict[str, Any]) -> List[Product]:
+        """
+        Recarrega da API uma busca do registro de popularidade, ignorando o
+        cache e substituindo a entrada (usado pelo aquecimento do cache).
+        
+        Args:
+            query: Descrição da busca no registro de popularidade ({"term": ...})
+            
+        Returns:
+            Lista de produtos encontrados
+        """
+        results = await self._load_products(query["term"])
+        self.cache_service.store(self._search_cache_key(query["term"]), results)
+        return [Product(**product) for product in results]
+    
+    @staticmethod
+    def _search_cache_key(search_term: str) -> str:
+        """Chave canônica da busca: não diferencia maiúsculas nem espaços extras."""
+        return QueryKey("products:search", casefold=("term",), term=search_term).key
+    
+    async def _load_products(self, search_term: str) -> List[Dict[str, Any]]:
+        """
+        Busca os produtos na API, propagando os erros.
+        
+        O resultado é armazenado no cache por quem chama (buscas sem
+        resultados expiram mais cedo; ver ``CacheService.store``).
+        
+        Args:
+            search_term: Termo de busca
             
-            products = []
+        Returns:
+            Produtos encontrados, no formato armazenado no cache
+        """
+        results = await self.api_client.search_products(search_term)
+        
+        products = []
+        with span("mapping"):
             for result in results:
                 # Mapeia os campos da API para os campos da entidade Product
                 product_id = result.get("id") or result.get("idProduto")
@@ -54,44 +119,43 @@ class TCEMGProductRepository(ProductRepository):
                         name=product_name,
                         unit=product_unit
                     )
-                    products.append(product)
-            
-            # Armazena no cache
-            self.cache_service.set(
-                cache_key,
-                [product.to_dict() for product in products]
-            )
+                    products.append(product.to_dict())
+        
+        return products
+    
+    def _fallback_products(self, search_term: str) -> List[Product]:
+        """
+        Produtos usados quando a API falha.
+        
+        O resultado não é armazenado no cache, para que não seja confundido
+        com uma resposta da API; a falha memorizada evita novas requisições
+        enquanto não expirar.
+        
+        Args:
+            search_term: Termo de busca
             
-            return products
+        Returns:
+            Produtos simulados para buscas por "agulha", ou uma lista vazia
+        """
+        # Se o termo de busca for "agulha", retorna uma lista de produtos simulados
+        if re.search(r"agulha", search_term.lower()):
+            mock_products = [
+                Product(id="1001", name="AGULHA DESCARTÁVEL 13X4,5", unit="CAIXA 100,00 UN"),
+                Product(id="1002", name="AGULHA DESCARTÁVEL 25X7", unit="CAIXA 100,00 UN"),
+                Product(id="1003", name="AGULHA DESCARTÁVEL 25X8", unit="CAIXA 100,00 UN"),
+                Product(id="1004", name="AGULHA DESCARTÁVEL 40X12", unit="CAIXA 100,00 UN"),
+                Product(id="1005", name="AGULHA GENGIVAL CURTA 30G", unit="CAIXA 100,00 UN"),
+                Product(id="1006", name="AGULHA GENGIVAL LONGA 27G", unit="CAIXA 100,00 UN"),
+                Product(id="1007", name="AGULHA PARA COLETA A VÁCUO 25X7", unit="CAIXA 100,00 UN"),
+                Product(id="1008", name="AGULHA PARA COLETA A VÁCUO 25X8", unit="CAIXA 100,00 UN"),
+                Product(id="1009", name="AGULHA HIPODERMICA 20X5,5", unit="CAIXA 100,00 UN"),
+                Product(id="1010", name="AGULHA HIPODERMICA 30X7", unit="CAIXA 100,00 UN")
+            ]
             
-        except Exception as e:
-            self.logger.error(f"Erro ao buscar produtos: {e}")
+            self.logger.info(f"Retornando {len(mock_products)} produtos simulados para 'agulha'")
+            return mock_products
             
-            # Se o termo de busca for "agulha", retorna uma lista de produtos simulados
-            if product_filter.search_term.lower() == "agulha" or re.search(r"agulha", product_filter.search_term.lower()):
-                mock_products = [
-                    Product(id="1001", name="AGULHA DESCARTÁVEL 13X4,5", unit="CAIXA 100,00 UN"),
-                    Product(id="1002", name="AGULHA DESCARTÁVEL 25X7", unit="CAIXA 100,00 UN"),
-                    Product(id="1003", name="AGULHA DESCARTÁVEL 25X8", unit="CAIXA 100,00 UN"),
-                    Product(id="1004", name="AGULHA DESCARTÁVEL 40X12", unit="CAIXA 100,00 UN"),
-                    Product(id="1005", name="AGULHA GENGIVAL CURTA 30G", unit="CAIXA 100,00 UN"),
-                    Product(id="1006", name="AGULHA GENGIVAL LONGA 27G", unit="CAIXA 100,00 UN"),
-                    Product(id="1007", name="AGULHA PARA COLETA A VÁCUO 25X7", unit="CAIXA 100,00 UN"),
-                    Product(id="1008", name="AGULHA PARA COLETA A VÁCUO 25X8", unit="CAIXA 100,00 UN"),
-                    Product(id="1009", name="AGULHA HIPODERMICA 20X5,5", unit="CAIXA 100,00 UN"),
-                    Product(id="1010", name="AGULHA HIPODERMICA 30X7", unit="CAIXA 100,00 UN")
-                ]
-                
-                # Armazena no cache
-                self.cache_service.set(
-                    cache_key,
-                    [product.to_dict() for product in mock_products]
-                )
-                
-                self.logger.info(f"Retornando {len(mock_products)} produtos simulados para 'agulha'")
-                return mock_products
-                
-            return []
+        return []
     
     async def get_product(self, product_id: str) -> Optional[Product]:
         """
@@ -107,7 +171,7 @@ class TCEMGProductRepository(ProductRepository):
         cache_key = f"products:id:{product_id}"
         cached_product = self.cache_service.get(cache_key)
         
-        if cached_product:
+        if cached_product is not None:
             return Product(**cached_product)
         
         # Produtos simulados para IDs específicos
@@ -1,19 +1,70 @@
+import asyncio
 import logging
 from typing import List, Optional
-import json
 
 from domain.entities import Territory, TerritoryType
 from domain.repositories import TerritoryRepository
+from domain.territory_index import TerritoryIndex
 from infrastructure.external import TCEMGApiClient
-from infrastructure.cache import CacheService
+from infrastructure.cache import CacheService, record_content_version
+from infrastructure.repositories.territory_snapshot import TerritorySnapshot
 
 class TCEMGTerritoryRepository(TerritoryRepository):
-    """Implementação do repositório de territórios usando a API do TCE-MG."""
+    """
+    Implementação do repositório de territórios usando a API do TCE-MG.
     
-    def __init__(self, api_client: TCEMGApiClient, cache_service: CacheService):
+    Os territórios são servidos sempre da memória: o repositório começa com
+    o snapshot versionado distribuído com a aplicação (ou o último gravado
+    em ``snapshot_path``) e o atualiza em segundo plano a partir da API
+    (ver ``refresh`` e ``start``). As consultas nunca aguardam a API, e uma
+    falha da API apenas mantém o snapshot atual.
+    
+    O snapshot distribuído não traz a região dos municípios; até que a API a
+    complete, os agrupamentos por região e a lista de municípios de uma
+    região ficam indisponíveis (ver ``TerritoryIndex.unmapped_municipalities``),
+    e as consultas com escopo de região são filtradas pela própria API.
+    """
+    
+    def __init__(
+        self,
+        api_client: TCEMGApiClient,
+        cache_service: CacheService,
+        snapshot_path: Optional[str] = None,
+        refresh_interval: float = 0
+    ):
+        """
+        Args:
+            api_client: Cliente da API do TCE-MG
+            cache_service: Serviço de cache (mantido por compatibilidade; os
+                territórios ficam no snapshot em memória)
+            snapshot_path: Arquivo onde o snapshot atualizado é gravado e de
+                onde é carregado na inicialização (opcional)
+            refresh_interval: Intervalo entre atualizações em segundo plano,
+                em segundos (0 desativa)
+        """
         self.api_client = api_client
         self.cache_service = cache_service
+        self.snapshot_path = snapshot_path
+        self.refresh_interval = refresh_interval
         self.logger = logging.getLogger(__name__)
+        self.snapshot = TerritorySnapshot.load_or_bundled(snapshot_path)
+        self._task: Optional[asyncio.Task] = None
+        
+        self.logger.info(
+            f"Snapshot de territórios {self.snapshot.version} carregado com "
+            f"{len(self.snapshot.municipalities)} municípios"
+        )
+        if not self.snapshot.index.regions_complete:
+            self.logger.warning(
+                f"{self.snapshot.index.unmapped_municipalities} municípios sem região no snapshot de territórios; "
+                f"agrupamentos por região indisponíveis até a atualização a partir da API"
+            )
+    
+    def _current(self) -> TerritoryIndex:
+        """Índice do snapshot atual, com a versão registrada para o ETag da resposta."""
+        snapshot = self.snapshot
+        record_content_version("territories", snapshot.digest)
+        return snapshot.index
     
     async def get_regions(self) -> List[Territory]:
         """
@@ -22,63 +73,7 @@ class TCEMGTerritoryRepository(TerritoryRepository):
         Returns:
             Lista de regiões
         """
-        # Verifica se as regiões estão no cache
-        cache_key = "territories:regions"
-        cached_regions = self.cache_service.get(cache_key)
-        
-        if cached_regions:
-            return [Territory(**region) for region in cached_regions]
-        
-        # Busca na API
-        try:
-            results = await self.api_client.get_regions()
-            
-            regions = []
-            for result in results:
-                region_id = result.get("id") or result.get("codigo")
-                region_name = result.get("nome")
-                
-                if region_id and region_name:
-                    region = Territory(
-                        id=region_id,
-                        name=region_name,
-                        type=TerritoryType.REGION
-                    )
-                    regions.append(region)
-            
-            # Armazena no cache
-            self.cache_service.set(
-                cache_key,
-                [region.to_dict() for region in regions]
-            )
-            
-            return regions
-            
-        except Exception as e:
-            self.logger.error(f"Erro ao buscar regiões: {e}")
-            
-            # Fallback para regiões fixas em caso de erro
-            # Este é apenas um exemplo, as regiões reais devem ser obtidas da API
-            fallback_regions = [
-                Territory("1", "Central", TerritoryType.REGION),
-                Territory("2", "Zona da Mata", TerritoryType.REGION),
-                Territory("3", "Sul de Minas", TerritoryType.REGION),
-                Territory("4", "Triângulo Mineiro", TerritoryType.REGION),
-                Territory("5", "Alto Paranaíba", TerritoryType.REGION),
-                Territory("6", "Centro-Oeste", TerritoryType.REGION),
-                Territory("7", "Noroeste", TerritoryType.REGION),
-                Territory("8", "Norte", TerritoryType.REGION),
-                Territory("9", "Jequitinhonha/Mucuri", TerritoryType.REGION),
-                Territory("10", "Rio Doce", TerritoryType.REGION)
-            ]
-            
-            # Armazena no cache
-            self.cache_service.set(
-                cache_key,
-                [region.to_dict() for region in fallback_regions]
-            )
-            
-            return fallback_regions
+        return list(self._current().regions)
     
     async def get_municipalities(self, region_code: str = None) -> List[Territory]:
         """
@@ -86,85 +81,26 @@ class TCEMGTerritoryRepository(TerritoryRepository):
         
         Args:
             region_code: Código da região para filtrar (opcional)
-            
+        
         Returns:
             Lista de municípios
         """
-        # Verifica se os municípios estão no cache
-        cache_key = f"territories:municipalities:{region_code or 'all'}"
-        cached_municipalities = self.cache_service.get(cache_key)
+        index = self._current()
+        if region_code:
+            return index.municipalities_of(region_code)
+        return list(index.municipalities)
+    
+    async def get_index(self) -> TerritoryIndex:
+        """
+        Obtém o índice em memória de regiões e municípios.
         
-        if cached_municipalities:
-            return [Territory(**municipality) for municipality in cached_municipalities]
+        O índice é construído uma única vez por snapshot e substituído
+        inteiro quando o snapshot é atualizado.
         
-        # Busca na API
-        try:
-            results = await self.api_client.get_municipalities(region_code)
-            
-            municipalities = []
-            for result in results:
-                municipality_id = result.get("id") or result.get("codigo")
-                municipality_name = result.get("nome")
-                
-                if municipality_id and municipality_name:
-                    municipality = Territory(
-                        id=municipality_id,
-                        name=municipality_name,
-                        type=TerritoryType.MUNICIPALITY
-                    )
-                    municipalities.append(municipality)
-            
-            # Armazena no cache
-            self.cache_service.set(
-                cache_key,
-                [municipality.to_dict() for municipality in municipalities]
-            )
-            
-            return municipalities
-            
-        except Exception as e:
-            self.logger.error(f"Erro ao buscar municípios: {e}")
-            
-            # Fallback para municípios fixos em caso de erro
-            # Limitamos a lista para os maiores municípios de Minas Gerais
-            # Filtramos por região se necessário
-            
-            all_municipalities = [
-                Territory("3106200", "BELO HORIZONTE", TerritoryType.MUNICIPALITY, region_id="1"),
-                Territory("3106705", "CONTAGEM", TerritoryType.MUNICIPALITY, region_id="1"),
-                Territory("3106200", "BETIM", TerritoryType.MUNICIPALITY, region_id="1"),
-                Territory("3136702", "JUIZ DE FORA", TerritoryType.MUNICIPALITY, region_id="2"),
-                Territory("3170206", "UBERLÂNDIA", TerritoryType.MUNICIPALITY, region_id="4"),
-                Territory("3143302", "MONTES CLAROS", TerritoryType.MUNICIPALITY, region_id="8"),
-                Territory("3122306", "DIVINÓPOLIS", TerritoryType.MUNICIPALITY, region_id="6"),
-                Territory("3151800", "POÇOS DE CALDAS", TerritoryType.MUNICIPALITY, region_id="3"),
-                Territory("3170107", "UBERABA", TerritoryType.MUNICIPALITY, region_id="4"),
-                Territory("3131307", "IPATINGA", TerritoryType.MUNICIPALITY, region_id="10"),
-                Territory("3153905", "RIBEIRÃO DAS NEVES", TerritoryType.MUNICIPALITY, region_id="1"),
-                Territory("3154606", "SANTA LUZIA", TerritoryType.MUNICIPALITY, region_id="1"),
-                Territory("3129806", "GOVERNADOR VALADARES", TerritoryType.MUNICIPALITY, region_id="10"),
-                Territory("3156700", "SETE LAGOAS", TerritoryType.MUNICIPALITY, region_id="1"),
-                Territory("3118601", "CORONEL FABRICIANO", TerritoryType.MUNICIPALITY, region_id="10"),
-                Territory("3171204", "VARGINHA", TerritoryType.MUNICIPALITY, region_id="3"),
-                Territory("3149309", "PATOS DE MINAS", TerritoryType.MUNICIPALITY, region_id="5"),
-                Territory("3127701", "FORMIGA", TerritoryType.MUNICIPALITY, region_id="6"),
-                Territory("3140159", "LAVRAS", TerritoryType.MUNICIPALITY, region_id="3"),
-                Territory("3161809", "TEÓFILO OTONI", TerritoryType.MUNICIPALITY, region_id="9")
-            ]
-            
-            # Filtra por região, se necessário
-            if region_code:
-                filtered_municipalities = [m for m in all_municipalities if m.region_id == region_code]
-            else:
-                filtered_municipalities = all_municipalities
-            
-            # Armazena no cache
-            self.cache_service.set(
-                cache_key,
-                [municipality.to_dict() for municipality in filtered_municipalities]
-            )
-            
-            return filtered_municipalities
+        Returns:
+            Índice de territórios
+        """
+        return self._current()
     
     async def get_territory(self, territory_id: str, territory_type: TerritoryType) -> Optional[Territory]:
         """
@@ -173,32 +109,70 @@ class TCEMGTerritoryRepository(TerritoryRepository):
         Args:
             territory_id: ID do território
             territory_type: Tipo do território
-            
+        
         Returns:
             Território encontrado ou None
         """
-        # Verifica se o território está no cache
-        cache_key = f"territories:{territory_type.value}:{territory_id}"
-        cached_territory = self.cache_service.get(cache_key)
+        return self._current().get(territory_id, territory_type)
+    
+    async def refresh(self) -> bool:
+        """
+        Atualiza o snapshot a partir da API do TCE-MG.
         
-        if cached_territory:
-            return Territory(**cached_territory)
+        As regiões e os municípios são obtidos juntos; se a API falhar, o
+        snapshot atual é mantido. O novo snapshot substitui o atual de uma
+        só vez (as consultas em andamento continuam com o anterior) e é
+        gravado em ``snapshot_path``, se configurado.
         
-        # Busca de acordo com o tipo
-        if territory_type == TerritoryType.REGION:
-            regions = await self.get_regions()
-            for region in regions:
-                if region.id == territory_id:
-                    # Armazena no cache
-                    self.cache_service.set(cache_key, region.to_dict())
-                    return region
+        Returns:
+            True se o snapshot mudou
+        """
+        try:
+            regions, municipalities = await asyncio.gather(
+                self.api_client.get_regions(),
+                self.api_client.get_municipalities()
+            )
+        except Exception as e:
+            self.logger.warning(f"Falha ao atualizar os territórios, mantendo o snapshot {self.snapshot.version}: {e}")
+            return False
         
-        elif territory_type == TerritoryType.MUNICIPALITY:
-            municipalities = await self.get_municipalities()
-            for municipality in municipalities:
-                if municipality.id == territory_id:
-                    # Armazena no cache
-                    self.cache_service.set(cache_key, municipality.to_dict())
-                    return municipality
+        snapshot = self.snapshot.merge(regions, municipalities)
+        if snapshot is self.snapshot:
+            return False
         
-        return None 
\ No newline at end of file
+        self.snapshot = snapshot
+        self.logger.info(
+            f"Snapshot de territórios atualizado para {snapshot.version} "
+            f"({len(snapshot.regions)} regiões, {len(snapshot.municipalities)} municípios)"
+        )
+        
+        if self.snapshot_path:
+            try:
+                await asyncio.to_thread(snapshot.save, self.snapshot_path)
+            except OSError as e:
+                self.logger.warning(f"Falha ao gravar o snapshot de territórios em {self.snapshot_path}: {e}")
+        return True
+    
+    async def _run(self) -> None:
+        """Atualiza o snapshot em laço até ser cancelado."""
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                self.logger.error(f"Erro na atualização dos territórios: {e}")
+            await asyncio.sleep(self.refresh_interval)
+    
+    def start(self) -> None:
+        """Inicia a atualização periódica do snapshot em segundo plano (a primeira, imediatamente)."""
+        if self._task is None and self.refresh_interval > 0:
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self) -> None:
+        """Interrompe a atualização periódica do snapshot."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,158 @@
+import json
+import logging
+import os
+from typing import Any, Dict, Iterable, List, Optional
+
+from domain.entities import Territory, TerritoryType
+from domain.territory_index import TerritoryIndex
+
+# Snapshot distribuído com a aplicação: os 853 municípios de Minas Gerais (IBGE)
+BUNDLED_SNAPSHOT_PATH = os.path.join(os.path.dirname(__file__), "data", "territorios_mg.json")
+
+
+class TerritorySnapshot:
+    """
+    Snapshot versionado das regiões e municípios, com o índice em memória.
+
+    Os territórios quase nunca mudam; por isso são carregados uma vez, de
+    um arquivo distribuído com a aplicação (ou do último snapshot gravado),
+    e apenas atualizados em segundo plano a partir da API do TCE-MG (ver
+    ``merge``). O índice e o resumo do conteúdo são calculados uma única vez
+    por snapshot.
+    """
+
+    def __init__(self, version: str, regions: Iterable[Territory], municipalities: Iterable[Territory]):
+        """
+        Args:
+            version: Versão do snapshot
+            regions: Regiões
+            municipalities: Municípios
+        """
+        self.version = version
+        self.index = TerritoryIndex(regions, municipalities)
+        self.digest = self.index.content_digest()
+
+    @property
+    def regions(self) -> List[Territory]:
+        return self.index.regions
+
+    @property
+    def municipalities(self) -> List[Territory]:
+        return self.index.municipalities
+
+    @classmethod
+    def load(cls, path: str = BUNDLED_SNAPSHOT_PATH) -> 'TerritorySnapshot':
+        """
+        Carrega um snapshot gravado em JSON.
+
+        Args:
+            path: Caminho do arquivo (padrão: snapshot distribuído com a aplicação)
+
+        Returns:
+            Snapshot carregado
+
+        Raises:
+            OSError, ValueError, KeyError: Se o arquivo não puder ser lido ou for inválido
+        """
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+
+        regions = Territory.from_records(
+            (str(code), name, TerritoryType.REGION, None) for code, name in data["regions"]
+        )
+        municipalities = Territory.from_records(
+            (str(code), name, TerritoryType.MUNICIPALITY, region_id) for code, name, region_id in data["municipalities"]
+        )
+        return cls(str(data["version"]), regions, municipalities)
+
+    @classmethod
+    def load_or_bundled(cls, path: Optional[str] = None) -> 'TerritorySnapshot':
+        """
+        Carrega o snapshot gravado no caminho informado, ou o distribuído com a
+        aplicação se o caminho não for informado, não existir ou for inválido.
+
+        Args:
+            path: Caminho do último snapshot gravado (opcional)
+
+        Returns:
+            Snapshot carregado
+        """
+        if path and os.path.exists(path):
+            try:
+                return cls.load(path)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logging.getLogger(__name__).warning(f"Snapshot de territórios inválido em {path}, usando o distribuído: {e}")
+        return cls.load(BUNDLED_SNAPSHOT_PATH)
+
+    def save(self, path: str) -> None:
+        """
+        Grava o snapshot em JSON (substituição atômica do arquivo).
+
+        Args:
+            path: Caminho do arquivo
+        """
+        data = {
+            "version": self.version,
+            "regions": [[region.id, region.name] for region in self.regions],
+            "municipalities": [
+                [municipality.id, municipality.name, municipality.region_id]
+                for municipality in self.municipalities
+            ]
+        }
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(data, file, ensure_ascii=False, separators=(",", ":"))
+        os.replace(temporary, path)
+
+    def merge(self, regions: List[Dict[str, Any]], municipalities: List[Dict[str, Any]]) -> 'TerritorySnapshot':
+        """
+        Cria um novo snapshot com os territórios obtidos da API do TCE-MG.
+
+        Uma lista não vazia da API substitui a do snapshot; nos municípios
+        presentes nos dois, o nome e a região ausentes na API são mantidos do
+        snapshot. Uma lista vazia (ou sem registros válidos) mantém a atual.
+
+        Args:
+            regions: Regiões no formato da API ("codigo"/"id" e "nome")
+            municipalities: Municípios no formato da API ("codigo"/"id", "nome" e "codRegiao")
+
+        Returns:
+            Novo snapshot (o próprio snapshot, se nada mudou)
+        """
+        new_regions = []
+        for result in regions:
+            region_id = result.get("id") or result.get("codigo")
+            region_name = result.get("nome")
+            if region_id and region_name:
+                new_regions.append(Territory(str(region_id), region_name, TerritoryType.REGION))
+
+        new_municipalities = []
+        current = self.index
+        for result in municipalities:
+            municipality_id = result.get("id") or result.get("codigo")
+            if not municipality_id:
+                continue
+            municipality_id = str(municipality_id)
+            known = current.get(municipality_id, TerritoryType.MUNICIPALITY)
+            name = result.get("nome") or (known.name if known else None)
+            region_id = result.get("codRegiao") or result.get("regiao") or (known.region_id if known else None)
+            if name:
+                new_municipalities.append(
+                    Territory(municipality_id, name, TerritoryType.MUNICIPALITY, str(region_id) if region_id else None)
+                )
+
+        merged = TerritorySnapshot(
+            self.version.split("+", 1)[0],
+            new_regions or self.regions,
+            new_municipalities or self.municipalities
+        )
+        if merged.digest == self.digest:
+            return self
+
+        # Versão do snapshot de origem, com o resumo do conteúdo atualizado
+        merged.version = f"{merged.version}+{merged.digest[:12]}"
+        return merged
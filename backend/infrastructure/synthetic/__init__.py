@@ -0,0 +1,18 @@
+"""
+Módulo de dados sintéticos: históricos de preço realistas e determinísticos,
+usados pela API simulada, pelos benchmarks e pelo fallback dos produtos simulados.
+"""
+
+from .price_generator import (
+    SyntheticMunicipality,
+    SyntheticPriceGenerator,
+    synthetic_municipalities,
+    synthetic_regions
+)
+
+__all__ = [
+    'SyntheticMunicipality',
+    'SyntheticPriceGenerator',
+    'synthetic_municipalities',
+    'synthetic_regions'
+]
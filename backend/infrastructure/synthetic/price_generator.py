@@ -0,0 +1,419 @@
+import logging
+import zlib
+from datetime import date
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from domain.price_series import PriceColumns
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Dependência opcional
+    pyarrow = None
+
+# Regiões usadas pelos municípios sintéticos padrão
+_REGIONS = [
+    "Central", "Zona da Mata", "Sul de Minas", "Triângulo Mineiro", "Alto Paranaíba",
+    "Centro-Oeste", "Noroeste", "Norte", "Jequitinhonha/Mucuri", "Rio Doce"
+]
+
+# Volume relativo de compras por mês (jan a dez): pico no início do exercício
+# e corrida para empenhar antes do fim do ano
+_MONTHLY_VOLUME = np.array([0.7, 1.0, 1.2, 1.1, 1.0, 0.9, 0.9, 1.0, 1.0, 1.0, 1.2, 1.5])
+
+# Volume relativo de compras por dia da semana (seg a dom)
+_WEEKDAY_VOLUME = np.array([1.0, 1.0, 1.0, 1.0, 0.9, 0.1, 0.05])
+
+# Fatores dos preços discrepantes: erro de unidade (x10, /10) e sobrepreço
+_OUTLIER_FACTORS = np.array([10.0, 0.1, 3.0])
+
+
+class SyntheticMunicipality(NamedTuple):
+    """Município dos dados sintéticos."""
+    code: str
+    name: str
+    region_code: str
+
+
+def synthetic_regions() -> List[Dict[str, str]]:
+    """Regiões padrão dos dados sintéticos, no formato da API do TCE-MG."""
+    return [{"codigo": str(i + 1), "nome": name} for i, name in enumerate(_REGIONS)]
+
+
+def synthetic_municipalities(count: int = 853, seed: int = 0) -> List[SyntheticMunicipality]:
+    """
+    Municípios sintéticos, distribuídos entre as regiões padrão.
+
+    Args:
+        count: Quantidade de municípios (853 em Minas Gerais)
+        seed: Semente da distribuição entre as regiões
+
+    Returns:
+        Lista de municípios, do maior para o menor volume de compras
+    """
+    region_of = np.random.default_rng(seed).integers(0, len(_REGIONS), count)
+    return [
+        SyntheticMunicipality(str(3100005 + i * 10), f"MUNICÍPIO {i + 1:03d}", str(region_of[i] + 1))
+        for i in range(count)
+    ]
+
+
+class SyntheticPriceGenerator:
+    """
+    Gerador vetorizado e determinístico de históricos de preço sintéticos.
+
+    Os registros são gerados em arrays NumPy, sem laços em Python, e seguem
+    padrões de dados reais de compras públicas:
+
+    - o volume de compras se concentra nos municípios maiores e nos produtos
+      mais populares (distribuições de Zipf);
+    - as datas seguem a sazonalidade do exercício (mais compras no início e no
+      fim do ano, poucas nos fins de semana);
+    - os preços seguem uma log-normal em torno do preço de referência do
+      produto, com inflação anual, variação sazonal, nível de preço próprio de
+      cada município e alguns valores discrepantes.
+
+    A mesma semente e os mesmos parâmetros produzem sempre os mesmos registros.
+    Os lotes usam colunas categóricas: produto e município são índices em
+    ``product_ids`` e ``municipalities``.
+    """
+
+    def __init__(
+        self,
+        seed: int = 0,
+        municipalities: Optional[Sequence[SyntheticMunicipality]] = None,
+        products: Optional[Dict[str, float]] = None,
+        start: date = date(2019, 1, 1),
+        end: date = date(2024, 12, 31),
+        product_skew: float = 1.1,
+        municipality_skew: float = 1.0,
+        annual_inflation: float = 0.06,
+        seasonality: float = 0.03,
+        dispersion: float = 0.2,
+        outlier_rate: float = 0.01
+    ):
+        """
+        Args:
+            seed: Semente dos dados
+            municipalities: Municípios, do maior para o menor volume de compras
+                (padrão: 853 municípios sintéticos)
+            products: Preço de referência por ID de produto (padrão: 200 produtos
+                a partir do ID 1001, com preços derivados do ID)
+            start: Data inicial padrão dos históricos
+            end: Data final padrão dos históricos
+            product_skew: Expoente da distribuição de Zipf da popularidade dos produtos
+            municipality_skew: Expoente da distribuição de Zipf do volume por município
+            annual_inflation: Aumento anual dos preços
+            seasonality: Amplitude da variação sazonal dos preços
+            dispersion: Desvio (sigma) da log-normal dos preços
+            outlier_rate: Fração de preços discrepantes
+        """
+        self.seed = seed
+        self.municipalities = list(municipalities) if municipalities is not None else synthetic_municipalities(seed=seed)
+        if products is None:
+            products = {str(1001 + i): None for i in range(200)}
+        self.product_ids = list(products)
+        self.start = start
+        self.end = end
+        self.annual_inflation = annual_inflation
+        self.seasonality = seasonality
+        self.dispersion = dispersion
+        self.outlier_rate = outlier_rate
+        self.logger = logging.getLogger(__name__)
+
+        self.reference_prices = np.array(
+            [price if price is not None else self.reference_price(product_id) for product_id, price in products.items()],
+            dtype=np.float64
+        )
+        self._product_position = {product_id: i for i, product_id in enumerate(self.product_ids)}
+        self._municipality_names = np.array([municipality.name for municipality in self.municipalities], dtype=object)
+
+        product_weights = 1.0 / np.arange(1, len(self.product_ids) + 1) ** product_skew
+        self.product_weights = product_weights / product_weights.sum()
+        self.municipality_weights = 1.0 / np.arange(1, len(self.municipalities) + 1) ** municipality_skew
+
+        # Nível de preço de cada município (fixo para a semente)
+        self._price_levels = np.random.default_rng([seed, 1]).lognormal(0, 0.08, len(self.municipalities))
+
+    @staticmethod
+    def reference_price(product_id: str) -> float:
+        """Preço de referência derivado do ID, para produtos sem preço informado."""
+        return 5.0 + zlib.crc32(product_id.encode("utf-8")) % 500
+
+    def _rng(self, *key) -> np.random.Generator:
+        """Gerador de números aleatórios derivado da semente e de uma chave."""
+        return np.random.default_rng([self.seed, *(zlib.crc32(str(part).encode("utf-8")) for part in key)])
+
+    def _dates(self, rng: np.random.Generator, rows: int, start: date, end: date) -> np.ndarray:
+        """Sorteia datas ordenadas, com a sazonalidade mensal e semanal do volume de compras."""
+        days = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D") + 1)
+        months = days.astype("datetime64[M]").astype(np.int64) % 12
+        weekdays = (days.astype(np.int64) + 3) % 7  # 1970-01-01 foi uma quinta-feira
+        weights = _MONTHLY_VOLUME[months] * _WEEKDAY_VOLUME[weekdays]
+        return np.sort(rng.choice(days, size=rows, p=weights / weights.sum()))
+
+    def _prices(
+        self,
+        rng: np.random.Generator,
+        references: np.ndarray,
+        municipalities: np.ndarray,
+        dates: np.ndarray
+    ) -> np.ndarray:
+        """Calcula os preços unitários de registros já sorteados, a partir do preço de referência de cada um."""
+        rows = len(dates)
+        years = (dates - np.datetime64(self.start, "D")).astype(np.float64) / 365.25
+        months = dates.astype("datetime64[M]").astype(np.int64) % 12
+
+        prices = (
+            references
+            * (1 + self.annual_inflation) ** years
+            * (1 + self.seasonality * np.sin(2 * np.pi * (months - 2) / 12))
+            * self._price_levels[municipalities]
+            * rng.lognormal(0, self.dispersion, rows)
+        )
+
+        outliers = np.flatnonzero(rng.random(rows) < self.outlier_rate)
+        prices[outliers] *= rng.choice(_OUTLIER_FACTORS, len(outliers))
+        return np.maximum(np.round(prices, 2), 0.01)
+
+    def _batch(
+        self,
+        rng: np.random.Generator,
+        products: np.ndarray,
+        references: np.ndarray,
+        scope: np.ndarray,
+        rows: int,
+        start: date,
+        end: date
+    ) -> Dict[str, np.ndarray]:
+        """Sorteia os registros de um lote nos municípios do escopo."""
+        weights = self.municipality_weights[scope]
+        where = scope[rng.choice(len(scope), size=rows, p=weights / weights.sum())]
+        # Garante ao menos um registro por município quando há registros suficientes
+        if rows >= len(scope):
+            where[:len(scope)] = scope
+            where = rng.permutation(where)
+
+        dates = self._dates(rng, rows, start, end)
+        return {
+            "date": dates,
+            "product": products.astype(np.int32),
+            "municipality": where.astype(np.int32),
+            "unit_price": self._prices(rng, references, where, dates),
+            "quantity": np.minimum(np.ceil(rng.lognormal(2.5, 1.0, rows)), 100000).astype(np.int32)
+        }
+
+    def sample(
+        self,
+        product_id: str,
+        rows: int,
+        municipalities: Optional[np.ndarray] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        key: str = ""
+    ) -> Dict[str, np.ndarray]:
+        """
+        Gera o histórico de um produto.
+
+        Args:
+            product_id: ID do produto (produtos fora do catálogo usam o preço derivado do ID)
+            rows: Quantidade de registros
+            municipalities: Índices dos municípios do escopo (padrão: todos)
+            start: Data inicial (padrão: a do gerador)
+            end: Data final (padrão: a do gerador)
+            key: Chave adicional da semente (ex.: os parâmetros da consulta)
+
+        Returns:
+            Lote colunar ordenado por data: "date", "product" (-1 para produtos
+            fora do catálogo), "municipality", "unit_price" e "quantity"
+        """
+        start, end = start or self.start, end or self.end
+        scope = np.arange(len(self.municipalities)) if municipalities is None else np.asarray(municipalities, dtype=np.int64)
+        if rows <= 0 or not len(scope) or end < start:
+            return {
+                "date": np.empty(0, dtype="datetime64[D]"),
+                "product": np.empty(0, dtype=np.int32),
+                "municipality": np.empty(0, dtype=np.int32),
+                "unit_price": np.empty(0, dtype=np.float64),
+                "quantity": np.empty(0, dtype=np.int32)
+            }
+
+        position = self._product_position.get(product_id, -1)
+        reference = self.reference_prices[position] if position >= 0 else self.reference_price(product_id)
+        return self._batch(
+            self._rng(product_id, key),
+            np.full(rows, position),
+            np.full(rows, reference),
+            scope,
+            rows,
+            start,
+            end
+        )
+
+    def price_columns(
+        self,
+        product_id: str,
+        unit: str,
+        rows: int,
+        municipalities: Optional[np.ndarray] = None,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        key: str = ""
+    ) -> PriceColumns:
+        """
+        Gera o histórico de um produto diretamente no formato colunar do domínio.
+
+        Args:
+            product_id: ID do produto
+            unit: Unidade do produto
+            rows: Quantidade de registros
+            municipalities: Índices dos municípios do escopo (padrão: todos)
+            start: Data inicial (padrão: a do gerador)
+            end: Data final (padrão: a do gerador)
+            key: Chave adicional da semente
+
+        Returns:
+            Histórico colunar, com IDs no mesmo formato dos registros da API
+        """
+        batch = self.sample(product_id, rows, municipalities, start, end, key)
+        names = self._municipality_names[batch["municipality"]]
+        days = batch["date"].astype(str).tolist()
+        return PriceColumns(
+            product_id=product_id,
+            unit=unit,
+            ids=np.array([f"{product_id}_{day}_{name}" for day, name in zip(days, names.tolist())], dtype=object),
+            dates=batch["date"],
+            municipalities=names,
+            prices=batch["unit_price"]
+        )
+
+    def iter_batches(self, rows: int, batch_size: int = 1000000) -> Iterator[Dict[str, np.ndarray]]:
+        """
+        Gera um conjunto de dados de todos os produtos e municípios, em lotes.
+
+        Os produtos são sorteados pela popularidade. Cada lote cobre todo o
+        período do gerador e é ordenado por data; o conteúdo depende da semente
+        e do tamanho do lote, e a memória usada é limitada ao lote.
+
+        Args:
+            rows: Quantidade total de registros
+            batch_size: Registros por lote
+
+        Returns:
+            Iterador de lotes colunares (ver ``sample``)
+        """
+        scope = np.arange(len(self.municipalities))
+        for index, offset in enumerate(range(0, rows, batch_size)):
+            size = min(batch_size, rows - offset)
+            rng = self._rng("dataset", index)
+            products = rng.choice(len(self.product_ids), size=size, p=self.product_weights)
+            yield self._batch(rng, products, self.reference_prices[products], scope, size, self.start, self.end)
+
+    def to_frame(self, batch: Dict[str, np.ndarray]):
+        """
+        Converte um lote em DataFrame do pandas, com produto e município categóricos.
+
+        Args:
+            batch: Lote gerado por ``sample`` ou ``iter_batches``
+
+        Returns:
+            DataFrame com as colunas "data", "id_produto", "codigo_municipio",
+            "municipio", "codigo_regiao", "valor_unitario" e "quantidade"
+        """
+        # pandas é importado só quando necessário (inicialização mais rápida)
+        import pandas as pd
+
+        codes = [municipality.code for municipality in self.municipalities]
+        regions = [municipality.region_code for municipality in self.municipalities]
+        where = batch["municipality"]
+        return pd.DataFrame({
+            "data": batch["date"],
+            "id_produto": pd.Categorical.from_codes(batch["product"], self.product_ids),
+            "codigo_municipio": pd.Categorical.from_codes(where, codes),
+            "municipio": pd.Categorical.from_codes(where, self._municipality_names.tolist()),
+            "codigo_regiao": pd.Categorical(np.array(regions, dtype=object)[where]),
+            "valor_unitario": batch["unit_price"],
+            "quantidade": batch["quantity"]
+        })
+
+    def write_parquet(self, path: str, rows: int, batch_size: int = 1000000) -> int:
+        """
+        Grava um conjunto de dados em Parquet, um grupo de linhas por lote.
+
+        Produto e município são gravados como colunas de dicionário, sem
+        materializar as strings de cada registro. Requer o pyarrow.
+
+        Args:
+            path: Arquivo de destino
+            rows: Quantidade total de registros
+            batch_size: Registros por lote (e por grupo de linhas)
+
+        Returns:
+            Quantidade de registros gravados
+        """
+        if pyarrow is None:
+            raise ImportError("A gravação em Parquet requer o pacote pyarrow (pip install pyarrow)")
+
+        product_ids = pyarrow.array(self.product_ids)
+        codes = pyarrow.array([municipality.code for municipality in self.municipalities])
+        names = pyarrow.array([municipality.name for municipality in self.municipalities])
+        regions = pyarrow.array([municipality.region_code for municipality in self.municipalities])
+
+        written = 0
+        writer = None
+        try:
+            for batch in self.iter_batches(rows, batch_size):
+                where = pyarrow.array(batch["municipality"])
+                table = pyarrow.table({
+                    "data": pyarrow.array(batch["date"]),
+                    "id_produto": pyarrow.DictionaryArray.from_arrays(pyarrow.array(batch["product"]), product_ids),
+                    "codigo_municipio": pyarrow.DictionaryArray.from_arrays(where, codes),
+                    "municipio": pyarrow.DictionaryArray.from_arrays(where, names),
+                    "codigo_regiao": pyarrow.DictionaryArray.from_arrays(where, regions),
+                    "valor_unitario": pyarrow.array(batch["unit_price"]),
+                    "quantidade": pyarrow.array(batch["quantity"])
+                })
+                if writer is None:
+                    writer = pyarrow.parquet.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+                written += len(batch["date"])
+        finally:
+            if writer is not None:
+                writer.close()
+
+        self.logger.info(f"{written} registros sintéticos gravados em {path}")
+        return written
+
+    def write_npz(self, path: str, rows: int, batch_size: int = 1000000) -> int:
+        """
+        Grava um conjunto de dados em um arquivo NumPy (.npz), coluna a coluna.
+
+        Produto e município são gravados como índices, acompanhados das
+        tabelas ``product_ids``, ``municipality_codes``, ``municipality_names``
+        e ``region_codes``; o arquivo não depende de pickle.
+
+        Args:
+            path: Arquivo de destino
+            rows: Quantidade total de registros
+            batch_size: Registros por lote da geração
+
+        Returns:
+            Quantidade de registros gravados
+        """
+        batches = list(self.iter_batches(rows, batch_size))
+        columns = {
+            name: np.concatenate([batch[name] for batch in batches]) if batches else np.empty(0)
+            for name in ("date", "product", "municipality", "unit_price", "quantity")
+        }
+        np.savez(
+            path,
+            **columns,
+            product_ids=np.array(self.product_ids, dtype=str),
+            municipality_codes=np.array([municipality.code for municipality in self.municipalities], dtype=str),
+            municipality_names=np.array([municipality.name for municipality in self.municipalities], dtype=str),
+            region_codes=np.array([municipality.region_code for municipality in self.municipalities], dtype=str)
+        )
+        self.logger.info(f"{len(columns['date'])} registros sintéticos gravados em {path}")
+        return len(columns["date"])
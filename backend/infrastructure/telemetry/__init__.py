@@ -0,0 +1,64 @@
+"""
+Módulo de instrumentação: medição de latência por etapa das requisições,
+métricas no formato do Prometheus e perfis estatísticos sob demanda.
+"""
+
+from .metrics import (
+    REGISTRY,
+    CounterValue,
+    GaugeValue,
+    Histogram,
+    MetricFamily,
+    MetricsRegistry,
+    archive_snapshot,
+    clear_snapshots,
+    collect,
+    generate_latest,
+    render,
+    write_snapshot
+)
+from .metrics_flusher import MetricsFlusher
+from .profiler import (
+    ProfileStore,
+    RequestProfile,
+    finish_profile,
+    render_collapsed,
+    start_profile,
+    top_functions
+)
+from .timing import (
+    RequestTiming,
+    current_timing,
+    finish_request_timing,
+    span,
+    span_histograms,
+    start_request_timing
+)
+
+__all__ = [
+    'REGISTRY',
+    'CounterValue',
+    'GaugeValue',
+    'Histogram',
+    'MetricFamily',
+    'MetricsRegistry',
+    'MetricsFlusher',
+    'ProfileStore',
+    'RequestProfile',
+    'RequestTiming',
+    'archive_snapshot',
+    'clear_snapshots',
+    'collect',
+    'current_timing',
+    'finish_profile',
+    'finish_request_timing',
+    'generate_latest',
+    'render',
+    'render_collapsed',
+    'span',
+    'span_histograms',
+    'start_profile',
+    'start_request_timing',
+    'top_functions',
+    'write_snapshot'
+]
@@ -0,0 +1,539 @@
+import json
+import logging
+import os
+import threading
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Limites dos histogramas de duração, em segundos
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_WORKER_PREFIX = "worker-"
+_ARCHIVE_FILE = "archive.json"
+
+
+class CounterValue:
+    """
+    Valor de um contador.
+
+    A atualização é uma soma simples, sem trava: o servidor executa as
+    requisições em um único laço de eventos, e o processo principal de
+    cada worker é o único que escreve nos seus valores.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Soma ``amount`` ao contador."""
+        self.value += amount
+
+
+class GaugeValue(CounterValue):
+    """Valor de um medidor (pode subir e descer)."""
+
+    __slots__ = ()
+
+    def dec(self, amount: float = 1.0) -> None:
+        """Subtrai ``amount`` do medidor."""
+        self.value -= amount
+
+    def set(self, value: float) -> None:
+        """Define o valor do medidor."""
+        self.value = value
+
+
+class Histogram:
+    """
+    Histograma de durações com limites fixos, no formato usado pelo Prometheus.
+    """
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # O último é o +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """
+        Registra uma observação.
+
+        Args:
+            value: Valor observado (duração em segundos, para os histogramas de duração)
+        """
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """
+        Estima um quantil pelo limite superior do intervalo que o contém.
+
+        Args:
+            q: Quantil entre 0 e 1
+
+        Returns:
+            Limite superior do intervalo (infinito acima do maior limite)
+        """
+        if not self.count:
+            return 0.0
+
+        target = q * self.count
+        accumulated = 0
+        for bound, count in zip(self.buckets, self.counts):
+            accumulated += count
+            if accumulated >= target:
+                return bound
+        return float("inf")
+
+    def cumulative_counts(self) -> List[Tuple[float, int]]:
+        """
+        Contagens acumuladas por limite, incluindo o +Inf.
+
+        Returns:
+            Lista de pares (limite, observações menores ou iguais ao limite)
+        """
+        accumulated = 0
+        result = []
+        for bound, count in zip((*self.buckets, float("inf")), self.counts):
+            accumulated += count
+            result.append((bound, accumulated))
+        return result
+
+
+class MetricFamily:
+    """
+    Métrica com rótulos (ex.: requisições por rota e status).
+
+    Cada combinação de valores dos rótulos tem o seu próprio valor, criado
+    no primeiro uso e reaproveitado depois (``labels`` é uma consulta a um
+    dicionário).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        kind: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        """
+        Args:
+            name: Nome da métrica
+            kind: Tipo ("counter", "gauge" ou "histogram")
+            help_text: Descrição da métrica
+            labelnames: Nomes dos rótulos
+            buckets: Limites do histograma (apenas para "histogram")
+        """
+        self.name = name
+        self.kind = kind
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+
+    def _new_child(self):
+        if self.kind == "histogram":
+            return Histogram(self.buckets)
+        if self.kind == "gauge":
+            return GaugeValue()
+        return CounterValue()
+
+    def labels(self, *values: str):
+        """
+        Obtém o valor de uma combinação de rótulos.
+
+        Args:
+            *values: Valores dos rótulos, na ordem de ``labelnames`` (texto)
+
+        Returns:
+            CounterValue, GaugeValue ou Histogram
+        """
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"A métrica {self.name} espera os rótulos {self.labelnames}")
+            child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def children(self) -> Dict[Tuple[str, ...], Any]:
+        """Valores por combinação de rótulos."""
+        return dict(self._children)
+
+    def inc(self, amount: float = 1.0) -> None:
+        """Atalho para métricas sem rótulos."""
+        self.labels().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        """Atalho para medidores sem rótulos."""
+        self.labels().dec(amount)
+
+    def observe(self, value: float) -> None:
+        """Atalho para histogramas sem rótulos."""
+        self.labels().observe(value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Cópia serializável dos valores da métrica.
+
+        Returns:
+            Dicionário com tipo, descrição, rótulos e amostras
+        """
+        samples = []
+        for labels, child in list(self._children.items()):
+            if self.kind == "histogram":
+                value = {"counts": list(child.counts), "sum": child.sum, "count": child.count}
+            else:
+                value = child.value
+            samples.append([list(labels), value])
+
+        return {
+            "kind": self.kind,
+            "help": self.help_text,
+            "labelnames": list(self.labelnames),
+            "buckets": list(self.buckets) if self.kind == "histogram" else None,
+            "samples": samples
+        }
+
+
+class MetricsRegistry:
+    """Conjunto das métricas de um processo."""
+
+    def __init__(self):
+        self._families: Dict[str, MetricFamily] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, family: MetricFamily) -> MetricFamily:
+        with self._lock:
+            existing = self._families.get(family.name)
+            if existing is not None:
+                return existing
+            self._families[family.name] = family
+            return family
+
+    def counter(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        """Registra (ou obtém) um contador."""
+        return self._register(MetricFamily(name, "counter", help_text, labelnames))
+
+    def gauge(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        """
+        Registra (ou obtém) um medidor.
+
+        Entre processos, os medidores são somados apenas entre os workers vivos.
+        """
+        return self._register(MetricFamily(name, "gauge", help_text, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> MetricFamily:
+        """Registra (ou obtém) um histograma."""
+        return self._register(MetricFamily(name, "histogram", help_text, labelnames, buckets))
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Cópia serializável de todas as métricas do processo.
+
+        Returns:
+            Dicionário do nome da métrica para o seu snapshot
+        """
+        return {name: family.snapshot() for name, family in list(self._families.items())}
+
+
+REGISTRY = MetricsRegistry()
+
+
+# Agregação entre processos
+#
+# Cada worker grava periodicamente o snapshot das suas métricas em
+# ``<diretório>/worker-<pid>.json``. Quando um worker termina, o processo
+# principal incorpora os seus contadores e histogramas em ``archive.json``
+# (os medidores de um processo morto não valem mais). O /metrics de
+# qualquer worker soma o próprio snapshot ao vivo com os arquivos dos demais.
+
+def _write_json(path: str, data: Any) -> None:
+    """Grava um arquivo JSON de forma atômica (arquivo temporário + rename)."""
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w", encoding="utf-8") as file:
+        json.dump(data, file)
+    os.replace(temporary, path)
+
+
+def _read_json(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def write_snapshot(directory: str, registry: MetricsRegistry = REGISTRY) -> None:
+    """
+    Grava o snapshot das métricas deste processo no diretório compartilhado.
+
+    Args:
+        directory: Diretório compartilhado entre os workers
+        registry: Métricas a gravar
+    """
+    os.makedirs(directory, exist_ok=True)
+    _write_json(os.path.join(directory, f"{_WORKER_PREFIX}{os.getpid()}.json"), registry.snapshot())
+
+
+def archive_snapshot(directory: str, pid: int) -> None:
+    """
+    Incorpora o snapshot de um worker encerrado ao arquivo consolidado.
+
+    Deve ser chamado apenas pelo processo principal, após o término do worker.
+
+    Args:
+        directory: Diretório compartilhado entre os workers
+        pid: PID do worker encerrado
+    """
+    path = os.path.join(directory, f"{_WORKER_PREFIX}{pid}.json")
+    snapshot = _read_json(path)
+    if snapshot is None:
+        return
+
+    archive_path = os.path.join(directory, _ARCHIVE_FILE)
+    archive = _read_json(archive_path) or {}
+    merged = merge_snapshots([archive, snapshot], include_gauges=[False, False])
+    _write_json(archive_path, merged)
+    os.remove(path)
+
+
+def clear_snapshots(directory: str) -> None:
+    """
+    Remove os snapshots de uma execução anterior.
+
+    Args:
+        directory: Diretório compartilhado entre os workers
+    """
+    if not os.path.isdir(directory):
+        return
+    for name in os.listdir(directory):
+        if name.startswith(_WORKER_PREFIX) or name == _ARCHIVE_FILE:
+            os.remove(os.path.join(directory, name))
+
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def merge_snapshots(
+    snapshots: Sequence[Dict[str, Dict[str, Any]]],
+    include_gauges: Sequence[bool]
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Soma snapshots de vários processos.
+
+    Args:
+        snapshots: Snapshots a somar
+        include_gauges: Para cada snapshot, se os seus medidores entram na soma
+
+    Returns:
+        Snapshot com os valores somados por métrica e combinação de rótulos
+    """
+    merged: Dict[str, Dict[str, Any]] = {}
+    values: Dict[str, Dict[Tuple[str, ...], Any]] = {}
+
+    for snapshot, with_gauges in zip(snapshots, include_gauges):
+        for name, family in snapshot.items():
+            if family["kind"] == "gauge" and not with_gauges:
+                continue
+
+            if name not in merged:
+                merged[name] = {key: family[key] for key in ("kind", "help", "labelnames", "buckets")}
+                values[name] = {}
+            target = values[name]
+
+            for labels, value in family["samples"]:
+                key = tuple(labels)
+                if family["kind"] != "histogram":
+                    target[key] = target.get(key, 0.0) + value
+                elif key not in target:
+                    target[key] = {"counts": list(value["counts"]), "sum": value["sum"], "count": value["count"]}
+                else:
+                    current = target[key]
+                    current["counts"] = [a + b for a, b in zip(current["counts"], value["counts"])]
+                    current["sum"] += value["sum"]
+                    current["count"] += value["count"]
+
+    for name, family in merged.items():
+        family["samples"] = [[list(key), value] for key, value in values[name].items()]
+    return merged
+
+
+def collect(directory: Optional[str] = None, registry: MetricsRegistry = REGISTRY) -> Dict[str, Dict[str, Any]]:
+    """
+    Reúne as métricas deste processo e, se houver diretório, as dos demais workers.
+
+    Args:
+        directory: Diretório compartilhado entre os workers (opcional)
+        registry: Métricas deste processo
+
+    Returns:
+        Snapshot agregado
+    """
+    snapshots = [registry.snapshot()]
+    include_gauges = [True]
+
+    if directory and os.path.isdir(directory):
+        own_file = f"{_WORKER_PREFIX}{os.getpid()}.json"
+        for name in sorted(os.listdir(directory)):
+            if not name.endswith(".json") or name == own_file:
+                continue
+
+            if name == _ARCHIVE_FILE:
+                alive = False
+            elif name.startswith(_WORKER_PREFIX):
+                try:
+                    alive = _is_alive(int(name[len(_WORKER_PREFIX):-len(".json")]))
+                except ValueError:
+                    continue
+            else:
+                continue
+
+            snapshot = _read_json(os.path.join(directory, name))
+            if snapshot is not None:
+                snapshots.append(snapshot)
+                include_gauges.append(alive)
+
+    return merge_snapshots(snapshots, include_gauges)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def render(snapshot: Dict[str, Dict[str, Any]]) -> str:
+    """
+    Converte um snapshot para o formato de texto do Prometheus (versão 0.0.4).
+
+    Args:
+        snapshot: Snapshot (de ``collect`` ou ``MetricsRegistry.snapshot``)
+
+    Returns:
+        Texto da exposição
+    """
+    lines = []
+    for name in sorted(snapshot):
+        family = snapshot[name]
+        labelnames = family["labelnames"]
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['kind']}")
+
+        for labels, value in sorted(family["samples"], key=lambda sample: sample[0]):
+            if family["kind"] != "histogram":
+                lines.append(f"{name}{_format_labels(labelnames, labels)} {_format_number(value)}")
+                continue
+
+            accumulated = 0
+            for bound, count in zip((*family["buckets"], float("inf")), value["counts"]):
+                accumulated += count
+                le = f'le="{_format_number(bound)}"'
+                lines.append(f"{name}_bucket{_format_labels(labelnames, labels, le)} {accumulated}")
+            lines.append(f"{name}_sum{_format_labels(labelnames, labels)} {_format_number(value['sum'])}")
+            lines.append(f"{name}_count{_format_labels(labelnames, labels)} {value['count']}")
+
+    return "\n".join(lines) + "\n"
+
+
+def generate_latest(directory: Optional[str] = None) -> str:
+    """
+    Gera a exposição das métricas de todos os workers.
+
+    Args:
+        directory: Diretório compartilhado entre os workers (opcional)
+
+    Returns:
+        Texto no formato do Prometheus
+    """
+    return render(collect(directory))
+
+
+# Métricas da aplicação
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "http_requests_total", "Requisições HTTP recebidas", ("method", "route", "status")
+)
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds", "Duração das requisições HTTP até o fim da resposta", ("method", "route")
+)
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.gauge(
+    "http_requests_in_flight", "Requisições HTTP em andamento"
+)
+REQUEST_STAGE_DURATION = REGISTRY.histogram(
+    "request_stage_duration_seconds", "Duração por etapa das requisições amostradas (Server-Timing)", ("stage",)
+)
+
+UPSTREAM_REQUESTS = REGISTRY.counter(
+    "tce_upstream_requests_total", "Requisições à API do TCE-MG por endpoint e status", ("endpoint", "status")
+)
+UPSTREAM_REQUEST_DURATION = REGISTRY.histogram(
+    "tce_upstream_request_duration_seconds", "Duração das requisições à API do TCE-MG", ("endpoint",)
+)
+UPSTREAM_RETRIES = REGISTRY.counter(
+    "tce_upstream_retries_total", "Novas tentativas de requisições à API do TCE-MG", ("endpoint",)
+)
+UPSTREAM_REQUESTS_IN_FLIGHT = REGISTRY.gauge(
+    "tce_upstream_requests_in_flight", "Requisições à API do TCE-MG em andamento"
+)
+UPSTREAM_COALESCED = REGISTRY.counter(
+    "tce_upstream_coalesced_total",
+    "Requisições à API do TCE-MG atendidas por uma requisição idêntica já em andamento",
+    ("endpoint",)
+)
+
+CACHE_REQUESTS = REGISTRY.counter(
+    "cache_requests_total", "Consultas ao cache em memória por namespace e resultado", ("namespace", "result")
+)
+CACHE_EVICTIONS = REGISTRY.counter(
+    "cache_evictions_total", "Entradas removidas do cache por namespace e motivo", ("namespace", "reason")
+)
+CACHE_ENTRIES = REGISTRY.gauge(
+    "cache_entries", "Entradas no cache por namespace", ("namespace",)
+)
+CACHE_BYTES = REGISTRY.gauge(
+    "cache_bytes", "Tamanho aproximado das entradas do cache por namespace", ("namespace",)
+)
+CACHE_WARMED = REGISTRY.counter(
+    "cache_warmed_total", "Consultas recarregadas pelo aquecimento do cache por namespace e resultado", ("namespace", "result")
+)
+
+EXPORTS = REGISTRY.counter(
+    "exports_total", "Exportações de histórico de preços por formato e status", ("format", "status")
+)
+EXPORT_DURATION = REGISTRY.histogram(
+    "export_duration_seconds", "Duração das exportações de histórico de preços", ("format",)
+)
@@ -0,0 +1,53 @@
+import asyncio
+import logging
+from typing import Optional
+
+from .metrics import write_snapshot
+
+
+class MetricsFlusher:
+    """
+    Grava periodicamente as métricas do worker no diretório compartilhado,
+    para que o /metrics de qualquer worker some as métricas de todos.
+    """
+
+    def __init__(self, directory: str, interval: float):
+        """
+        Args:
+            directory: Diretório compartilhado entre os workers
+            interval: Intervalo entre gravações, em segundos
+        """
+        self.directory = directory
+        self.interval = interval
+        self.logger = logging.getLogger(__name__)
+        self._task: Optional[asyncio.Task] = None
+
+    def flush(self) -> None:
+        """Grava o snapshot atual."""
+        try:
+            write_snapshot(self.directory)
+        except OSError as e:
+            self.logger.warning(f"Falha ao gravar as métricas em {self.directory}: {e}")
+
+    async def _run(self) -> None:
+        """Grava as métricas em laço até ser cancelado."""
+        while True:
+            await asyncio.sleep(self.interval)
+            self.flush()
+
+    def start(self) -> None:
+        """Inicia a gravação periódica em segundo plano."""
+        if self._task is None:
+            self.flush()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Interrompe a gravação periódica e grava o snapshot final."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.flush()
@@ -0,0 +1,451 @@
+import asyncio
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from contextvars import ContextVar, Token
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Perfil da requisição atual; as tarefas criadas nesse contexto entram no perfil
+_current_profile: ContextVar[Optional['RequestProfile']] = ContextVar("request_profile", default=None)
+
+# Diretório do backend, para encurtar os caminhos dos arquivos nas pilhas
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Profundidade máxima das pilhas amostradas
+_MAX_DEPTH = 128
+
+
+@lru_cache(maxsize=4096)
+def _short_path(filename: str) -> str:
+    """Encurta o caminho de um arquivo de código para exibição."""
+    if filename.startswith(_BACKEND_DIR + os.sep):
+        return filename[len(_BACKEND_DIR) + 1:]
+    marker = "site-packages" + os.sep
+    position = filename.rfind(marker)
+    if position >= 0:
+        return filename[position + len(marker):]
+    return os.path.basename(filename)
+
+
+def _frame_label(frame) -> str:
+    """Rótulo de uma função na pilha (ex.: "PriceController.get_price_history (application/controllers.py:120)")."""
+    code = frame.f_code
+    return f"{code.co_qualname} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _awaited(awaitable) -> Tuple[Any, Any]:
+    """Obtém o quadro de execução e o objeto aguardado por uma corrotina, gerador ou gerador assíncrono."""
+    for frame_attr, await_attr in (("cr_frame", "cr_await"), ("ag_frame", "ag_await"), ("gi_frame", "gi_yieldfrom")):
+        if hasattr(awaitable, frame_attr):
+            return getattr(awaitable, frame_attr), getattr(awaitable, await_attr)
+    return None, None
+
+
+def _awaited_name(awaited) -> str:
+    """Nome do objeto em que uma tarefa está suspensa (o iterador de um Future aparece como Future)."""
+    name = type(awaited).__name__
+    return "Future" if name == "FutureIter" else name
+
+
+def _coroutine_chain(task: asyncio.Task) -> Tuple[List[Any], Any]:
+    """
+    Percorre a cadeia de corrotinas de uma tarefa, da mais externa para a mais interna.
+
+    Returns:
+        Tupla com os quadros de execução e o objeto aguardado no final da cadeia
+        (Future, tarefa ou None)
+    """
+    frames = []
+    awaitable = task.get_coro()
+    while awaitable is not None and len(frames) < _MAX_DEPTH:
+        frame, awaited = _awaited(awaitable)
+        if frame is None:
+            return frames, awaitable
+        frames.append(frame)
+        awaitable = awaited
+    return frames, None
+
+
+def _thread_stack(thread_id: int) -> List[Any]:
+    """Pilha atual de uma thread, do quadro mais externo para o mais interno."""
+    frame = sys._current_frames().get(thread_id)
+    stack = []
+    while frame is not None and len(stack) < _MAX_DEPTH:
+        stack.append(frame)
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+class RequestProfile:
+    """
+    Perfil estatístico de uma requisição.
+
+    A cada intervalo, o amostrador registra a pilha de cada tarefa da
+    requisição: a tarefa principal e as criadas no seu contexto (consultas em
+    paralelo, requisições à API do TCE-MG compartilhadas), cada uma precedida
+    da pilha da tarefa que a criou. A pilha de uma tarefa suspensa é a cadeia
+    de corrotinas até o ponto de espera (ex.: resposta da API do TCE-MG),
+    terminando em "[aguardando ...]"; a de uma tarefa em execução inclui as
+    funções síncronas chamadas por ela.
+    """
+
+    def __init__(self, task: asyncio.Task, method: str, path: str, query: str, trigger: str, interval: float):
+        """
+        Args:
+            task: Tarefa que processa a requisição
+            method: Método HTTP
+            path: Rota da requisição
+            query: Parâmetros da requisição (query string)
+            trigger: Origem do perfil ("header" ou "sample")
+            interval: Intervalo entre amostras, em segundos
+        """
+        self.id = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.query = query
+        self.trigger = trigger
+        self.interval = interval
+        self.started_at = datetime.now()
+        self.started = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.status: Optional[int] = None
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self.tasks: List[asyncio.Task] = [task]
+        self.parents: Dict[asyncio.Task, Optional[asyncio.Task]] = {task: None}
+        self.loop = task.get_loop()
+        self.thread_id = threading.get_ident()
+
+    def sample(self) -> None:
+        """Registra uma amostra das pilhas das tarefas (executado na thread do amostrador)."""
+        running = asyncio.current_task(self.loop)
+        tasks = [task for task in tuple(self.tasks) if not task.done()]
+        waiting_on_children = {self.parents.get(task) for task in tasks}
+        prefixes: Dict[asyncio.Task, Tuple[str, ...]] = {}
+        self.samples += 1
+
+        for task in tasks:
+            # Tarefa suspensa com tarefas filhas em andamento (gather, shield,
+            # requisição compartilhada): o tempo aparece na pilha das filhas
+            if task is not running and task in waiting_on_children:
+                continue
+
+            frames, awaited = _coroutine_chain(task)
+            if not frames:
+                continue
+
+            if task is running:
+                stack = _thread_stack(self.thread_id)
+                for position, frame in enumerate(stack):
+                    if frame is frames[0]:
+                        frames = stack[position:]
+                        break
+                leaf = ()
+            else:
+                leaf = (f"[aguardando {_awaited_name(awaited)}]",) if awaited is not None else ()
+
+            self.stacks[(*self._prefix(task, prefixes), *map(_frame_label, frames), *leaf)] += 1
+
+    def _prefix(self, task: asyncio.Task, prefixes: Dict[asyncio.Task, Tuple[str, ...]]) -> Tuple[str, ...]:
+        """
+        Início da pilha de uma tarefa: a pilha da tarefa que a criou (no ponto
+        em que está suspensa) seguida do nome da tarefa, de modo que a pilha de
+        uma requisição à API do TCE-MG continue a do controlador que a originou.
+        """
+        if task in prefixes:
+            return prefixes[task]
+
+        parent = self.parents.get(task)
+        if parent is None:
+            prefix = ("task:request",) if task is self.tasks[0] else (f"task:{task.get_name()}",)
+        else:
+            prefixes[task] = ()  # Proteção contra ciclos
+            frames, _ = _coroutine_chain(parent)
+            prefix = (*self._prefix(parent, prefixes), *map(_frame_label, frames), f"task:{task.get_name()}")
+
+        prefixes[task] = prefix
+        return prefix
+
+    def finish(self, status: Optional[int]) -> None:
+        """
+        Encerra o perfil.
+
+        Args:
+            status: Status HTTP da resposta (None se não houve resposta)
+        """
+        self.duration = time.perf_counter() - self.started
+        self.status = status
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Representação serializável do perfil.
+
+        Returns:
+            Dicionário com os dados da requisição e as pilhas amostradas
+            (mais frequentes primeiro)
+        """
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "query": self.query,
+            "status": self.status,
+            "trigger": self.trigger,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round((self.duration or 0) * 1000, 1),
+            "interval_ms": round(self.interval * 1000, 3),
+            "samples": self.samples,
+            "stacks": [
+                {"frames": list(frames), "count": count}
+                for frames, count in self.stacks.most_common()
+            ]
+        }
+
+
+class _Sampler:
+    """Thread única que amostra todos os perfis ativos do processo."""
+
+    def __init__(self):
+        self._profiles: List[RequestProfile] = []
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, profile: RequestProfile) -> None:
+        with self._lock:
+            self._profiles.append(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+
+    def remove(self, profile: RequestProfile) -> None:
+        with self._lock:
+            if profile in self._profiles:
+                self._profiles.remove(profile)
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                profiles = list(self._profiles)
+                if not profiles:
+                    self._thread = None
+                    return
+
+            for profile in profiles:
+                try:
+                    profile.sample()
+                except Exception as e:  # A amostragem nunca deve derrubar a thread
+                    logger.debug(f"Falha ao amostrar o perfil {profile.id}: {e}")
+
+            time.sleep(min(profile.interval for profile in profiles))
+
+
+_sampler = _Sampler()
+
+
+def _install_task_factory(loop: asyncio.AbstractEventLoop) -> None:
+    """Instala no laço de eventos a fábrica que associa as tarefas novas ao perfil da requisição."""
+    previous = loop.get_task_factory()
+    if getattr(previous, "_profiling", False):
+        return
+
+    def task_factory(loop, coro, **kwargs):
+        if previous is not None:
+            task = previous(loop, coro, **kwargs)
+        else:
+            task = asyncio.Task(coro, loop=loop, **kwargs)
+        profile = _current_profile.get()
+        if profile is not None:
+            profile.parents[task] = asyncio.current_task(loop)
+            profile.tasks.append(task)
+        return task
+
+    task_factory._profiling = True
+    loop.set_task_factory(task_factory)
+
+
+def start_profile(method: str, path: str, query: str, trigger: str, interval: float) -> Tuple[RequestProfile, Token]:
+    """
+    Inicia o perfil estatístico da requisição da tarefa atual.
+
+    Args:
+        method: Método HTTP
+        path: Rota da requisição
+        query: Parâmetros da requisição (query string)
+        trigger: Origem do perfil ("header" ou "sample")
+        interval: Intervalo entre amostras, em segundos
+
+    Returns:
+        Tupla com o perfil e o token para ``finish_profile``
+    """
+    task = asyncio.current_task()
+    _install_task_factory(task.get_loop())
+    profile = RequestProfile(task, method, path, query, trigger, interval)
+    token = _current_profile.set(profile)
+    _sampler.add(profile)
+    return profile, token
+
+
+def finish_profile(profile: RequestProfile, token: Token, status: Optional[int]) -> None:
+    """
+    Encerra o perfil iniciado com ``start_profile``.
+
+    Args:
+        profile: Perfil da requisição
+        token: Token devolvido por ``start_profile``
+        status: Status HTTP da resposta (None se não houve resposta)
+    """
+    _sampler.remove(profile)
+    _current_profile.reset(token)
+    profile.finish(status)
+
+
+def render_collapsed(profile: Dict[str, Any]) -> str:
+    """
+    Converte um perfil para o formato de pilhas colapsadas ("frame;frame;frame contagem"),
+    lido por ferramentas de flame graph (flamegraph.pl, speedscope, inferno).
+
+    Args:
+        profile: Perfil no formato de ``RequestProfile.to_dict``
+
+    Returns:
+        Uma linha por pilha distinta
+    """
+    lines = [
+        ";".join(frame.replace(";", ",") for frame in stack["frames"]) + f" {stack['count']}"
+        for stack in profile["stacks"]
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def top_functions(profile: Dict[str, Any], limit: int = 30) -> List[Dict[str, Any]]:
+    """
+    Funções com mais amostras em um perfil.
+
+    Args:
+        profile: Perfil no formato de ``RequestProfile.to_dict``
+        limit: Quantidade de funções
+
+    Returns:
+        Lista com a função, as amostras em que estava na pilha ("total") e as
+        amostras em que era a mais interna ("self"), ordenada por total
+    """
+    totals: Counter = Counter()
+    own: Counter = Counter()
+    for stack in profile["stacks"]:
+        frames = stack["frames"][1:]  # Sem o rótulo da tarefa
+        if not frames:
+            continue
+        for frame in set(frames):
+            totals[frame] += stack["count"]
+        own[frames[-1]] += stack["count"]
+
+    return [
+        {"function": frame, "total": count, "self": own.get(frame, 0)}
+        for frame, count in totals.most_common(limit)
+    ]
+
+
+class ProfileStore:
+    """
+    Guarda os perfis mais recentes.
+
+    Com um diretório configurado, os perfis são gravados em arquivos JSON,
+    para que qualquer worker os devolva; sem ele, ficam na memória do worker
+    que atendeu a requisição.
+    """
+
+    def __init__(self, max_profiles: int = 50, directory: Optional[str] = None):
+        """
+        Args:
+            max_profiles: Quantidade máxima de perfis guardados (os mais antigos são descartados)
+            directory: Diretório compartilhado entre os workers (opcional)
+        """
+        self.max_profiles = max_profiles
+        self.directory = directory
+        self.logger = logging.getLogger(__name__)
+        self._profiles: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+
+    def save(self, profile: RequestProfile) -> None:
+        """
+        Guarda um perfil encerrado.
+
+        Args:
+            profile: Perfil da requisição
+        """
+        data = profile.to_dict()
+        if not self.directory:
+            self._profiles[profile.id] = data
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+            return
+
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f"{profile.id}.json")
+            with open(f"{path}.tmp", "w", encoding="utf-8") as file:
+                json.dump(data, file)
+            os.replace(f"{path}.tmp", path)
+            for stale in self._files()[self.max_profiles:]:
+                os.remove(stale)
+        except OSError as e:
+            self.logger.warning(f"Falha ao gravar o perfil {profile.id} em {self.directory}: {e}")
+
+    def _files(self) -> List[str]:
+        """Arquivos de perfis do diretório, do mais recente para o mais antigo."""
+        try:
+            names = [name for name in os.listdir(self.directory) if name.endswith(".json")]
+        except FileNotFoundError:
+            return []
+        paths = [os.path.join(self.directory, name) for name in names]
+        return sorted(paths, key=lambda path: os.stat(path).st_mtime, reverse=True)
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Obtém um perfil pelo identificador.
+
+        Args:
+            profile_id: Identificador do perfil
+
+        Returns:
+            Perfil no formato de ``RequestProfile.to_dict`` ou None se não encontrado
+        """
+        if not self.directory:
+            return self._profiles.get(profile_id)
+
+        if not profile_id.isalnum():
+            return None
+        try:
+            with open(os.path.join(self.directory, f"{profile_id}.json"), encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+    def list(self) -> List[Dict[str, Any]]:
+        """
+        Lista os perfis guardados, do mais recente para o mais antigo.
+
+        Returns:
+            Resumos dos perfis (sem as pilhas)
+        """
+        if not self.directory:
+            profiles = list(reversed(self._profiles.values()))
+        else:
+            profiles = []
+            for path in self._files():
+                try:
+                    with open(path, encoding="utf-8") as file:
+                        profiles.append(json.load(file))
+                except (OSError, ValueError):
+                    continue
+
+        return [{key: value for key, value in profile.items() if key != "stacks"} for profile in profiles]
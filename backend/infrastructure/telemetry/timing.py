@@ -0,0 +1,203 @@
+import json
+import logging
+from contextvars import ContextVar, Token
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple
+
+from .metrics import Histogram, REQUEST_STAGE_DURATION
+
+logger = logging.getLogger(__name__)
+
+# Medição da requisição atual; None quando a requisição não foi amostrada
+_current_timing: ContextVar[Optional['RequestTiming']] = ContextVar("request_timing", default=None)
+
+
+class RequestTiming:
+    """
+    Durações das etapas (spans) de uma requisição.
+
+    Uma etapa pode ocorrer várias vezes na mesma requisição (ex.: várias
+    chamadas à API do TCE-MG); as durações são somadas por nome.
+    """
+
+    __slots__ = ("started", "spans")
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.spans: List[Tuple[str, float]] = []
+
+    def add(self, name: str, seconds: float) -> None:
+        """
+        Registra a duração de uma etapa.
+
+        Args:
+            name: Nome da etapa
+            seconds: Duração em segundos
+        """
+        self.spans.append((name, seconds))
+
+    def elapsed(self) -> float:
+        """Tempo decorrido desde o início da requisição, em segundos."""
+        return perf_counter() - self.started
+
+    def total(self, name: str) -> float:
+        """
+        Soma das durações de uma etapa.
+
+        Args:
+            name: Nome da etapa
+
+        Returns:
+            Duração total em segundos
+        """
+        return sum(seconds for span_name, seconds in self.spans if span_name == name)
+
+    def summary(self) -> Dict[str, Tuple[float, int]]:
+        """
+        Durações agregadas por etapa, na ordem da primeira ocorrência.
+
+        Returns:
+            Dicionário do nome da etapa para (duração total em segundos, ocorrências)
+        """
+        result: Dict[str, Tuple[float, int]] = {}
+        for name, seconds in self.spans:
+            total, count = result.get(name, (0.0, 0))
+            result[name] = (total + seconds, count + 1)
+        return result
+
+    def server_timing(self, total: float) -> str:
+        """
+        Monta o valor do cabeçalho Server-Timing.
+
+        Args:
+            total: Duração total da requisição até o envio dos cabeçalhos, em segundos
+
+        Returns:
+            Valor do cabeçalho (ex.: "upstream;dur=120.5, mapping;dur=3.1, total;dur=130.2")
+        """
+        entries = [
+            f'{name};dur={seconds * 1000:.1f}' + (f';desc="x{count}"' if count > 1 else "")
+            for name, (seconds, count) in self.summary().items()
+        ]
+        entries.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(entries)
+
+
+class _Span:
+    """Contexto que mede uma etapa da requisição amostrada."""
+
+    __slots__ = ("timing", "name", "started")
+
+    def __init__(self, timing: RequestTiming, name: str):
+        self.timing = timing
+        self.name = name
+
+    def __enter__(self) -> '_Span':
+        self.started = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.timing.add(self.name, perf_counter() - self.started)
+
+
+class _NoopSpan:
+    """Contexto vazio usado quando a requisição não foi amostrada."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> '_NoopSpan':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        return None
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name: str):
+    """
+    Mede a duração de uma etapa da requisição atual.
+
+    Fora de uma requisição amostrada o custo é uma leitura de ContextVar.
+
+    Uso:
+        with span("upstream"):
+            ...
+
+    Args:
+        name: Nome da etapa (usado no Server-Timing, nos logs e nos histogramas)
+
+    Returns:
+        Gerenciador de contexto
+    """
+    timing = _current_timing.get()
+    if timing is None:
+        return _NOOP_SPAN
+    return _Span(timing, name)
+
+
+def current_timing() -> Optional[RequestTiming]:
+    """Obtém a medição da requisição atual (None se não amostrada)."""
+    return _current_timing.get()
+
+
+def start_request_timing() -> Tuple[RequestTiming, Token]:
+    """
+    Inicia a medição de uma requisição amostrada no contexto atual.
+
+    Returns:
+        Tupla com a medição e o token para ``finish_request_timing``
+    """
+    timing = RequestTiming()
+    return timing, _current_timing.set(timing)
+
+
+def span_histograms() -> Dict[str, Histogram]:
+    """
+    Histogramas das durações por etapa das requisições amostradas neste processo.
+
+    A etapa "total" corresponde à duração completa da requisição.
+
+    Returns:
+        Dicionário do nome da etapa para o histograma
+    """
+    return {labels[0]: histogram for labels, histogram in REQUEST_STAGE_DURATION.children().items()}
+
+
+def finish_request_timing(
+    timing: RequestTiming,
+    token: Token,
+    method: str,
+    path: str,
+    status: Optional[int],
+    log_threshold_ms: float = 0
+) -> None:
+    """
+    Encerra a medição: alimenta os histogramas e registra o log estruturado.
+
+    Args:
+        timing: Medição da requisição
+        token: Token devolvido por ``start_request_timing``
+        method: Método HTTP
+        path: Rota da requisição
+        status: Status HTTP da resposta (None se não houve resposta)
+        log_threshold_ms: Registra o log apenas para requisições a partir desta duração
+    """
+    _current_timing.reset(token)
+    total = timing.elapsed()
+    summary = timing.summary()
+
+    for name, (seconds, _) in summary.items():
+        REQUEST_STAGE_DURATION.labels(name).observe(seconds)
+    REQUEST_STAGE_DURATION.labels("total").observe(total)
+
+    if total * 1000 >= log_threshold_ms:
+        logger.info(json.dumps({
+            "event": "request_timing",
+            "method": method,
+            "path": path,
+            "status": status,
+            "total_ms": round(total * 1000, 1),
+            "spans_ms": {name: round(seconds * 1000, 1) for name, (seconds, _) in summary.items()}
+        }))
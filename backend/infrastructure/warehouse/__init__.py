@@ -0,0 +1,8 @@
+"""
+Módulo do armazém local de preços e da ingestão incremental a partir da API do TCE-MG.
+"""
+
+from .price_store import PriceStore
+from .ingestion_service import PriceIngestionService
+
+__all__ = ['PriceStore', 'PriceIngestionService']
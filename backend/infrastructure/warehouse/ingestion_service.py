@@ -0,0 +1,100 @@
+import asyncio
+import logging
+from datetime import date
+from typing import List, Optional, Tuple
+
+from domain.entities import TerritoryType
+from domain.value_objects import TerritoryScope, PricePeriod
+from infrastructure.external import TCEMGApiClient
+from infrastructure.repositories.price_history_decoder import decode_price_history
+from .price_store import PriceStore
+
+
+class PriceIngestionService:
+    """
+    Sincroniza periodicamente o histórico de preços de uma lista de produtos
+    monitorados da API do TCE-MG para o armazém local.
+    """
+
+    def __init__(
+        self,
+        api_client: TCEMGApiClient,
+        price_store: PriceStore,
+        watchlist: List[Tuple[str, str]],
+        interval: int
+    ):
+        self.api_client = api_client
+        self.price_store = price_store
+        self.watchlist = list(watchlist)
+        self.interval = interval
+        self.logger = logging.getLogger(__name__)
+        self._task: Optional[asyncio.Task] = None
+
+    async def sync_partition(self, product_id: str, unit: str) -> int:
+        """
+        Sincroniza uma partição (produto, unidade) a partir da sua marca d'água.
+
+        Args:
+            product_id: ID do produto
+            unit: Unidade do produto
+
+        Returns:
+            Quantidade de registros gravados
+        """
+        watermark = await asyncio.to_thread(self.price_store.get_watermark, product_id, unit)
+        since = watermark if watermark and watermark != date.min else None
+
+        body = await self.api_client.get_price_history_body(
+            product_id,
+            unit,
+            TerritoryScope(territory_type=TerritoryType.STATE).to_dict(),
+            PricePeriod(start_date=since).to_dict()
+        )
+        records = decode_price_history(product_id, unit, body).to_records()
+
+        # Uma resposta vazia não deve apagar os registros já ingeridos do dia da marca d'água
+        if not records:
+            await asyncio.to_thread(self.price_store.touch, product_id, unit)
+            self.logger.info(f"Nenhum registro novo para produto {product_id} ({unit})")
+            return 0
+
+        count = await asyncio.to_thread(self.price_store.replace_since, product_id, unit, since, records)
+        self.logger.info(f"{count} registros sincronizados para produto {product_id} ({unit}) desde {since or 'o início'}")
+        return count
+
+    async def sync_all(self) -> int:
+        """
+        Sincroniza todas as partições da lista de produtos monitorados.
+
+        Returns:
+            Quantidade total de registros gravados
+        """
+        total = 0
+        for product_id, unit in self.watchlist:
+            try:
+                total += await self.sync_partition(product_id, unit)
+            except Exception as e:
+                self.logger.error(f"Erro ao sincronizar produto {product_id} ({unit}): {e}")
+        return total
+
+    async def _run(self) -> None:
+        """Executa a sincronização em laço até ser cancelada."""
+        while True:
+            await self.sync_all()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Inicia a sincronização periódica em segundo plano."""
+        if self._task is None and self.watchlist:
+            self._task = asyncio.create_task(self._run())
+            self.logger.info(f"Ingestão iniciada para {len(self.watchlist)} produtos a cada {self.interval}s")
+
+    async def stop(self) -> None:
+        """Interrompe a sincronização periódica."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
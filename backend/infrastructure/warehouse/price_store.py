@@ -0,0 +1,639 @@
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import weakref
+from datetime import date, datetime
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from domain.entities import PriceRecord
+from domain.price_series import PriceColumns, MonthlyPriceSummaries
+from domain.quantile_sketch import KLLSketch
+from domain.territory_index import normalize_territory_name
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS price_records (
+    id TEXT NOT NULL,
+    product_id TEXT NOT NULL,
+    unit TEXT NOT NULL,
+    municipality TEXT NOT NULL,
+    municipality_key TEXT NOT NULL,
+    date TEXT NOT NULL,
+    unit_price REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_price_records_product_unit_date
+    ON price_records (product_id, unit, date);
+
+CREATE INDEX IF NOT EXISTS idx_price_records_product_unit_municipality_date
+    ON price_records (product_id, unit, municipality_key, date);
+
+CREATE TABLE IF NOT EXISTS price_summaries (
+    product_id TEXT NOT NULL,
+    unit TEXT NOT NULL,
+    municipality TEXT NOT NULL,
+    municipality_key TEXT NOT NULL,
+    month TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    sum REAL NOT NULL,
+    min REAL NOT NULL,
+    max REAL NOT NULL,
+    sketch BLOB NOT NULL,
+    PRIMARY KEY (product_id, unit, month, municipality_key)
+);
+
+CREATE TABLE IF NOT EXISTS price_year_summaries (
+    product_id TEXT NOT NULL,
+    unit TEXT NOT NULL,
+    municipality TEXT NOT NULL,
+    municipality_key TEXT NOT NULL,
+    year TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    sum REAL NOT NULL,
+    min REAL NOT NULL,
+    max REAL NOT NULL,
+    sketch BLOB NOT NULL,
+    PRIMARY KEY (product_id, unit, year, municipality_key)
+);
+
+CREATE TABLE IF NOT EXISTS sync_watermarks (
+    product_id TEXT NOT NULL,
+    unit TEXT NOT NULL,
+    last_date TEXT,
+    synced_at TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (product_id, unit)
+);
+"""
+
+
+class PriceStore:
+    """
+    Armazém local de registros de preço em SQLite.
+
+    Cada partição (produto, unidade) possui uma marca d'água com a data mais
+    recente já ingerida, usada para sincronizações incrementais.
+
+    Além dos registros, o armazém mantém resumos materializados por
+    (produto, unidade, município, mês) e por (produto, unidade, município,
+    ano), atualizados a cada ingestão apenas para os períodos afetados. Os
+    resumos anuais são obtidos mesclando os sketches mensais.
+    """
+
+    def __init__(self, path: str, sketch_k: int = 200):
+        self.path = path
+        self.sketch_k = sketch_k
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self._connection = self._connect()
+        self._connection.executescript(_SCHEMA)
+        self._migrate()
+        self._connection.commit()
+
+        self._backfill_summaries()
+
+        # Conexões SQLite não podem ser compartilhadas entre processos: cada
+        # worker criado por fork (ver api.launcher) abre a sua própria conexão
+        if hasattr(os, "register_at_fork"):
+            store = weakref.ref(self)
+            os.register_at_fork(after_in_child=lambda: store() and store()._reopen())
+
+    def _connect(self) -> sqlite3.Connection:
+        """Abre uma conexão com o banco de dados no modo WAL."""
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _reopen(self) -> None:
+        """Substitui a conexão e o lock herdados do processo pai após um fork."""
+        self._lock = threading.Lock()
+        self._connection = self._connect()
+
+    def _migrate(self) -> None:
+        """Atualiza o esquema de bancos criados por versões anteriores."""
+        columns = [row[1] for row in self._connection.execute("PRAGMA table_info(sync_watermarks)")]
+        if "version" not in columns:
+            self._connection.execute("ALTER TABLE sync_watermarks ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+    def _backfill_summaries(self) -> None:
+        """Materializa os resumos de partições ingeridas antes da existência da tabela de resumos."""
+        with self._lock, self._connection:
+            partitions = self._connection.execute(
+                "SELECT DISTINCT product_id, unit FROM price_records AS r WHERE NOT EXISTS ("
+                "SELECT 1 FROM price_year_summaries AS s WHERE s.product_id = r.product_id AND s.unit = r.unit)"
+            ).fetchall()
+
+            for product_id, unit in partitions:
+                self.logger.info(f"Materializando resumos para produto {product_id} ({unit})")
+                self._refresh_summaries(product_id, unit, None)
+
+    def close(self) -> None:
+        """Fecha a conexão com o banco de dados."""
+        with self._lock:
+            self._connection.close()
+
+    def get_watermark(self, product_id: str, unit: str) -> Optional[date]:
+        """
+        Obtém a marca d'água de uma partição.
+
+        Args:
+            product_id: ID do produto
+            unit: Unidade do produto
+
+        Returns:
+            Data mais recente já ingerida, ou None se a partição nunca foi sincronizada
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT last_date FROM sync_watermarks WHERE product_id = ? AND unit = ?",
+                (product_id, unit)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        return date.fromisoformat(row[0]) if row[0] else date.min
+
+    def has_partition(self, product_id: str, unit: str) -> bool:
+        """
+        Verifica se uma partição já foi sincronizada ao menos uma vez.
+
+        Args:
+            product_id: ID do produto
+            unit: Unidade do produto
+
+        Returns:
+            True se a partição existe no armazém
+        """
+        return self.get_watermark(product_id, unit) is not None
+
+    def get_version(self, product_id: str, unit: str) -> Optional[int]:
+        """
+        Obtém a versão dos dados de uma partição, incrementada a cada ingestão com registros.
+
+        Args:
+            product_id: ID do produto
+            unit: Unidade do produto
+
+        Returns:
+            Versão da partição, ou None se a partição nunca foi sincronizada
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT version FROM sync_watermarks WHERE product_id = ? AND unit = ?",
+                (product_id, unit)
+            ).fetchone()
+
+        return row[0] if row else None
+
+    def replace_since(
+        self,
+        product_id: str,
+        unit: str,
+        since: Optional[date],
+        records: Sequence[PriceRecord]
+    ) -> int:
+        """
+        Substitui os registros de uma partição a partir de uma data e avança a marca d'água.
+
+        A sincronização incremental busca novamente o dia da marca d'água
+        (inclusive), pois ele pode ter sido ingerido parcialmente; por isso os
+        registros a partir dessa data são removidos antes da inserção.
+
+        Args:
+            product_id: ID do produto
+            unit: Unidade do produto
+            since: Data inicial da substituição (None substitui a partição inteira)
+            records: Registros obtidos da API
+
+        Returns:
+            Quantidade de registros inseridos
+        """
+        rows = [
+            (
+                record.id,
+                product_id,
+                unit,
+                record.municipality,
+                normalize_territory_name(record.municipality),
+                record.date.isoformat(),
+                record.unit_price
+            )
+            for record in records
+            if isinstance(record.date, date)
+        ]
+        last_date = max((row[5] for row in rows), default=None)
+
+        with self._lock, self._connection:
+            if since is None:
+                self._connection.execute(
+                    "DELETE FROM price_records WHERE product_id = ? AND unit = ?",
+                    (product_id, unit)
+                )
+            else:
+                self._connection.execute(
+                    "DELETE FROM price_records WHERE product_id = ? AND unit = ? AND date >= ?",
+                    (product_id, unit, since.isoformat())
+                )
+
+            self._connection.executemany(
+                "INSERT INTO price_records (id, product_id, unit, municipality, municipality_key, date, unit_price) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+            self._refresh_summaries(product_id, unit, since)
+
+            # A marca d'água nunca retrocede
+            current = self._connection.execute(
+                "SELECT last_date, version FROM sync_watermarks WHERE product_id = ? AND unit = ?",
+                (product_id, unit)
+            ).fetchone()
+            if current and current[0] and (last_date is None or current[0] > last_date):
+                last_date = current[0]
+            version = current[1] + 1 if current else 1
+
+            self._connection.execute(
+                "INSERT OR REPLACE INTO sync_watermarks (product_id, unit, last_date, synced_at, version) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (product_id, unit, last_date, datetime.now().isoformat(), version)
+            )
+
+        return len(rows)
+
+    def _refresh_summaries(self, product_id: str, unit: str, since: Optional[date]) -> None:
+        """
+        Recalcula os resumos mensais dos meses afetados por uma ingestão.
+
+        Apenas os meses a partir de ``since`` são reconstruídos; os demais
+        resumos da partição permanecem intactos. Deve ser chamado dentro da
+        transação que alterou os registros.
+
+        Args:
+            product_id: ID do produto
+            unit: Unidade do produto
+            since: Data inicial da ingestão (None recalcula a partição inteira)
+        """
+        first_month = since.isoformat()[:7] if since else ""
+
+        self._connection.execute(
+            "DELETE FROM price_summaries WHERE product_id = ? AND unit = ? AND month >= ?",
+            (product_id, unit, first_month)
+        )
+
+        rows = self._connection.execute(
+            "SELECT municipality_key, substr(date, 1, 7) AS month, municipality, unit_price FROM price_records "
+            "WHERE product_id = ? AND unit = ? AND date >= ? ORDER BY municipality_key, month",
+            (product_id, unit, first_month)
+        ).fetchall()
+
+        if rows:
+            self._insert_month_summaries(product_id, unit, rows)
+
+        self._refresh_year_summaries(product_id, unit, first_month[:4])
+
+    def _insert_month_summaries(self, product_id: str, unit: str, rows: list) -> None:
+        """
+        Materializa os resumos mensais a partir de registros ordenados por (município, mês).
+
+        Args:
+            product_id: ID do produto
+            unit: Unidade do produto
+            rows: Tuplas (chave do município, mês, município, preço)
+        """
+        keys, months, municipalities, prices = zip(*rows)
+        group_keys = np.char.add(np.array(keys, dtype=str), np.char.add("|", np.array(months, dtype=str)))
+        prices = np.array(prices, dtype=np.float64)
+
+        # As linhas já vêm ordenadas por (município, mês): cada grupo é uma faixa contígua
+        boundaries = np.flatnonzero(group_keys[1:] != group_keys[:-1]) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.append(boundaries, len(prices))
+
+        summaries = []
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            values = prices[start:end]
+            summaries.append((
+                product_id,
+                unit,
+                municipalities[start],
+                keys[start],
+                months[start],
+                int(len(values)),
+                float(values.sum()),
+                float(values.min()),
+                float(values.max()),
+                KLLSketch.from_values(values, self.sketch_k).to_bytes()
+            ))
+
+        self._connection.executemany(
+            "INSERT INTO price_summaries "
+            "(product_id, unit, municipality, municipality_key, month, count, sum, min, max, sketch) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            summaries
+        )
+
+    def _refresh_year_summaries(self, product_id: str, unit: str, first_year: str) -> None:
+        """
+        Recalcula os resumos anuais a partir de um ano, mesclando os resumos mensais.
+
+        Args:
+            product_id: ID do produto
+            unit: Unidade do produto
+            first_year: Primeiro ano afetado no formato AAAA ("" recalcula todos)
+        """
+        self._connection.execute(
+            "DELETE FROM price_year_summaries WHERE product_id = ? AND unit = ? AND year >= ?",
+            (product_id, unit, first_year)
+        )
+
+        rows = self._connection.execute(
+            "SELECT municipality_key, substr(month, 1, 4) AS year, municipality, count, sum, min, max, sketch "
+            "FROM price_summaries WHERE product_id = ? AND unit = ? AND month >= ? "
+            "ORDER BY municipality_key, month",
+            (product_id, unit, first_year)
+        ).fetchall()
+
+        summaries = []
+        current = None
+        for key, year, municipality, count, total, minimum, maximum, sketch in rows:
+            if current is None or current[0] != key or current[1] != year:
+                if current is not None:
+                    summaries.append(current)
+                current = [key, year, municipality, 0, 0.0, minimum, maximum, KLLSketch(self.sketch_k)]
+
+            current[3] += count
+            current[4] += total
+            current[5] = min(current[5], minimum)
+            current[6] = max(current[6], maximum)
+            current[7].merge(KLLSketch.from_bytes(sketch))
+
+        if current is not None:
+            summaries.append(current)
+
+        self._connection.executemany(
+            "INSERT INTO price_year_summaries "
+            "(product_id, unit, municipality, municipality_key, year, count, sum, min, max, sketch) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (product_id, unit, municipality, key, year, count, total, minimum, maximum, sketch.to_bytes())
+                for key, year, municipality, count, total, minimum, maximum, sketch in summaries
+            ]
+        )
+
+    def drop_product(self, product_id: str) -> int:
+        """
+        Remove todas as partições de um produto (registros, resumos e marcas d'água).
+
+        Usado quando a API publica correções: sem a partição, as consultas
+        voltam a ser atendidas pela API, e a próxima ingestão do produto
+        refaz a partição inteira.
+
+        Args:
+            product_id: ID do produto
+
+        Returns:
+            Quantidade de partições removidas
+        """
+        with self._lock, self._connection:
+            for table in ("price_records", "price_summaries", "price_year_summaries"):
+                self._connection.execute(f"DELETE FROM {table} WHERE product_id = ?", (product_id,))
+            return self._connection.execute(
+                "DELETE FROM sync_watermarks WHERE product_id = ?", (product_id,)
+            ).rowcount
+
+    def touch(self, product_id: str, unit: str) -> None:
+        """
+        Registra uma sincronização sem novos registros.
+
+        Args:
+            product_id: ID do produto
+            unit: Unidade do produto
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT INTO sync_watermarks (product_id, unit, last_date, synced_at) VALUES (?, ?, NULL, ?) "
+                "ON CONFLICT (product_id, unit) DO UPDATE SET synced_at = excluded.synced_at",
+                (product_id, unit, datetime.now().isoformat())
+            )
+
+    def query_columns(
+        self,
+        product_id: str,
+        unit: str,
+        municipalities: Optional[List[str]] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None
+    ) -> PriceColumns:
+        """
+        Consulta o histórico de uma partição em formato colunar.
+
+        Args:
+            product_id: ID do produto
+            unit: Unidade do produto
+            municipalities: Nomes dos municípios para filtrar (opcional)
+            start_date: Data inicial, inclusive (opcional)
+            end_date: Data final, inclusive (opcional)
+
+        Returns:
+            Histórico de preços em formato colunar, ordenado por data
+        """
+        columns, _ = self.query_column_page(product_id, unit, municipalities, start_date, end_date)
+        return columns
+
+    def query_column_page(
+        self,
+        product_id: str,
+        unit: str,
+        municipalities: Optional[List[str]] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        after: Optional[Tuple[str, int]] = None,
+        limit: Optional[int] = None
+    ) -> Tuple[PriceColumns, Optional[Tuple[str, int]]]:
+        """
+        Consulta uma página do histórico de uma partição, com paginação por chave.
+
+        A página seguinte começa depois do cursor (data, rowid) da anterior,
+        de modo que cada página custa o mesmo independentemente da posição,
+        ao contrário de OFFSET.
+
+        Args:
+            product_id: ID do produto
+            unit: Unidade do produto
+            municipalities: Nomes dos municípios para filtrar (opcional)
+            start_date: Data inicial, inclusive (opcional)
+            end_date: Data final, inclusive (opcional)
+            after: Cursor devolvido pela página anterior (opcional)
+            limit: Quantidade máxima de registros (opcional, sem limite por padrão)
+
+        Returns:
+            Tupla com a página em formato colunar, ordenada por data, e o cursor
+            da próxima página (None quando não há mais registros)
+        """
+        sql = "SELECT id, date, municipality, unit_price, rowid FROM price_records WHERE product_id = ? AND unit = ?"
+        params: list = [product_id, unit]
+
+        if municipalities is not None:
+            if not municipalities:
+                return PriceColumns.empty(product_id, unit), None
+            sql += f" AND municipality_key IN ({', '.join('?' for _ in municipalities)})"
+            params.extend(normalize_territory_name(name) for name in municipalities)
+
+        if start_date:
+            sql += " AND date >= ?"
+            params.append(start_date.isoformat())
+
+        if end_date:
+            sql += " AND date <= ?"
+            params.append(end_date.isoformat())
+
+        if after is not None:
+            sql += " AND (date > ? OR (date = ? AND rowid > ?))"
+            params.extend([after[0], after[0], after[1]])
+
+        sql += " ORDER BY date, rowid"
+
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            rows = self._connection.execute(sql, params).fetchall()
+
+        if not rows:
+            return PriceColumns.empty(product_id, unit), None
+
+        ids, dates, municipality_names, prices, rowids = zip(*rows)
+        cursor = (dates[-1], rowids[-1]) if limit and len(rows) == limit else None
+
+        columns = PriceColumns(
+            product_id=product_id,
+            unit=unit,
+            ids=np.array(ids, dtype=object),
+            dates=np.array(dates, dtype="datetime64[D]"),
+            # Nomes internados: cada município aparece uma única vez na memória
+            municipalities=np.array(list(map(sys.intern, municipality_names)), dtype=object),
+            prices=np.array(prices, dtype=np.float64)
+        )
+        return columns, cursor
+
+    def query_summaries(
+        self,
+        product_id: str,
+        unit: str,
+        municipalities: Optional[List[str]] = None,
+        start_month: Optional[str] = None,
+        end_month: Optional[str] = None
+    ) -> MonthlyPriceSummaries:
+        """
+        Consulta os resumos mensais materializados de uma partição.
+
+        Args:
+            product_id: ID do produto
+            unit: Unidade do produto
+            municipalities: Nomes dos municípios para filtrar (opcional)
+            start_month: Mês inicial no formato AAAA-MM, inclusive (opcional)
+            end_month: Mês final no formato AAAA-MM, inclusive (opcional)
+
+        Returns:
+            Resumos mensais por município
+        """
+        return self._query_summary_table(
+            "price_summaries", "month", product_id, unit, municipalities, start_month, end_month
+        )
+
+    def query_year_summaries(
+        self,
+        product_id: str,
+        unit: str,
+        municipalities: Optional[List[str]] = None,
+        start_year: Optional[int] = None,
+        end_year: Optional[int] = None
+    ) -> MonthlyPriceSummaries:
+        """
+        Consulta os resumos anuais materializados de uma partição.
+
+        O campo ``months`` do resultado contém janeiro de cada ano.
+
+        Args:
+            product_id: ID do produto
+            unit: Unidade do produto
+            municipalities: Nomes dos municípios para filtrar (opcional)
+            start_year: Ano inicial, inclusive (opcional)
+            end_year: Ano final, inclusive (opcional)
+
+        Returns:
+            Resumos anuais por município
+        """
+        return self._query_summary_table(
+            "price_year_summaries",
+            "year",
+            product_id,
+            unit,
+            municipalities,
+            f"{start_year:04d}" if start_year else None,
+            f"{end_year:04d}" if end_year else None
+        )
+
+    def _query_summary_table(
+        self,
+        table: str,
+        period_column: str,
+        product_id: str,
+        unit: str,
+        municipalities: Optional[List[str]],
+        start_period: Optional[str],
+        end_period: Optional[str]
+    ) -> MonthlyPriceSummaries:
+        """Consulta uma das tabelas de resumos materializados."""
+        sql = (
+            f"SELECT municipality, {period_column}, count, sum, min, max, sketch FROM {table} "
+            "WHERE product_id = ? AND unit = ?"
+        )
+        params: list = [product_id, unit]
+
+        if municipalities is not None:
+            if not municipalities:
+                return MonthlyPriceSummaries.empty(product_id, unit)
+            sql += f" AND municipality_key IN ({', '.join('?' for _ in municipalities)})"
+            params.extend(normalize_territory_name(name) for name in municipalities)
+
+        if start_period:
+            sql += f" AND {period_column} >= ?"
+            params.append(start_period)
+
+        if end_period:
+            sql += f" AND {period_column} <= ?"
+            params.append(end_period)
+
+        with self._lock:
+            rows = self._connection.execute(sql, params).fetchall()
+
+        if not rows:
+            return MonthlyPriceSummaries.empty(product_id, unit)
+
+        municipality_names, periods, counts, sums, mins, maxs, sketches = zip(*rows)
+        sketch_array = np.empty(len(sketches), dtype=object)
+        sketch_array[:] = [KLLSketch.from_bytes(sketch) for sketch in sketches]
+
+        return MonthlyPriceSummaries(
+            product_id=product_id,
+            unit=unit,
+            municipalities=np.array(municipality_names, dtype=object),
+            months=np.array(periods, dtype="datetime64[M]"),
+            counts=np.array(counts, dtype=np.int64),
+            sums=np.array(sums, dtype=np.float64),
+            mins=np.array(mins, dtype=np.float64),
+            maxs=np.array(maxs, dtype=np.float64),
+            sketches=sketch_array
+        )
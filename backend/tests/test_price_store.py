@@ -0,0 +1,121 @@
+"""
+Testes do armazém local de preços e do repositório sobre ele: consultas
+colunares, paginação, escopos territoriais sem municípios e consultas por
+região com o mapeamento de municípios incompleto.
+"""
+
+import asyncio
+from datetime import date
+
+import pytest
+from aiohttp import web
+
+from domain.entities import PriceRecord, TerritoryType
+from domain.value_objects import PricePeriod, ProductFilter, TerritoryScope
+from infrastructure.cache import CacheService
+from infrastructure.config import Config
+from infrastructure.external import TCEMGApiClient
+from infrastructure.repositories.sqlite_price_repository import SQLitePriceRepository
+from infrastructure.repositories.tce_mg_price_repository import TCEMGPriceRepository
+from infrastructure.repositories.tce_mg_territory_repository import TCEMGTerritoryRepository
+from infrastructure.warehouse import PriceStore
+
+
+def _records(count: int = 5):
+    return [
+        PriceRecord(str(i), "1001", "", "UN", date(2024, 1, 1 + i), "BELO HORIZONTE", 10.0 + i)
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = PriceStore(str(tmp_path / "prices.sqlite3"))
+    store.replace_since("1001", "UN", None, _records())
+    yield store
+    store.close()
+
+
+def test_query_columns_by_municipality(store):
+    columns = store.query_columns("1001", "UN", ["Belo Horizonte"])
+
+    assert len(columns) == 5
+    assert columns.prices.tolist() == [10.0, 11.0, 12.0, 13.0, 14.0]
+
+
+def test_query_column_page_follows_cursor(store):
+    first, cursor = store.query_column_page("1001", "UN", limit=3)
+    second, last_cursor = store.query_column_page("1001", "UN", after=cursor, limit=3)
+
+    assert first.ids.tolist() == ["0", "1", "2"]
+    assert second.ids.tolist() == ["3", "4"]
+    assert last_cursor is None
+
+
+def test_empty_municipality_list_returns_empty_page(store):
+    columns, cursor = store.query_column_page("1001", "UN", [])
+
+    assert len(columns) == 0
+    assert cursor is None
+    assert len(store.query_columns("1001", "UN", [])) == 0
+
+
+def test_repository_unknown_municipality_returns_empty_history(store):
+    territories = TCEMGTerritoryRepository(api_client=None, cache_service=None)
+    repository = SQLitePriceRepository(store, fallback_repository=None, territory_repository=territories)
+
+    columns = asyncio.run(repository.get_price_columns(
+        ProductFilter(product_id="1001", unit="UN"),
+        TerritoryScope(TerritoryType.MUNICIPALITY, municipality_codes=["9999999"]),
+        PricePeriod()
+    ))
+
+    assert len(columns) == 0
+    assert columns.unit == "UN"
+
+
+def test_repository_region_scope_uses_fallback_while_mapping_incomplete(store, monkeypatch):
+    requests = []
+
+    async def handler(request):
+        requests.append(dict(request.query))
+        return web.json_response([
+            {"id": "api", "dataNotaFiscal": "2024-02-01", "municipio": "ABAETE", "valorUnitario": 2.0}
+        ])
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/precos/historico", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        monkeypatch.setattr(
+            Config, "TCE_PRICE_HISTORY_ENDPOINT",
+            f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/precos/historico"
+        )
+
+        client = TCEMGApiClient()
+        territories = TCEMGTerritoryRepository(api_client=None, cache_service=None)
+        repository = SQLitePriceRepository(
+            store,
+            fallback_repository=TCEMGPriceRepository(client, CacheService()),
+            territory_repository=territories
+        )
+        try:
+            assert not territories.snapshot.index.regions_complete
+            return await repository.get_price_columns(
+                ProductFilter(product_id="1001", unit="UN"),
+                TerritoryScope(TerritoryType.REGION, region_codes=["1"]),
+                PricePeriod()
+            )
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    columns = asyncio.run(run())
+
+    # A região é filtrada pela API, não pelos poucos municípios mapeados localmente
+    assert columns.municipalities.tolist() == ["ABAETE"]
+    assert columns.prices.tolist() == [2.0]
+    assert requests[0]["codRegioes"] == "1"
@@ -0,0 +1,93 @@
+"""
+Testes do sketch de quantis KLL: limites de erro contra os quantis exatos do
+NumPy, caminho exato, serialização e mesclas.
+"""
+
+import math
+
+import numpy as np
+import pytest
+
+from benchmarks.quantile_sketch_accuracy import QUANTILES, rank_error
+from domain.quantile_sketch import KLLSketch
+
+
+def _sketch(values: np.ndarray, k: int = 200, seed: int = 0) -> KLLSketch:
+    """Sketch com sorteios reproduzíveis."""
+    sketch = KLLSketch(k, seed=seed)
+    sketch.update_many(values)
+    return sketch
+
+
+def _worst_rank_error(values: np.ndarray, sketch: KLLSketch) -> float:
+    """Maior erro de posto normalizado entre os quantis validados."""
+    sorted_values = np.sort(values)
+    estimates = sketch.quantiles(QUANTILES)
+    return max(rank_error(sorted_values, estimate, q) for estimate, q in zip(estimates, QUANTILES))
+
+
+@pytest.mark.parametrize("k", [100, 200])
+def test_single_sketch_within_rank_error(k):
+    values = np.random.default_rng(1).lognormal(mean=3.0, sigma=0.8, size=50000)
+    sketch = _sketch(values, k)
+
+    assert not sketch.is_exact
+    assert len(sketch) == len(values)
+    assert _worst_rank_error(values, sketch) <= KLLSketch.normalized_rank_error(k)
+
+
+def test_merged_sketches_within_rank_error():
+    rng = np.random.default_rng(2)
+    partitions = [
+        rng.lognormal(mean=0.0, sigma=0.6, size=int(size)) * scale
+        for size, scale in zip(rng.integers(20, 5000, size=200), rng.lognormal(3.0, 0.8, size=200))
+    ]
+
+    merged = KLLSketch(200, seed=3)
+    for seed, values in enumerate(partitions):
+        merged.merge(_sketch(values, seed=seed))
+
+    all_values = np.concatenate(partitions)
+    assert len(merged) == len(all_values)
+    assert _worst_rank_error(all_values, merged) <= KLLSketch.normalized_rank_error(200)
+
+
+def test_exact_while_not_compacted():
+    values = np.random.default_rng(4).normal(100.0, 15.0, size=150)
+    sketch = _sketch(values)
+
+    assert sketch.is_exact
+    assert sketch.quantiles(QUANTILES) == pytest.approx(np.quantile(values, QUANTILES).tolist())
+    assert sketch.quantile(0.5) == pytest.approx(float(np.median(values)))
+
+
+def test_bytes_round_trip():
+    sketch = _sketch(np.random.default_rng(5).lognormal(size=20000))
+    restored = KLLSketch.from_bytes(sketch.to_bytes())
+
+    assert restored.k == sketch.k
+    assert restored.n == sketch.n
+    assert restored.levels == sketch.levels
+    assert restored.quantiles(QUANTILES) == sketch.quantiles(QUANTILES)
+
+
+def test_merge_with_different_k_keeps_smaller_bound():
+    rng = np.random.default_rng(6)
+    left_values = rng.lognormal(size=30000)
+    right_values = rng.lognormal(mean=1.0, size=30000)
+
+    merged = _sketch(left_values, k=400, seed=7).merge(_sketch(right_values, k=100, seed=8))
+
+    all_values = np.concatenate([left_values, right_values])
+    assert merged.k == 100
+    assert len(merged) == len(all_values)
+    assert _worst_rank_error(all_values, merged) <= KLLSketch.normalized_rank_error(100)
+
+
+def test_empty_sketch_returns_nan():
+    sketch = KLLSketch()
+
+    assert len(sketch) == 0
+    assert all(math.isnan(value) for value in sketch.quantiles(QUANTILES))
+    assert math.isnan(sketch.quantile(0.5))
+    assert math.isnan(KLLSketch.from_bytes(sketch.to_bytes()).quantile(0.5))
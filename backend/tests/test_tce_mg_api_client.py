@@ -0,0 +1,101 @@
+"""
+Testes do histórico de preços em fluxo do cliente da API do TCE-MG: corpo
+truncado e prazo de leitura com consumidor lento.
+"""
+
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from infrastructure.config import Config
+from infrastructure.external import TCEMGApiClient
+from infrastructure.external.rate_limiter import RateLimiter
+
+_RECORD = b'{"id": 1, "data": "2024-01-02", "municipio": "BELO HORIZONTE", "valorUnitario": 1.5}'
+
+
+async def _serve(handler):
+    """Servidor HTTP local com o endpoint do histórico de preços."""
+    app = web.Application()
+    app.router.add_get("/precos/historico", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/precos/historico"
+
+
+async def _truncated(request):
+    response = web.StreamResponse()
+    await response.prepare(request)
+    await response.write(b"[" + _RECORD + b",")
+    await response.write_eof()
+    return response
+
+
+async def _endless(request):
+    response = web.StreamResponse()
+    await response.prepare(request)
+    await response.write(b"[" + _RECORD)
+    while True:
+        await asyncio.sleep(0.02)
+        await response.write(b"," + _RECORD)
+
+
+def _collect(client: TCEMGApiClient, pause: float = 0.0):
+    async def run():
+        batches = []
+        async for batch in client.iter_price_history("1001", "UN", {"limiteTerritorial": "ESTADO"}, {}, chunk_size=64):
+            batches.append(batch)
+            await asyncio.sleep(pause)
+        return batches
+    return run()
+
+
+def test_truncated_body_raises(monkeypatch):
+    async def run():
+        runner, url = await _serve(_truncated)
+        monkeypatch.setattr(Config, "TCE_PRICE_HISTORY_ENDPOINT", url)
+        limiter = RateLimiter(max_concurrent=1)
+        client = TCEMGApiClient(rate_limiter=limiter)
+        try:
+            with pytest.raises(aiohttp.ClientPayloadError):
+                await _collect(client)
+            assert limiter.in_flight == 0
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    asyncio.run(run())
+
+
+def test_deadline_releases_slot_of_slow_consumer(monkeypatch):
+    async def run():
+        runner, url = await _serve(_endless)
+        monkeypatch.setattr(Config, "TCE_PRICE_HISTORY_ENDPOINT", url)
+        monkeypatch.setattr(Config, "TCE_STREAM_DEADLINE", 0.2)
+        limiter = RateLimiter(max_concurrent=1)
+        client = TCEMGApiClient(rate_limiter=limiter)
+        try:
+            stream = client.iter_price_history("1001", "UN", {"limiteTerritorial": "ESTADO"}, {}, chunk_size=64)
+            await stream.__anext__()
+            assert limiter.in_flight == 1
+
+            # Consumidor parado: a vaga é liberada no prazo, sem esperar a próxima leitura
+            await asyncio.sleep(0.4)
+            assert limiter.in_flight == 0
+            await asyncio.wait_for(limiter.acquire(), timeout=0.1)
+            limiter.release()
+
+            with pytest.raises(asyncio.TimeoutError):
+                async for _ in stream:
+                    pass
+            assert limiter.in_flight == 0
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    asyncio.run(run())
@@ -0,0 +1,70 @@
+"""
+Testes do repositório de preços da API do TCE-MG: a chave de cache do
+histórico corresponde exatamente aos parâmetros enviados à API.
+"""
+
+import asyncio
+
+from aiohttp import web
+
+from domain.entities import TerritoryType
+from domain.value_objects import PricePeriod, ProductFilter, TerritoryScope
+from infrastructure.cache import CacheService
+from infrastructure.config import Config
+from infrastructure.external import TCEMGApiClient
+from infrastructure.repositories.tce_mg_price_repository import TCEMGPriceRepository
+
+
+def _history(units, requests):
+    """Consulta o histórico em cada grafia da unidade, registrando as unidades enviadas à API."""
+    async def handler(request):
+        requests.append(request.query["unidade"])
+        if request.query["unidade"] != "UN":
+            return web.json_response([])
+        return web.json_response([
+            {"id": 1, "dataNotaFiscal": "2024-01-02", "municipio": "BELO HORIZONTE", "valorUnitario": 1.5}
+        ])
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/precos/historico", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        Config.TCE_PRICE_HISTORY_ENDPOINT = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/precos/historico"
+
+        client = TCEMGApiClient()
+        repository = TCEMGPriceRepository(client, CacheService())
+        try:
+            return [
+                len(await repository.get_price_columns(
+                    ProductFilter(product_id="1001", unit=unit),
+                    TerritoryScope(TerritoryType.STATE),
+                    PricePeriod()
+                ))
+                for unit in units
+            ]
+        finally:
+            await client.close()
+            await runner.cleanup()
+
+    return asyncio.run(run())
+
+
+def test_unit_spellings_do_not_share_cache_entries(monkeypatch):
+    monkeypatch.setattr(Config, "TCE_PRICE_HISTORY_ENDPOINT", Config.TCE_PRICE_HISTORY_ENDPOINT)
+    requests = []
+
+    # O histórico vazio de "un" não pode ser servido para "UN", nem o contrário
+    assert _history(["un", "UN", "un", "UN"], requests) == [0, 1, 0, 1]
+    assert requests == ["un", "UN"]
+
+
+def test_cached_unit_matches_unit_sent(monkeypatch):
+    monkeypatch.setattr(Config, "TCE_PRICE_HISTORY_ENDPOINT", Config.TCE_PRICE_HISTORY_ENDPOINT)
+    requests = []
+
+    # Espaços são normalizados antes do envio, como na chave: uma única requisição
+    assert _history([" UN ", "UN"], requests) == [1, 1]
+    assert requests == ["UN"]
@@ -0,0 +1,23 @@
+"""
+Testes do snapshot de territórios distribuído com a aplicação: nomes em uma
+única grafia e regiões dos municípios completas ou ausentes.
+"""
+
+import unicodedata
+
+from infrastructure.repositories.territory_snapshot import BUNDLED_SNAPSHOT_PATH, TerritorySnapshot
+
+
+def test_bundled_names_share_one_spelling():
+    snapshot = TerritorySnapshot.load(BUNDLED_SNAPSHOT_PATH)
+
+    names = [municipality.name for municipality in snapshot.municipalities]
+    assert len(names) == 853
+    assert all(name == unicodedata.normalize("NFKD", name).upper() and name.isascii() for name in names)
+
+
+def test_bundled_regions_are_complete_or_absent():
+    index = TerritorySnapshot.load(BUNDLED_SNAPSHOT_PATH).index
+
+    # Um mapeamento parcial omitiria municípios dos agrupamentos por região sem aviso
+    assert index.unmapped_municipalities in (0, 853)
@@ -0,0 +1,61 @@
+"""
+Testes da interpretação das unidades de fornecimento: embalagens com
+quantidade, formas farmacêuticas, embalagens de embalagens e embalagens sem
+conteúdo informado.
+"""
+
+from datetime import date
+
+import numpy as np
+import pytest
+
+from domain.price_series import PriceColumns
+from domain.units import merge_unit_columns, parse_unit
+
+
+@pytest.mark.parametrize("raw, base_unit, factor", [
+    ("CAIXA 100,00 UN", "UN", 100.0),
+    ("FRASCO 1,00 L", "ML", 1000.0),
+    ("COMPRIMIDO", "UN", 1.0),
+    ("COMPRIMIDO 500 MG", "UN", 1.0),
+    ("CAIXA 30 COMPRIMIDOS", "UN", 30.0),
+    ("CAIXA 30 COMPRIMIDOS 500 MG", "UN", 30.0),
+    ("Caixa c/ 20 cápsulas", "UN", 20.0),
+    ("CAIXA 12X1 UN", "UN", 12.0),
+    ("FARDO 6 X 1,5 L", "ML", 9000.0),
+])
+def test_parse_known_units(raw, base_unit, factor):
+    unit = parse_unit(raw)
+
+    assert unit.known
+    assert unit.base_unit == base_unit
+    assert unit.factor == factor
+
+
+def test_package_without_content_is_unknown():
+    unit = parse_unit("PCT")
+
+    # Um pacote pode ter qualquer número de unidades: não se combina com "UN"
+    assert not unit.known
+    assert unit.base_unit == "PCT"
+    assert parse_unit("PCT 10 UN").factor == 10.0
+
+
+def test_merge_converts_dosage_forms_to_units():
+    def columns(unit, price):
+        return PriceColumns(
+            product_id="1001",
+            unit=unit,
+            ids=np.array([unit], dtype=object),
+            dates=np.array([date(2024, 1, 1)], dtype="datetime64[D]"),
+            municipalities=np.array(["BELO HORIZONTE"], dtype=object),
+            prices=np.array([price])
+        )
+
+    merged = merge_unit_columns([columns("CAIXA 30 COMPRIMIDOS", 15.0), columns("COMPRIMIDO", 0.5)])
+
+    assert merged.unit == "UN"
+    assert merged.prices.tolist() == [0.5, 0.5]
+
+    with pytest.raises(ValueError):
+        merge_unit_columns([columns("PCT", 15.0), columns("UN", 0.5)])